@@ -0,0 +1,269 @@
+"""
+Admin API endpoints.
+
+This module provides data export, guest list import and bulk guest update
+endpoints for administrators.
+"""
+import tempfile
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+from fastapi import APIRouter, Depends, Request, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from backend.core.config import settings
+from backend.core.dependencies import service_factory
+from backend.core.exceptions import AppException
+from backend.db import crud
+from backend.db.session import get_db, get_read_db, pool_metrics
+from backend.services.export_service import ExportService, ExportFormat
+from backend.services.guest_analytics import AnalyticsUnavailable, get_guest_analytics, reset_guest_analytics
+from backend.services.guest_facets import build_guest_facet_index, guest_facet_index
+from backend.services.guest_import_service import GuestImportService, GuestImportError, ImportFormat
+from backend.services.guest_search_index import build_guest_search_index, guest_search_index
+from backend.services.rsvp_events import rsvp_event_broadcaster
+from backend.services.stats_cache import rsvp_stats_cache
+from backend.services.storage import DataStorage, RSVP_UPDATABLE_COLUMNS
+
+router = APIRouter()
+export_service = ExportService()
+get_data_storage = service_factory(DataStorage)
+
+# Uploads larger than this are spooled to disk instead of memory
+UPLOAD_SPOOL_BYTES = 4 * 1024 * 1024
+
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv",
+    ExportFormat.NDJSON: "application/x-ndjson",
+}
+
+
+def _export_response(chunks, filename: str, export_format: ExportFormat) -> StreamingResponse:
+    """Wrap a gzip chunk stream in a downloadable streaming response."""
+    return StreamingResponse(
+        chunks,
+        media_type="application/gzip",
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.{export_format.value}.gz"',
+            "X-Export-Content-Type": MEDIA_TYPES[export_format],
+        }
+    )
+
+
+@router.get("/export/responses")
+def export_user_responses(
+    format: ExportFormat = ExportFormat.CSV,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    response_type: Optional[str] = None
+) -> StreamingResponse:
+    """
+    Export user responses as gzip-compressed CSV or NDJSON.
+
+    Args:
+        format: Output format (csv or ndjson)
+        since: Only include responses created at or after this time
+        until: Only include responses created before this time
+        response_type: Only include responses of this type
+
+    Returns:
+        Streaming gzip download of the responses
+    """
+    chunks = export_service.stream_user_responses(format, since, until, response_type)
+    return _export_response(chunks, "user_responses", format)
+
+
+@router.get("/export/guests")
+def export_rsvp_guests(
+    format: ExportFormat = ExportFormat.CSV,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> StreamingResponse:
+    """
+    Export RSVP guests as gzip-compressed CSV or NDJSON.
+
+    Args:
+        format: Output format (csv or ndjson)
+        since: Only include guests updated at or after this time
+        until: Only include guests updated before this time
+
+    Returns:
+        Streaming gzip download of the guests
+    """
+    chunks = export_service.stream_rsvp_guests(format, since, until)
+    return _export_response(chunks, "rsvp_guests", format)
+
+
+@router.post("/import/guests")
+async def import_guest_list(
+    request: Request,
+    format: ImportFormat = ImportFormat.CSV
+) -> Dict[str, Any]:
+    """
+    Bulk import a guest list into rsvp_guests.
+
+    The request body is the raw CSV or XLSX file. Existing guests are
+    matched by normalized phone number and updated; new guests are inserted.
+
+    Args:
+        format: Format of the uploaded file (csv or xlsx)
+
+    Returns:
+        Counts of inserted, updated and rejected rows
+    """
+    with tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES) as upload:
+        async for chunk in request.stream():
+            upload.write(chunk)
+        upload.seek(0)
+
+        try:
+            result = await run_in_threadpool(GuestImportService().import_file, upload, format)
+        except GuestImportError as e:
+            raise AppException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                message=str(e),
+                error_code="IMPORT_ERROR"
+            )
+
+    if result.inserted or result.updated:
+        rsvp_stats_cache.invalidate()
+        rsvp_event_broadcaster.publish_local(reset=True)
+    # The merge touches arbitrary guests, so reload the search and facet indexes wholesale
+    if guest_search_index.tracking and (result.inserted or result.updated):
+        await run_in_threadpool(build_guest_search_index)
+    if guest_facet_index.tracking and (result.inserted or result.updated):
+        await run_in_threadpool(build_guest_facet_index)
+
+    return result.to_dict()
+
+
+class GuestUpdate(BaseModel):
+    """Fields to change for one guest, identified by phone number."""
+    phone_number: str
+    updates: Dict[str, Any]
+
+
+@router.patch("/guests")
+def bulk_update_guests(
+    guest_updates: List[GuestUpdate],
+    storage: DataStorage = Depends(get_data_storage)
+) -> Dict[str, Any]:
+    """
+    Update RSVP details for many guests in one transaction.
+
+    Args:
+        guest_updates: Phone numbers with the fields to change for each
+
+    Returns:
+        Number of guests updated
+    """
+    invalid = sorted({
+        column
+        for guest_update in guest_updates
+        for column in guest_update.updates
+        if column not in RSVP_UPDATABLE_COLUMNS
+    })
+    if invalid:
+        raise AppException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            message=f"Columns not updatable: {', '.join(invalid)}",
+            error_code="INVALID_COLUMNS",
+            details={"allowed": sorted(RSVP_UPDATABLE_COLUMNS)}
+        )
+
+    updated = storage.bulk_update_rsvp_details(
+        (guest_update.phone_number, guest_update.updates) for guest_update in guest_updates
+    )
+    if updated is None:
+        raise AppException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            message="Bulk guest update failed",
+            error_code="UPDATE_FAILED"
+        )
+
+    return {"updated": updated}
+
+
+@router.delete("/guests/tombstones")
+def purge_guest_tombstones(
+    older_than_days: Optional[int] = None,
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Delete the log of guests deleted long ago.
+
+    Differential sync clients (/rsvp/guests/changes) with an older
+    watermark are told to reload all guests.
+
+    Args:
+        older_than_days: Keep this many days (default GUEST_TOMBSTONE_RETENTION_DAYS)
+
+    Returns:
+        Number of tombstones deleted
+    """
+    days = settings.GUEST_TOMBSTONE_RETENTION_DAYS if older_than_days is None else older_than_days
+    return {"purged": crud.purge_guest_tombstones(db, datetime.utcnow() - timedelta(days=days))}
+
+
+def _guest_analytics():
+    """Get the guest analytics engine, or a 503 when numpy is missing."""
+    try:
+        return get_guest_analytics()
+    except AnalyticsUnavailable as e:
+        raise AppException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            message=str(e),
+            error_code="ANALYTICS_UNAVAILABLE"
+        )
+
+
+@router.get("/analytics/guests")
+def get_guest_analytics_summary(
+    refresh: bool = True,
+    db: Session = Depends(get_read_db)
+) -> Dict[str, Any]:
+    """
+    Get attendance, headcount, dietary facets and response latency.
+
+    Computed from in-memory column arrays, refreshed with the guests,
+    responses and template sends changed since the previous call.
+
+    Args:
+        refresh: Apply the latest changes first (default True)
+
+    Returns:
+        The analytics summary
+    """
+    analytics = _guest_analytics()
+    if refresh:
+        analytics.refresh(db)
+    return analytics.summary()
+
+
+@router.post("/analytics/guests/rebuild")
+def rebuild_guest_analytics(db: Session = Depends(get_read_db)) -> Dict[str, Any]:
+    """
+    Drop the analytics columns and reload them from the database.
+
+    Returns:
+        Column sizes after the reload
+    """
+    reset_guest_analytics()
+    analytics = _guest_analytics()
+    analytics.refresh(db)
+    return analytics.status()
+
+
+@router.get("/db/pools")
+def get_pool_metrics() -> Dict[str, Any]:
+    """
+    Get connection pool usage per engine and the read replica routing status.
+
+    Returns:
+        Pool counters for the primary (and replica) engines, the last
+        measured replica lag and how many reads went to each side
+    """
+    return pool_metrics()
@@ -0,0 +1,76 @@
+"""
+Analytics API endpoints.
+
+This module serves the RSVP funnel and response time series from the
+hourly rollups (see services/response_rollups.py), so the cost does not
+grow with the response history.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.core.exceptions import AppException
+from backend.db import crud
+from backend.db.session import get_async_read_db
+
+router = APIRouter()
+
+
+@router.get("/responses/timeseries")
+async def get_response_time_series(
+    start: datetime,
+    end: Optional[datetime] = None,
+    response_type: Optional[str] = None,
+    button_payload: Optional[str] = None,
+    template_sid: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db)
+) -> List[Dict[str, Any]]:
+    """
+    Get responses per hour, e.g. confirmations per hour since an invitation blast.
+
+    Args:
+        start: First hour (UTC unless an offset is given)
+        end: End of the range, exclusive (default now)
+        response_type: Only count this response type (e.g. button)
+        button_payload: Only count this button payload (e.g. 1 for confirmations)
+        template_sid: Only count answers to this template
+
+    Returns:
+        One point per hour with the number of responses and the average
+        seconds from the template being sent to the answer
+    """
+    start = crud.utc_naive(start)
+    end = crud.utc_naive(end) if end is not None else datetime.utcnow()
+    if end <= start or end - start > timedelta(hours=crud.MAX_TIME_SERIES_HOURS):
+        raise AppException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            message=f"The range must be positive and at most {crud.MAX_TIME_SERIES_HOURS} hours",
+            error_code="INVALID_RANGE"
+        )
+    return await crud.get_response_time_series_async(
+        db, start, end,
+        response_type=response_type, button_payload=button_payload, template_sid=template_sid
+    )
+
+
+@router.get("/funnel")
+async def get_response_funnel(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    template_sid: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db)
+) -> Dict[str, Any]:
+    """
+    Get the invitation funnel: templates sent, answered, and RSVP answers by status.
+
+    Args:
+        start: Count from this hour (default: all history)
+        end: Count up to this hour, exclusive
+        template_sid: Only count this template
+
+    Returns:
+        Funnel counts, answer rate and time to answer, overall and per template
+    """
+    return await crud.get_response_funnel_async(db, start, end, template_sid)
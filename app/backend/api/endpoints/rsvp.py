@@ -3,20 +3,43 @@ RSVP API endpoints.
 
 This module provides endpoints for retrieving RSVP information and statistics.
 """
-from typing import Dict, Any, List
+import base64
+import json
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.db.session import get_db
+from backend.core.config import settings
+from backend.core.exceptions import AppException
+from backend.db.session import get_async_read_db
 from backend.db import crud
-from backend.db.models import RsvpGuest, RsvpStats
+from backend.services.guest_facets import guest_facet_index
+from backend.services.guest_search_index import guest_search_index
+from backend.services.guest_snapshot import guest_snapshot
+from backend.services.rsvp_events import rsvp_event_broadcaster
+from backend.services.stats_cache import rsvp_stats_cache
 
 router = APIRouter()
 
 
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison, as for GET)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
 @router.get("/stats")
-def get_rsvp_statistics(db: Session = Depends(get_db)) -> Dict[str, Any]:
+async def get_rsvp_statistics(
+    db: AsyncSession = Depends(get_async_read_db),
+    if_none_match: Optional[str] = Header(None)
+) -> Response:
     """
     Get RSVP statistics.
     
@@ -25,94 +48,289 @@ def get_rsvp_statistics(db: Session = Depends(get_db)) -> Dict[str, Any]:
     - Number of guests attending
     - Number of guests not attending
     - Attendance rate
+    
+    Served from the shared guest snapshot when one is mapped and recent
+    (see services/guest_snapshot.py), otherwise cached for a few seconds
+    (see services/stats_cache.py) and dropped whenever guests or responses
+    change. It carries a strong ETag; a request whose If-None-Match
+    matches gets 304 Not Modified.
     """
-    stats = crud.get_rsvp_statistics(db)
-    if not stats:
-        return {
-            "total_guests": 0,
-            "attending_guests": 0,
-            "not_attending_guests": 0,
-            "attendance_rate": 0,
-            "total_responses": 0
-        }
-    
-    return {
-        "total_guests": stats.total_guests or 0,
-        "attending_guests": stats.attending_guests or 0,
-        "not_attending_guests": stats.not_attending_guests or 0,
-        "attendance_rate": stats.attendance_rate,
-        "total_responses": stats.total_responses or 0
-    }
+    cached = guest_snapshot.stats(max_age=settings.GUEST_SNAPSHOT_MAX_AGE) or rsvp_stats_cache.get()
+    if cached is None:
+        version = rsvp_stats_cache.version
+        stats = await crud.get_rsvp_statistics_async(db)
+        cached = rsvp_stats_cache.put(crud.rsvp_stats_summary(stats), version)
+    
+    # no-cache: browsers may store the response but must revalidate it
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+    if _etag_matches(if_none_match, cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(cached.body, media_type="application/json", headers=headers)
+
+
+@router.get("/events")
+async def stream_rsvp_events(last_event_id: Optional[str] = Header(None)) -> StreamingResponse:
+    """
+    Stream RSVP changes as server-sent events.
+    
+    The stream starts with the full statistics, then sends "stats" events
+    with the fields that changed, "guest" events with changed guest rows
+    (as in /guests) and "delete" events with the ids of removed guests. A
+    "reset" event means the guest list must be reloaded. Reconnecting with
+    Last-Event-ID replays missed events when the worker still has them
+    (see services/rsvp_events.py).
+    """
+    return StreamingResponse(
+        rsvp_event_broadcaster.subscribe(last_event_id),
+        media_type="text/event-stream",
+        # Disable proxy buffering so events are delivered as they happen
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def encode_guest_cursor(created_at: datetime, guest_id: Any) -> str:
+    """Encode a (created_at, id) keyset position as an opaque cursor token."""
+    payload = json.dumps([created_at.isoformat(), guest_id], default=str)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_guest_cursor(cursor: str) -> Tuple[datetime, Any]:
+    """
+    Decode a cursor token produced by encode_guest_cursor.
+    
+    Raises:
+        AppException: If the token is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, guest_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), guest_id
+    except (ValueError, TypeError):
+        raise AppException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            message="Invalid pagination cursor",
+            error_code="INVALID_CURSOR"
+        )
 
 
 @router.get("/guests")
-def get_all_rsvp_guests(
-    db: Session = Depends(get_db),
+async def get_all_rsvp_guests(
+    db: AsyncSession = Depends(get_async_read_db),
     skip: int = 0,
-    limit: int = 100
-) -> List[Dict[str, Any]]:
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> JSONResponse:
     """
     Get all RSVP guests with pagination.
     
+    Served by a single column-projected query; rows are serialized
+    directly into the response.
+    
+    Prefer cursor pagination: pass the X-Next-Cursor header of the
+    previous page as `cursor`. It seeks via the (created_at, id) index and
+    is stable under concurrent inserts. skip/limit is still supported.
+    X-Total-Count carries an estimated total number of guests.
+    
     Args:
-        skip: Number of records to skip (for pagination)
+        skip: Number of records to skip (ignored when cursor is given)
         limit: Maximum number of records to return
+        cursor: Opaque cursor from a previous page's X-Next-Cursor header
         
     Returns:
         List of RSVP guest information
     """
-    guests = db.query(RsvpGuest).order_by(RsvpGuest.created_at.desc()).offset(skip).limit(limit).all()
+    after = decode_guest_cursor(cursor) if cursor else None
+    rows = await crud.get_rsvp_guest_rows_async(db, skip=skip, limit=limit, after=after)
+    
+    headers = {"X-Total-Count": str(await crud.estimate_rsvp_guest_count_async(db))}
+    if rows and len(rows) == limit and rows[-1].created_at is not None:
+        headers["X-Next-Cursor"] = encode_guest_cursor(rows[-1].created_at, rows[-1].id)
+    
+    return JSONResponse([crud.serialize_guest_row(row) for row in rows], headers=headers)
+
+
+def encode_sync_token(
+    guests_after: Optional[crud.SyncPosition],
+    tombstones_after: Optional[crud.SyncPosition]
+) -> str:
+    """Encode the guest and tombstone log positions as an opaque sync token."""
+    positions = [
+        [position[0].isoformat(), position[1]] if position is not None else None
+        for position in (guests_after, tombstones_after)
+    ]
+    payload = json.dumps(positions, default=str)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_sync_token(token: str) -> Tuple[Optional[crud.SyncPosition], Optional[crud.SyncPosition]]:
+    """
+    Decode a token produced by encode_sync_token.
     
-    result = []
-    for guest in guests:
-        # Get the associated user response to get the phone number
-        user_response = guest.user_response
+    Raises:
+        AppException: If the token is malformed
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        guests_after, tombstones_after = (
+            (datetime.fromisoformat(position[0]), position[1]) if position is not None else None
+            for position in json.loads(base64.urlsafe_b64decode(padded))
+        )
+        return guests_after, tombstones_after
+    except (ValueError, TypeError, IndexError):
+        raise AppException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            message="Invalid sync token",
+            error_code="INVALID_SYNC_TOKEN"
+        )
+
+
+@router.get("/guests/changes")
+async def get_rsvp_guest_changes(
+    since: Optional[str] = None,
+    limit: int = Query(crud.DEFAULT_SYNC_LIMIT, ge=1, le=crud.MAX_SYNC_LIMIT),
+    db: AsyncSession = Depends(get_async_read_db)
+) -> JSONResponse:
+    """
+    Get the guests inserted, updated or deleted since a sync token.
+    
+    Keeps a client-side copy of the guest list current: start without
+    `since` (every guest is returned, page by page), then pass the `next`
+    token of the previous response. Apply `changed` rows as upserts by id
+    and remove the ids in `deleted`. Rows changed in the last few seconds
+    may be sent again. While `has_more` is true, ask again right away.
+    
+    A token older than the tombstone retention period gets 410 Gone: the
+    client must drop its copy and sync from the start.
+    
+    Args:
+        since: Token from a previous response's `next`
+        limit: Maximum number of changed (and of deleted) guests
         
-        result.append({
-            "id": guest.id,
-            "name": guest.name,
-            "attending": guest.attending,
-            "dietary_restrictions": guest.dietary_restrictions,
-            "phone_number": user_response.phone_number if user_response else None,
-            "created_at": guest.created_at.isoformat() if guest.created_at else None,
-            "updated_at": guest.updated_at.isoformat() if guest.updated_at else None
-        })
+    Returns:
+        Changed guest rows, deleted guest ids, the next token and has_more
+    """
+    guests_after, tombstones_after = decode_sync_token(since) if since else (None, None)
+    changes = await crud.get_rsvp_guest_changes_async(db, guests_after, tombstones_after, limit=limit)
+    
+    retention = timedelta(days=settings.GUEST_TOMBSTONE_RETENTION_DAYS)
+    if since and tombstones_after is not None and tombstones_after[0] < changes.database_now - retention:
+        raise AppException(
+            status_code=status.HTTP_410_GONE,
+            message="Sync token expired, sync from the start",
+            error_code="SYNC_TOKEN_EXPIRED"
+        )
+    
+    return JSONResponse({
+        "changed": [crud.serialize_guest_row(row) for row in changes.rows],
+        "deleted": [crud.parse_guest_id(guest_id) for guest_id in changes.deleted],
+        "next": encode_sync_token(changes.guests_after, changes.tombstones_after),
+        "has_more": changes.has_more
+    })
+
+
+@router.get("/guests/facets")
+async def get_rsvp_guest_facets(
+    status_filter: Optional[List[str]] = Query(None, alias="status"),
+    headcount: Optional[List[str]] = Query(None),
+    dietary: Optional[List[str]] = Query(None),
+    last_interaction: Optional[List[str]] = Query(None),
+    limit: int = Query(100, ge=0, le=crud.MAX_SYNC_LIMIT),
+    offset: int = Query(0, ge=0)
+) -> Dict[str, Any]:
+    """
+    Filter guests by facets and count the guests per facet value.
+    
+    Repeat a parameter to select several values of a facet (e.g.
+    ?dietary=vegan&dietary=vegetarian); facets are combined with AND. The
+    counts of each facet apply the other facets' filters, so they show
+    what selecting another value would return.
+    
+    Answered from the in-memory guest facet index.
     
-    return result
+    Args:
+        status: attending, not_attending or unknown
+        headcount: Party size (guests sharing a phone number): 1-4 or 5+
+        dietary: Dietary tag (lower-case) or none
+        last_interaction: today, 7d, 30d or older
+        limit: Maximum number of guest ids to return
+        offset: Number of matching guest ids to skip
+        
+    Returns:
+        total, ids of the matching guests and counts per facet and value
+    """
+    if not guest_facet_index.ready:
+        raise AppException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            message="The guest facet index is loading",
+            error_code="FACETS_NOT_READY"
+        )
+    filters = {
+        "status": status_filter,
+        "headcount": headcount,
+        "dietary": [value.casefold() for value in dietary] if dietary else None,
+        "last_interaction": last_interaction,
+    }
+    return guest_facet_index.query(filters, limit, offset)
 
 
 @router.get("/guests/search")
-def search_rsvp_guests(
+async def search_rsvp_guests(
     query: str,
-    db: Session = Depends(get_db)
-) -> List[Dict[str, Any]]:
+    limit: int = Query(crud.DEFAULT_SEARCH_LIMIT, ge=1, le=crud.MAX_SEARCH_LIMIT),
+    db: AsyncSession = Depends(get_async_read_db)
+) -> JSONResponse:
     """
     Search for RSVP guests by name or phone number.
     
+    Names are matched fuzzily (typos, partial words, Hebrew or Latin) and
+    phone numbers by any run of 3+ digits. Results are ranked by similarity.
+    
+    Answered from the in-memory guest search index once it is loaded,
+    otherwise from the database.
+    
     Args:
-        query: Search term (name or phone number)
+        query: Search term (name or part of a phone number)
+        limit: Maximum number of results
         
     Returns:
-        List of matching RSVP guests
+        List of matching RSVP guests, best match first
     """
-    # Search in both the name field and phone number field
-    guests = db.query(RsvpGuest).join(RsvpGuest.user_response).filter(
-        (RsvpGuest.name.ilike(f"%{query}%")) | 
-        (RsvpGuest.user_response.has(phone_number=query))
-    ).all()
+    if guest_search_index.ready:
+        rows = guest_search_index.search(query, limit)
+    else:
+        rows = await crud.search_rsvp_guest_rows_async(db, query, limit=limit)
+    return JSONResponse([crud.serialize_guest_row(row) for row in rows])
+
+
+@router.get("/guests/{phone_number}")
+async def get_rsvp_guest_summary(
+    phone_number: str,
+    db: AsyncSession = Depends(get_async_read_db)
+) -> Dict[str, Any]:
+    """
+    Get a guest's RSVP status, number of guests and name by phone number.
+    
+    Served from the shared guest snapshot while it is fresh (see
+    services/guest_snapshot.py), otherwise from the database.
     
-    result = []
-    for guest in guests:
-        user_response = guest.user_response
+    Args:
+        phone_number: Phone number as unique identifier
         
-        result.append({
-            "id": guest.id,
-            "name": guest.name,
-            "attending": guest.attending,
-            "dietary_restrictions": guest.dietary_restrictions,
-            "phone_number": user_response.phone_number if user_response else None,
-            "created_at": guest.created_at.isoformat() if guest.created_at else None,
-            "updated_at": guest.updated_at.isoformat() if guest.updated_at else None
-        })
-    
-    return result 
\ No newline at end of file
+    Returns:
+        phone_number, rsvp_status, num_guests and name
+    """
+    max_age = settings.GUEST_SNAPSHOT_MAX_AGE
+    guest = guest_snapshot.lookup(phone_number, max_age=max_age)
+    if guest is not None:
+        summary = guest._asdict()
+    elif guest_snapshot.fresh(max_age):
+        summary = None
+    else:
+        summary = await crud.get_guest_summary_async(db, phone_number)
+    if summary is None:
+        raise AppException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            message="Guest not found",
+            error_code="GUEST_NOT_FOUND"
+        )
+    return summary
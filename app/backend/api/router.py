@@ -6,6 +6,8 @@ from fastapi import APIRouter
 # Import webhook router and RSVP router
 from backend.api.endpoints.webhook import router as webhook_router
 from backend.api.endpoints.rsvp import router as rsvp_router
+from backend.api.endpoints.admin import router as admin_router
+from backend.api.endpoints.analytics import router as analytics_router
 
 # Create main API router
 api_router = APIRouter()
@@ -14,4 +16,10 @@ api_router = APIRouter()
 api_router.include_router(webhook_router, tags=["webhook"])
 
 # Register the RSVP router
-api_router.include_router(rsvp_router, prefix="/rsvp", tags=["rsvp"]) 
\ No newline at end of file
+api_router.include_router(rsvp_router, prefix="/rsvp", tags=["rsvp"])
+
+# Register the admin router
+api_router.include_router(admin_router, prefix="/admin", tags=["admin"])
+
+# Register the analytics router
+api_router.include_router(analytics_router, prefix="/analytics", tags=["analytics"])
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+"""
+Benchmark for services.guest_analytics.
+
+Computes attendance, headcount (guests per phone), dietary facets and the
+response latency distribution three ways:
+
+    ORM      load RsvpGuest objects (with their UserResponse) and count in Python
+    SQL      GROUP BY queries, finishing facets and percentiles in Python
+    NumPy    GuestAnalytics: full load, summary, and an incremental refresh
+             after 1% of the guests changed
+
+Usage:
+    python benchmarks/bench_guest_analytics.py
+    python benchmarks/bench_guest_analytics.py --guests 1000000 --skip-orm --uri postgresql://...
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timedelta
+
+# Add the parent directories to Python path
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+app_dir = os.path.dirname(current_dir)
+root_dir = os.path.dirname(app_dir)
+
+for path in [current_dir, app_dir, root_dir]:
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from sqlalchemy import create_engine, func, insert, select, update
+from sqlalchemy.orm import joinedload, sessionmaker
+
+from app.backend.db.models import Base, RsvpGuest, SentTemplate, UserResponse
+from backend.services.guest_analytics import GuestAnalytics, normalize_dietary
+
+DIETS = ["", "", "", "", "vegetarian", "vegan", "gluten free", "Vegetarian, gluten free", "kosher; nut allergy"]
+
+
+def _result(guests, attending, party_sizes, facets, latencies):
+    """The comparable part of a summary."""
+    return {
+        "guests": guests,
+        "attending": attending,
+        "parties": len(party_sizes),
+        "party_sizes": dict(sorted(Counter(party_sizes).items())),
+        "dietary": dict(sorted(facets.items())),
+        "latency_p50": round(statistics.median(latencies), 1) if latencies else None,
+    }
+
+
+def _latencies(first_sent, first_response):
+    """Seconds from the first send to the first response, per phone."""
+    return [
+        (first_response[phone] - sent).total_seconds()
+        for phone, sent in first_sent.items()
+        if phone in first_response and first_response[phone] >= sent
+    ]
+
+
+def orm_summary(db):
+    """Hydrate every guest and its response, count in Python."""
+    guests = db.query(RsvpGuest).options(joinedload(RsvpGuest.user_response)).all()
+    attending = sum(1 for guest in guests if guest.attending)
+    parties = Counter(guest.user_response.phone_number for guest in guests)
+    facets = Counter(tag for guest in guests for tag in normalize_dietary(guest.dietary_restrictions))
+    first_sent = {}
+    for sent in db.query(SentTemplate).all():
+        if sent.phone_number not in first_sent or sent.sent_at < first_sent[sent.phone_number]:
+            first_sent[sent.phone_number] = sent.sent_at
+    first_response = {}
+    for response in db.query(UserResponse).all():
+        current = first_response.get(response.phone_number)
+        if current is None or response.created_at < current:
+            first_response[response.phone_number] = response.created_at
+    return _result(len(guests), attending, list(parties.values()), dict(facets),
+                   _latencies(first_sent, first_response))
+
+
+def sql_summary(db):
+    """Aggregate in the database, finish facets and percentiles in Python."""
+    guests, attending = db.execute(select(
+        func.count(RsvpGuest.id), func.count(RsvpGuest.id).filter(RsvpGuest.attending.is_(True))
+    )).one()
+    party_sizes = db.execute(
+        select(func.count(RsvpGuest.id)).join(UserResponse, RsvpGuest.user_response_id == UserResponse.id)
+        .group_by(UserResponse.phone_number)
+    ).scalars().all()
+    facets = Counter()
+    for value, count in db.execute(
+        select(RsvpGuest.dietary_restrictions, func.count()).group_by(RsvpGuest.dietary_restrictions)
+    ):
+        for tag in normalize_dietary(value):
+            facets[tag] += count
+    first_sent = dict(db.execute(
+        select(SentTemplate.phone_number, func.min(SentTemplate.sent_at)).group_by(SentTemplate.phone_number)
+    ).all())
+    first_response = dict(db.execute(
+        select(UserResponse.phone_number, func.min(UserResponse.created_at)).group_by(UserResponse.phone_number)
+    ).all())
+    return _result(guests, attending, list(party_sizes), dict(facets), _latencies(first_sent, first_response))
+
+
+def numpy_result(summary):
+    """The comparable part of a GuestAnalytics summary."""
+    return {
+        "guests": summary["attendance"]["guests"],
+        "attending": summary["attendance"]["attending"],
+        "parties": summary["headcount"]["parties"],
+        "party_sizes": {int(size): count for size, count in summary["headcount"]["party_sizes"].items()},
+        "dietary": {tag: facet["guests"] for tag, facet in sorted(summary["dietary"].items())},
+        "latency_p50": summary["response_latency"]["p50_seconds"],
+    }
+
+
+def seed(engine, num_guests: int, seed_value: int = 42) -> None:
+    """Create the schema and fill it with phones, sends, responses and guests."""
+    rng = random.Random(seed_value)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    start = datetime(2025, 1, 1)
+    responses, guests, sends = [], [], []
+    response_id = 0
+    phone_index = 0
+    while len(guests) < num_guests:
+        phone_index += 1
+        phone = f"+9725{phone_index:08d}"
+        sent_at = start + timedelta(seconds=phone_index)
+        sends.append({"message_sid": f"SM{phone_index:030d}", "phone_number": phone,
+                      "template_sid": "HXbench", "sent_at": sent_at})
+        response_id += 1
+        answered_at = sent_at + timedelta(seconds=int(rng.expovariate(1 / 3600)) + 1)
+        responses.append({
+            "id": response_id, "phone_number": phone, "question_key": "button_response",
+            "response_text": "", "response_value": "", "created_at": answered_at, "updated_at": answered_at,
+        })
+        for _ in range(rng.randint(1, 5)):
+            guests.append({
+                "user_response_id": response_id, "name": f"Guest {len(guests)}",
+                "attending": rng.random() < 0.7, "dietary_restrictions": rng.choice(DIETS),
+                "created_at": answered_at, "updated_at": answered_at,
+            })
+    del guests[num_guests:]
+
+    with engine.begin() as conn:
+        for model, rows in ((SentTemplate, sends), (UserResponse, responses), (RsvpGuest, guests)):
+            for start_index in range(0, len(rows), 10000):
+                conn.execute(insert(model), rows[start_index:start_index + 10000])
+
+
+def measure(name: str, fn, repeat: int):
+    """Run fn several times and print the best time and peak memory."""
+    timings = []
+    peak = 0
+    result = None
+    for _ in range(repeat):
+        tracemalloc.start()
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    print(f"{name:<22} best {min(timings) * 1000:9.1f} ms   peak Python memory {peak / 1024 / 1024:7.1f} MiB")
+    return result
+
+
+def main():
+    """Seed a synthetic guest list and compare the implementations."""
+    parser = argparse.ArgumentParser(description="Benchmark guest analytics")
+    parser.add_argument("--uri", default="sqlite://", help="Database URI (default: in-memory SQLite)")
+    parser.add_argument("--guests", type=int, default=100000, help="Number of synthetic guests")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per implementation")
+    parser.add_argument("--skip-orm", action="store_true", help="Skip the ORM implementation (slow at 1M)")
+    args = parser.parse_args()
+
+    engine = create_engine(args.uri)
+    print(f"Seeding {args.guests} guests into {engine.dialect.name}...")
+    seed(engine, args.guests)
+    session_factory = sessionmaker(bind=engine)
+
+    def run(fn):
+        with session_factory() as db:
+            return fn(db)
+
+    results = {}
+    if not args.skip_orm:
+        results["ORM"] = measure("ORM", lambda: run(orm_summary), args.repeat)
+    results["SQL"] = measure("SQL aggregate", lambda: run(sql_summary), args.repeat)
+
+    def full_load():
+        analytics = GuestAnalytics()
+        run(lambda db: analytics.refresh(db, settle_seconds=0))
+        return analytics
+
+    analytics = measure("NumPy full load", full_load, args.repeat)
+    results["NumPy"] = numpy_result(measure("NumPy summary", analytics.summary, args.repeat))
+
+    # Touch 1% of the guests and apply only those
+    with session_factory() as db:
+        changed = max(1, args.guests // 100)
+        ids = select(RsvpGuest.id).order_by(RsvpGuest.id).limit(changed).scalar_subquery()
+        db.execute(update(RsvpGuest).where(RsvpGuest.id.in_(ids)).values(
+            attending=~RsvpGuest.attending, updated_at=datetime.utcnow()
+        ))
+        db.commit()
+    refreshed = measure("NumPy refresh (1%)", lambda: run(lambda db: analytics.refresh(db, settle_seconds=0)), 1)
+    print(f"Incremental refresh applied {refreshed}")
+
+    expected = next(iter(results.values()))
+    for name, result in results.items():
+        assert result == expected, f"{name} differs: {result} != {expected}"
+    print(f"Results match: {expected}")
+
+
+if __name__ == "__main__":
+    main()
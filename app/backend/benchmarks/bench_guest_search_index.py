@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""
+Benchmark for the in-memory guest search index.
+
+Builds the index from synthetic Hebrew and Latin guests and reports build
+time, memory held by the index per 10k guests, and search latency.
+
+Usage:
+    python benchmarks/bench_guest_search_index.py
+    python benchmarks/bench_guest_search_index.py --guests 50000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+# Add the parent directories to Python path
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+app_dir = os.path.dirname(current_dir)
+root_dir = os.path.dirname(app_dir)
+
+for path in [current_dir, app_dir, root_dir]:
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from backend.services.guest_search_index import GuestSearchIndex, IndexedGuest
+
+FIRST_NAMES = ["נועה", "יוסף", "מיכל", "אברהם", "שירה", "דוד", "Noa", "Daniel", "Maya", "Yosef", "Sarah", "Ariel"]
+LAST_NAMES = ["כהן", "לוי", "מזרחי", "פרץ", "ביטון", "Cohen", "Levi", "Mizrahi", "Peretz", "Friedman", "Goldberg"]
+
+QUERIES = ["כהן", "נועה לוי", "Mizrahy", "Goldberg", "050-1234", "+97252", "Daniel Fridman", "ש"]
+
+
+def synthetic_guests(num_guests: int, seed_value: int = 42):
+    """Generate guests shaped like the listing query rows."""
+    rng = random.Random(seed_value)
+    timestamp = datetime(2025, 1, 1)
+    return [
+        IndexedGuest(
+            index,
+            f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {index % 97}",
+            rng.random() < 0.7,
+            None,
+            f"+9725{rng.randrange(10 ** 8):08d}",
+            timestamp,
+            timestamp,
+        )
+        for index in range(num_guests)
+    ]
+
+
+def main():
+    """Build the index and time searches against it."""
+    parser = argparse.ArgumentParser(description="Benchmark the in-memory guest search index")
+    parser.add_argument("--guests", type=int, default=10000, help="Number of synthetic guests")
+    parser.add_argument("--repeat", type=int, default=200, help="Runs per query")
+    args = parser.parse_args()
+
+    guests = synthetic_guests(args.guests)
+
+    # Memory is measured on a separate build, tracing slows the build down
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    traced = GuestSearchIndex()
+    traced.load(guests)
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    index = GuestSearchIndex()
+    started = time.perf_counter()
+    index.load(guests)
+    build = time.perf_counter() - started
+
+    print(f"Built index of {len(index)} guests in {build * 1000:.0f} ms")
+    print(f"Index memory (excluding the guest rows) {held / 1024 / 1024:.1f} MiB, "
+          f"{held / len(index) * 10000 / 1024 / 1024:.1f} MiB per 10k guests")
+
+    for query in QUERIES:
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            results = index.search(query, 20)
+        per_query = (time.perf_counter() - started) / args.repeat * 1000
+        print(f"{query!r:<18} {per_query:7.3f} ms   ({len(results)} results)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""
+Benchmark for services.message_classifier.
+
+Classifies a corpus of typical Hebrew and English guest messages with the
+compiled rule classifier and with the previous implementation (repeated
+strip/int/list checks and one substring scan per question word), and
+fails if the classifier is below the throughput target.
+
+Usage:
+    python benchmarks/bench_message_classifier.py
+    python benchmarks/bench_message_classifier.py --messages 1000000 --target 300000
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from collections import Counter
+
+# Add the parent directories to Python path
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+app_dir = os.path.dirname(current_dir)
+root_dir = os.path.dirname(app_dir)
+
+for path in [current_dir, app_dir, root_dir]:
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from backend.services.message_classifier import message_classifier
+
+# Messages guests send after an invitation, with their expected type
+CORPUS = [
+    ("שלום", "greeting"),
+    ("שָׁלוֹם!", "greeting"),
+    ("היי", "greeting"),
+    ("Hi", "greeting"),
+    ("hello 👋", "greeting"),
+    ("Hey!", "greeting"),
+    ("1", "numeric"),
+    (" 2 ", "numeric"),
+    ("3", "numeric"),
+    ("האם יש חניה באולם?", "question"),
+    ("מתי מתחילה החופה", "question"),
+    ("ומתי צריך להגיע", "question"),
+    ("איפה האולם בדיוק", "question"),
+    ("כמה אנשים אפשר להביא", "question"),
+    ("מה קוד הלבוש", "question"),
+    ("יש לי שאלה לגבי ההסעות", "question"),
+    ("Is there parking?", "question"),
+    ("Can I bring my kids?", "question"),
+    ("What time does it start?", "question"),
+    ("מזל טוב!!! 🎉🎉", "general"),
+    ("תודה רבה, נתראה בשמחות", "general"),
+    ("תודה רבה מהמשפחה", "general"),
+    ("נגיע שנינו בע\"ה", "general"),
+    ("אנחנו מגיעים 3 אנשים", "general"),
+    ("לצערי לא נוכל להגיע, מאחלים המון אושר", "general"),
+    ("Congratulations!! See you there 💕", "general"),
+    ("We will be there", "general"),
+    ("Sorry, we can't make it", "general"),
+    ("👍", "general"),
+    ("ok", "general"),
+]
+
+
+def legacy_categorize(body: str, num_media: str = "0") -> str:
+    """Previous implementation (without the button check), for comparison."""
+    body = body.lower()
+    if body.strip().isdigit() and len(body.strip()) == 1 and int(body.strip()) in range(1, 10):
+        return "numeric"
+    if int(num_media) > 0:
+        return "media"
+    if body in ['hi', 'hello', 'שלום', 'היי', 'hey']:
+        return "greeting"
+    if '?' in body or any(word in body for word in ["שאלה", "מתי", "איפה", "כמה", "מה"]):
+        return "question"
+    return "general"
+
+
+def measure(name: str, fn, messages) -> float:
+    """Classify every message and print the throughput."""
+    started = time.perf_counter()
+    for body in messages:
+        fn(body)
+    elapsed = time.perf_counter() - started
+    rate = len(messages) / elapsed
+    print(f"{name:<12} {elapsed * 1000:9.1f} ms   {rate:12,.0f} messages/s")
+    return rate
+
+
+def main():
+    """Check the corpus labels and compare throughput."""
+    parser = argparse.ArgumentParser(description="Benchmark message classification")
+    parser.add_argument("--messages", type=int, default=300000, help="Messages to classify")
+    parser.add_argument("--target", type=float, default=200000, help="Minimum classifier messages/s")
+    args = parser.parse_args()
+    # Measure classification, not log output
+    logging.disable(logging.INFO)
+
+    wrong = [(body, expected, message_classifier.classify(body)) for body, expected in CORPUS
+             if message_classifier.classify(body) != expected]
+    legacy_wrong = [body for body, expected in CORPUS if legacy_categorize(body) != expected]
+    print(f"Corpus of {len(CORPUS)}: classifier mislabels {len(wrong)}, legacy mislabels {len(legacy_wrong)}")
+    for body, expected, actual in wrong:
+        print(f"  {body!r}: expected {expected}, got {actual}")
+
+    messages = [CORPUS[i % len(CORPUS)][0] for i in range(args.messages)]
+    print(f"Classifying {len(messages)} messages ({dict(Counter(label for _, label in CORPUS))})...")
+    measure("legacy", legacy_categorize, messages)
+    rate = measure("classifier", message_classifier.classify, messages)
+
+    assert not wrong, "The classifier mislabels corpus messages"
+    assert rate >= args.target, f"{rate:,.0f} messages/s is below the target of {args.target:,.0f}"
+
+
+if __name__ == "__main__":
+    main()
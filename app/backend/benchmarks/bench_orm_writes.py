@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+"""
+Benchmark for the ORM write path in db/crud.py.
+
+Compares three ways of saving the same user responses and guests:
+
+- legacy: commit and refresh per object (the previous crud behaviour)
+- unit of work: crud helpers with commit=False, one commit at the end
+- bulk: bulk_create_user_responses / bulk_create_rsvp_guests in one transaction
+
+Defaults to a SQLite file in a temporary directory, so commits pay for
+syncing to disk as they would on a real database.
+
+Usage:
+    python benchmarks/bench_orm_writes.py
+    python benchmarks/bench_orm_writes.py --rows 5000 --uri postgresql://...
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Add the parent directories to Python path
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+app_dir = os.path.dirname(current_dir)
+root_dir = os.path.dirname(app_dir)
+
+for path in [current_dir, app_dir, root_dir]:
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.backend.db.models import Base, UserResponse, RsvpGuest
+from backend.db import crud
+
+
+def _response(index: int) -> dict:
+    return {
+        "phone_number": f"+9725{index:08d}",
+        "question_key": "button_response",
+        "response_text": "מגיע",
+        "response_value": "1",
+    }
+
+
+def _guest(response_id: int) -> dict:
+    return {"user_response_id": response_id, "name": f"Guest {response_id}", "attending": True}
+
+
+def legacy_writes(session_factory, rows: int) -> None:
+    """Previous implementation: commit and refresh after every object."""
+    db = session_factory()
+    try:
+        for index in range(rows):
+            response = UserResponse(**_response(index))
+            db.add(response)
+            db.commit()
+            db.refresh(response)
+            guest = RsvpGuest(**_guest(response.id))
+            db.add(guest)
+            db.commit()
+            db.refresh(guest)
+    finally:
+        db.close()
+
+
+def unit_of_work_writes(session_factory, rows: int) -> None:
+    """Per-object crud helpers inside one caller-controlled transaction."""
+    db = session_factory(expire_on_commit=False)
+    try:
+        with db.begin():
+            for index in range(rows):
+                response = crud.create_user_response(db, _response(index), commit=False)
+                crud.create_rsvp_guest(db, _guest(response.id), commit=False)
+    finally:
+        db.close()
+
+
+def bulk_writes(session_factory, rows: int) -> None:
+    """Batch crud helpers inside one transaction."""
+    db = session_factory(expire_on_commit=False)
+    try:
+        with db.begin():
+            responses = crud.bulk_create_user_responses(db, (_response(index) for index in range(rows)))
+            crud.bulk_create_rsvp_guests(db, (_guest(row.id) for row in responses))
+    finally:
+        db.close()
+
+
+def measure(name: str, fn, engine, rows: int) -> None:
+    """Run fn on a fresh schema and print time and statement count."""
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        started = time.perf_counter()
+        fn(sessionmaker(bind=engine), rows)
+        elapsed = time.perf_counter() - started
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    print(f"{name:<14} {elapsed * 1000:9.1f} ms   {elapsed / rows * 1e6:8.1f} us/row   {len(statements):6d} statements")
+
+
+def main():
+    """Compare the write paths on the same workload."""
+    parser = argparse.ArgumentParser(description="Benchmark the ORM write path")
+    parser.add_argument("--uri", help="Database URI (default: SQLite file in a temporary directory)")
+    parser.add_argument("--rows", type=int, default=2000, help="Responses to write (each with one guest)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(args.uri or f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        print(f"Writing {args.rows} responses and guests to {engine.dialect.name}...")
+        measure("legacy", legacy_writes, engine, args.rows)
+        measure("unit of work", unit_of_work_writes, engine, args.rows)
+        measure("bulk", bulk_writes, engine, args.rows)
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
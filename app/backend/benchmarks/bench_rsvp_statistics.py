@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+"""
+Benchmark for models.get_rsvp_statistics.
+
+Compares the single aggregate query against the previous implementation,
+which loaded every latest UserResponse and RsvpGuest as ORM objects and
+counted attendance in Python.
+
+Usage:
+    python benchmarks/bench_rsvp_statistics.py
+    python benchmarks/bench_rsvp_statistics.py --responses 100000 --uri postgresql://...
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+# Add the parent directories to Python path
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+app_dir = os.path.dirname(current_dir)
+root_dir = os.path.dirname(app_dir)
+
+for path in [current_dir, app_dir, root_dir]:
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from sqlalchemy import create_engine, func, insert
+from sqlalchemy.orm import sessionmaker
+
+from backend.db.models import Base, UserResponse, RsvpGuest, RsvpStats, get_rsvp_statistics
+
+
+def legacy_get_rsvp_statistics(db) -> RsvpStats:
+    """Previous implementation: ORM hydration plus Python-side counting."""
+    subq = db.query(
+        UserResponse.phone_number,
+        func.max(UserResponse.updated_at).label('max_updated')
+    ).group_by(UserResponse.phone_number).subquery('latest_responses')
+
+    latest_responses = db.query(UserResponse).join(
+        subq,
+        (UserResponse.phone_number == subq.c.phone_number) &
+        (UserResponse.updated_at == subq.c.max_updated)
+    ).all()
+
+    total_responses = len(latest_responses)
+    response_ids = [r.id for r in latest_responses]
+    all_guests = db.query(RsvpGuest).filter(
+        RsvpGuest.user_response_id.in_(response_ids)
+    ).all()
+
+    total_guests = len(all_guests)
+    attending_guests = sum(1 for g in all_guests if g.attending)
+
+    response_attendance = defaultdict(bool)
+    for guest in all_guests:
+        if guest.attending:
+            response_attendance[guest.user_response_id] = True
+    attending_count = sum(1 for attending in response_attendance.values() if attending)
+
+    return RsvpStats(
+        total_responses=total_responses,
+        attending_count=attending_count,
+        not_attending_count=total_responses - attending_count,
+        total_guests=total_guests,
+        attending_guests=attending_guests,
+        not_attending_guests=total_guests - attending_guests
+    )
+
+
+def seed(engine, num_responses: int, responses_per_phone: int, seed_value: int = 42) -> None:
+    """Create the schema and fill it with synthetic responses and guests."""
+    rng = random.Random(seed_value)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    start = datetime(2025, 1, 1)
+    responses = []
+    guests = []
+    for response_id in range(1, num_responses + 1):
+        phone = f"+9725{(response_id % (num_responses // responses_per_phone)):08d}"
+        timestamp = start + timedelta(seconds=response_id)
+        responses.append({
+            "id": response_id,
+            "phone_number": phone,
+            "question_key": "button_response",
+            "response_text": "",
+            "response_value": "",
+            "created_at": timestamp,
+            "updated_at": timestamp,
+        })
+        for _ in range(rng.randint(0, 3)):
+            guests.append({
+                "user_response_id": response_id,
+                "name": f"Guest {response_id}",
+                "attending": rng.random() < 0.7,
+                "dietary_restrictions": "",
+                "created_at": timestamp,
+                "updated_at": timestamp,
+            })
+
+    with engine.begin() as conn:
+        for start_index in range(0, len(responses), 10000):
+            conn.execute(insert(UserResponse), responses[start_index:start_index + 10000])
+        for start_index in range(0, len(guests), 10000):
+            conn.execute(insert(RsvpGuest), guests[start_index:start_index + 10000])
+
+
+def measure(name: str, fn, session_factory, repeat: int) -> RsvpStats:
+    """Run fn several times and print the best time and peak memory."""
+    timings = []
+    peak = 0
+    result = None
+    for _ in range(repeat):
+        db = session_factory()
+        try:
+            tracemalloc.start()
+            started = time.perf_counter()
+            result = fn(db)
+            timings.append(time.perf_counter() - started)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        finally:
+            db.close()
+    print(f"{name:<12} best {min(timings) * 1000:9.1f} ms   peak Python memory {peak / 1024 / 1024:7.1f} MiB")
+    return result
+
+
+def main():
+    """Seed a synthetic dataset and compare both implementations."""
+    parser = argparse.ArgumentParser(description="Benchmark RSVP statistics computation")
+    parser.add_argument("--uri", default="sqlite://", help="Database URI (default: in-memory SQLite)")
+    parser.add_argument("--responses", type=int, default=100000, help="Number of synthetic responses")
+    parser.add_argument("--responses-per-phone", type=int, default=5, help="Responses per phone number")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per implementation")
+    args = parser.parse_args()
+
+    engine = create_engine(args.uri)
+    print(f"Seeding {args.responses} responses ({args.responses_per_phone} per phone) into {engine.dialect.name}...")
+    seed(engine, args.responses, args.responses_per_phone)
+    session_factory = sessionmaker(bind=engine)
+
+    legacy = measure("legacy ORM", legacy_get_rsvp_statistics, session_factory, args.repeat)
+    current = measure("aggregate", get_rsvp_statistics, session_factory, args.repeat)
+
+    assert legacy == current, f"Results differ: {legacy} != {current}"
+    print(f"Results match: {current}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""
+Load test for the RSVP read API.
+
+Simulates dashboard clients against a running server. Each client loops
+over the statistics, a page of the guest listing and a guest search, as
+the RSVP status page does, and the script reports requests per second
+and latency percentiles.
+
+Usage:
+    python -m uvicorn backend.main:app --port 8000 &
+    python benchmarks/load_test_rsvp.py --url http://localhost:8000/api/v1/rsvp --clients 500
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import List
+
+import httpx
+
+SEARCH_TERMS = ["כהן", "לוי", "Daniel", "Maya", "0521", "נועה", "Fried"]
+
+
+async def dashboard_client(
+    client: httpx.AsyncClient,
+    deadline: float,
+    latencies: List[float],
+    errors: List[str]
+) -> None:
+    """Request the dashboard endpoints in a loop until the deadline."""
+    rng = random.Random()
+    requests = [
+        lambda: client.get("/stats"),
+        lambda: client.get("/guests", params={"limit": 50}),
+        lambda: client.get("/guests/search", params={"query": rng.choice(SEARCH_TERMS)}),
+    ]
+    while time.perf_counter() < deadline:
+        for request in requests:
+            started = time.perf_counter()
+            try:
+                response = await request()
+                if response.status_code != 200:
+                    errors.append(f"HTTP {response.status_code}")
+            except httpx.HTTPError as e:
+                errors.append(type(e).__name__)
+            latencies.append(time.perf_counter() - started)
+
+
+async def run(url: str, clients: int, duration: float) -> None:
+    """Run the clients concurrently and print a summary."""
+    latencies: List[float] = []
+    errors: List[str] = []
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(dashboard_client(client, deadline, latencies, errors) for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    if not latencies:
+        print("No requests completed")
+        return
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(f"{clients} clients, {len(latencies)} requests in {elapsed:.1f} s: "
+          f"{len(latencies) / elapsed:.0f} req/s, {len(errors)} errors")
+    print(f"latency p50 {percentiles[49] * 1000:.0f} ms, p95 {percentiles[94] * 1000:.0f} ms, "
+          f"p99 {percentiles[98] * 1000:.0f} ms")
+    if errors:
+        print(f"first errors: {sorted(set(errors))[:5]}")
+
+
+def main():
+    """Parse arguments and run the load test."""
+    parser = argparse.ArgumentParser(description="Load test the RSVP read API")
+    parser.add_argument("--url", default="http://localhost:8000/api/v1/rsvp", help="Base URL of the RSVP API")
+    parser.add_argument("--clients", type=int, default=500, help="Concurrent dashboard clients")
+    parser.add_argument("--duration", type=float, default=30, help="Test duration in seconds")
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.clients, args.duration))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ Application factory module for the backend API.
 import logging
 import sys
 import os
+import threading
 from typing import Optional
 
 from fastapi import FastAPI
@@ -41,10 +42,54 @@ def create_app(settings: Optional[Settings] = None) -> FastAPI:
     @app.on_event("startup")
     async def startup_event():
         logger.info("Application startup")
+        # Build the guest search and facet indexes in the background; searches
+        # use the database until the search index is ready
+        from backend.services.guest_facets import build_guest_facet_index
+        from backend.services.guest_search_index import build_guest_search_index
+        threading.Thread(target=build_guest_search_index, name="guest-search-index", daemon=True).start()
+        threading.Thread(target=build_guest_facet_index, name="guest-facet-index", daemon=True).start()
+        # Map the shared guest snapshot; the first worker to take its lock
+        # refreshes it and the others stand by to take over
+        if settings.GUEST_SNAPSHOT_PATH:
+            from backend.services.guest_snapshot import guest_snapshot, snapshot_refresher
+            guest_snapshot.attach(settings.GUEST_SNAPSHOT_PATH)
+            if snapshot_refresher.start(settings.GUEST_SNAPSHOT_PATH, settings.GUEST_SNAPSHOT_REFRESH_SECONDS):
+                logger.info(f"Refreshing guest snapshot {settings.GUEST_SNAPSHOT_PATH}")
+        # Keep this worker's caches (and live events) current with writes made
+        # by other workers
+        if settings.CACHE_CHANGE_LISTENER and settings.DATABASE_URI.startswith("postgresql"):
+            from backend.services.cache_notifications import CacheChangeListener, listener_dsn
+            from backend.services.rsvp_events import rsvp_event_broadcaster
+            app.state.cache_change_listener = CacheChangeListener(
+                listener_dsn(settings.DATABASE_URI),
+                on_connection_change=rsvp_event_broadcaster.set_remote_feed
+            )
+            app.state.cache_change_listener.start()
+        # Load the reply routes (with the reply_routes table on PostgreSQL)
+        # and reload them when the routing file changes
+        from backend.services.reply_routes import reply_router
+        reply_router.start(
+            settings.REPLY_ROUTES_WATCH_SECONDS,
+            use_database=settings.DATABASE_URI.startswith("postgresql")
+        )
+        # Keep the analytics rollups current; one worker refreshes at a time
+        if settings.RESPONSE_ROLLUP_REFRESH_SECONDS > 0 and settings.DATABASE_URI.startswith("postgresql"):
+            from backend.services.response_rollups import rollup_refresher
+            rollup_refresher.start(settings.RESPONSE_ROLLUP_REFRESH_SECONDS)
     
     @app.on_event("shutdown")
     async def shutdown_event():
         logger.info("Application shutdown")
+        listener = getattr(app.state, "cache_change_listener", None)
+        if listener is not None:
+            await listener.stop()
+        if settings.GUEST_SNAPSHOT_PATH:
+            from backend.services.guest_snapshot import snapshot_refresher
+            snapshot_refresher.stop()
+        from backend.services.response_rollups import rollup_refresher
+        rollup_refresher.stop()
+        from backend.services.reply_routes import reply_router
+        reply_router.stop()
     
     # Register exception handlers
     register_exception_handlers(app)
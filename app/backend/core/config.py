@@ -12,6 +12,8 @@ from functools import lru_cache
 
 from pydantic import field_validator, Field, model_validator
 from pydantic_settings import BaseSettings
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import ArgumentError
 
 
 class LogLevel(str, Enum):
@@ -31,6 +33,13 @@ class Environment(str, Enum):
     PRODUCTION = "production"
 
 
+# Supported database backends and the async driver of each (see db/session.py)
+ASYNC_DATABASE_DRIVERS: Dict[str, str] = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+
 class Settings(BaseSettings):
     """
     Application settings with explicit typing and defaults.
@@ -69,6 +78,43 @@ class Settings(BaseSettings):
         description="Database connection URI"
     )
     
+    DATABASE_REPLICA_URI: Optional[str] = Field(
+        default=None,
+        description="Read replica connection URI; reads use the primary when unset"
+    )
+    REPLICA_MAX_LAG_SECONDS: float = Field(
+        default=5.0,
+        description="Replication lag above which reads fall back to the primary"
+    )
+    REPLICA_LAG_CHECK_INTERVAL: float = Field(
+        default=2.0,
+        description="Seconds between replica lag measurements"
+    )
+    GUEST_SNAPSHOT_PATH: Optional[str] = Field(
+        default=None,
+        description="Memory-mapped guest snapshot file shared by the workers (e.g. /dev/shm/rsvp_guests.snapshot)"
+    )
+    GUEST_SNAPSHOT_REFRESH_SECONDS: float = Field(
+        default=5.0,
+        description="Seconds between snapshot rewrites when no change was notified"
+    )
+    GUEST_SNAPSHOT_MAX_AGE: float = Field(
+        default=30.0,
+        description="Snapshot age after which reads fall back to the database"
+    )
+    CACHE_CHANGE_LISTENER: bool = Field(
+        default=True,
+        description="Listen for cache change notifications from other workers (PostgreSQL only)"
+    )
+    RESPONSE_ROLLUP_REFRESH_SECONDS: float = Field(
+        default=60.0,
+        description="Seconds between incremental refreshes of the analytics rollups (0 disables; PostgreSQL only)"
+    )
+    GUEST_TOMBSTONE_RETENTION_DAYS: int = Field(
+        default=30,
+        description="Days deleted guests are kept for differential sync; older watermarks must reload"
+    )
+    
     # SQLAlchemy settings
     SQL_ECHO: bool = Field(
         default=False,
@@ -80,6 +126,18 @@ class Settings(BaseSettings):
         default="your_verify_token_here",
         description="WhatsApp API verification token"
     )
+    MESSAGE_RULES_PATH: Optional[str] = Field(
+        default=None,
+        description="JSON message classification rules (default: services/data/message_rules.json)"
+    )
+    REPLY_ROUTES_PATH: Optional[str] = Field(
+        default=None,
+        description="JSON reply routing table (default: services/data/reply_routes.json)"
+    )
+    REPLY_ROUTES_WATCH_SECONDS: float = Field(
+        default=2.0,
+        description="Seconds between checks of the reply routing file for changes (0 disables)"
+    )
     
     # File-based configuration
     model_config = {
@@ -113,6 +171,20 @@ class Settings(BaseSettings):
         # Frontend is expected to be at app/frontend/build
         return os.path.join(base_dir, "frontend", "build")
     
+    @field_validator("DATABASE_URI", "DATABASE_REPLICA_URI")
+    def check_database_backend(cls, v: Optional[str], info) -> Optional[str]:
+        """Reject database URIs of backends without an async driver."""
+        if not v:
+            return v
+        try:
+            backend = make_url(v).get_backend_name()
+        except ArgumentError:
+            raise ValueError(f"{info.field_name} is not a valid database URI")
+        if backend not in ASYNC_DATABASE_DRIVERS:
+            supported = ", ".join(sorted(ASYNC_DATABASE_DRIVERS))
+            raise ValueError(f"{info.field_name} uses unsupported database backend {backend!r} (supported: {supported})")
+        return v
+    
     def MODEL_DUMP_JSON(self, **kwargs) -> str:
         """Custom JSON dumping method that handles Enums properly."""
         import json
@@ -4,7 +4,9 @@ Database package initialization.
 This module initializes the database package and exports key components
 for easy access from other parts of the application.
 """
-from app.backend.db.session import get_db, get_db_session
+from app.backend.db.session import (
+    get_db, get_async_db, get_read_db, get_async_read_db, get_db_session, unit_of_work
+)
 from app.backend.db.models import (
     Base,
     UserResponse,
@@ -20,7 +22,11 @@ from app.backend.db.models import (
 
 __all__ = [
     "get_db",
+    "get_async_db",
+    "get_read_db",
+    "get_async_read_db",
     "get_db_session",
+    "unit_of_work",
     "Base",
     "UserResponse",
     "RsvpGuest",
@@ -4,33 +4,133 @@ CRUD operations for the database models.
 This module provides Create, Read, Update, Delete operations for database models.
 It serves as an abstraction layer between the API endpoints and the database.
 """
-from datetime import datetime
-from typing import List, Optional, Dict, Any, Union
+import re
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Dict, Any, Iterable, NamedTuple, Tuple, Union
 
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    DateTime, case, delete, event, func, insert, literal_column, select, text, true, tuple_, type_coerce,
+    update, ColumnElement, Executable, Select, Row
+)
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ORMExecuteState, Session
 
-from app.backend.db.models import UserResponse, RsvpGuest, get_rsvp_statistics, RsvpStats
+from app.backend.db.models import (
+    ConversationState, UserResponse, RsvpGuest, RsvpGuestTombstone, RsvpStats, ResponseRollupHourly,
+    SentTemplate, TemplateSendRollupHourly, commit_or_flush, parse_guest_id,
+    get_rsvp_statistics, rsvp_statistics_query, rsvp_stats_from_row
+)
+from backend.services.guest_facets import guest_facet_index
+from backend.services.guest_search_index import guest_search_index
+from backend.services.cache_notifications import NOTIFY_CHANGES_STATEMENT
+from backend.services.rsvp_events import rsvp_event_broadcaster
+from backend.services.stats_cache import rsvp_stats_cache
+
+
+# Default and maximum number of guest search results
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+# Default and maximum number of changed guests (and of deleted guests) per sync page
+DEFAULT_SYNC_LIMIT = 500
+MAX_SYNC_LIMIT = 5000
+
+# Seconds a guest write may take to commit after its updated_at was set.
+# Sync watermarks never move past changes this recent, so a transaction
+# committing late is still picked up; recent rows are re-sent instead.
+GUEST_SYNC_SETTLE_SECONDS = 5.0
+
+# Longest range of a response time series, in hourly buckets
+MAX_TIME_SERIES_HOURS = 24 * 92
+
+# RSVP status of each invitation button payload (as in the process_user_response trigger)
+BUTTON_RSVP_STATUSES = {"1": "confirmed", "2": "declined", "3": "pending"}
+
+# Fewer digits than this are not treated as a phone number search
+MIN_PHONE_SEARCH_DIGITS = 3
+
+# Hebrew niqqud and cantillation marks, ignored when searching
+_NIQQUD_PATTERN = re.compile("[\u0591-\u05C7]")
+
+# Must match the expression of idx_rsvp_guests_phone_digits_trgm (migration 010)
+_PHONE_DIGITS_SQL = "regexp_replace(phone_number, '\\D', '', 'g')"
+
+# Planner row estimate, free regardless of table size (PostgreSQL only)
+_GUEST_COUNT_ESTIMATE_QUERY = text(
+    "SELECT reltuples::bigint FROM pg_class WHERE oid = 'rsvp_guests'::regclass"
+)
+
+
+# A guest's directory entry, as in the guest snapshot (PostgreSQL schema)
+_GUEST_SUMMARY_QUERY = text(
+    "SELECT phone_number, rsvp_status, num_guests, name FROM rsvp_guests WHERE phone_number = :phone_number"
+)
+
+
+# Session.info key of the search and facet index changes waiting for the transaction to commit
+_GUEST_INDEX_SYNC_KEY = "guest_search_index_sync"
+
+# Tables the RSVP statistics are computed from, and the Session.info key
+# marking a transaction that wrote to them
+_RSVP_STATS_TABLES = frozenset({UserResponse.__tablename__, RsvpGuest.__tablename__})
+_RSVP_STATS_CHANGED_KEY = "rsvp_stats_changed"
+
+# Session.info key of the guest ids written in the transaction, for live events
+_RSVP_EVENT_GUESTS_KEY = "rsvp_event_guests"
+
+
+def _escape_like(value: str) -> str:
+    """Escape LIKE wildcards so user input is matched literally."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
 
 
 # UserResponse CRUD operations
-def create_user_response(db: Session, response_data: Dict[str, Any]) -> UserResponse:
+def create_user_response(db: Session, response_data: Dict[str, Any], commit: bool = True) -> UserResponse:
     """
     Create a new user response record.
     
     Args:
         db: Database session
         response_data: Dictionary containing response data
+        commit: Commit immediately; pass False to only flush and leave the
+            transaction to the caller
         
     Returns:
         The created UserResponse object
     """
     response = UserResponse(**response_data)
     db.add(response)
-    db.commit()
-    db.refresh(response)
+    commit_or_flush(db, commit)
     return response
 
 
+def bulk_create_user_responses(db: Session, responses: Iterable[Dict[str, Any]]) -> List[Row]:
+    """
+    Insert many user responses with a single INSERT ... RETURNING.
+    
+    Runs in the caller's transaction and does not commit.
+    
+    Args:
+        db: Database session
+        responses: Dictionaries of UserResponse column values
+        
+    Returns:
+        (id, phone_number, created_at) rows, in input order
+    """
+    rows = list(responses)
+    if not rows:
+        return []
+    query = insert(UserResponse).returning(
+        UserResponse.id, UserResponse.phone_number, UserResponse.created_at,
+        sort_by_parameter_order=True
+    )
+    created = db.execute(query, rows).all()
+    _notify_cache_changes(db, UserResponse.__tablename__, (row.phone_number for row in created))
+    return created
+
+
 def get_user_response(db: Session, response_id: int) -> Optional[UserResponse]:
     """
     Get a user response by ID.
@@ -59,6 +159,86 @@ def get_user_responses_by_phone(db: Session, phone_number: str) -> List[UserResp
     return db.query(UserResponse).filter(UserResponse.phone_number == phone_number).order_by(UserResponse.created_at).all()
 
 
+def get_conversation_state(db: Session, phone_number: str) -> Optional[ConversationState]:
+    """
+    Get the conversation state of a phone number (primary key lookup).
+    
+    Args:
+        db: Database session
+        phone_number: Phone number
+        
+    Returns:
+        ConversationState object if the phone has one, None otherwise
+    """
+    return db.get(ConversationState, phone_number, populate_existing=True)
+
+
+def save_conversation_state(
+    db: Session,
+    values: Dict[str, Any],
+    expected_version: int
+) -> Tuple[bool, Optional[str]]:
+    """
+    Write a phone's conversation state if it is still at expected_version.
+    
+    Version 0 means the phone has no stored state yet; the row is then
+    inserted unless another transaction inserted it first. Runs in the
+    caller's transaction and does not commit.
+    
+    Args:
+        db: Database session
+        values: ConversationState column values, including the new version
+        expected_version: Version the new state was derived from
+        
+    Returns:
+        Whether the state was written, and on PostgreSQL the id of the
+        writing transaction (the version of its cache change notifications)
+    """
+    dialect = db.connection().dialect.name
+    if expected_version == 0:
+        if dialect == "postgresql":
+            statement = postgresql_insert(ConversationState).values(**values).on_conflict_do_nothing()
+        elif dialect == "sqlite":
+            statement = sqlite_insert(ConversationState).values(**values).on_conflict_do_nothing()
+        else:
+            statement = insert(ConversationState).values(**values)
+    else:
+        statement = update(ConversationState).where(
+            ConversationState.phone_number == values["phone_number"],
+            ConversationState.version == expected_version
+        ).values(**values).execution_options(synchronize_session=False)
+    if dialect == "postgresql":
+        row = db.execute(statement.returning(literal_column("pg_current_xact_id()::text"))).first()
+        return row is not None, row[0] if row is not None else None
+    return db.execute(statement).rowcount == 1, None
+
+
+def record_sent_template(db: Session, message_sid: str, phone_number: str, template_sid: str) -> None:
+    """
+    Log a sent template message and commit, so responses replying to it
+    are attributed to the template (see services/response_rollups.py).
+    
+    The SQLAlchemy counterpart of DataStorage.record_sent_template; a
+    message already logged is left as it is.
+    
+    Args:
+        db: Database session
+        message_sid: Twilio SID of the sent message
+        phone_number: Recipient phone number
+        template_sid: Twilio content template SID
+    """
+    values = {"message_sid": message_sid, "phone_number": phone_number, "template_sid": template_sid}
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        statement = postgresql_insert(SentTemplate).values(**values).on_conflict_do_nothing()
+    elif dialect == "sqlite":
+        statement = sqlite_insert(SentTemplate).values(**values).on_conflict_do_nothing()
+    else:
+        statement = insert(SentTemplate).values(**values)
+    db.execute(statement)
+    db.commit()
+
+
 def get_user_responses_by_question(db: Session, question_key: str) -> List[UserResponse]:
     """
     Get all responses for a specific question.
@@ -73,7 +253,12 @@ def get_user_responses_by_question(db: Session, question_key: str) -> List[UserR
     return db.query(UserResponse).filter(UserResponse.question_key == question_key).order_by(UserResponse.created_at).all()
 
 
-def update_user_response(db: Session, response_id: int, update_data: Dict[str, Any]) -> Optional[UserResponse]:
+def update_user_response(
+    db: Session,
+    response_id: int,
+    update_data: Dict[str, Any],
+    commit: bool = True
+) -> Optional[UserResponse]:
     """
     Update user response information.
     
@@ -81,6 +266,8 @@ def update_user_response(db: Session, response_id: int, update_data: Dict[str, A
         db: Database session
         response_id: ID of the response to update
         update_data: Dictionary containing fields to update
+        commit: Commit immediately; pass False to only flush and leave the
+            transaction to the caller
         
     Returns:
         Updated UserResponse object or None if not found
@@ -93,30 +280,104 @@ def update_user_response(db: Session, response_id: int, update_data: Dict[str, A
         if hasattr(response, key):
             setattr(response, key, value)
     
-    db.commit()
-    db.refresh(response)
+    commit_or_flush(db, commit)
     return response
 
 
 # RsvpGuest CRUD operations
-def create_rsvp_guest(db: Session, guest_data: Dict[str, Any]) -> RsvpGuest:
+def create_rsvp_guest(db: Session, guest_data: Dict[str, Any], commit: bool = True) -> RsvpGuest:
     """
     Create a new RSVP guest record.
     
     Args:
         db: Database session
         guest_data: Dictionary containing guest data
+        commit: Commit immediately; pass False to only flush and leave the
+            transaction to the caller
         
     Returns:
         The created RsvpGuest object
     """
     guest = RsvpGuest(**guest_data)
     db.add(guest)
-    db.commit()
-    db.refresh(guest)
+    db.flush()
+    _queue_guest_search_index_sync(db, [guest.id])
+    commit_or_flush(db, commit)
     return guest
 
 
+def bulk_create_rsvp_guests(db: Session, guests: Iterable[Dict[str, Any]]) -> List[int]:
+    """
+    Insert many RSVP guests with a single INSERT ... RETURNING.
+    
+    Runs in the caller's transaction and does not commit.
+    
+    Args:
+        db: Database session
+        guests: Dictionaries of RsvpGuest column values
+        
+    Returns:
+        IDs of the created guests, in input order
+    """
+    rows = list(guests)
+    if not rows:
+        return []
+    query = insert(RsvpGuest).returning(RsvpGuest.id, sort_by_parameter_order=True)
+    guest_ids = db.execute(query, rows).scalars().all()
+    _queue_guest_search_index_sync(db, guest_ids)
+    _notify_cache_changes(db, RsvpGuest.__tablename__, guest_ids)
+    return guest_ids
+
+
+def bulk_update_rsvp_guests(db: Session, updates: Iterable[Dict[str, Any]]) -> int:
+    """
+    Update many RSVP guests by primary key in one executemany UPDATE.
+    
+    Each dictionary carries the guest "id" plus the fields to change; keys
+    that are not RsvpGuest columns are ignored. Runs in the caller's
+    transaction and does not commit.
+    
+    Args:
+        db: Database session
+        updates: Dictionaries with "id" and the fields to update
+        
+    Returns:
+        Number of guests updated
+    """
+    columns = set(RsvpGuest.__table__.columns.keys())
+    rows = [
+        {key: value for key, value in fields.items() if key in columns}
+        for fields in updates
+    ]
+    if not rows:
+        return 0
+    # Rows with different key sets are grouped into separate executemany batches
+    db.execute(update(RsvpGuest), rows)
+    _queue_guest_search_index_sync(db, [row["id"] for row in rows])
+    _notify_cache_changes(db, RsvpGuest.__tablename__, (row["id"] for row in rows))
+    return len(rows)
+
+
+def bulk_upsert_guests(db: Session, guests: Iterable[Dict[str, Any]]) -> List[int]:
+    """
+    Create or update many RSVP guests in the caller's transaction.
+    
+    Dictionaries with an "id" update that guest, the others are inserted.
+    
+    Args:
+        db: Database session
+        guests: Dictionaries of RsvpGuest column values
+        
+    Returns:
+        Guest IDs, in input order
+    """
+    rows = list(guests)
+    updates = [row for row in rows if row.get("id") is not None]
+    created = iter(bulk_create_rsvp_guests(db, (row for row in rows if row.get("id") is None)))
+    bulk_update_rsvp_guests(db, updates)
+    return [row["id"] if row.get("id") is not None else next(created) for row in rows]
+
+
 def get_rsvp_guest(db: Session, guest_id: int) -> Optional[RsvpGuest]:
     """
     Get an RSVP guest by ID.
@@ -145,7 +406,769 @@ def get_rsvp_guests_by_response(db: Session, user_response_id: int) -> List[Rsvp
     return db.query(RsvpGuest).filter(RsvpGuest.user_response_id == user_response_id).all()
 
 
-def update_rsvp_guest(db: Session, guest_id: int, update_data: Dict[str, Any]) -> Optional[RsvpGuest]:
+def rsvp_guest_listing_query() -> Select:
+    """
+    Build the column-projected guest listing query.
+    
+    Selects only the columns the API returns and joins the phone number in,
+    so no ORM objects are hydrated and no lazy loads are triggered.
+    
+    Returns:
+        Select statement yielding one row per guest
+    """
+    return select(
+        RsvpGuest.id,
+        RsvpGuest.name,
+        RsvpGuest.attending,
+        RsvpGuest.dietary_restrictions,
+        UserResponse.phone_number,
+        RsvpGuest.created_at,
+        RsvpGuest.updated_at
+    ).select_from(RsvpGuest).outerjoin(
+        UserResponse, RsvpGuest.user_response_id == UserResponse.id
+    )
+
+
+def rsvp_guest_index_query(dialect_name: str) -> Select:
+    """
+    Build the query loading guests into the search and facet indexes.
+    
+    Yields listing rows. On PostgreSQL the phone number is read from
+    rsvp_guests.phone_number, which the guest trigger and DataStorage
+    maintain and return to the indexes on every write; the listing join
+    through user_response_id misses guests created by the trigger, which
+    never sets it. Other databases use the listing query.
+    
+    Args:
+        dialect_name: Name of the database dialect (e.g. "postgresql")
+        
+    Returns:
+        Select statement yielding one row per guest
+    """
+    if dialect_name != "postgresql":
+        return rsvp_guest_listing_query()
+    return select(
+        RsvpGuest.id,
+        RsvpGuest.name,
+        RsvpGuest.attending,
+        RsvpGuest.dietary_restrictions,
+        literal_column("rsvp_guests.phone_number").label("phone_number"),
+        RsvpGuest.created_at,
+        RsvpGuest.updated_at
+    ).select_from(RsvpGuest)
+
+
+def serialize_guest_row(row) -> Dict[str, Any]:
+    """Convert a projected guest row into its API representation."""
+    return {
+        "id": row.id,
+        "name": row.name,
+        "attending": row.attending,
+        "dietary_restrictions": row.dietary_restrictions,
+        "phone_number": row.phone_number,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "updated_at": row.updated_at.isoformat() if row.updated_at else None
+    }
+
+
+def _queue_guest_search_index_sync(db: Session, guest_ids: List[int]) -> None:
+    """
+    Read back written guests for the in-memory search and facet indexes.
+    
+    The rows are applied when the session commits and dropped if it rolls
+    back (see _apply_guest_search_index_sync).
+    """
+    if (guest_search_index.tracking or guest_facet_index.tracking) and guest_ids:
+        query = rsvp_guest_index_query(db.get_bind().dialect.name)
+        rows = db.execute(query.where(RsvpGuest.id.in_(guest_ids))).all()
+        db.info.setdefault(_GUEST_INDEX_SYNC_KEY, []).extend(("upsert", row) for row in rows)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_guest_search_index_sync(db: Session) -> None:
+    """Apply the guest writes queued in this transaction to the search and facet indexes."""
+    for operation, value in db.info.pop(_GUEST_INDEX_SYNC_KEY, ()):
+        for index in (guest_search_index, guest_facet_index):
+            if index.tracking:
+                if operation == "upsert":
+                    index.upsert(value)
+                else:
+                    index.remove(value)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_guest_search_index_sync(db: Session) -> None:
+    """Forget guest writes that were rolled back."""
+    db.info.pop(_GUEST_INDEX_SYNC_KEY, None)
+
+
+def _notify_cache_changes(db: Session, table: str, keys: Iterable[Any]) -> None:
+    """
+    Tell other workers' caches about written rows (PostgreSQL only).
+    
+    The notification is sent in the session's transaction, so it is only
+    delivered if the transaction commits (see services/cache_notifications.py).
+    Guest ids are also kept for this worker's live events.
+    """
+    keys = list(keys)
+    if table == RsvpGuest.__tablename__:
+        db.info.setdefault(_RSVP_EVENT_GUESTS_KEY, set()).update(keys)
+    keys = sorted({str(key) for key in keys})
+    if keys:
+        connection = db.connection()
+        if connection.dialect.name == "postgresql":
+            connection.execute(text(NOTIFY_CHANGES_STATEMENT), {"table": table, "keys": keys})
+
+
+@event.listens_for(Session, "after_flush")
+def _track_rsvp_flush(db: Session, flush_context) -> None:
+    """Note unit-of-work writes to guests and responses, and publish their keys."""
+    guest_ids, phone_numbers = set(), set()
+    for instance in (*db.new, *db.dirty, *db.deleted):
+        if isinstance(instance, RsvpGuest):
+            guest_ids.add(instance.id)
+        elif isinstance(instance, UserResponse):
+            phone_numbers.add(instance.phone_number)
+    if guest_ids or phone_numbers:
+        db.info[_RSVP_STATS_CHANGED_KEY] = True
+        _notify_cache_changes(db, RsvpGuest.__tablename__, guest_ids)
+        _notify_cache_changes(db, UserResponse.__tablename__, phone_numbers)
+
+
+@event.listens_for(Session, "after_flush")
+def _record_guest_tombstones(db: Session, flush_context) -> None:
+    """
+    Log guests deleted in the unit of work for differential sync.
+    
+    On PostgreSQL the rsvp_guest_tombstones trigger does this for every
+    client (migration 013).
+    """
+    guest_ids = [instance.id for instance in db.deleted if isinstance(instance, RsvpGuest)]
+    if guest_ids:
+        connection = db.connection()
+        if connection.dialect.name != "postgresql":
+            deleted_at = datetime.utcnow()
+            connection.execute(
+                insert(RsvpGuestTombstone),
+                [{"guest_id": str(guest_id), "deleted_at": deleted_at} for guest_id in guest_ids]
+            )
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_rsvp_stats_statement(state: ORMExecuteState) -> None:
+    """Note bulk INSERT/UPDATE/DELETE statements on the statistics tables."""
+    if (state.is_insert or state.is_update or state.is_delete) and state.bind_mapper is not None \
+            and state.bind_mapper.local_table.name in _RSVP_STATS_TABLES:
+        state.session.info[_RSVP_STATS_CHANGED_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_rsvp_stats(db: Session) -> None:
+    """Drop the cached RSVP statistics once a write to their tables commits, and publish it."""
+    guest_ids = db.info.pop(_RSVP_EVENT_GUESTS_KEY, ())
+    if db.info.pop(_RSVP_STATS_CHANGED_KEY, False):
+        rsvp_stats_cache.invalidate()
+        rsvp_event_broadcaster.publish_local(guest_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rsvp_stats_changes(db: Session) -> None:
+    """Rolled back writes leave the statistics unchanged."""
+    db.info.pop(_RSVP_STATS_CHANGED_KEY, None)
+    db.info.pop(_RSVP_EVENT_GUESTS_KEY, None)
+
+
+def rsvp_guest_page_query(
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Tuple[datetime, Any]] = None
+) -> Select:
+    """
+    Build the query for a page of RSVP guests, newest first.
+    
+    Pass the (created_at, id) of the last row of the previous page as
+    `after` for keyset pagination, which seeks directly via the
+    (created_at, id) index instead of scanning and discarding skipped rows.
+    
+    Args:
+        skip: Number of records to skip (ignored when `after` is given)
+        limit: Maximum number of records to return
+        after: Keyset position to continue after
+        
+    Returns:
+        Select statement (see rsvp_guest_listing_query)
+    """
+    query = rsvp_guest_listing_query().order_by(
+        RsvpGuest.created_at.desc(), RsvpGuest.id.desc()
+    ).limit(limit)
+    
+    if after is not None:
+        query = query.where(tuple_(RsvpGuest.created_at, RsvpGuest.id) < tuple_(*after))
+    elif skip:
+        query = query.offset(skip)
+    return query
+
+
+def get_rsvp_guest_rows(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Tuple[datetime, Any]] = None
+) -> List[Row]:
+    """
+    Get a page of RSVP guests as projected rows, newest first.
+    
+    Args:
+        db: Database session
+        skip: Number of records to skip (ignored when `after` is given)
+        limit: Maximum number of records to return
+        after: Keyset position to continue after (see rsvp_guest_page_query)
+        
+    Returns:
+        List of guest rows (see rsvp_guest_listing_query)
+    """
+    return db.execute(rsvp_guest_page_query(skip, limit, after)).all()
+
+
+async def get_rsvp_guest_rows_async(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Tuple[datetime, Any]] = None
+) -> List[Row]:
+    """Async version of get_rsvp_guest_rows."""
+    return (await db.execute(rsvp_guest_page_query(skip, limit, after))).all()
+
+
+async def get_guest_summary_async(db: AsyncSession, phone_number: str) -> Optional[Dict[str, Any]]:
+    """
+    Get a guest's RSVP status, number of guests and name (PostgreSQL).
+    
+    The database side of the guest snapshot lookup (see
+    services/guest_snapshot.py).
+    
+    Args:
+        db: Async database session
+        phone_number: Phone number as unique identifier
+        
+    Returns:
+        Dictionary with phone_number, rsvp_status, num_guests and name,
+        or None if the guest is not found
+    """
+    row = (await db.execute(_GUEST_SUMMARY_QUERY, {"phone_number": phone_number})).first()
+    return dict(row._mapping) if row is not None else None
+
+
+def estimate_rsvp_guest_count(db: Session) -> int:
+    """
+    Get the approximate number of RSVP guests.
+    
+    On PostgreSQL this reads the planner's row estimate from pg_class,
+    which costs nothing regardless of table size. It falls back to an
+    exact COUNT(*) on other databases or before the table is analyzed.
+    
+    Args:
+        db: Database session
+        
+    Returns:
+        Estimated number of guests
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        estimate = db.execute(_GUEST_COUNT_ESTIMATE_QUERY).scalar()
+        if estimate is not None and estimate >= 0:
+            return int(estimate)
+    return db.execute(select(func.count()).select_from(RsvpGuest)).scalar_one()
+
+
+async def estimate_rsvp_guest_count_async(db: AsyncSession) -> int:
+    """Async version of estimate_rsvp_guest_count."""
+    if db.get_bind().dialect.name == "postgresql":
+        estimate = (await db.execute(_GUEST_COUNT_ESTIMATE_QUERY)).scalar()
+        if estimate is not None and estimate >= 0:
+            return int(estimate)
+    return (await db.execute(select(func.count()).select_from(RsvpGuest))).scalar_one()
+
+
+# Keyset position in a change log: (timestamp, id). An id of None means
+# "from this timestamp on", inclusive.
+SyncPosition = Tuple[datetime, Any]
+
+
+class GuestChanges(NamedTuple):
+    """A page of guest changes after a sync watermark."""
+    rows: List[Row]
+    deleted: List[str]
+    guests_after: Optional[SyncPosition]
+    tombstones_after: Optional[SyncPosition]
+    has_more: bool
+    database_now: datetime
+
+
+def _after_position(timestamp_column, id_column, position: Optional[SyncPosition]) -> ColumnElement:
+    """Condition selecting log entries after a keyset position."""
+    if position is None:
+        return true()
+    if position[1] is None:
+        return timestamp_column >= position[0]
+    return tuple_(timestamp_column, id_column) > tuple_(*position)
+
+
+def rsvp_guest_changes_query(after: Optional[SyncPosition], limit: int) -> Select:
+    """
+    Build the query for guests inserted or updated after a sync position.
+    
+    Seeks via the (updated_at, id) index (idx_rsvp_guests_updated_at_id).
+    """
+    return rsvp_guest_listing_query().where(
+        _after_position(RsvpGuest.updated_at, RsvpGuest.id, after)
+    ).order_by(RsvpGuest.updated_at, RsvpGuest.id).limit(limit)
+
+
+def rsvp_guest_tombstones_query(after: Optional[SyncPosition], limit: int) -> Select:
+    """Build the query for guests deleted after a sync position."""
+    return select(
+        RsvpGuestTombstone.id, RsvpGuestTombstone.guest_id, RsvpGuestTombstone.deleted_at
+    ).where(
+        _after_position(RsvpGuestTombstone.deleted_at, RsvpGuestTombstone.id, after)
+    ).order_by(RsvpGuestTombstone.deleted_at, RsvpGuestTombstone.id).limit(limit)
+
+
+def _advance_position(
+    position: Optional[SyncPosition],
+    last: Optional[SyncPosition],
+    full_page: bool,
+    horizon: datetime
+) -> Tuple[Optional[SyncPosition], bool]:
+    """
+    Move a sync position past a page, but not past the settle horizon.
+    
+    Returns:
+        The new position, and whether more entries are ready to read now
+    """
+    if last is None or last[0] >= horizon:
+        # Nothing older than the horizon is left: continue from the horizon,
+        # re-reading any more recent entries next time
+        if position is not None and position[0] >= horizon:
+            return position, False
+        return (horizon, None), False
+    return last, full_page
+
+
+def _guest_changes_page(
+    rows: List[Row],
+    tombstones: List[Row],
+    guests_after: Optional[SyncPosition],
+    tombstones_after: Optional[SyncPosition],
+    limit: int,
+    now: datetime,
+    settle_seconds: Optional[float]
+) -> GuestChanges:
+    """Build a GuestChanges page from the rows read after both positions."""
+    if settle_seconds is None:
+        settle_seconds = GUEST_SYNC_SETTLE_SECONDS
+    horizon = now - timedelta(seconds=settle_seconds)
+    
+    guests_position, more_guests = _advance_position(
+        guests_after, (rows[-1].updated_at, rows[-1].id) if rows else None, len(rows) == limit, horizon
+    )
+    tombstones_position, more_tombstones = _advance_position(
+        tombstones_after,
+        (tombstones[-1].deleted_at, tombstones[-1].id) if tombstones else None,
+        len(tombstones) == limit,
+        horizon
+    )
+    return GuestChanges(
+        rows=rows,
+        deleted=[tombstone.guest_id for tombstone in tombstones],
+        guests_after=guests_position,
+        tombstones_after=tombstones_position,
+        has_more=more_guests or more_tombstones,
+        database_now=now
+    )
+
+
+# Current time on the database clock (triggers stamp rows with it on PostgreSQL)
+_DATABASE_NOW_QUERY = select(type_coerce(func.now(), DateTime))
+
+
+def get_rsvp_guest_changes(
+    db: Session,
+    guests_after: Optional[SyncPosition] = None,
+    tombstones_after: Optional[SyncPosition] = None,
+    limit: int = DEFAULT_SYNC_LIMIT,
+    settle_seconds: Optional[float] = None
+) -> GuestChanges:
+    """
+    Get guests changed and deleted after a sync watermark.
+    
+    Changed guests are read through the (updated_at, id) index and deleted
+    ones from the tombstone log, each after its own keyset position. The
+    returned positions never pass changes younger than settle_seconds, so
+    a write whose transaction commits late is still seen; clients apply
+    changes idempotently and may receive recent rows twice.
+    
+    Args:
+        db: Database session
+        guests_after: Position in the guest change log (None: from the start)
+        tombstones_after: Position in the tombstone log (None: from the start)
+        limit: Maximum number of changed and of deleted guests
+        settle_seconds: Age before a change is passed by the watermark
+            (default GUEST_SYNC_SETTLE_SECONDS)
+        
+    Returns:
+        The changes and the positions to continue after
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        now = db.execute(_DATABASE_NOW_QUERY).scalar_one()
+    else:
+        # The ORM stamps rows with datetime.utcnow
+        now = datetime.utcnow()
+    rows = db.execute(rsvp_guest_changes_query(guests_after, limit)).all()
+    tombstones = db.execute(rsvp_guest_tombstones_query(tombstones_after, limit)).all()
+    return _guest_changes_page(rows, tombstones, guests_after, tombstones_after, limit, now, settle_seconds)
+
+
+async def get_rsvp_guest_changes_async(
+    db: AsyncSession,
+    guests_after: Optional[SyncPosition] = None,
+    tombstones_after: Optional[SyncPosition] = None,
+    limit: int = DEFAULT_SYNC_LIMIT,
+    settle_seconds: Optional[float] = None
+) -> GuestChanges:
+    """Async version of get_rsvp_guest_changes."""
+    if db.get_bind().dialect.name == "postgresql":
+        now = (await db.execute(_DATABASE_NOW_QUERY)).scalar_one()
+    else:
+        now = datetime.utcnow()
+    rows = (await db.execute(rsvp_guest_changes_query(guests_after, limit))).all()
+    tombstones = (await db.execute(rsvp_guest_tombstones_query(tombstones_after, limit))).all()
+    return _guest_changes_page(rows, tombstones, guests_after, tombstones_after, limit, now, settle_seconds)
+
+
+def purge_guest_tombstones(db: Session, before: datetime, commit: bool = True) -> int:
+    """
+    Delete tombstones of guests deleted before a time.
+    
+    Sync clients whose watermark is older than that must reload all guests.
+    
+    Args:
+        db: Database session
+        before: Oldest deletion time to keep
+        commit: Commit immediately; pass False to leave the transaction to the caller
+        
+    Returns:
+        Number of tombstones deleted
+    """
+    result = db.execute(delete(RsvpGuestTombstone).where(RsvpGuestTombstone.deleted_at < before))
+    commit_or_flush(db, commit)
+    return result.rowcount
+
+
+def utc_naive(value: datetime) -> datetime:
+    """Drop the time zone of an aware datetime, converting it to UTC first."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _rollup_filters(model, start: Optional[datetime], end: Optional[datetime], **dimensions) -> List[ColumnElement]:
+    """Conditions on a rollup table's bucket range and dimension columns."""
+    conditions = []
+    if start is not None:
+        conditions.append(model.bucket_start >= start)
+    if end is not None:
+        conditions.append(model.bucket_start < end)
+    for column, value in dimensions.items():
+        if value is not None:
+            conditions.append(getattr(model, column) == value)
+    return conditions
+
+
+def response_time_series_query(
+    start: datetime,
+    end: datetime,
+    response_type: Optional[str] = None,
+    button_payload: Optional[str] = None,
+    template_sid: Optional[str] = None
+) -> Select:
+    """Build the query for hourly response counts from the rollup (hours with responses only)."""
+    return select(
+        ResponseRollupHourly.bucket_start,
+        func.sum(ResponseRollupHourly.responses).label("responses"),
+        func.sum(ResponseRollupHourly.answered_sends).label("answered_sends"),
+        func.sum(ResponseRollupHourly.answer_seconds_sum).label("answer_seconds_sum")
+    ).where(*_rollup_filters(
+        ResponseRollupHourly, start, end,
+        response_type=response_type, button_payload=button_payload, template_sid=template_sid
+    )).group_by(ResponseRollupHourly.bucket_start).order_by(ResponseRollupHourly.bucket_start)
+
+
+def _average(total: Optional[float], count: Optional[int]) -> Optional[float]:
+    """Mean of a rolled up sum, None without data."""
+    return round(total / count, 1) if count else None
+
+
+async def get_response_time_series_async(
+    db: AsyncSession,
+    start: datetime,
+    end: datetime,
+    response_type: Optional[str] = None,
+    button_payload: Optional[str] = None,
+    template_sid: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Get responses per hour from the hourly rollup.
+    
+    Args:
+        db: Async database session
+        start: First hour (UTC, rounded down to the hour)
+        end: End of the range (UTC, exclusive)
+        response_type: Only count this response type
+        button_payload: Only count this button payload ('' for none)
+        template_sid: Only count answers to this template ('' for unattributed)
+        
+    Returns:
+        One point per hour, including hours without responses: bucket_start,
+        responses and the average seconds from send to answer
+    """
+    start = utc_naive(start).replace(minute=0, second=0, microsecond=0)
+    end = utc_naive(end)
+    rows = (await db.execute(response_time_series_query(
+        start, end, response_type, button_payload, template_sid
+    ))).all()
+    by_hour = {utc_naive(row.bucket_start): row for row in rows}
+    
+    points = []
+    bucket = start
+    while bucket < end:
+        row = by_hour.get(bucket)
+        points.append({
+            "bucket_start": bucket.isoformat(),
+            "responses": int(row.responses) if row else 0,
+            "avg_answer_seconds": _average(row.answer_seconds_sum, row.answered_sends) if row else None,
+        })
+        bucket += timedelta(hours=1)
+    return points
+
+
+async def get_response_funnel_async(
+    db: AsyncSession,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    template_sid: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Get the invitation funnel from the hourly rollups.
+    
+    Template sends lead to answers (the first reply to each logged send),
+    and button answers split into RSVP statuses by payload. Also reports
+    responses per type and, per template, sends, answers and the average
+    time to answer.
+    
+    Args:
+        db: Async database session
+        start: Count from this hour (UTC)
+        end: Count up to this hour (UTC, exclusive)
+        template_sid: Only count this template
+        
+    Returns:
+        Funnel counts
+    """
+    start = utc_naive(start) if start is not None else None
+    end = utc_naive(end) if end is not None else None
+    sends = (await db.execute(
+        select(
+            TemplateSendRollupHourly.template_sid,
+            func.sum(TemplateSendRollupHourly.sent).label("sent")
+        ).where(*_rollup_filters(TemplateSendRollupHourly, start, end, template_sid=template_sid))
+        .group_by(TemplateSendRollupHourly.template_sid)
+    )).all()
+    responses = (await db.execute(
+        select(
+            ResponseRollupHourly.response_type,
+            ResponseRollupHourly.button_payload,
+            ResponseRollupHourly.template_sid,
+            func.sum(ResponseRollupHourly.responses).label("responses"),
+            func.sum(ResponseRollupHourly.answered_sends).label("answered_sends"),
+            func.sum(ResponseRollupHourly.answer_seconds_sum).label("answer_seconds_sum")
+        ).where(*_rollup_filters(ResponseRollupHourly, start, end, template_sid=template_sid))
+        .group_by(
+            ResponseRollupHourly.response_type,
+            ResponseRollupHourly.button_payload,
+            ResponseRollupHourly.template_sid
+        )
+    )).all()
+    
+    templates: Dict[str, Dict[str, Any]] = {}
+    
+    def template_entry(sid: str) -> Dict[str, Any]:
+        return templates.setdefault(sid, {"sent": 0, "answered": 0, "answer_seconds_sum": 0.0})
+    
+    for row in sends:
+        template_entry(row.template_sid)["sent"] += int(row.sent)
+    
+    by_response_type: Dict[str, int] = {}
+    rsvp = {status: 0 for status in BUTTON_RSVP_STATUSES.values()}
+    answered = 0
+    answer_seconds = 0.0
+    for row in responses:
+        count = int(row.responses)
+        by_response_type[row.response_type] = by_response_type.get(row.response_type, 0) + count
+        if row.response_type == "button" and row.button_payload in BUTTON_RSVP_STATUSES:
+            rsvp[BUTTON_RSVP_STATUSES[row.button_payload]] += count
+        answered += int(row.answered_sends)
+        answer_seconds += float(row.answer_seconds_sum)
+        if row.template_sid:
+            entry = template_entry(row.template_sid)
+            entry["answered"] += int(row.answered_sends)
+            entry["answer_seconds_sum"] += float(row.answer_seconds_sum)
+    
+    sent = sum(entry["sent"] for entry in templates.values())
+    return {
+        "sent": sent,
+        "answered": answered,
+        "answer_rate": round(answered / sent, 4) if sent else None,
+        "avg_answer_seconds": _average(answer_seconds, answered),
+        "rsvp": rsvp,
+        "responses": sum(by_response_type.values()),
+        "by_response_type": by_response_type,
+        "templates": [
+            {
+                "template_sid": sid,
+                "sent": entry["sent"],
+                "answered": entry["answered"],
+                "avg_answer_seconds": _average(entry["answer_seconds_sum"], entry["answered"]),
+            }
+            for sid, entry in sorted(templates.items())
+        ],
+    }
+
+
+def rsvp_guest_search_query(
+    dialect_name: str,
+    search: str,
+    limit: int = DEFAULT_SEARCH_LIMIT
+) -> Optional[Executable]:
+    """
+    Build the fuzzy guest search query for a database dialect.
+    
+    On PostgreSQL names are matched with pg_trgm word similarity (typos and
+    partial words, Hebrew or Latin) and phones by a substring of their
+    digits, both served by the trigram indexes from migration 010. Other
+    databases fall back to substring matching.
+    
+    Args:
+        dialect_name: Name of the database dialect (e.g. "postgresql")
+        search: Search term (name, or any part of a phone number)
+        limit: Maximum number of results
+        
+    Returns:
+        Statement yielding guest rows best match first (see
+        rsvp_guest_listing_query), or None if the term is empty
+    """
+    term = _NIQQUD_PATTERN.sub("", search).strip()
+    # Leading zeros are the local trunk prefix (050-...), stored numbers are +972...
+    digits = re.sub(r"\D", "", search).lstrip("0")
+    if len(digits) < MIN_PHONE_SEARCH_DIGITS:
+        digits = ""
+    if not term:
+        return None
+    
+    name_pattern = "%" + _escape_like(term) + "%"
+    phone_pattern = "%" + digits + "%"
+    
+    if dialect_name == "postgresql":
+        scores = ["word_similarity(:term, name)", "CASE WHEN name ILIKE :name_pattern THEN 0.9 END"]
+        conditions = [":term <% name", "name ILIKE :name_pattern"]
+        params = {"term": term, "name_pattern": name_pattern, "limit": limit}
+        if digits:
+            scores.append(f"CASE WHEN {_PHONE_DIGITS_SQL} LIKE :phone_pattern THEN 1.0 END")
+            conditions.append(f"{_PHONE_DIGITS_SQL} LIKE :phone_pattern")
+            params["phone_pattern"] = phone_pattern
+        return text(f"""
+            SELECT id, name, attending, dietary_restrictions, phone_number,
+                   created_at, updated_at, GREATEST({', '.join(scores)}) AS score
+            FROM rsvp_guests
+            WHERE {' OR '.join(conditions)}
+            ORDER BY score DESC, name
+            LIMIT :limit
+        """).bindparams(**params)
+    
+    name_match = RsvpGuest.name.ilike(name_pattern, escape="\\")
+    condition = name_match
+    if digits:
+        condition = condition | UserResponse.phone_number.like(phone_pattern)
+    return rsvp_guest_listing_query().where(condition).order_by(
+        case((RsvpGuest.name.ilike(_escape_like(term) + "%", escape="\\"), 0), (name_match, 1), else_=2),
+        RsvpGuest.name
+    ).limit(limit)
+
+
+def search_rsvp_guest_rows(db: Session, search: str, limit: int = DEFAULT_SEARCH_LIMIT) -> List[Row]:
+    """
+    Fuzzy search RSVP guests by name or partial phone number, best match first.
+    
+    Args:
+        db: Database session
+        search: Search term (name, or any part of a phone number)
+        limit: Maximum number of results
+        
+    Returns:
+        List of matching guest rows (see rsvp_guest_search_query)
+    """
+    query = rsvp_guest_search_query(db.get_bind().dialect.name, search, limit)
+    return db.execute(query).all() if query is not None else []
+
+
+async def search_rsvp_guest_rows_async(
+    db: AsyncSession,
+    search: str,
+    limit: int = DEFAULT_SEARCH_LIMIT
+) -> List[Row]:
+    """Async version of search_rsvp_guest_rows."""
+    query = rsvp_guest_search_query(db.get_bind().dialect.name, search, limit)
+    return (await db.execute(query)).all() if query is not None else []
+
+
+async def get_rsvp_statistics_async(db: AsyncSession) -> RsvpStats:
+    """Async version of get_rsvp_statistics (one aggregate query)."""
+    return rsvp_stats_from_row((await db.execute(rsvp_statistics_query())).one())
+
+
+def rsvp_stats_summary(stats: Optional[RsvpStats]) -> Dict[str, Any]:
+    """
+    Build the /rsvp/stats response body from statistics.
+    
+    Args:
+        stats: Statistics from get_rsvp_statistics, or None
+        
+    Returns:
+        Guest totals and attendance rate, zeros when there are no statistics
+    """
+    if not stats:
+        return {
+            "total_guests": 0,
+            "attending_guests": 0,
+            "not_attending_guests": 0,
+            "attendance_rate": 0,
+            "total_responses": 0
+        }
+    
+    return {
+        "total_guests": stats.total_guests or 0,
+        "attending_guests": stats.attending_guests or 0,
+        "not_attending_guests": stats.not_attending_guests or 0,
+        "attendance_rate": stats.attendance_rate,
+        "total_responses": stats.total_responses or 0
+    }
+
+
+def update_rsvp_guest(
+    db: Session,
+    guest_id: int,
+    update_data: Dict[str, Any],
+    commit: bool = True
+) -> Optional[RsvpGuest]:
     """
     Update RSVP guest information.
     
@@ -153,6 +1176,8 @@ def update_rsvp_guest(db: Session, guest_id: int, update_data: Dict[str, Any]) -
         db: Database session
         guest_id: ID of the guest to update
         update_data: Dictionary containing fields to update
+        commit: Commit immediately; pass False to only flush and leave the
+            transaction to the caller
         
     Returns:
         Updated RsvpGuest object or None if not found
@@ -165,18 +1190,21 @@ def update_rsvp_guest(db: Session, guest_id: int, update_data: Dict[str, Any]) -
         if hasattr(guest, key):
             setattr(guest, key, value)
     
-    db.commit()
-    db.refresh(guest)
+    db.flush()
+    _queue_guest_search_index_sync(db, [guest.id])
+    commit_or_flush(db, commit)
     return guest
 
 
-def delete_rsvp_guest(db: Session, guest_id: int) -> bool:
+def delete_rsvp_guest(db: Session, guest_id: int, commit: bool = True) -> bool:
     """
     Delete an RSVP guest.
     
     Args:
         db: Database session
         guest_id: ID of the guest to delete
+        commit: Commit immediately; pass False to only flush and leave the
+            transaction to the caller
         
     Returns:
         True if deleted, False if not found
@@ -186,5 +1214,7 @@ def delete_rsvp_guest(db: Session, guest_id: int) -> bool:
         return False
         
     db.delete(guest)
-    db.commit()
+    if guest_search_index.tracking or guest_facet_index.tracking:
+        db.info.setdefault(_GUEST_INDEX_SYNC_KEY, []).append(("remove", guest_id))
+    commit_or_flush(db, commit)
     return True 
\ No newline at end of file
@@ -5,7 +5,7 @@ This module defines the ORM models for the database tables and views.
 """
 from sqlalchemy import (
     Column, Integer, String, Boolean, DateTime, ForeignKey, Text,
-    Float, func, text
+    Float, Index, JSON, Select, UniqueConstraint, func, select, text
 )
 from sqlalchemy.orm import relationship, Session
 from sqlalchemy.ext.declarative import declarative_base
@@ -14,7 +14,6 @@ from typing import List, Optional, Dict, Any, NamedTuple
 from datetime import datetime
 import os
 import sys
-from collections import defaultdict
 
 Base = declarative_base()
 
@@ -29,6 +28,12 @@ class UserResponse(Base):
     Represents a response from a user to a question or RSVP.
     """
     __tablename__ = "user_responses"
+    __table_args__ = (
+        # Serves "latest response per phone" lookups
+        Index("idx_user_responses_phone_updated_at", "phone_number", "updated_at"),
+        # Serves get_guest_by_phone (latest response by created_at)
+        Index("idx_user_responses_phone_created_at", "phone_number", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     phone_number = Column(String(20), nullable=False, index=True)
@@ -52,9 +57,15 @@ class RsvpGuest(Base):
     Represents a guest in an RSVP response.
     """
     __tablename__ = "rsvp_guests"
+    __table_args__ = (
+        # Keyset pagination of the guest listing (newest first)
+        Index("idx_rsvp_guests_created_at_id", "created_at", "id"),
+        # Differential sync: guests changed after a watermark
+        Index("idx_rsvp_guests_updated_at_id", "updated_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    user_response_id = Column(Integer, ForeignKey("user_responses.id"), nullable=False)
+    user_response_id = Column(Integer, ForeignKey("user_responses.id"), nullable=False, index=True)
     name = Column(String(100), nullable=False)
     attending = Column(Boolean, nullable=False)
     dietary_restrictions = Column(Text)
@@ -62,14 +73,155 @@ class RsvpGuest(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
-    user_response = relationship("UserResponse", back_populates="rsvp_guests")
+    # Listing and search paths project columns instead of loading this;
+    # an implicit lazy load raises so N+1 regressions surface in tests.
+    # Use joinedload/selectinload when the related object is needed.
+    user_response = relationship("UserResponse", back_populates="rsvp_guests", lazy="raise_on_sql")
     
     def __repr__(self):
         return f"<RsvpGuest(id={self.id}, name={self.name}, attending={self.attending})>"
 
 
+class RsvpGuestTombstone(Base):
+    """
+    Model for the rsvp_guest_tombstones table.
+    
+    Logs deleted guests so differential sync clients can drop them. On
+    PostgreSQL a delete trigger writes the rows (migration 013); elsewhere
+    the crud session hooks do.
+    """
+    __tablename__ = "rsvp_guest_tombstones"
+    __table_args__ = (
+        Index("idx_rsvp_guest_tombstones_deleted_at_id", "deleted_at", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    guest_id = Column(String(36), nullable=False)
+    deleted_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<RsvpGuestTombstone(guest_id={self.guest_id}, deleted_at={self.deleted_at})>"
+
+
+class SentTemplate(Base):
+    """
+    Model for the sent_templates table (migration 014).
+    
+    Template messages sent to guests; replies reference them by message SID.
+    """
+    __tablename__ = "sent_templates"
+    __table_args__ = (
+        Index("idx_sent_templates_sent_at", "sent_at"),
+    )
+    
+    message_sid = Column(String(64), primary_key=True)
+    phone_number = Column(String(20), nullable=False)
+    template_sid = Column(String(64), nullable=False)
+    sent_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class ResponseRollupHourly(Base):
+    """
+    Model for the response_rollups_hourly table.
+    
+    Responses per hour, response type, button payload and template, kept
+    up to date by services/response_rollups.py (migration 014). Missing
+    payloads and templates are stored as ''.
+    """
+    __tablename__ = "response_rollups_hourly"
+    
+    bucket_start = Column(DateTime, primary_key=True)
+    response_type = Column(String(50), primary_key=True)
+    button_payload = Column(Text, primary_key=True, default="")
+    template_sid = Column(String(64), primary_key=True, default="")
+    responses = Column(Integer, nullable=False, default=0)
+    answered_sends = Column(Integer, nullable=False, default=0)
+    answer_seconds_sum = Column(Float, nullable=False, default=0.0)
+
+
+class TemplateSendRollupHourly(Base):
+    """Model for the template_send_rollups_hourly table: template sends per hour."""
+    __tablename__ = "template_send_rollups_hourly"
+    
+    bucket_start = Column(DateTime, primary_key=True)
+    template_sid = Column(String(64), primary_key=True)
+    sent = Column(Integer, nullable=False, default=0)
+
+
+class ReplyRoute(Base):
+    """
+    Model for the reply_routes table (migration 016).
+    
+    Reply routes that override or extend the routing file
+    (services/reply_routes.py). An empty button payload or text matches
+    any; changes are notified to every worker, which reloads its table.
+    """
+    __tablename__ = "reply_routes"
+    __table_args__ = (
+        UniqueConstraint("category", "button_payload", "button_text", name="uq_reply_routes_key"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False)
+    category = Column(String(20), nullable=False)
+    button_payload = Column(String(255), nullable=False, default="")
+    button_text = Column(String(255), nullable=False, default="")
+    template_sid = Column(String(64), nullable=False)
+    response = Column(JSON, nullable=False, default=dict)
+    variables = Column(JSON, nullable=True)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class ConversationState(Base):
+    """
+    Model for the conversation_states table (migration 017).
+    
+    Where each phone's conversation stands: its step in the conversation
+    state machine (services/conversation_state.py), the last template sent
+    and message counters. version counts the transitions and guards writes
+    made from a stale cached state.
+    """
+    __tablename__ = "conversation_states"
+    
+    phone_number = Column(String(20), primary_key=True)
+    step = Column(String(30), nullable=False, default="new")
+    last_template_sid = Column(String(64), nullable=True)
+    message_count = Column(Integer, nullable=False, default=0)
+    question_count = Column(Integer, nullable=False, default=0)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 # Helper functions for SQLAlchemy models
-def create_response(db: Session, phone_number: str, question_key: str, response_data: Dict[str, Any]) -> UserResponse:
+def parse_guest_id(guest_id: str) -> Any:
+    """
+    Convert a guest id stored as text (tombstones, change notifications)
+    back to the guest's id: an int for integer ids, else the string.
+    """
+    return int(guest_id) if guest_id.isdigit() else guest_id
+
+
+def commit_or_flush(db: Session, commit: bool) -> None:
+    """
+    Commit, or just flush when the caller controls the transaction.
+    
+    Objects are not refreshed after committing: their values are already
+    known, and sessions with expire_on_commit=False (see unit_of_work)
+    keep them readable without another SELECT.
+    """
+    if commit:
+        db.commit()
+    else:
+        db.flush()
+
+
+def create_response(
+    db: Session,
+    phone_number: str,
+    question_key: str,
+    response_data: Dict[str, Any],
+    commit: bool = True
+) -> UserResponse:
     """
     Create a new response record.
     
@@ -78,6 +230,8 @@ def create_response(db: Session, phone_number: str, question_key: str, response_
         phone_number: User's phone number
         question_key: Key identifying the question or interaction
         response_data: Dictionary with response_text and/or response_value
+        commit: Commit immediately; pass False to only flush and leave the
+            transaction to the caller
         
     Returns:
         The created UserResponse object
@@ -90,8 +244,7 @@ def create_response(db: Session, phone_number: str, question_key: str, response_
     )
     
     db.add(user_response)
-    db.commit()
-    db.refresh(user_response)
+    commit_or_flush(db, commit)
     return user_response
 
 
@@ -99,30 +252,36 @@ def get_guest_by_phone(db: Session, phone_number: str) -> Optional[RsvpGuest]:
     """
     Get the most recent RSVP guest record for a phone number.
     
+    Runs as one statement: the latest response id is a subquery read from
+    the top of idx_user_responses_phone_created_at, and the guest is then
+    fetched through its user_response_id index.
+    
     Args:
         db: Database session
         phone_number: Phone number to look up
         
     Returns:
-        The most recent RsvpGuest object or None
+        The RsvpGuest of the most recent response, or None if there is no
+        response or the latest one has no guest
     """
-    # Find the most recent user response for this phone number
-    latest_response = db.query(UserResponse).filter(
-        UserResponse.phone_number == phone_number
-    ).order_by(UserResponse.created_at.desc()).first()
-    
-    if not latest_response:
-        return None
-    
-    # Get the associated guest
-    guest = db.query(RsvpGuest).filter(
-        RsvpGuest.user_response_id == latest_response.id
-    ).first()
-    
-    return guest
+    latest_response_id = (
+        select(UserResponse.id)
+        .where(UserResponse.phone_number == phone_number)
+        .order_by(UserResponse.created_at.desc(), UserResponse.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    return db.execute(
+        select(RsvpGuest).where(RsvpGuest.user_response_id == latest_response_id).limit(1)
+    ).scalar_one_or_none()
 
 
-def update_guest(db: Session, guest_id: int, update_data: Dict[str, Any]) -> Optional[RsvpGuest]:
+def update_guest(
+    db: Session,
+    guest_id: int,
+    update_data: Dict[str, Any],
+    commit: bool = True
+) -> Optional[RsvpGuest]:
     """
     Update an RSVP guest record.
     
@@ -130,6 +289,8 @@ def update_guest(db: Session, guest_id: int, update_data: Dict[str, Any]) -> Opt
         db: Database session
         guest_id: ID of the guest to update
         update_data: Dictionary with fields to update
+        commit: Commit immediately; pass False to only flush and leave the
+            transaction to the caller
         
     Returns:
         The updated RsvpGuest object or None
@@ -142,12 +303,16 @@ def update_guest(db: Session, guest_id: int, update_data: Dict[str, Any]) -> Opt
         if hasattr(guest, key):
             setattr(guest, key, value)
     
-    db.commit()
-    db.refresh(guest)
+    commit_or_flush(db, commit)
     return guest
 
 
-def create_guest(db: Session, response_id: int, guest_data: Dict[str, Any]) -> RsvpGuest:
+def create_guest(
+    db: Session,
+    response_id: int,
+    guest_data: Dict[str, Any],
+    commit: bool = True
+) -> RsvpGuest:
     """
     Create a new RSVP guest record.
     
@@ -155,6 +320,8 @@ def create_guest(db: Session, response_id: int, guest_data: Dict[str, Any]) -> R
         db: Database session
         response_id: ID of the associated user response
         guest_data: Dictionary with guest details
+        commit: Commit immediately; pass False to only flush and leave the
+            transaction to the caller
         
     Returns:
         The created RsvpGuest object
@@ -167,8 +334,7 @@ def create_guest(db: Session, response_id: int, guest_data: Dict[str, Any]) -> R
     )
     
     db.add(guest)
-    db.commit()
-    db.refresh(guest)
+    commit_or_flush(db, commit)
     return guest
 
 
@@ -189,63 +355,76 @@ class RsvpStats(NamedTuple):
         return (self.attending_guests / self.total_guests) * 100
 
 
-def get_rsvp_statistics(db: Session) -> Optional[RsvpStats]:
+def rsvp_statistics_query() -> Select:
     """
-    Get the RSVP statistics by analyzing user responses.
+    Build the aggregate query behind get_rsvp_statistics.
+    
+    The latest response per phone number is picked with a window function
+    and guests are counted per response, all in one aggregate query, so
+    no ORM objects are loaded.
     
-    Args:
-        db: Database session
-        
     Returns:
-        RsvpStats object with statistics
+        Select yielding one row of total_responses, attending_count,
+        total_guests and attending_guests
     """
-    # Get the latest response for each phone number
-    subq = db.query(
-        UserResponse.phone_number,
-        func.max(UserResponse.updated_at).label('max_updated')
-    ).group_by(UserResponse.phone_number).subquery('latest_responses')
-    
-    latest_responses = db.query(UserResponse).join(
-        subq,
-        (UserResponse.phone_number == subq.c.phone_number) & 
-        (UserResponse.updated_at == subq.c.max_updated)
-    ).all()
-    
-    # Initialize counters
-    total_responses = len(latest_responses)
-    attending_count = 0
-    not_attending_count = 0
-    
-    # Get all guests associated with the latest responses
-    response_ids = [r.id for r in latest_responses]
-    all_guests = db.query(RsvpGuest).filter(
-        RsvpGuest.user_response_id.in_(response_ids)
-    ).all()
-    
-    # Count guests
-    total_guests = len(all_guests)
-    attending_guests = sum(1 for g in all_guests if g.attending)
-    not_attending_guests = total_guests - attending_guests
-    
-    # Count responses with attending guests
-    response_attendance = defaultdict(bool)
-    for guest in all_guests:
-        if guest.attending:
-            response_attendance[guest.user_response_id] = True
-    
-    attending_count = sum(1 for r_id, attending in response_attendance.items() if attending)
-    not_attending_count = total_responses - attending_count
+    # Rank responses per phone number, newest first (ties share rank 1)
+    ranked = select(
+        UserResponse.id,
+        func.rank().over(
+            partition_by=UserResponse.phone_number,
+            order_by=UserResponse.updated_at.desc()
+        ).label("response_rank")
+    ).where(UserResponse.updated_at.isnot(None)).subquery("ranked_responses")
+    
+    # Guest counts for each latest response
+    per_response = select(
+        ranked.c.id,
+        func.count(RsvpGuest.id).label("guests"),
+        func.count(RsvpGuest.id).filter(RsvpGuest.attending.is_(True)).label("attending_guests")
+    ).select_from(ranked).outerjoin(
+        RsvpGuest, RsvpGuest.user_response_id == ranked.c.id
+    ).where(ranked.c.response_rank == 1).group_by(ranked.c.id).subquery("latest_responses")
+    
+    return select(
+        func.count().label("total_responses"),
+        func.count().filter(per_response.c.attending_guests > 0).label("attending_count"),
+        func.coalesce(func.sum(per_response.c.guests), 0).label("total_guests"),
+        func.coalesce(func.sum(per_response.c.attending_guests), 0).label("attending_guests")
+    ).select_from(per_response)
+
+
+def rsvp_stats_from_row(row: Any) -> RsvpStats:
+    """Convert the row returned by rsvp_statistics_query into RsvpStats."""
+    total_responses = int(row.total_responses)
+    attending_count = int(row.attending_count)
+    total_guests = int(row.total_guests)
+    attending_guests = int(row.attending_guests)
     
     return RsvpStats(
         total_responses=total_responses,
         attending_count=attending_count,
-        not_attending_count=not_attending_count,
+        not_attending_count=total_responses - attending_count,
         total_guests=total_guests,
         attending_guests=attending_guests,
-        not_attending_guests=not_attending_guests
+        not_attending_guests=total_guests - attending_guests
     )
 
 
+def get_rsvp_statistics(db: Session) -> Optional[RsvpStats]:
+    """
+    Get the RSVP statistics by analyzing user responses.
+    
+    Runs rsvp_statistics_query, a single aggregate query.
+    
+    Args:
+        db: Database session
+        
+    Returns:
+        RsvpStats object with statistics
+    """
+    return rsvp_stats_from_row(db.execute(rsvp_statistics_query()).one())
+
+
 def get_responses_by_phone(db: Session, phone_number: str) -> List[UserResponse]:
     """
     Get all responses from a specific phone number.
@@ -0,0 +1,179 @@
+"""
+Read/write engine routing.
+
+Reads that tolerate slightly stale data can be served by a read replica,
+keeping dashboard queries off the primary's connection pool. The router
+measures replication lag periodically and sends reads back to the primary
+while the replica is too far behind or unreachable.
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import Engine, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Module-level logger with explicit name
+logger = logging.getLogger(__name__)
+
+# Seconds since the last replayed transaction, or 0 when the replica is
+# streaming and has replayed everything it received (an idle primary is
+# not lag) or the server is not a standby at all. NULL when the standby is
+# not streaming from its upstream: it has replayed all it received, but
+# cannot tell how far behind that is.
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN NOT EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+""")
+
+
+def pool_status(engine: Engine) -> Dict[str, Any]:
+    """
+    Get connection pool counters for an engine.
+
+    Args:
+        engine: SQLAlchemy engine (for an AsyncEngine pass its sync_engine)
+
+    Returns:
+        Pool class and, for queue pools, size, checked in/out and overflow
+    """
+    pool = engine.pool
+    status: Dict[str, Any] = {"pool": type(pool).__name__}
+    for counter in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, counter, None)
+        if callable(method):
+            status[counter] = method()
+    return status
+
+
+class ReplicaRouter:
+    """
+    Decide whether reads go to the replica or the primary.
+
+    The replica lag is measured at most once per check_interval, on
+    whichever engine (sync or async) asks first, and cached in between.
+    A failed measurement, or a replica that is not streaming (the lag
+    query returns NULL), counts as unavailable, so reads fall back to the
+    primary until the next successful check. The cached lag and the
+    routing counters are updated under a lock shared by all threads.
+    """
+
+    def __init__(
+        self,
+        replica_engine: Optional[Engine],
+        async_replica_engine: Optional[AsyncEngine],
+        max_lag_seconds: float,
+        check_interval: float,
+        lag_query: Any = REPLICA_LAG_SQL
+    ):
+        """
+        Initialize the router.
+
+        Args:
+            replica_engine: Sync engine of the replica, None without a replica
+            async_replica_engine: Async engine of the replica, None without a replica
+            max_lag_seconds: Lag above which reads use the primary
+            check_interval: Seconds between lag measurements
+            lag_query: Query returning the replica lag in seconds
+        """
+        self.replica_engine = replica_engine
+        self.async_replica_engine = async_replica_engine
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self.lag_query = lag_query
+        self._lock = threading.Lock()
+        self._lag: Optional[float] = None
+        self._checked_at = float("-inf")
+        self.routed = {"replica": 0, "primary": 0}
+
+    @property
+    def enabled(self) -> bool:
+        """Whether a replica is configured."""
+        return self.replica_engine is not None
+
+    @property
+    def lag_seconds(self) -> Optional[float]:
+        """Last measured replica lag, None if unknown or unreachable."""
+        return self._lag
+
+    def _due(self) -> bool:
+        """Claim the next lag check if the cached value is stale."""
+        with self._lock:
+            if time.monotonic() - self._checked_at < self.check_interval:
+                return False
+            self._checked_at = time.monotonic()
+            return True
+
+    def _record(self, lag: Optional[float]) -> None:
+        """Store a lag measurement and log availability changes."""
+        with self._lock:
+            previous, self._lag = self._lag, lag
+        if (lag is None or lag > self.max_lag_seconds) != (
+            previous is None or previous > self.max_lag_seconds
+        ):
+            if lag is None:
+                logger.warning("Read replica unreachable or not streaming, routing reads to the primary")
+            elif lag > self.max_lag_seconds:
+                logger.warning(f"Read replica lagging {lag:.1f}s, routing reads to the primary")
+            else:
+                logger.info(f"Read replica caught up ({lag:.1f}s lag), routing reads to it")
+
+    def _route(self) -> bool:
+        """Pick the target from the cached lag and count the decision."""
+        with self._lock:
+            use_replica = self._lag is not None and self._lag <= self.max_lag_seconds
+            self.routed["replica" if use_replica else "primary"] += 1
+        return use_replica
+
+    def use_replica(self) -> bool:
+        """
+        Decide where the next sync read goes, measuring lag when due.
+
+        Returns:
+            True to read from the replica, False to read from the primary
+        """
+        if not self.enabled:
+            return False
+        if self._due():
+            try:
+                with self.replica_engine.connect() as conn:
+                    lag = conn.execute(self.lag_query).scalar()
+                self._record(float(lag) if lag is not None else None)
+            except Exception as e:
+                logger.debug(f"Replica lag check failed: {str(e)}")
+                self._record(None)
+        return self._route()
+
+    async def use_replica_async(self) -> bool:
+        """
+        Decide where the next async read goes, measuring lag when due.
+
+        Returns:
+            True to read from the replica, False to read from the primary
+        """
+        if not self.enabled:
+            return False
+        if self._due():
+            try:
+                async with self.async_replica_engine.connect() as conn:
+                    lag = (await conn.execute(self.lag_query)).scalar()
+                self._record(float(lag) if lag is not None else None)
+            except Exception as e:
+                logger.debug(f"Replica lag check failed: {str(e)}")
+                self._record(None)
+        return self._route()
+
+    def status(self) -> Dict[str, Any]:
+        """Replica configuration, last lag and routing counters."""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "lag_seconds": self._lag,
+                "max_lag_seconds": self.max_lag_seconds,
+                "routed": dict(self.routed),
+            }
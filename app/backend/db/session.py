@@ -4,14 +4,17 @@ Database session management.
 This module provides functions for creating database sessions and connections.
 It includes utilities for dependency injection in FastAPI routes.
 """
-from typing import Generator, Any
+from typing import AsyncGenerator, Dict, Generator, Any
 from contextlib import contextmanager
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 
-from app.backend.core.config import settings
+from app.backend.core.config import ASYNC_DATABASE_DRIVERS, settings
+from app.backend.db.routing import ReplicaRouter, pool_status
 
 engine = create_engine(
     settings.DATABASE_URI,
@@ -20,6 +23,78 @@ engine = create_engine(
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Objects stay loaded after commit, so returning them costs no extra SELECT
+UnitOfWorkSession = sessionmaker(autocommit=False, autoflush=False, bind=engine, expire_on_commit=False)
+
+def async_database_uri(uri: str) -> str:
+    """
+    Convert a database URI to its async driver equivalent.
+    
+    "postgresql://..." and "postgresql+psycopg2://..." become
+    "postgresql+asyncpg://...", "sqlite://..." becomes "sqlite+aiosqlite://...".
+    
+    Args:
+        uri: Sync database URI
+        
+    Returns:
+        Database URI using an async driver
+    """
+    url = make_url(uri)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DATABASE_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}")
+    return url.set(drivername=f"{backend}+{ASYNC_DATABASE_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+# Async engine for the read API; queries run on the event loop instead of a threadpool
+async_engine = create_async_engine(
+    async_database_uri(settings.DATABASE_URI),
+    pool_pre_ping=True,
+    echo=settings.SQL_ECHO,
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def _read_only(bind):
+    """Bind that runs every transaction READ ONLY (PostgreSQL only)."""
+    if bind.dialect.name == "postgresql":
+        return bind.execution_options(postgresql_readonly=True)
+    return bind
+
+
+# Optional read replica with its own pools, so dashboard reads don't compete
+# with webhook writes for primary connections
+replica_engine = None
+async_replica_engine = None
+if settings.DATABASE_REPLICA_URI:
+    replica_engine = create_engine(
+        settings.DATABASE_REPLICA_URI,
+        pool_pre_ping=True,
+        echo=settings.SQL_ECHO,
+    )
+    async_replica_engine = create_async_engine(
+        async_database_uri(settings.DATABASE_REPLICA_URI),
+        pool_pre_ping=True,
+        echo=settings.SQL_ECHO,
+    )
+
+replica_router = ReplicaRouter(
+    replica_engine,
+    async_replica_engine,
+    max_lag_seconds=settings.REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.REPLICA_LAG_CHECK_INTERVAL,
+)
+
+# Read-only session factories: replica when configured, primary as fallback
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=_read_only(engine))
+AsyncReadSessionLocal = async_sessionmaker(_read_only(async_engine), autoflush=False, expire_on_commit=False)
+ReplicaSessionLocal = replica_engine and sessionmaker(
+    autocommit=False, autoflush=False, bind=_read_only(replica_engine)
+)
+AsyncReplicaSessionLocal = async_replica_engine and async_sessionmaker(
+    _read_only(async_replica_engine), autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
 
@@ -37,6 +112,67 @@ def get_db() -> Generator[Session, Any, None]:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    FastAPI dependency that provides an async database session.
+    
+    Yields:
+        AsyncSession: SQLAlchemy async database session
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_read_db() -> Generator[Session, Any, None]:
+    """
+    FastAPI dependency that provides a read-only database session.
+    
+    Uses the read replica while its lag is within REPLICA_MAX_LAG_SECONDS,
+    the primary otherwise. Data may be slightly stale; use get_db to read
+    your own writes.
+    
+    Yields:
+        Session: Read-only SQLAlchemy database session
+    """
+    factory = ReplicaSessionLocal if replica_router.use_replica() else ReadSessionLocal
+    db = factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    FastAPI dependency that provides a read-only async database session.
+    
+    Routed like get_read_db.
+    
+    Yields:
+        AsyncSession: Read-only SQLAlchemy async database session
+    """
+    use_replica = await replica_router.use_replica_async()
+    factory = AsyncReplicaSessionLocal if use_replica else AsyncReadSessionLocal
+    async with factory() as db:
+        yield db
+
+
+def pool_metrics() -> Dict[str, Any]:
+    """
+    Get connection pool counters per engine and the replica routing status.
+    
+    Returns:
+        Dictionary keyed by engine name, plus "replica_routing"
+    """
+    engines = {"primary": engine, "primary_async": async_engine.sync_engine}
+    if replica_engine is not None:
+        engines["replica"] = replica_engine
+        engines["replica_async"] = async_replica_engine.sync_engine
+    metrics: Dict[str, Any] = {name: pool_status(bind) for name, bind in engines.items()}
+    metrics["replica_routing"] = replica_router.status()
+    return metrics
+
+
 @contextmanager
 def get_db_session() -> Generator[Session, Any, None]:
     """
@@ -49,4 +185,24 @@ def get_db_session() -> Generator[Session, Any, None]:
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+
+@contextmanager
+def unit_of_work() -> Generator[Session, Any, None]:
+    """
+    Context manager that runs all work on the session as one transaction.
+    
+    Commits when the block exits normally and rolls back on an exception.
+    Objects are not expired on commit, so they can still be read afterwards
+    without reloading them.
+    
+    Yields:
+        Session: SQLAlchemy database session inside a transaction
+    """
+    db = UnitOfWorkSession()
+    try:
+        with db.begin():
+            yield db
+    finally:
+        db.close()
@@ -0,0 +1,120 @@
+-- Migration: 007_add_response_generated_columns.sql
+-- Description: Adds stored generated columns for hot JSONB fields of user_responses,
+--              with targeted indexes, and rewrites the views and trigger to use them
+-- PostgreSQL version: 16
+-- Depends on: 006_add_attending_column.sql
+
+-- Begin transaction for safety
+BEGIN;
+
+-- Stored generated columns are computed once on write instead of on every read.
+-- Adding them rewrites user_responses once; run during a low-traffic period.
+ALTER TABLE user_responses
+    ADD COLUMN IF NOT EXISTS button_payload TEXT
+        GENERATED ALWAYS AS (response_data->>'button_payload') STORED,
+    ADD COLUMN IF NOT EXISTS button_text TEXT
+        GENERATED ALWAYS AS (response_data->>'button_text') STORED,
+    -- Only well-formed counts are cast, so a bad value never fails the insert
+    ADD COLUMN IF NOT EXISTS numeric_value INTEGER
+        GENERATED ALWAYS AS (
+            CASE WHEN response_data->>'value' ~ '^\s*\d{1,9}\s*$'
+                 THEN btrim(response_data->>'value')::integer
+            END
+        ) STORED,
+    ADD COLUMN IF NOT EXISTS message_body TEXT
+        GENERATED ALWAYS AS (response_data->>'body') STORED;
+
+-- Partial indexes only cover the rows each lookup can match
+CREATE INDEX IF NOT EXISTS idx_user_responses_button_payload
+    ON user_responses (button_payload, created_at)
+    WHERE response_type = 'button';
+
+CREATE INDEX IF NOT EXISTS idx_user_responses_numeric_value
+    ON user_responses (numeric_value, created_at)
+    WHERE response_type = 'numeric';
+
+-- Serves the per-type views and time-range exports in created_at order
+CREATE INDEX IF NOT EXISTS idx_user_responses_type_created_at
+    ON user_responses (response_type, created_at);
+
+-- Recreate the views on top of the generated columns
+-- (numeric_value changes type, so the view must be dropped first)
+DROP VIEW IF EXISTS button_responses;
+DROP VIEW IF EXISTS numeric_responses;
+
+CREATE VIEW button_responses AS
+SELECT
+    id,
+    phone_number,
+    profile_name,
+    button_text,
+    button_payload,
+    created_at
+FROM user_responses
+WHERE response_type = 'button';
+
+CREATE VIEW numeric_responses AS
+SELECT
+    id,
+    phone_number,
+    profile_name,
+    numeric_value,
+    created_at
+FROM user_responses
+WHERE response_type = 'numeric';
+
+-- Rewrite the trigger function to read the generated columns and update the
+-- guest with a single upsert (no per-row exception block / subtransaction)
+CREATE OR REPLACE FUNCTION process_user_response()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_rsvp_status VARCHAR(50);
+    v_num_guests INTEGER;
+BEGIN
+    -- Map button payloads to RSVP status
+    IF NEW.response_type = 'button' THEN
+        v_rsvp_status := CASE NEW.button_payload
+            WHEN '1' THEN 'confirmed'  -- Approve response
+            WHEN '2' THEN 'declined'   -- Decline response
+            WHEN '3' THEN 'pending'    -- Not sure yet response
+        END;
+    END IF;
+
+    -- Numeric responses carry the number of guests (NULL if not a valid number)
+    IF NEW.response_type = 'numeric' THEN
+        v_num_guests := NEW.numeric_value;
+    END IF;
+
+    -- Insert or update guest information
+    INSERT INTO rsvp_guests (phone_number, name, last_interaction_at, rsvp_status, num_guests)
+    VALUES (NEW.phone_number, NEW.profile_name, NOW(), v_rsvp_status, COALESCE(v_num_guests, 0))
+    ON CONFLICT (phone_number)
+    DO UPDATE SET
+        name = COALESCE(EXCLUDED.name, rsvp_guests.name),
+        last_interaction_at = NOW(),
+        rsvp_status = COALESCE(v_rsvp_status, rsvp_guests.rsvp_status),
+        num_guests = COALESCE(v_num_guests, rsvp_guests.num_guests),
+        updated_at = NOW();
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Add comments
+COMMENT ON COLUMN user_responses.button_payload IS 'Generated from response_data->>''button_payload''';
+COMMENT ON COLUMN user_responses.button_text IS 'Generated from response_data->>''button_text''';
+COMMENT ON COLUMN user_responses.numeric_value IS 'Generated from response_data->>''value'' when it is a valid count';
+COMMENT ON COLUMN user_responses.message_body IS 'Generated from response_data->>''body''';
+
+-- Track this migration in schema_migrations if the table exists
+INSERT INTO schema_migrations (migration_name)
+SELECT '007_add_response_generated_columns.sql'
+WHERE EXISTS (
+    SELECT 1
+    FROM information_schema.tables
+    WHERE table_name = 'schema_migrations'
+)
+ON CONFLICT (migration_name) DO NOTHING;
+
+-- Commit the transaction
+COMMIT;
@@ -0,0 +1,30 @@
+-- Migration: 008_add_latest_response_indexes.sql
+-- Description: Adds indexes for the single-query RSVP statistics
+--              (latest response per phone, guests per response)
+-- PostgreSQL version: 16
+-- Depends on: 007_add_response_generated_columns.sql
+
+-- Begin transaction for safety
+BEGIN;
+
+-- Lets the rank() OVER (PARTITION BY phone_number ORDER BY updated_at DESC)
+-- window read rows already in partition order instead of sorting them
+CREATE INDEX IF NOT EXISTS idx_user_responses_phone_updated_at
+    ON user_responses (phone_number, updated_at DESC);
+
+-- Guests are joined to their latest response by user_response_id
+CREATE INDEX IF NOT EXISTS idx_rsvp_guests_user_response_id
+    ON rsvp_guests (user_response_id);
+
+-- Track this migration in schema_migrations if the table exists
+INSERT INTO schema_migrations (migration_name)
+SELECT '008_add_latest_response_indexes.sql'
+WHERE EXISTS (
+    SELECT 1
+    FROM information_schema.tables
+    WHERE table_name = 'schema_migrations'
+)
+ON CONFLICT (migration_name) DO NOTHING;
+
+-- Commit the transaction
+COMMIT;
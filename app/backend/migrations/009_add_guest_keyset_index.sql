@@ -0,0 +1,29 @@
+-- Migration: 009_add_guest_keyset_index.sql
+-- Description: Adds the (created_at, id) index used for keyset pagination
+--              of the guest listing
+-- PostgreSQL version: 16
+-- Depends on: 008_add_latest_response_indexes.sql
+
+-- Begin transaction for safety
+BEGIN;
+
+-- Matches ORDER BY created_at DESC, id DESC and the
+-- (created_at, id) < (cursor_created_at, cursor_id) seek condition
+CREATE INDEX IF NOT EXISTS idx_rsvp_guests_created_at_id
+    ON rsvp_guests (created_at DESC, id DESC);
+
+-- Keep planner statistics fresh so reltuples gives a usable total estimate
+ANALYZE rsvp_guests;
+
+-- Track this migration in schema_migrations if the table exists
+INSERT INTO schema_migrations (migration_name)
+SELECT '009_add_guest_keyset_index.sql'
+WHERE EXISTS (
+    SELECT 1
+    FROM information_schema.tables
+    WHERE table_name = 'schema_migrations'
+)
+ON CONFLICT (migration_name) DO NOTHING;
+
+-- Commit the transaction
+COMMIT;
@@ -0,0 +1,33 @@
+-- Migration: 010_add_guest_trigram_search.sql
+-- Description: Enables pg_trgm and adds trigram indexes for fuzzy guest search
+--              by name and (partial) phone number
+-- PostgreSQL version: 16
+-- Depends on: 009_add_guest_keyset_index.sql
+
+-- Begin transaction for safety
+BEGIN;
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Serves name ILIKE '%...%' as well as the word-similarity operators (<%, %>)
+-- for both Hebrew and Latin names
+CREATE INDEX IF NOT EXISTS idx_rsvp_guests_name_trgm
+    ON rsvp_guests USING GIN (name gin_trgm_ops);
+
+-- Digits-only phone number, so "050-622", "+97250622" and "622 88" all
+-- match through LIKE '%digits%'. Queries must use this exact expression.
+CREATE INDEX IF NOT EXISTS idx_rsvp_guests_phone_digits_trgm
+    ON rsvp_guests USING GIN ((regexp_replace(phone_number, '\D', '', 'g')) gin_trgm_ops);
+
+-- Track this migration in schema_migrations if the table exists
+INSERT INTO schema_migrations (migration_name)
+SELECT '010_add_guest_trigram_search.sql'
+WHERE EXISTS (
+    SELECT 1
+    FROM information_schema.tables
+    WHERE table_name = 'schema_migrations'
+)
+ON CONFLICT (migration_name) DO NOTHING;
+
+-- Commit the transaction
+COMMIT;
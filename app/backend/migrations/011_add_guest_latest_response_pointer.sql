@@ -0,0 +1,109 @@
+-- Migration: 011_add_guest_latest_response_pointer.sql
+-- Description: Keeps a pointer to each guest's latest response on rsvp_guests,
+--              maintained by the insert trigger, so "latest response for a
+--              phone" is a unique-key plus primary-key fetch instead of a sort
+-- PostgreSQL version: 16
+-- Depends on: 010_add_guest_trigram_search.sql
+
+-- Begin transaction for safety
+BEGIN;
+
+ALTER TABLE rsvp_guests
+    ADD COLUMN IF NOT EXISTS latest_response_id UUID,
+    ADD COLUMN IF NOT EXISTS latest_response_at TIMESTAMP WITH TIME ZONE;
+
+-- Responses are never deleted while the guest exists, but keep the pointer
+-- valid if one is
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.table_constraints
+        WHERE constraint_name = 'fk_rsvp_guests_latest_response'
+    ) THEN
+        ALTER TABLE rsvp_guests
+            ADD CONSTRAINT fk_rsvp_guests_latest_response
+            FOREIGN KEY (latest_response_id)
+            REFERENCES user_responses(id)
+            ON DELETE SET NULL;
+    END IF;
+END $$;
+
+-- Backfill from the existing responses (latest per phone)
+UPDATE rsvp_guests AS g
+SET latest_response_id = latest.id,
+    latest_response_at = latest.created_at
+FROM (
+    SELECT DISTINCT ON (phone_number) phone_number, id, created_at
+    FROM user_responses
+    ORDER BY phone_number, created_at DESC, id DESC
+) AS latest
+WHERE g.phone_number = latest.phone_number;
+
+-- Same upsert as 007, now also moving the pointer. It runs in the insert's
+-- transaction, so the pointer and the response row commit together. A
+-- response older than the current pointer (e.g. a replayed webhook) does
+-- not move it back.
+CREATE OR REPLACE FUNCTION process_user_response()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_rsvp_status VARCHAR(50);
+    v_num_guests INTEGER;
+BEGIN
+    -- Map button payloads to RSVP status
+    IF NEW.response_type = 'button' THEN
+        v_rsvp_status := CASE NEW.button_payload
+            WHEN '1' THEN 'confirmed'  -- Approve response
+            WHEN '2' THEN 'declined'   -- Decline response
+            WHEN '3' THEN 'pending'    -- Not sure yet response
+        END;
+    END IF;
+
+    -- Numeric responses carry the number of guests (NULL if not a valid number)
+    IF NEW.response_type = 'numeric' THEN
+        v_num_guests := NEW.numeric_value;
+    END IF;
+
+    -- Insert or update guest information
+    INSERT INTO rsvp_guests (
+        phone_number, name, last_interaction_at, rsvp_status, num_guests,
+        latest_response_id, latest_response_at
+    )
+    VALUES (
+        NEW.phone_number, NEW.profile_name, NOW(), v_rsvp_status, COALESCE(v_num_guests, 0),
+        NEW.id, NEW.created_at
+    )
+    ON CONFLICT (phone_number)
+    DO UPDATE SET
+        name = COALESCE(EXCLUDED.name, rsvp_guests.name),
+        last_interaction_at = NOW(),
+        rsvp_status = COALESCE(v_rsvp_status, rsvp_guests.rsvp_status),
+        num_guests = COALESCE(v_num_guests, rsvp_guests.num_guests),
+        latest_response_id = CASE
+            WHEN rsvp_guests.latest_response_at IS NULL
+                 OR EXCLUDED.latest_response_at >= rsvp_guests.latest_response_at
+            THEN EXCLUDED.latest_response_id
+            ELSE rsvp_guests.latest_response_id
+        END,
+        latest_response_at = GREATEST(rsvp_guests.latest_response_at, EXCLUDED.latest_response_at),
+        updated_at = NOW();
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Add comments
+COMMENT ON COLUMN rsvp_guests.latest_response_id IS 'Latest user_responses row for this phone (maintained by process_user_response)';
+COMMENT ON COLUMN rsvp_guests.latest_response_at IS 'created_at of the latest response';
+
+-- Track this migration in schema_migrations if the table exists
+INSERT INTO schema_migrations (migration_name)
+SELECT '011_add_guest_latest_response_pointer.sql'
+WHERE EXISTS (
+    SELECT 1
+    FROM information_schema.tables
+    WHERE table_name = 'schema_migrations'
+)
+ON CONFLICT (migration_name) DO NOTHING;
+
+-- Commit the transaction
+COMMIT;
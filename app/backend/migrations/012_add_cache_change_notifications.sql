@@ -0,0 +1,93 @@
+-- Migration: 012_add_cache_change_notifications.sql
+-- Description: Publishes cache change notifications from the response trigger,
+--              so every application worker can evict or refresh its in-process
+--              caches when a response changes a guest
+-- PostgreSQL version: 16
+-- Depends on: 011_add_guest_latest_response_pointer.sql
+
+-- Begin transaction for safety
+BEGIN;
+
+-- Sends [table, key, version] on the rsvp_cache_changes channel (must match
+-- CACHE_CHANGES_CHANNEL in services/cache_notifications.py). NOTIFY is
+-- transactional: the message goes out on commit and is dropped on rollback,
+-- and identical messages within one transaction are sent once.
+CREATE OR REPLACE FUNCTION notify_cache_change(p_table TEXT, p_key TEXT)
+RETURNS VOID AS $$
+BEGIN
+    PERFORM pg_notify(
+        'rsvp_cache_changes',
+        json_build_array(p_table, p_key, pg_current_xact_id()::text)::text
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Same as 011, now also returning the guest id and notifying listeners
+CREATE OR REPLACE FUNCTION process_user_response()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_rsvp_status VARCHAR(50);
+    v_num_guests INTEGER;
+    v_guest_id UUID;
+BEGIN
+    -- Map button payloads to RSVP status
+    IF NEW.response_type = 'button' THEN
+        v_rsvp_status := CASE NEW.button_payload
+            WHEN '1' THEN 'confirmed'  -- Approve response
+            WHEN '2' THEN 'declined'   -- Decline response
+            WHEN '3' THEN 'pending'    -- Not sure yet response
+        END;
+    END IF;
+
+    -- Numeric responses carry the number of guests (NULL if not a valid number)
+    IF NEW.response_type = 'numeric' THEN
+        v_num_guests := NEW.numeric_value;
+    END IF;
+
+    -- Insert or update guest information
+    INSERT INTO rsvp_guests (
+        phone_number, name, last_interaction_at, rsvp_status, num_guests,
+        latest_response_id, latest_response_at
+    )
+    VALUES (
+        NEW.phone_number, NEW.profile_name, NOW(), v_rsvp_status, COALESCE(v_num_guests, 0),
+        NEW.id, NEW.created_at
+    )
+    ON CONFLICT (phone_number)
+    DO UPDATE SET
+        name = COALESCE(EXCLUDED.name, rsvp_guests.name),
+        last_interaction_at = NOW(),
+        rsvp_status = COALESCE(v_rsvp_status, rsvp_guests.rsvp_status),
+        num_guests = COALESCE(v_num_guests, rsvp_guests.num_guests),
+        latest_response_id = CASE
+            WHEN rsvp_guests.latest_response_at IS NULL
+                 OR EXCLUDED.latest_response_at >= rsvp_guests.latest_response_at
+            THEN EXCLUDED.latest_response_id
+            ELSE rsvp_guests.latest_response_id
+        END,
+        latest_response_at = GREATEST(rsvp_guests.latest_response_at, EXCLUDED.latest_response_at),
+        updated_at = NOW()
+    RETURNING id INTO v_guest_id;
+
+    PERFORM notify_cache_change('user_responses', NEW.phone_number);
+    PERFORM notify_cache_change('rsvp_guests', v_guest_id::text);
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Add comments
+COMMENT ON FUNCTION notify_cache_change(TEXT, TEXT) IS 'Notifies application workers that cached data for a table key changed';
+
+-- Track this migration in schema_migrations if the table exists
+INSERT INTO schema_migrations (migration_name)
+SELECT '012_add_cache_change_notifications.sql'
+WHERE EXISTS (
+    SELECT 1
+    FROM information_schema.tables
+    WHERE table_name = 'schema_migrations'
+)
+ON CONFLICT (migration_name) DO NOTHING;
+
+-- Commit the transaction
+COMMIT;
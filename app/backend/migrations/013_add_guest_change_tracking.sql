@@ -0,0 +1,55 @@
+-- Migration: 013_add_guest_change_tracking.sql
+-- Description: Supports differential guest sync (/rsvp/guests/changes):
+--              an (updated_at, id) index to read guests changed after a
+--              watermark, and a tombstone log of deleted guests
+-- PostgreSQL version: 16
+-- Depends on: 012_add_cache_change_notifications.sql
+
+-- Begin transaction for safety
+BEGIN;
+
+-- Matches ORDER BY updated_at, id and the
+-- (updated_at, id) > (since_updated_at, since_id) seek condition.
+-- updated_at is maintained by update_rsvp_guests_updated_at and the
+-- response trigger.
+CREATE INDEX IF NOT EXISTS idx_rsvp_guests_updated_at_id
+    ON rsvp_guests (updated_at, id);
+
+-- One row per deleted guest, read after a watermark like the guests themselves.
+-- guest_id is text so it holds any guest id type.
+CREATE TABLE IF NOT EXISTS rsvp_guest_tombstones (
+    id BIGSERIAL PRIMARY KEY,
+    guest_id TEXT NOT NULL,
+    deleted_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_rsvp_guest_tombstones_deleted_at_id
+    ON rsvp_guest_tombstones (deleted_at, id);
+
+-- Record every deleted guest, whichever client deletes it
+CREATE OR REPLACE FUNCTION record_rsvp_guest_tombstone()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO rsvp_guest_tombstones (guest_id) VALUES (OLD.id::text);
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS record_rsvp_guest_tombstone ON rsvp_guests;
+CREATE TRIGGER record_rsvp_guest_tombstone
+AFTER DELETE ON rsvp_guests
+FOR EACH ROW
+EXECUTE FUNCTION record_rsvp_guest_tombstone();
+
+-- Track this migration in schema_migrations if the table exists
+INSERT INTO schema_migrations (migration_name)
+SELECT '013_add_guest_change_tracking.sql'
+WHERE EXISTS (
+    SELECT 1
+    FROM information_schema.tables
+    WHERE table_name = 'schema_migrations'
+)
+ON CONFLICT (migration_name) DO NOTHING;
+
+-- Commit the transaction
+COMMIT;
@@ -0,0 +1,74 @@
+-- Migration: 014_add_response_rollups.sql
+-- Description: Adds hourly rollups of responses (by response type, button
+--              payload and template) and of template sends, recounted over
+--              a trailing window on each refresh, plus the log of sent
+--              templates the rollups attribute responses to
+-- PostgreSQL version: 16
+-- Depends on: 013_add_guest_change_tracking.sql
+
+-- Begin transaction for safety
+BEGIN;
+
+-- Template messages we sent. Button replies store the SID of the message
+-- they answer in response_data->>'replied_to_sid', which joins here.
+CREATE TABLE IF NOT EXISTS sent_templates (
+    message_sid VARCHAR(64) PRIMARY KEY,
+    phone_number VARCHAR(20) NOT NULL,
+    template_sid VARCHAR(64) NOT NULL,
+    sent_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_sent_templates_sent_at
+    ON sent_templates (sent_at);
+
+-- Lets each rollup refresh read only responses newer than the watermark
+CREATE INDEX IF NOT EXISTS idx_user_responses_created_at
+    ON user_responses (created_at);
+
+-- Finds the earlier replies to a send, so only the first one counts as answering it
+CREATE INDEX IF NOT EXISTS idx_user_responses_replied_to_sid
+    ON user_responses ((response_data->>'replied_to_sid'), created_at, id)
+    WHERE response_data->>'replied_to_sid' IS NOT NULL;
+
+-- Responses per hour. Missing payloads and templates are stored as ''
+-- so they can be part of the primary key.
+CREATE TABLE IF NOT EXISTS response_rollups_hourly (
+    bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    response_type VARCHAR(50) NOT NULL,
+    button_payload TEXT NOT NULL DEFAULT '',
+    template_sid VARCHAR(64) NOT NULL DEFAULT '',
+    responses BIGINT NOT NULL DEFAULT 0,
+    -- First replies to a logged template send, and their total time to answer
+    answered_sends BIGINT NOT NULL DEFAULT 0,
+    answer_seconds_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket_start, response_type, button_payload, template_sid)
+);
+
+-- Template sends per hour
+CREATE TABLE IF NOT EXISTS template_send_rollups_hourly (
+    bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    template_sid VARCHAR(64) NOT NULL,
+    sent BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket_start, template_sid)
+);
+
+-- Time of the named rollup's last refresh; the next one recounts the hours
+-- from a trailing window before it
+CREATE TABLE IF NOT EXISTS rollup_watermarks (
+    name VARCHAR(50) PRIMARY KEY,
+    processed_up_to TIMESTAMP WITH TIME ZONE NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+-- Track this migration in schema_migrations if the table exists
+INSERT INTO schema_migrations (migration_name)
+SELECT '014_add_response_rollups.sql'
+WHERE EXISTS (
+    SELECT 1
+    FROM information_schema.tables
+    WHERE table_name = 'schema_migrations'
+)
+ON CONFLICT (migration_name) DO NOTHING;
+
+-- Commit the transaction
+COMMIT;
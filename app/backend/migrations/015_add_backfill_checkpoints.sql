@@ -0,0 +1,34 @@
+-- Migration: 015_add_backfill_checkpoints.sql
+-- Description: Adds the checkpoints of resumable backfill jobs, such as the
+--              re-classification of stored message types after the message
+--              rules change (backfill_message_types.py)
+-- PostgreSQL version: 16
+-- Depends on: 014_add_response_rollups.sql
+
+-- Begin transaction for safety
+BEGIN;
+
+-- Last primary key (user_responses.id, a uuid) a backfill has finished, written in the same transaction
+-- as each batch of updates. rules_version identifies the rules the backfill
+-- ran with; a backfill with other rules starts over.
+CREATE TABLE IF NOT EXISTS backfill_checkpoints (
+    name VARCHAR(100) PRIMARY KEY,
+    last_id UUID NOT NULL DEFAULT '00000000-0000-0000-0000-000000000000',
+    rules_version VARCHAR(64),
+    rows_scanned BIGINT NOT NULL DEFAULT 0,
+    rows_changed BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Track this migration in schema_migrations if the table exists
+INSERT INTO schema_migrations (migration_name)
+SELECT '015_add_backfill_checkpoints.sql'
+WHERE EXISTS (
+    SELECT 1
+    FROM information_schema.tables
+    WHERE table_name = 'schema_migrations'
+)
+ON CONFLICT (migration_name) DO NOTHING;
+
+-- Commit the transaction
+COMMIT;
@@ -0,0 +1,56 @@
+-- Migration: 016_add_reply_routes.sql
+-- Description: Adds reply routes that override or extend the reply routing
+--              file, and notifies the application workers to reload their
+--              routing table when they change
+-- PostgreSQL version: 16
+-- Depends on: 015_add_backfill_checkpoints.sql
+
+-- Begin transaction for safety
+BEGIN;
+
+-- A route maps (category, button payload, button text) to a template and
+-- the data sent with it. An empty payload or text matches any; a row with
+-- the key of a route in the file replaces it.
+CREATE TABLE IF NOT EXISTS reply_routes (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    category VARCHAR(20) NOT NULL,
+    button_payload VARCHAR(255) NOT NULL DEFAULT '',
+    button_text VARCHAR(255) NOT NULL DEFAULT '',
+    template_sid VARCHAR(64) NOT NULL,
+    response JSONB NOT NULL DEFAULT '{}'::jsonb,
+    variables JSONB,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    CONSTRAINT uq_reply_routes_key UNIQUE (category, button_payload, button_text)
+);
+
+-- Every change reloads the whole table in each worker (key '*' of table
+-- reply_routes, see notify_cache_change in migration 012)
+CREATE OR REPLACE FUNCTION notify_reply_routes_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM notify_cache_change('reply_routes', '*');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS reply_routes_changed ON reply_routes;
+CREATE TRIGGER reply_routes_changed
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON reply_routes
+FOR EACH STATEMENT
+EXECUTE FUNCTION notify_reply_routes_change();
+
+COMMENT ON TABLE reply_routes IS 'Reply routes overriding or extending the reply routing file';
+
+-- Track this migration in schema_migrations if the table exists
+INSERT INTO schema_migrations (migration_name)
+SELECT '016_add_reply_routes.sql'
+WHERE EXISTS (
+    SELECT 1
+    FROM information_schema.tables
+    WHERE table_name = 'schema_migrations'
+)
+ON CONFLICT (migration_name) DO NOTHING;
+
+-- Commit the transaction
+COMMIT;
@@ -0,0 +1,36 @@
+-- Migration: 017_add_conversation_states.sql
+-- Description: Adds the per-phone conversation state (step, last template
+--              sent and message counters) written with each response
+-- PostgreSQL version: 16
+-- Depends on: 016_add_reply_routes.sql
+
+-- Begin transaction for safety
+BEGIN;
+
+-- One row per phone, updated in the transaction that saves the response.
+-- version counts the transitions; a write from a stale state matches no
+-- row and is retried from the stored one.
+CREATE TABLE IF NOT EXISTS conversation_states (
+    phone_number VARCHAR(20) PRIMARY KEY,
+    step VARCHAR(30) NOT NULL DEFAULT 'new',
+    last_template_sid VARCHAR(64),
+    message_count INTEGER NOT NULL DEFAULT 0,
+    question_count INTEGER NOT NULL DEFAULT 0,
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+COMMENT ON TABLE conversation_states IS 'Conversation state machine step and counters per phone';
+
+-- Track this migration in schema_migrations if the table exists
+INSERT INTO schema_migrations (migration_name)
+SELECT '017_add_conversation_states.sql'
+WHERE EXISTS (
+    SELECT 1
+    FROM information_schema.tables
+    WHERE table_name = 'schema_migrations'
+)
+ON CONFLICT (migration_name) DO NOTHING;
+
+-- Commit the transaction
+COMMIT;
@@ -0,0 +1,315 @@
+"""
+Cache change notifications module.
+
+Keeps the in-process caches of every worker (RSVP statistics, latest
+responses, conversation states, guest search index) consistent with writes made elsewhere,
+using PostgreSQL LISTEN/NOTIFY.
+
+Writers publish a compact [table, key, version] JSON array on
+CACHE_CHANGES_CHANNEL in the writing transaction, so it is delivered only
+if and when the transaction commits:
+
+- the process_user_response trigger (migration 012), for each response
+  and the guest it upserts
+- crud (the session after_flush hook _track_rsvp_flush, and the bulk
+  helpers), DataStorage and the guest import, for application writes
+
+The key is a phone number for user_responses and a guest id for
+rsvp_guests; "*" means "anything in the table". The version is the id of
+the writing transaction, which lets a worker recognize its own write.
+
+Each worker runs one CacheChangeListener, started with the application.
+It reconnects with exponential backoff and, after reconnecting, drops
+everything since notifications sent while disconnected are lost.
+"""
+import asyncio
+import json
+import logging
+import random
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Set
+
+from sqlalchemy.engine import make_url
+
+from backend.services.guest_facets import build_guest_facet_index, guest_facet_index
+from backend.services.guest_search_index import build_guest_search_index, guest_search_index
+from backend.services.guest_snapshot import snapshot_refresher
+from backend.services.reply_routes import reply_router
+from backend.services.rsvp_events import rsvp_event_broadcaster
+from backend.services.conversation_state import conversation_state_cache
+from backend.services.latest_response_cache import latest_response_cache
+from backend.services.stats_cache import rsvp_stats_cache
+
+# Module-level logger with explicit name
+logger = logging.getLogger(__name__)
+
+# Must match notify_cache_change() in migration 012
+CACHE_CHANGES_CHANNEL = "rsvp_cache_changes"
+
+# Key meaning every row of the table changed
+ALL_KEYS = "*"
+
+# Notified by the reply_routes trigger (migration 016); not a cache
+REPLY_ROUTES_TABLE = "reply_routes"
+
+# Publishes one notification per key in the current transaction (psycopg2
+# parameters: table, keys). SQLAlchemy sessions use NOTIFY_CHANGES_STATEMENT.
+NOTIFY_CHANGES_SQL = (
+    f"SELECT pg_notify('{CACHE_CHANGES_CHANNEL}', "
+    f"json_build_array(%s::text, key, pg_current_xact_id()::text)::text) "
+    f"FROM unnest(%s::text[]) AS key"
+)
+NOTIFY_CHANGES_STATEMENT = (
+    f"SELECT pg_notify('{CACHE_CHANGES_CHANNEL}', "
+    f"json_build_array(CAST(:table AS text), key, pg_current_xact_id()::text)::text) "
+    f"FROM unnest(CAST(:keys AS text[])) AS key"
+)
+
+# Reconnect delays of the listener, doubled after each failure
+LISTENER_MIN_BACKOFF = 0.5
+LISTENER_MAX_BACKOFF = 30.0
+
+
+class CacheChange(NamedTuple):
+    """One change notification."""
+    table: str
+    key: str
+    version: Optional[str]
+
+
+# Dispatched after a reconnect: anything may have changed meanwhile
+RESYNC = CacheChange(ALL_KEYS, ALL_KEYS, None)
+
+
+def parse_cache_change(payload: str) -> Optional[CacheChange]:
+    """
+    Parse a notification payload.
+
+    Returns:
+        The change, or None if the payload is malformed
+    """
+    try:
+        table, key, version = json.loads(payload)
+        return CacheChange(str(table), str(key), None if version is None else str(version))
+    except (ValueError, TypeError):
+        logger.warning(f"Ignoring malformed cache change notification: {payload!r}")
+        return None
+
+
+def notify_cache_changes(cursor, table: str, keys: Iterable[Any]) -> None:
+    """
+    Publish changes from a psycopg2 cursor, delivered when its transaction commits.
+
+    Args:
+        cursor: Cursor inside the writing transaction
+        table: Changed table
+        keys: Changed keys (guest ids, phone numbers, or ALL_KEYS)
+    """
+    keys = sorted({str(key) for key in keys})
+    if keys:
+        cursor.execute(NOTIFY_CHANGES_SQL, (table, keys))
+
+
+def _fetch_guest_rows(guest_ids: List[str]) -> List[Any]:
+    """Read the rows of guests for the search and facet indexes."""
+    from backend.db import crud
+    from backend.db.session import get_db_session
+    from app.backend.db.models import RsvpGuest
+
+    with get_db_session() as db:
+        query = crud.rsvp_guest_index_query(db.get_bind().dialect.name)
+        return db.execute(query.where(RsvpGuest.id.in_(guest_ids))).all()
+
+
+async def apply_cache_changes(
+    changes: List[CacheChange],
+    fetch_guest_rows: Callable[[List[str]], List[Any]] = _fetch_guest_rows
+) -> None:
+    """
+    Evict or patch the local caches for a batch of changes.
+
+    Statistics are dropped, latest responses and conversation states
+    evicted (unless this worker wrote them), changed guests re-read into the search and facet indexes
+    and published as live events and, in the snapshot refresher process,
+    the guest snapshot rewritten. A change to every key drops the caches,
+    rebuilds the indexes and resets live event subscribers. A change of
+    reply_routes (or a resync) reloads the reply routing table.
+
+    Args:
+        changes: Changes received since the last batch
+        fetch_guest_rows: Reads listing rows by guest id (run in a thread)
+    """
+    if reply_router.use_database and any(change.table in (REPLY_ROUTES_TABLE, ALL_KEYS) for change in changes):
+        await asyncio.to_thread(reply_router.reload)
+        changes = [change for change in changes if change.table != REPLY_ROUTES_TABLE]
+        if not changes:
+            return
+
+    snapshot_refresher.request_refresh()
+    if any(change.key == ALL_KEYS for change in changes):
+        rsvp_stats_cache.invalidate()
+        latest_response_cache.clear()
+        conversation_state_cache.clear()
+        rsvp_event_broadcaster.publish(reset=True)
+        if guest_search_index.tracking:
+            await asyncio.to_thread(build_guest_search_index)
+        if guest_facet_index.tracking:
+            await asyncio.to_thread(build_guest_facet_index)
+        return
+
+    from app.backend.db.models import parse_guest_id
+
+    rsvp_stats_cache.invalidate()
+    guest_ids: Set[str] = set()
+    for change in changes:
+        if change.table == "user_responses":
+            latest_response_cache.invalidate(change.key, version=change.version)
+            conversation_state_cache.invalidate(change.key, version=change.version)
+        elif change.table == "rsvp_guests":
+            guest_ids.add(change.key)
+    rsvp_event_broadcaster.publish(parse_guest_id(key) for key in guest_ids)
+
+    indexes = [index for index in (guest_search_index, guest_facet_index) if index.tracking]
+    if guest_ids and indexes:
+        rows = await asyncio.to_thread(fetch_guest_rows, sorted(guest_ids))
+        for index in indexes:
+            for row in rows:
+                index.upsert(row)
+            # Guests that are gone were deleted
+            for guest_id in guest_ids - {str(row.id) for row in rows}:
+                index.remove(parse_guest_id(guest_id))
+
+
+def listener_dsn(database_uri: str) -> str:
+    """Convert a SQLAlchemy PostgreSQL URI to a plain libpq DSN for asyncpg."""
+    return make_url(database_uri).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+class CacheChangeListener:
+    """
+    LISTEN on CACHE_CHANGES_CHANNEL and apply changes to the local caches.
+
+    Notifications arriving together are handled as one batch, so a burst
+    of writes causes one statistics eviction and one index read.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        handler: Callable[[List[CacheChange]], Awaitable[None]] = apply_cache_changes,
+        channel: str = CACHE_CHANGES_CHANNEL,
+        min_backoff: float = LISTENER_MIN_BACKOFF,
+        max_backoff: float = LISTENER_MAX_BACKOFF,
+        on_connection_change: Optional[Callable[[bool], None]] = None
+    ):
+        """
+        Initialize the listener.
+
+        Args:
+            dsn: PostgreSQL DSN (see listener_dsn)
+            handler: Coroutine applying a batch of changes
+            channel: Notification channel
+            min_backoff: First reconnect delay in seconds
+            max_backoff: Longest reconnect delay in seconds
+            on_connection_change: Called with True once listening and False when
+                the connection is lost
+        """
+        self.dsn = dsn
+        self.handler = handler
+        self.channel = channel
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.on_connection_change = on_connection_change
+        self.connected = False
+        self.received = 0
+        self.failures = 0
+        self._pending: List[CacheChange] = []
+        self._flushing: Optional[asyncio.Task] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> asyncio.Task:
+        """Start listening in a background task on the running loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run(), name="cache-change-listener")
+        return self._task
+
+    async def stop(self) -> None:
+        """Stop listening and close the connection."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self) -> None:
+        """Listen until cancelled, reconnecting with backoff."""
+        import asyncpg
+
+        backoff = self.min_backoff
+        has_connected = False
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(self.dsn)
+                lost = asyncio.get_running_loop().create_future()
+                conn.add_termination_listener(lambda _: lost.done() or lost.set_result(None))
+                await conn.add_listener(self.channel, self._on_notification)
+                self._set_connected(True)
+                backoff = self.min_backoff
+                logger.info(f"Listening for cache changes on {self.channel}")
+                if has_connected:
+                    # Changes made while disconnected were not delivered
+                    self._enqueue(RESYNC)
+                has_connected = True
+                await lost
+                logger.warning("Cache change listener connection lost")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                logger.warning(f"Cache change listener failed ({str(e)}), retrying in {backoff:.1f}s")
+            finally:
+                self._set_connected(False)
+                if conn is not None and not conn.is_closed():
+                    await conn.close(timeout=5)
+            await asyncio.sleep(backoff * random.uniform(0.5, 1.0))
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def _set_connected(self, connected: bool) -> None:
+        """Record the connection state and report changes."""
+        changed = connected != self.connected
+        self.connected = connected
+        if changed and self.on_connection_change is not None:
+            self.on_connection_change(connected)
+
+    def _on_notification(self, connection, pid: int, channel: str, payload: str) -> None:
+        """asyncpg notification callback."""
+        change = parse_cache_change(payload)
+        if change is not None:
+            self.received += 1
+            self._enqueue(change)
+
+    def _enqueue(self, change: CacheChange) -> None:
+        """Queue a change and schedule the batch if none is pending."""
+        self._pending.append(change)
+        if self._flushing is None or self._flushing.done():
+            self._flushing = asyncio.get_running_loop().create_task(self._flush())
+
+    async def _flush(self) -> None:
+        """Apply queued changes until none are left."""
+        while self._pending:
+            batch, self._pending = self._pending, []
+            try:
+                await self.handler(batch)
+            except Exception as e:
+                logger.error(f"Failed to apply {len(batch)} cache changes: {str(e)}")
+
+    def status(self) -> Dict[str, Any]:
+        """Connection state and counters."""
+        return {
+            "channel": self.channel,
+            "connected": self.connected,
+            "received": self.received,
+            "failures": self.failures,
+        }
@@ -7,9 +7,11 @@ import logging
 from typing import Dict, Any, Optional, List
 from sqlalchemy.orm import Session
 
-from app.backend.db import crud
-from app.backend.services.webhook_service import WhatsAppMessage, MessageType
-from app.backend.services.twilio_service import TwilioMessageSender
+from backend.db import crud
+from backend.services.webhook_service import MessageCategorizer, WhatsAppMessage, MessageType
+from backend.services.twilio_service import TwilioMessageSender
+from backend.services.conversation_state import conversation_event, conversation_states
+from backend.services.reply_routes import reply_router
 
 # Module-level logger with explicit name
 logger = logging.getLogger(__name__)
@@ -32,14 +34,28 @@ class ConversationService:
             db: SQLAlchemy database session
         """
         self.db = db
-        self.twilio_sender = TwilioMessageSender()
+        self.message_categorizer = MessageCategorizer()
+        self.twilio_sender = TwilioMessageSender(sent_template_log=self._record_sent_template)
+    
+    def _record_sent_template(self, message_sid: str, phone_number: str, template_sid: str) -> None:
+        """
+        Log a template sent in reply, so responses to it are attributed to it.
+        
+        A failure is logged and does not fail the reply.
+        """
+        try:
+            crud.record_sent_template(self.db, message_sid, phone_number, template_sid)
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Failed to record sent template: {str(e)}")
     
     def process_message(self, message: WhatsAppMessage) -> Dict[str, Any]:
         """
         Process an incoming WhatsApp message.
         
         This method determines the appropriate response based on message type,
-        saves the message to the database, and returns a response.
+        saves the message and the conversation state's transition to the
+        database in one transaction, and returns a response.
         
         Args:
             message: The WhatsApp message to process
@@ -50,7 +66,7 @@ class ConversationService:
         logger.info(f"Processing message from {message.profile_name} ({message.from_number})")
         
         # Determine message type
-        message_type = self._categorize_message(message)
+        message_type = self.message_categorizer.categorize(message)
         
         # Save message to database - use the appropriate question key
         question_key = "general_message"
@@ -73,229 +89,64 @@ class ConversationService:
             )
         }
         
-        # Save to database using CRUD operations
-        user_response = crud.create_user_response(self.db, response_data)
-        
-        # Process message based on type
-        if message_type == MessageType.BUTTON:
-            return self._handle_button_response(message)
-        elif message_type == MessageType.NUMERIC:
-            return self._handle_numeric_response(message)
-        elif message_type == MessageType.GREETING:
-            return self._handle_greeting(message)
-        elif message_type == MessageType.QUESTION:
-            return self._handle_question(message)
-        else:
-            return self._handle_general_message(message)
-    
-    def _categorize_message(self, message: WhatsAppMessage) -> str:
-        """
-        Categorize a WhatsApp message.
-        
-        Args:
-            message: The WhatsApp message
-            
-        Returns:
-            Message type
-        """
-        # Check for button interactions first
-        if message.button_text or message.button_payload:
-            logger.info(f"Button interaction detected: {message.button_text} (payload: {message.button_payload})")
-            return MessageType.BUTTON
-        
-        # Use the message body for categorization
-        body = message.body.lower()
-        
-        # Check for numeric response (single digit 1-9)
-        if body.strip().isdigit() and len(body.strip()) == 1 and int(body.strip()) in range(1, 10):
-            logger.info(f"Numeric response detected: {body}")
-            return MessageType.NUMERIC
-        
-        # Clear, explicit checks for each message type
-        if int(message.num_media) > 0:
-            return MessageType.MEDIA
-            
-        if body in ['hi', 'hello', 'שלום', 'היי', 'hey']:
-            return MessageType.GREETING
-            
-        if '?' in body or any(word in body for word in ["שאלה", "מתי", "איפה", "כמה", "מה"]):
-            return MessageType.QUESTION
-            
-        # Default case
-        return MessageType.GENERAL
-    
-    def _handle_button_response(self, message: WhatsAppMessage) -> Dict[str, Any]:
-        """
-        Handle button response based on button text and payload.
-        
-        Args:
-            message: The WhatsApp message with button interaction
-            
-        Returns:
-            Response data specific to the button interaction
-        """
-        logger.info(f"Handling button response: {message.button_text} (payload: {message.button_payload})")
-        
-        # Handle specific button responses
-        if message.button_text == "לצערי לא" and message.button_payload == "2":
-            # Custom response for "Unfortunately not" button with payload 2
-            return self._handle_decline_response(message)
-        elif message.button_text == "כן, אגיע!" and message.button_payload == "1":
-            # Custom response for approval button
-            return self._handle_approve_response(message)
-        elif message.button_text == "עוד לא יודע/ת" and message.button_payload == "3":
-            # Custom response for "Don't know yet" button 
-            return self._handle_not_know_yet_response(message)
-            
-        # Default button response
-        return {
-            "status": "button_response_processed",
-            "message_type": MessageType.BUTTON,
-            "button_text": message.button_text,
-            "button_payload": message.button_payload,
-            "from": message.from_number
-        }
-    
-    def _handle_decline_response(self, message: WhatsAppMessage) -> Dict[str, Any]:
-        """
-        Handle decline response (לצערי לא - Unfortunately not).
-        
-        Args:
-            message: The WhatsApp message with decline button interaction
-            
-        Returns:
-            Response data for decline interaction
-        """
-        logger.info(f"Handling decline response from {message.profile_name}")
-        
-        # Use the shared template sending method with decline-specific template
-        template_sid = "HX4b154aac4a81de7cebb4cb42fbd837a9"
-        return self.twilio_sender.send_template(
-            message, 
-            template_sid,
-            {"response_type": "decline"}
+        # Save the response and the conversation's transition in one transaction
+        route = reply_router.dispatch(message_type.value, message)
+        crud.create_user_response(self.db, response_data, commit=False)
+        state = conversation_states.advance(
+            self.db,
+            message.from_number,
+            conversation_event(message_type.value, message.button_payload)
         )
+        self.db.commit()
+        
+        result = self._reply(message, message_type, route)
+        # The template is part of the state only once the guest has been sent it
+        if route is not None and result.get("twilio_message_sid"):
+            self._record_template(message.from_number, route.template_sid)
+        result["conversation_step"] = state.step
+        return result
     
-    def _handle_approve_response(self, message: WhatsAppMessage) -> Dict[str, Any]:
+    def _record_template(self, phone_number: str, template_sid: str) -> None:
         """
-        Handle approve response (כן, אגיע! - Yes, I'll come!).
+        Record a sent reply template in the phone's conversation state.
         
-        Args:
-            message: The WhatsApp message with approve button interaction
-            
-        Returns:
-            Response data for approve interaction
+        A failure is logged and does not fail the reply.
         """
-        logger.info(f"Handling approve response from {message.profile_name}")
-        
-        # Use the shared template sending method with approve-specific template
-        template_sid = "HXd10781b44eab25e5088956bfa0cfc541"
-        return self.twilio_sender.send_template(
-            message, 
-            template_sid,
-            {"response_type": "approve"}
-        )
-    
-    def _handle_not_know_yet_response(self, message: WhatsAppMessage) -> Dict[str, Any]:
-        """
-        Handle "don't know yet" response (עוד לא יודע/ת - Don't know yet).
-        
-        Args:
-            message: The WhatsApp message with "don't know yet" button interaction
-            
-        Returns:
-            Response data for "don't know yet" interaction
-        """
-        logger.info(f"Handling 'don't know yet' response from {message.profile_name}")
-        
-        # Use the shared template sending method with "don't know yet"-specific template
-        template_sid = "HX9eddabf5aea2ec56279755bde2160640"
-        return self.twilio_sender.send_template(
-            message, 
-            template_sid,
-            {"response_type": "not_know_yet"}
-        )
+        try:
+            conversation_states.record_template(self.db, phone_number, template_sid)
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Failed to record template {template_sid} for {phone_number}: {str(e)}")
     
-    def _handle_numeric_response(self, message: WhatsAppMessage) -> Dict[str, Any]:
+    def _reply(self, message: WhatsAppMessage, message_type: MessageType, route) -> Dict[str, Any]:
         """
-        Handle numeric responses (1-9).
-        
-        Args:
-            message: The WhatsApp message with numeric response
-            
-        Returns:
-            Response data for numeric interaction
-        """
-        # Extract numeric value
-        numeric_value = message.body.strip()
-        logger.info(f"Handling numeric response '{numeric_value}' from {message.profile_name}")
-        
-        # Use the shared template sending method with numeric-specific template
-        template_sid = "HXf67e92a3d1ed68775b925abc2dd1d325"
-        return self.twilio_sender.send_template(
-            message, 
-            template_sid,
-            {
-                "response_type": "numeric", 
-                "numeric_value": numeric_value
-            }
-        )
-    
-    def _handle_greeting(self, message: WhatsAppMessage) -> Dict[str, Any]:
-        """
-        Handle greeting messages.
-        
-        Args:
-            message: The WhatsApp message with greeting
-            
-        Returns:
-            Response data for greeting
-        """
-        logger.info(f"Handling greeting from {message.profile_name}")
-        
-        # Use a template for greeting responses
-        template_sid = "HX9f1d4a8bc3a25db4a6b6a8e66f72f7dc"
-        return self.twilio_sender.send_template(
-            message, 
-            template_sid,
-            {"response_type": "greeting"}
-        )
-    
-    def _handle_question(self, message: WhatsAppMessage) -> Dict[str, Any]:
-        """
-        Handle question messages.
-        
-        Args:
-            message: The WhatsApp message with question
-            
-        Returns:
-            Response data for question
-        """
-        logger.info(f"Handling question from {message.profile_name}: {message.body}")
-        
-        # Use a template for question responses
-        template_sid = "HX75d9b6aa1adce7d6b8bc88f7e1c95d5d"
-        return self.twilio_sender.send_template(
-            message, 
-            template_sid,
-            {"response_type": "question"}
-        )
-    
-    def _handle_general_message(self, message: WhatsAppMessage) -> Dict[str, Any]:
-        """
-        Handle general messages.
+        Reply with the template routed for the message, if any.
         
         Args:
             message: The WhatsApp message
+            message_type: Its message type
+            route: Its reply route, or None
             
         Returns:
-            Response data for general message
+            Response data for the message
         """
-        logger.info(f"Handling general message from {message.profile_name}: {message.body}")
+        if route is not None:
+            return route.send(self.twilio_sender, message)
+        if message_type == MessageType.BUTTON:
+            logger.info(f"No reply route for button {message.button_text} (payload: {message.button_payload})")
+            return {
+                "status": "button_response_processed",
+                "message_type": MessageType.BUTTON,
+                "button_text": message.button_text,
+                "button_payload": message.button_payload,
+                "from": message.from_number
+            }
         
         # Default response for general messages
+        logger.info(f"Handling general message from {message.profile_name}: {message.body}")
         return {
             "status": "general_message_processed",
             "message_type": MessageType.GENERAL,
             "from": message.from_number
-        } 
\ No newline at end of file
+        }
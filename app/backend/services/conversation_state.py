@@ -0,0 +1,268 @@
+"""
+Conversation state module.
+
+Keeps where each phone's conversation stands, so the conversation service
+can act on earlier answers ("you said yes, how many are coming?") without
+reading the phone's response history on every message.
+
+The state of a phone is one conversation_states row (migration 017): the
+step of the conversation state machine, the last template sent and
+message counters. Each message is an event; TRANSITIONS gives the next
+step, and the new state is written in the same transaction as the
+response row, so the two never disagree.
+
+States are read through a write-through LRU cache: a committed transition
+puts the new state, so a guest's next message reads it without a query.
+Each worker holds its own copy. The response row written with a
+transition notifies the other workers (services/cache_notifications.py),
+which evict the phone; ttl_seconds bounds staleness if a notification is
+missed, and a transition derived from a stale state is caught by the
+version check and retried from the stored row.
+"""
+from datetime import datetime
+from enum import Enum
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from backend.services.latest_response_cache import PhoneLRUCache
+
+# Phones kept in the cache; the least recently used entry is dropped first
+CONVERSATION_STATE_CACHE_SIZE = 10000
+
+# Seconds an entry is trusted before it is read from the database again
+CONVERSATION_STATE_CACHE_TTL = 60.0
+
+# Attempts at writing a transition when other workers keep moving the state on
+CONVERSATION_STATE_WRITE_ATTEMPTS = 3
+
+# Session.info key of the states to cache once the transaction commits
+_CONVERSATION_STATE_PUTS_KEY = "conversation_state_puts"
+
+
+class ConversationStep(str, Enum):
+    """Steps of the conversation state machine."""
+    NEW = "new"
+    AWAITING_HEADCOUNT = "awaiting_headcount"
+    CONFIRMED = "confirmed"
+    DECLINED = "declined"
+    UNDECIDED = "undecided"
+
+
+# Step of a transition that applies in every step
+ANY_STEP = "*"
+
+# Event of a question message, counted in question_count
+QUESTION_EVENT = "question"
+
+# (step, event) -> next step. Events are message types, with the payload
+# for buttons ("button:1"). A transition for the current step wins over
+# one for ANY_STEP; without either the step stays.
+TRANSITIONS: Dict[Tuple[str, str], ConversationStep] = {
+    (ANY_STEP, "button:1"): ConversationStep.AWAITING_HEADCOUNT,
+    (ANY_STEP, "button:2"): ConversationStep.DECLINED,
+    (ANY_STEP, "button:3"): ConversationStep.UNDECIDED,
+    (ConversationStep.AWAITING_HEADCOUNT.value, "numeric"): ConversationStep.CONFIRMED,
+}
+
+
+class ConversationSnapshot(NamedTuple):
+    """Immutable conversation state of a phone."""
+    phone_number: str
+    step: str = ConversationStep.NEW.value
+    last_template_sid: Optional[str] = None
+    message_count: int = 0
+    question_count: int = 0
+    version: int = 0
+
+
+def conversation_event(message_type: str, button_payload: str = "") -> str:
+    """
+    Event of a message for the state machine.
+
+    Args:
+        message_type: Message type (button, numeric, greeting, ...)
+        button_payload: Pressed button's payload
+
+    Returns:
+        The message type, with the payload for buttons
+    """
+    return f"{message_type}:{button_payload}" if message_type == "button" else message_type
+
+
+class ConversationStateMachine:
+    """Transition table of the conversation."""
+
+    def __init__(self, transitions: Optional[Dict[Tuple[str, str], ConversationStep]] = None):
+        """
+        Initialize the machine.
+
+        Args:
+            transitions: (step, event) -> next step (default: TRANSITIONS)
+        """
+        self.transitions = {
+            (step, event_name): ConversationStep(next_step).value
+            for (step, event_name), next_step in (transitions if transitions is not None else TRANSITIONS).items()
+        }
+
+    def next_step(self, step: str, event_name: str) -> str:
+        """The step after an event (the same step if no transition applies)."""
+        return self.transitions.get((step, event_name)) or self.transitions.get((ANY_STEP, event_name)) or step
+
+    def apply(
+        self,
+        state: ConversationSnapshot,
+        event_name: str,
+        template_sid: Optional[str] = None
+    ) -> ConversationSnapshot:
+        """
+        Apply an event to a state.
+
+        Args:
+            state: Current state
+            event_name: Event (see conversation_event)
+            template_sid: Template being sent in reply, if any
+
+        Returns:
+            The next state, one version later
+        """
+        return state._replace(
+            step=self.next_step(state.step, event_name),
+            last_template_sid=template_sid or state.last_template_sid,
+            message_count=state.message_count + 1,
+            question_count=state.question_count + (event_name == QUESTION_EVENT),
+            version=state.version + 1,
+        )
+
+
+class ConversationStateStore:
+    """Conversation states in the database behind a write-through cache."""
+
+    def __init__(self, cache: PhoneLRUCache, machine: Optional[ConversationStateMachine] = None):
+        """
+        Initialize the store.
+
+        Args:
+            cache: Cache of states by phone
+            machine: State machine (default: TRANSITIONS)
+        """
+        self.cache = cache
+        self.machine = machine or ConversationStateMachine()
+
+    def get(self, db: Session, phone_number: str) -> ConversationSnapshot:
+        """
+        Get a phone's state, from the cache when possible.
+
+        Args:
+            db: Database session
+            phone_number: Phone number
+
+        Returns:
+            The state (the initial state for a phone without one)
+        """
+        cached = self.cache.get(phone_number)
+        if cached is not None:
+            return cached
+        return self._read(db, phone_number)
+
+    def advance(
+        self,
+        db: Session,
+        phone_number: str,
+        event_name: str,
+        template_sid: Optional[str] = None
+    ) -> ConversationSnapshot:
+        """
+        Record a transition in the session's transaction (not committed).
+
+        The new state is cached when the transaction commits. If another
+        worker moved the state on since it was cached, the transition is
+        applied again to the stored state.
+
+        Args:
+            db: Database session (the one saving the response)
+            phone_number: Phone number
+            event_name: Event (see conversation_event)
+            template_sid: Template already sent to the phone, if any (a reply
+                still to be sent is recorded with record_template once sent)
+
+        Returns:
+            The new state
+
+        Raises:
+            RuntimeError: If the state kept changing under every attempt
+        """
+        return self._write(db, phone_number, lambda state: self.machine.apply(state, event_name, template_sid))
+
+    def record_template(self, db: Session, phone_number: str, template_sid: str) -> ConversationSnapshot:
+        """
+        Record a template sent to a phone in the session's transaction (not committed).
+
+        Args:
+            db: Database session
+            phone_number: Phone number
+            template_sid: Template the phone received
+
+        Returns:
+            The new state (same step, one version later)
+
+        Raises:
+            RuntimeError: If the state kept changing under every attempt
+        """
+        return self._write(
+            db, phone_number,
+            lambda state: state._replace(last_template_sid=template_sid, version=state.version + 1)
+        )
+
+    def _write(
+        self,
+        db: Session,
+        phone_number: str,
+        change: Callable[[ConversationSnapshot], ConversationSnapshot]
+    ) -> ConversationSnapshot:
+        """Write change(state) if the stored state is still state, re-reading it otherwise."""
+        from backend.db import crud
+
+        state = self.get(db, phone_number)
+        for _ in range(CONVERSATION_STATE_WRITE_ATTEMPTS):
+            next_state = change(state)
+            values = {**next_state._asdict(), "updated_at": datetime.utcnow()}
+            written, cache_version = crud.save_conversation_state(db, values, expected_version=state.version)
+            if written:
+                db.info.setdefault(_CONVERSATION_STATE_PUTS_KEY, []).append((self.cache, next_state, cache_version))
+                return next_state
+            self.cache.invalidate(phone_number)
+            state = self._read(db, phone_number)
+        raise RuntimeError(f"Conversation state of {phone_number} kept changing; transition not recorded")
+
+    def _read(self, db: Session, phone_number: str) -> ConversationSnapshot:
+        """Read a phone's state from the database and cache it."""
+        from backend.db import crud
+
+        row = crud.get_conversation_state(db, phone_number)
+        if row is None:
+            return ConversationSnapshot(phone_number)
+        state = ConversationSnapshot(
+            row.phone_number, row.step, row.last_template_sid, row.message_count, row.question_count, row.version
+        )
+        self.cache.put(phone_number, state)
+        return state
+
+
+@event.listens_for(Session, "after_commit")
+def _cache_committed_conversation_states(db: Session) -> None:
+    """Cache the states written by the committed transaction."""
+    for cache, state, cache_version in db.info.pop(_CONVERSATION_STATE_PUTS_KEY, ()):
+        cache.put(state.phone_number, state, version=cache_version)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_conversation_states(db: Session) -> None:
+    """Forget states whose transaction rolled back."""
+    db.info.pop(_CONVERSATION_STATE_PUTS_KEY, None)
+
+
+# Process-wide cache and store used by the conversation service
+conversation_state_cache = PhoneLRUCache(CONVERSATION_STATE_CACHE_SIZE, CONVERSATION_STATE_CACHE_TTL)
+conversation_states = ConversationStateStore(conversation_state_cache)
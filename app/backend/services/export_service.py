@@ -0,0 +1,254 @@
+"""
+Export service module.
+
+Streams user responses and RSVP guests out of PostgreSQL as CSV or NDJSON.
+
+Rows are read through a server-side cursor and compressed on the fly, so
+memory use stays flat no matter how many rows are exported.
+"""
+import csv
+import io
+import json
+import logging
+import zlib
+from datetime import datetime
+from enum import Enum
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Sequence
+
+from sqlalchemy import text
+
+from backend.db.session import get_db_session
+
+# Module-level logger with explicit name
+logger = logging.getLogger(__name__)
+
+# Rows fetched from the server-side cursor per round trip
+DEFAULT_BATCH_SIZE = 2000
+
+# gzip container (wbits 16 + 15) so the output is a regular .gz file
+GZIP_WBITS = 31
+
+
+class ExportFormat(str, Enum):
+    """Supported export formats."""
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+# response_data fields, read from the generated columns added in migration 007
+RESPONSE_COLUMNS: List[str] = [
+    "id",
+    "phone_number",
+    "profile_name",
+    "response_type",
+    "button_text",
+    "button_payload",
+    "numeric_value",
+    "body",
+    "message_sid",
+    "wa_id",
+    "created_at",
+    "updated_at",
+]
+
+GUEST_COLUMNS: List[str] = [
+    "id",
+    "phone_number",
+    "name",
+    "email",
+    "rsvp_status",
+    "attending",
+    "num_guests",
+    "dietary_restrictions",
+    "notes",
+    "last_interaction_at",
+    "created_at",
+    "updated_at",
+]
+
+RESPONSES_QUERY = """
+    SELECT id, phone_number, profile_name, response_type,
+           button_text, button_payload, numeric_value, message_body AS body,
+           message_sid, wa_id, created_at, updated_at
+    FROM user_responses
+    {where}
+    ORDER BY created_at
+"""
+
+GUESTS_QUERY = """
+    SELECT id, phone_number, name, email, rsvp_status, attending, num_guests,
+           dietary_restrictions, notes, last_interaction_at, created_at, updated_at
+    FROM rsvp_guests
+    {where}
+    ORDER BY created_at
+"""
+
+
+def _format_value(value: Any) -> Any:
+    """Convert database values into JSON/CSV friendly scalars."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def serialize_rows(
+    rows: Iterable[Sequence[Any]],
+    columns: List[str],
+    export_format: ExportFormat
+) -> Iterator[str]:
+    """
+    Serialize rows into CSV or NDJSON text chunks.
+
+    Args:
+        rows: Iterable of row batches (each batch is a sequence of rows)
+        columns: Column names, in row order
+        export_format: Output format
+
+    Yields:
+        One text chunk per batch (the CSV header is its own chunk)
+    """
+    if export_format == ExportFormat.CSV:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        yield buffer.getvalue()
+        for batch in rows:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows([_format_value(v) for v in row] for row in batch)
+            yield buffer.getvalue()
+        return
+
+    for batch in rows:
+        yield "".join(
+            json.dumps(
+                {column: _format_value(value) for column, value in zip(columns, row)},
+                ensure_ascii=False
+            ) + "\n"
+            for row in batch
+        )
+
+
+def gzip_stream(chunks: Iterable[str]) -> Iterator[bytes]:
+    """
+    Compress text chunks into a gzip byte stream as they are produced.
+
+    Args:
+        chunks: Text chunks to encode as UTF-8 and compress
+
+    Yields:
+        Compressed byte chunks
+    """
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, GZIP_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _build_where(
+    time_column: str,
+    since: Optional[datetime],
+    until: Optional[datetime],
+    response_type: Optional[str] = None
+) -> tuple:
+    """Build a WHERE clause and bind parameters for the export filters."""
+    conditions = []
+    params: Dict[str, Any] = {}
+    if since is not None:
+        conditions.append(f"{time_column} >= :since")
+        params["since"] = since
+    if until is not None:
+        conditions.append(f"{time_column} < :until")
+        params["until"] = until
+    if response_type:
+        conditions.append("response_type = :response_type")
+        params["response_type"] = response_type
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return where, params
+
+
+class ExportService:
+    """
+    Service for exporting data from the database.
+
+    Each export opens its own session, because the response body is
+    streamed after the request-scoped session has already been closed.
+    """
+
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE):
+        """
+        Initialize the export service.
+
+        Args:
+            batch_size: Rows fetched per server-side cursor round trip
+        """
+        self.batch_size = batch_size
+
+    def _stream_query(self, query: str, params: Dict[str, Any]) -> Iterator[Sequence[Any]]:
+        """
+        Execute a query through a server-side cursor.
+
+        Yields:
+            Batches of at most batch_size rows
+        """
+        with get_db_session() as db:
+            result = db.execute(
+                text(query),
+                params,
+                execution_options={"stream_results": True, "yield_per": self.batch_size}
+            )
+            try:
+                for batch in result.partitions():
+                    yield batch
+            finally:
+                result.close()
+
+    def stream_user_responses(
+        self,
+        export_format: ExportFormat = ExportFormat.CSV,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        response_type: Optional[str] = None
+    ) -> Iterator[bytes]:
+        """
+        Stream user responses with response_data flattened into columns.
+
+        Args:
+            export_format: Output format
+            since: Only include responses created at or after this time
+            until: Only include responses created before this time
+            response_type: Only include responses of this type
+
+        Yields:
+            gzip-compressed chunks of the export
+        """
+        where, params = _build_where("created_at", since, until, response_type)
+        logger.info("Exporting user_responses as %s (filters: %s)", export_format.value, params)
+        batches = self._stream_query(RESPONSES_QUERY.format(where=where), params)
+        return gzip_stream(serialize_rows(batches, RESPONSE_COLUMNS, export_format))
+
+    def stream_rsvp_guests(
+        self,
+        export_format: ExportFormat = ExportFormat.CSV,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> Iterator[bytes]:
+        """
+        Stream RSVP guests.
+
+        Args:
+            export_format: Output format
+            since: Only include guests updated at or after this time
+            until: Only include guests updated before this time
+
+        Yields:
+            gzip-compressed chunks of the export
+        """
+        where, params = _build_where("updated_at", since, until)
+        logger.info("Exporting rsvp_guests as %s (filters: %s)", export_format.value, params)
+        batches = self._stream_query(GUESTS_QUERY.format(where=where), params)
+        return gzip_stream(serialize_rows(batches, GUEST_COLUMNS, export_format))
@@ -0,0 +1,391 @@
+"""
+Guest analytics module.
+
+Keeps the guest list and the response timing per phone in compact NumPy
+columns and computes the admin analytics (attendance, headcount, dietary
+facets and response latency) with vectorized operations instead of
+iterating rows or ORM objects.
+
+Columns (one entry per guest):
+
+    attending   bool
+    alive       bool             False once the guest is deleted
+    party       int32            dictionary code of the guest's phone number
+                                 (-1: no phone, a party of one)
+    dietary     int32            dictionary code of the normalized set of
+                                 dietary restrictions (0: none)
+
+and per phone code: the first template sent to it and its first response
+(float64 epoch seconds, NaN if none), which give the response latency.
+
+refresh() reads only what changed: guests after the differential sync
+watermark (crud.get_rsvp_guest_changes, which also yields deleted guests),
+and responses and sends created after the last refresh. The first
+refresh loads everything.
+
+NumPy is an optional dependency; without it the engine reports itself
+unavailable.
+"""
+import logging
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+# Module-level logger with explicit name
+logger = logging.getLogger(__name__)
+
+# Changed guests read per query while refreshing
+REFRESH_CHUNK_SIZE = 5000
+
+# Responses and sends are re-read from this long before the last refresh,
+# so rows committed late are not missed (first-time minimums are idempotent)
+TIMING_SETTLE_SECONDS = 5.0
+
+# Upper bounds of the response latency histogram buckets, in seconds
+LATENCY_BUCKETS = (60, 600, 3600, 6 * 3600, 24 * 3600, 3 * 24 * 3600)
+
+# Separators between dietary restrictions in one guest's entry
+_DIETARY_SEPARATORS = re.compile(r"[,;/\n]+")
+
+
+class AnalyticsUnavailable(RuntimeError):
+    """NumPy is not installed."""
+
+
+def normalize_dietary(value: Optional[str]) -> Tuple[str, ...]:
+    """Split a dietary restrictions entry into sorted, lower-cased, distinct tags."""
+    if not value:
+        return ()
+    tags = {" ".join(tag.split()).casefold() for tag in _DIETARY_SEPARATORS.split(value)}
+    tags.discard("")
+    return tuple(sorted(tags))
+
+
+def _epoch(value: Optional[datetime]) -> float:
+    """Epoch seconds of a datetime (naive values are UTC), NaN for None."""
+    if value is None:
+        return float("nan")
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class GuestAnalytics:
+    """
+    Columnar guest analytics with incremental refresh.
+
+    refresh() and summary() may be called from several threads; refreshes
+    are serialized and readers see a consistent set of columns.
+    """
+
+    def __init__(self, initial_capacity: int = 1024):
+        """
+        Initialize empty columns.
+
+        Args:
+            initial_capacity: Guest rows allocated up front (grown by doubling)
+        """
+        if np is None:
+            raise AnalyticsUnavailable("Guest analytics require numpy (pip install numpy)")
+        self._lock = threading.RLock()
+        self._size = 0
+        self._attending = np.zeros(initial_capacity, dtype=bool)
+        self._alive = np.zeros(initial_capacity, dtype=bool)
+        self._party = np.zeros(initial_capacity, dtype=np.int32)
+        self._dietary = np.zeros(initial_capacity, dtype=np.int32)
+        # Row of each guest id
+        self._rows: Dict[Any, int] = {}
+        # Dictionaries: phone numbers and dietary tag sets by code
+        self._phone_codes: Dict[str, int] = {}
+        self._dietary_codes: Dict[Tuple[str, ...], int] = {(): 0}
+        self._dietary_entries: Dict[Optional[str], int] = {}
+        self._dietary_sets: List[Tuple[str, ...]] = [()]
+        self._first_sent = np.full(initial_capacity, np.nan)
+        self._first_response = np.full(initial_capacity, np.nan)
+        # Watermarks
+        self._guests_after = None
+        self._tombstones_after = None
+        self._timing_after: Optional[datetime] = None
+        self.refreshed_at: Optional[float] = None
+        self.refreshes = 0
+
+    def __len__(self) -> int:
+        """Number of live guests."""
+        return int(self._alive[:self._size].sum())
+
+    def _grow_guests(self, needed: int) -> None:
+        """Make room for needed guest rows."""
+        capacity = len(self._attending)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ("_attending", "_alive", "_party", "_dietary"):
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+
+    def _phone_code(self, phone_number: str) -> int:
+        """Dictionary code of a phone number, growing the per-phone columns."""
+        code = self._phone_codes.get(phone_number)
+        if code is None:
+            code = len(self._phone_codes)
+            self._phone_codes[phone_number] = code
+            if code >= len(self._first_sent):
+                for name in ("_first_sent", "_first_response"):
+                    column = getattr(self, name)
+                    grown = np.full(len(column) * 2, np.nan)
+                    grown[:len(column)] = column
+                    setattr(self, name, grown)
+        return code
+
+    def _dietary_code(self, value: Optional[str]) -> int:
+        """Dictionary code of a dietary restrictions entry."""
+        code = self._dietary_entries.get(value)
+        if code is None:
+            tags = normalize_dietary(value)
+            code = self._dietary_codes.get(tags)
+            if code is None:
+                code = len(self._dietary_sets)
+                self._dietary_codes[tags] = code
+                self._dietary_sets.append(tags)
+            self._dietary_entries[value] = code
+        return code
+
+    def apply_guests(self, rows: List[Any]) -> None:
+        """
+        Insert or update guests.
+
+        Args:
+            rows: Guest listing rows (id, attending, dietary_restrictions, phone_number)
+        """
+        with self._lock:
+            self._grow_guests(self._size + len(rows))
+            positions = np.empty(len(rows), dtype=np.int64)
+            party = np.empty(len(rows), dtype=np.int32)
+            dietary = np.empty(len(rows), dtype=np.int32)
+            for index, row in enumerate(rows):
+                position = self._rows.get(row.id)
+                if position is None:
+                    position = self._rows[row.id] = self._size
+                    self._size += 1
+                positions[index] = position
+                party[index] = self._phone_code(row.phone_number) if row.phone_number else -1
+                dietary[index] = self._dietary_code(row.dietary_restrictions)
+            self._attending[positions] = np.fromiter((bool(row.attending) for row in rows), dtype=bool, count=len(rows))
+            self._alive[positions] = True
+            self._party[positions] = party
+            self._dietary[positions] = dietary
+
+    def remove_guests(self, guest_ids: List[str]) -> None:
+        """Mark guests deleted (ids as logged in the tombstones, i.e. strings)."""
+        from app.backend.db.models import parse_guest_id
+
+        with self._lock:
+            for guest_id in guest_ids:
+                position = self._rows.get(parse_guest_id(guest_id))
+                if position is not None:
+                    self._alive[position] = False
+
+    def apply_timings(self, column: str, rows: List[Tuple[str, Optional[datetime]]]) -> None:
+        """
+        Lower the first-sent or first-response time of phones.
+
+        Args:
+            column: "sent" or "response"
+            rows: (phone_number, earliest time in the batch) pairs
+        """
+        rows = [(phone, value) for phone, value in rows if phone and value is not None]
+        with self._lock:
+            codes = np.fromiter((self._phone_code(phone) for phone, _ in rows), dtype=np.int64, count=len(rows))
+            times = np.fromiter((_epoch(value) for _, value in rows), dtype=np.float64, count=len(rows))
+            target = self._first_sent if column == "sent" else self._first_response
+            # fmin ignores NaN, so the first known time wins
+            np.fmin.at(target, codes, times)
+
+    def refresh(
+        self,
+        db: Session,
+        chunk_size: int = REFRESH_CHUNK_SIZE,
+        settle_seconds: Optional[float] = None
+    ) -> Dict[str, int]:
+        """
+        Apply everything that changed since the last refresh.
+
+        Args:
+            db: Database session
+            chunk_size: Changed guests read per query
+            settle_seconds: Age before a change is passed by the watermarks
+                (default GUEST_SYNC_SETTLE_SECONDS / TIMING_SETTLE_SECONDS)
+
+        Returns:
+            Numbers of guests upserted and removed and phones with new timings
+        """
+        from backend.db import crud
+        from app.backend.db.models import SentTemplate, UserResponse
+
+        with self._lock:
+            upserted = removed = 0
+            while True:
+                changes = crud.get_rsvp_guest_changes(
+                    db, self._guests_after, self._tombstones_after,
+                    limit=chunk_size, settle_seconds=settle_seconds
+                )
+                self.apply_guests(changes.rows)
+                self.remove_guests(changes.deleted)
+                upserted += len(changes.rows)
+                removed += len(changes.deleted)
+                self._guests_after, self._tombstones_after = changes.guests_after, changes.tombstones_after
+                if not changes.has_more:
+                    break
+
+            now = changes.database_now
+            timings = 0
+            for column, phone_column, time_column in (
+                ("sent", SentTemplate.phone_number, SentTemplate.sent_at),
+                ("response", UserResponse.phone_number, UserResponse.created_at),
+            ):
+                query = select(phone_column, func.min(time_column)).group_by(phone_column)
+                if self._timing_after is not None:
+                    query = query.where(time_column >= self._timing_after)
+                rows = db.execute(query).all()
+                self.apply_timings(column, rows)
+                timings += len(rows)
+            settle = TIMING_SETTLE_SECONDS if settle_seconds is None else settle_seconds
+            self._timing_after = now - timedelta(seconds=settle)
+
+            self.refreshed_at = time.time()
+            self.refreshes += 1
+        return {"upserted": upserted, "removed": removed, "timings": timings}
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Compute the analytics over the current columns.
+
+        Returns:
+            attendance, headcount (party sizes by phone), dietary facets and
+            the response latency distribution
+        """
+        with self._lock:
+            size = self._size
+            alive = self._alive[:size]
+            attending = self._attending[:size] & alive
+            party = self._party[:size]
+            dietary = self._dietary[:size]
+            phones = len(self._phone_codes)
+            first_sent = self._first_sent[:phones].copy()
+            first_response = self._first_response[:phones].copy()
+            dietary_sets = list(self._dietary_sets)
+
+        guests = int(alive.sum())
+        attending_guests = int(attending.sum())
+
+        # Party sizes: guests per phone, guests without one are parties of one
+        phoned = party >= 0
+        party_sizes = np.bincount(party[alive & phoned], minlength=phones)
+        attending_sizes = np.bincount(party[attending & phoned], minlength=phones)
+        solo = alive & ~phoned
+        parties = np.concatenate([party_sizes[party_sizes > 0], np.ones(int(solo.sum()), dtype=np.int64)])
+        size_counts = np.bincount(parties) if len(parties) else np.zeros(1, dtype=np.int64)
+
+        # Dietary facets: count per tag set, then spread over the tags
+        per_set = np.bincount(dietary[alive], minlength=len(dietary_sets))
+        per_set_attending = np.bincount(dietary[attending], minlength=len(dietary_sets))
+        facets: Dict[str, Dict[str, int]] = {}
+        for code in np.flatnonzero(per_set[1:]) + 1:
+            for tag in dietary_sets[code]:
+                facet = facets.setdefault(tag, {"guests": 0, "attending": 0})
+                facet["guests"] += int(per_set[code])
+                facet["attending"] += int(per_set_attending[code])
+
+        return {
+            "attendance": {
+                "guests": guests,
+                "attending": attending_guests,
+                "not_attending": guests - attending_guests,
+                "attendance_rate": round(attending_guests / guests * 100, 2) if guests else 0.0,
+            },
+            "headcount": {
+                "parties": int(len(parties)),
+                "attending_parties": int((attending_sizes > 0).sum() + (attending & ~phoned).sum()),
+                "mean_party_size": round(float(parties.mean()), 2) if len(parties) else 0.0,
+                "party_sizes": {str(size): int(count) for size, count in enumerate(size_counts) if size and count},
+            },
+            "dietary": dict(sorted(facets.items(), key=lambda item: (-item[1]["guests"], item[0]))),
+            "response_latency": self._latency_distribution(first_sent, first_response),
+            "refreshed_at": self.refreshed_at,
+        }
+
+    @staticmethod
+    def _latency_distribution(first_sent, first_response) -> Dict[str, Any]:
+        """Seconds from the first template sent to a phone to its first response after it."""
+        valid = ~np.isnan(first_sent) & ~np.isnan(first_response) & (first_response >= first_sent)
+        latencies = first_response[valid] - first_sent[valid]
+        if not len(latencies):
+            return {"count": 0, "mean_seconds": None, "p50_seconds": None, "p90_seconds": None,
+                    "p99_seconds": None, "histogram": []}
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+        buckets = np.bincount(np.searchsorted(LATENCY_BUCKETS, latencies), minlength=len(LATENCY_BUCKETS) + 1)
+        return {
+            "count": int(len(latencies)),
+            "mean_seconds": round(float(latencies.mean()), 1),
+            "p50_seconds": round(float(p50), 1),
+            "p90_seconds": round(float(p90), 1),
+            "p99_seconds": round(float(p99), 1),
+            "histogram": [
+                {"le_seconds": bound, "count": int(count)}
+                for bound, count in zip(list(LATENCY_BUCKETS) + [None], buckets)
+            ],
+        }
+
+    def status(self) -> Dict[str, Any]:
+        """Sizes and refresh counters."""
+        with self._lock:
+            return {
+                "guests": len(self),
+                "rows": self._size,
+                "phones": len(self._phone_codes),
+                "dietary_sets": len(self._dietary_sets),
+                "bytes": int(sum(
+                    getattr(self, name).nbytes
+                    for name in ("_attending", "_alive", "_party", "_dietary", "_first_sent", "_first_response")
+                )),
+                "refreshes": self.refreshes,
+                "refreshed_at": self.refreshed_at,
+            }
+
+
+_guest_analytics: Optional[GuestAnalytics] = None
+_guest_analytics_lock = threading.Lock()
+
+
+def get_guest_analytics() -> GuestAnalytics:
+    """
+    Get the process-wide engine, created on first use.
+
+    Raises:
+        AnalyticsUnavailable: If numpy is not installed
+    """
+    global _guest_analytics
+    with _guest_analytics_lock:
+        if _guest_analytics is None:
+            _guest_analytics = GuestAnalytics()
+        return _guest_analytics
+
+
+def reset_guest_analytics() -> None:
+    """Drop the process-wide engine; the next use reloads everything."""
+    global _guest_analytics
+    with _guest_analytics_lock:
+        _guest_analytics = None
@@ -0,0 +1,435 @@
+"""
+Guest facet index module.
+
+Keeps one bitmap per facet value over guest ordinals so the admin guest
+view can filter by any combination of facets and show the count of every
+facet value without a COUNT ... GROUP BY per facet.
+
+Facets:
+
+    status            attending, not_attending, unknown
+    headcount         size of the guest's party (guests sharing a phone
+                      number): 1, 2, 3, 4, 5+
+    dietary           each normalized dietary tag, or none
+    last_interaction  when the guest was last updated: today, 7d (1-6
+                      days ago), 30d (7-29 days ago), older
+
+Bitmaps are Python ints; bit n is set when the guest with ordinal n has the
+value. Filters OR the selected values of a facet and AND the facets.
+
+Like the guest search index, the bitmaps are loaded once and then kept up
+to date by the write paths in crud and DataStorage and, for writes made by
+other workers, by cache change notifications.
+"""
+import logging
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from backend.services.guest_analytics import normalize_dietary
+from backend.services.guest_search_index import IndexedGuest
+
+# Module-level logger with explicit name
+logger = logging.getLogger(__name__)
+
+FACETS = ("status", "headcount", "dietary", "last_interaction")
+
+# Party sizes from this one up share a headcount value
+MAX_HEADCOUNT_VALUE = 5
+
+# last_interaction windows: value and the age in days of the oldest day it covers
+INTERACTION_WINDOWS = (("today", 0), ("7d", 6), ("30d", 29))
+OLDER_INTERACTION = "older"
+
+# Days of updates kept as separate bitmaps
+_KEPT_DAYS = INTERACTION_WINDOWS[-1][1]
+
+
+def _bitmap(ordinals: Iterable[int]) -> int:
+    """Build a bitmap with the given bits set."""
+    buffer = bytearray()
+    for ordinal in ordinals:
+        index = ordinal >> 3
+        if index >= len(buffer):
+            buffer.extend(bytes(index + 1 - len(buffer)))
+        buffer[index] |= 1 << (ordinal & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def _ordinals(bitmap: int) -> Iterator[int]:
+    """Yield the set bits of a bitmap in ascending order."""
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    for index, byte in enumerate(data):
+        while byte:
+            low = byte & -byte
+            yield index * 8 + low.bit_length() - 1
+            byte ^= low
+
+
+def _status_value(attending: Optional[bool]) -> str:
+    """Status facet value of a guest."""
+    if attending is None:
+        return "unknown"
+    return "attending" if attending else "not_attending"
+
+
+def _headcount_value(party_size: int) -> str:
+    """Headcount facet value of a party size."""
+    return f"{MAX_HEADCOUNT_VALUE}+" if party_size >= MAX_HEADCOUNT_VALUE else str(party_size)
+
+
+class GuestFacetIndex:
+    """
+    Bitmap facet index over guests.
+
+    Each guest gets an ordinal (reused after deletion). Static facets
+    (status, headcount, dietary) are bitmaps per value. Last interaction is
+    kept as a bitmap per day for the last 30 days, ORed into windows at
+    query time, so the facet stays correct as days pass without touching
+    every guest; everyone else is older.
+
+    All methods are thread safe; writes that arrive while the index is
+    being loaded are replayed on top of the loaded data.
+    """
+
+    def __init__(self):
+        """Initialize an empty index, not ready to serve queries."""
+        self._lock = threading.RLock()
+        self._pending: Optional[List[Tuple[str, Any]]] = None
+        self.ready = False
+        self._reset()
+
+    def _reset(self) -> None:
+        """Drop all indexed data (the caller holds the lock)."""
+        self._ordinals: Dict[Any, int] = {}
+        self._ids: List[Any] = []
+        self._free: List[int] = []
+        self._all = 0
+        self._bitmaps: Dict[str, Dict[str, int]] = {facet: {} for facet in ("status", "headcount", "dietary")}
+        # Facet values and phone/day of each ordinal, to unset them on change
+        self._values: Dict[int, Tuple[str, Tuple[str, ...]]] = {}
+        self._phones: Dict[int, str] = {}
+        self._days: Dict[int, date] = {}
+        self._parties: Dict[str, set] = {}
+        self._headcounts: Dict[int, str] = {}
+        self._day_bitmaps: Dict[date, int] = {}
+        self._today = self._clock()
+
+    @staticmethod
+    def _clock() -> date:
+        """Current UTC day (updated_at is stored as naive UTC)."""
+        return datetime.utcnow().date()
+
+    def __len__(self) -> int:
+        return len(self._ordinals)
+
+    @property
+    def tracking(self) -> bool:
+        """Whether writes should be applied (the index is loaded or loading)."""
+        return self.ready or self._pending is not None
+
+    def load(self, rows: Iterable[Any]) -> None:
+        """
+        Replace the index contents with the given guest rows.
+
+        Args:
+            rows: Rows with the IndexedGuest attributes (e.g. listing query rows)
+        """
+        with self._lock:
+            self._pending = []
+
+        fresh = GuestFacetIndex()
+        try:
+            fresh._bulk_add(IndexedGuest(*(getattr(row, field) for field in IndexedGuest._fields)) for row in rows)
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            self.__dict__.update({
+                key: value for key, value in fresh.__dict__.items()
+                if key not in ("_lock", "_pending", "ready")
+            })
+            pending, self._pending = self._pending, None
+            for operation, value in pending:
+                if operation == "upsert":
+                    self._remove(value.id)
+                    self._add(value)
+                else:
+                    self._remove(value)
+            self.ready = True
+        logger.info(f"Guest facet index loaded with {len(self._ordinals)} guests")
+
+    def upsert(self, row: Any) -> None:
+        """
+        Add or replace a guest.
+
+        Args:
+            row: Row or mapping with the IndexedGuest fields
+        """
+        if isinstance(row, dict):
+            guest = IndexedGuest(*(row.get(field) for field in IndexedGuest._fields))
+        else:
+            guest = IndexedGuest(*(getattr(row, field) for field in IndexedGuest._fields))
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(("upsert", guest))
+            self._remove(guest.id)
+            self._add(guest)
+
+    def remove(self, guest_id: Any) -> None:
+        """
+        Remove a guest, if present.
+
+        Args:
+            guest_id: ID of the guest to remove
+        """
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(("remove", guest_id))
+            self._remove(guest_id)
+
+    def clear(self) -> None:
+        """Empty the index and mark it as not ready."""
+        with self._lock:
+            self._reset()
+            self.ready = False
+
+    def query(self, filters: Dict[str, List[str]], limit: int, offset: int = 0) -> Dict[str, Any]:
+        """
+        Find guests matching facet filters and count every facet value.
+
+        The counts of a facet apply the filters of the other facets only,
+        so they show how many guests each alternative value would match.
+
+        Args:
+            filters: Selected values per facet (any of FACETS); values of a
+                facet are alternatives
+            limit: Maximum number of ids to return
+            offset: Number of matching ids to skip
+
+        Returns:
+            total, ids (in ordinal order) and counts per facet and value
+        """
+        with self._lock:
+            bitmaps = self._facet_bitmaps()
+            # Guests matching each facet's selection (all guests without one)
+            selected = {
+                facet: self._union(bitmaps[facet], filters.get(facet))
+                for facet in FACETS
+            }
+            matching = self._all
+            for bitmap in selected.values():
+                matching &= bitmap
+
+            counts: Dict[str, Dict[str, int]] = {}
+            for facet in FACETS:
+                others = self._all
+                for other, bitmap in selected.items():
+                    if other != facet:
+                        others &= bitmap
+                counts[facet] = {
+                    value: (bitmap & others).bit_count()
+                    for value, bitmap in bitmaps[facet].items()
+                    if bitmap & others
+                }
+
+            ids = []
+            for position, ordinal in enumerate(_ordinals(matching)):
+                if position >= offset + limit:
+                    break
+                if position >= offset:
+                    ids.append(self._ids[ordinal])
+            return {"total": matching.bit_count(), "ids": ids, "counts": counts}
+
+    def _union(self, values: Dict[str, int], selection: Optional[List[str]]) -> int:
+        """OR of the selected values' bitmaps (every guest if nothing is selected)."""
+        if not selection:
+            return self._all
+        bitmap = 0
+        for value in selection:
+            bitmap |= values.get(value, 0)
+        return bitmap
+
+    def _facet_bitmaps(self) -> Dict[str, Dict[str, int]]:
+        """Bitmaps of every facet value, with the last interaction windows as of today."""
+        self._roll_days()
+        windows: Dict[str, int] = {}
+        start = 0
+        for value, days in INTERACTION_WINDOWS:
+            bitmap = 0
+            for age in range(start, days + 1):
+                bitmap |= self._day_bitmaps.get(self._today - timedelta(days=age), 0)
+            windows[value] = bitmap
+            start = days + 1
+        recent = 0
+        for bitmap in windows.values():
+            recent |= bitmap
+        # Unknown and future-dated updates count as older too
+        windows[OLDER_INTERACTION] = self._all & ~recent
+        return {**self._bitmaps, "last_interaction": windows}
+
+    def _roll_days(self) -> None:
+        """Drop the day bitmaps that left the last windows."""
+        today = self._clock()
+        if today == self._today:
+            return
+        self._today = today
+        recent = self._recent_days(today)
+        for day in [day for day in self._day_bitmaps if day not in recent]:
+            del self._day_bitmaps[day]
+
+    @staticmethod
+    def _recent_days(today: date) -> set:
+        """Days kept as separate bitmaps."""
+        return {today - timedelta(days=age) for age in range(_KEPT_DAYS + 1)}
+
+    def _ordinal(self, guest_id: Any) -> int:
+        """Assign an ordinal to a new guest (the caller holds the lock)."""
+        ordinal = self._free.pop() if self._free else len(self._ids)
+        if ordinal == len(self._ids):
+            self._ids.append(guest_id)
+        else:
+            self._ids[ordinal] = guest_id
+        self._ordinals[guest_id] = ordinal
+        return ordinal
+
+    def _static_values(self, guest: IndexedGuest) -> Tuple[str, Tuple[str, ...]]:
+        """Status and dietary values of a guest."""
+        return _status_value(guest.attending), normalize_dietary(guest.dietary_restrictions) or ("none",)
+
+    def _bulk_add(self, guests: Iterable[IndexedGuest]) -> None:
+        """Index many guests at once, building each bitmap in one pass."""
+        postings: Dict[str, Dict[Any, List[int]]] = {
+            "status": {}, "dietary": {}, "day": {}, "headcount": {},
+        }
+        for guest in guests:
+            ordinal = self._ordinal(guest.id)
+            status, dietary = self._values[ordinal] = self._static_values(guest)
+            postings["status"].setdefault(status, []).append(ordinal)
+            for tag in dietary:
+                postings["dietary"].setdefault(tag, []).append(ordinal)
+            if guest.updated_at is not None:
+                day = self._days[ordinal] = guest.updated_at.date()
+                postings["day"].setdefault(day, []).append(ordinal)
+            if guest.phone_number:
+                self._phones[ordinal] = guest.phone_number
+                self._parties.setdefault(guest.phone_number, set()).add(ordinal)
+
+        for phone, members in self._parties.items():
+            value = _headcount_value(len(members))
+            for ordinal in members:
+                self._headcounts[ordinal] = value
+            postings["headcount"].setdefault(value, []).extend(members)
+        for ordinal in self._values.keys() - self._phones.keys():
+            self._headcounts[ordinal] = _headcount_value(1)
+            postings["headcount"].setdefault(_headcount_value(1), []).append(ordinal)
+
+        for facet in ("status", "dietary", "headcount"):
+            self._bitmaps[facet] = {value: _bitmap(ordinals) for value, ordinals in postings[facet].items()}
+        recent = self._recent_days(self._today)
+        for day, ordinals in postings["day"].items():
+            if day in recent:
+                self._day_bitmaps[day] = _bitmap(ordinals)
+        self._all = _bitmap(self._values)
+
+    def _set(self, values: Dict[str, int], value: str, bit: int) -> None:
+        """Set a bit in a value's bitmap."""
+        values[value] = values.get(value, 0) | bit
+
+    def _unset(self, values: Dict[Any, int], value: Any, bit: int) -> None:
+        """Clear a bit in a value's bitmap, dropping it once empty."""
+        bitmap = values.get(value, 0) & ~bit
+        if bitmap:
+            values[value] = bitmap
+        else:
+            values.pop(value, None)
+
+    def _set_headcount(self, ordinal: int, value: str) -> None:
+        """Move a guest to another headcount value."""
+        bit = 1 << ordinal
+        previous = self._headcounts.get(ordinal)
+        if previous == value:
+            return
+        if previous is not None:
+            self._unset(self._bitmaps["headcount"], previous, bit)
+        self._headcounts[ordinal] = value
+        self._set(self._bitmaps["headcount"], value, bit)
+
+    def _update_party(self, phone: Optional[str]) -> None:
+        """Recompute the headcount of every guest in a phone's party."""
+        members = self._parties.get(phone, ())
+        value = _headcount_value(len(members))
+        for ordinal in members:
+            self._set_headcount(ordinal, value)
+
+    def _add(self, guest: IndexedGuest) -> None:
+        """Index a guest (the caller holds the lock)."""
+        self._roll_days()
+        ordinal = self._ordinal(guest.id)
+        bit = 1 << ordinal
+        status, dietary = self._values[ordinal] = self._static_values(guest)
+        self._all |= bit
+        self._set(self._bitmaps["status"], status, bit)
+        for tag in dietary:
+            self._set(self._bitmaps["dietary"], tag, bit)
+        if guest.updated_at is not None:
+            day = self._days[ordinal] = guest.updated_at.date()
+            if day in self._recent_days(self._today):
+                self._day_bitmaps[day] = self._day_bitmaps.get(day, 0) | bit
+        if guest.phone_number:
+            self._phones[ordinal] = guest.phone_number
+            self._parties.setdefault(guest.phone_number, set()).add(ordinal)
+            self._update_party(guest.phone_number)
+        else:
+            self._set_headcount(ordinal, _headcount_value(1))
+
+    def _remove(self, guest_id: Any) -> None:
+        """Unindex a guest (the caller holds the lock)."""
+        ordinal = self._ordinals.pop(guest_id, None)
+        if ordinal is None:
+            return
+        bit = 1 << ordinal
+        status, dietary = self._values.pop(ordinal)
+        self._all &= ~bit
+        self._unset(self._bitmaps["status"], status, bit)
+        for tag in dietary:
+            self._unset(self._bitmaps["dietary"], tag, bit)
+        self._unset(self._bitmaps["headcount"], self._headcounts.pop(ordinal), bit)
+        day = self._days.pop(ordinal, None)
+        if day in self._day_bitmaps:
+            self._unset(self._day_bitmaps, day, bit)
+        phone = self._phones.pop(ordinal, None)
+        if phone is not None:
+            party = self._parties[phone]
+            party.discard(ordinal)
+            if not party:
+                del self._parties[phone]
+            self._update_party(phone)
+        self._ids[ordinal] = None
+        self._free.append(ordinal)
+
+
+# Process-wide index shared by the API and the write paths
+guest_facet_index = GuestFacetIndex()
+
+
+def build_guest_facet_index(index: GuestFacetIndex = guest_facet_index) -> None:
+    """
+    Load the index from rsvp_guests.
+
+    Errors are logged and leave the index not ready.
+    """
+    from backend.db import crud
+    from backend.db.session import get_db_session
+
+    try:
+        with get_db_session() as db:
+            result = db.execute(
+                crud.rsvp_guest_index_query(db.get_bind().dialect.name),
+                execution_options={"stream_results": True, "yield_per": 2000}
+            )
+            index.load(result)
+    except Exception as e:
+        logger.error(f"Failed to build guest facet index: {str(e)}")
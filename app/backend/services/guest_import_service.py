@@ -0,0 +1,398 @@
+"""
+Guest import service module.
+
+Bulk-loads a CSV or XLSX guest list into rsvp_guests.
+
+Rows are validated and normalized in Python, streamed through COPY into a
+temporary staging table, and merged into rsvp_guests with one set-based
+INSERT ... ON CONFLICT statement.
+"""
+import csv
+import io
+import logging
+import re
+import zipfile
+from dataclasses import dataclass, field, asdict
+from enum import Enum
+from typing import Dict, Any, BinaryIO, Iterable, Iterator, List, Optional
+
+from backend.services.cache_notifications import ALL_KEYS, notify_cache_changes
+
+# Module-level logger with explicit name
+logger = logging.getLogger(__name__)
+
+# Country code assumed for local numbers such as 050-1234567
+DEFAULT_COUNTRY_CODE = "972"
+
+# Same format accepted by the Twilio sender
+PHONE_PATTERN = re.compile(r"^\+\d{10,15}$")
+
+# Maximum number of per-row errors kept in the import report
+MAX_REPORTED_ERRORS = 50
+
+# Accepted header names (lowercased) for each staging column
+HEADER_ALIASES: Dict[str, List[str]] = {
+    "phone_number": ["phone_number", "phone", "mobile", "telephone", "טלפון", "נייד", "מספר טלפון"],
+    "name": ["name", "full_name", "guest", "שם", "שם מלא"],
+    "email": ["email", "e-mail", "אימייל", "מייל"],
+    "num_guests": ["num_guests", "guests", "party_size", "מספר אורחים", "כמות"],
+    "dietary_restrictions": ["dietary_restrictions", "dietary", "diet", "תזונה"],
+    "notes": ["notes", "note", "comments", "הערות"],
+}
+
+STAGING_COLUMNS = ["line_no", "phone_number", "name", "email", "num_guests", "dietary_restrictions", "notes"]
+
+CREATE_STAGING_SQL = """
+    CREATE TEMP TABLE guest_import_staging (
+        line_no INTEGER NOT NULL,
+        phone_number VARCHAR(20) NOT NULL,
+        name VARCHAR(255),
+        email VARCHAR(255),
+        num_guests INTEGER,
+        dietary_restrictions TEXT,
+        notes TEXT
+    ) ON COMMIT DROP
+"""
+
+COPY_STAGING_SQL = f"COPY guest_import_staging ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+
+# Later lines win when the same phone appears more than once in the file
+# (prepare_rows reports the earlier lines as rejected duplicates).
+# (xmax = 0) is true only for rows that were freshly inserted.
+MERGE_STAGING_SQL = """
+    WITH deduped AS (
+        SELECT DISTINCT ON (phone_number) *
+        FROM guest_import_staging
+        ORDER BY phone_number, line_no DESC
+    ), merged AS (
+        INSERT INTO rsvp_guests (phone_number, name, email, num_guests, dietary_restrictions, notes)
+        SELECT phone_number, name, email, num_guests, dietary_restrictions, notes
+        FROM deduped
+        ON CONFLICT (phone_number) DO UPDATE SET
+            name = COALESCE(EXCLUDED.name, rsvp_guests.name),
+            email = COALESCE(EXCLUDED.email, rsvp_guests.email),
+            num_guests = COALESCE(EXCLUDED.num_guests, rsvp_guests.num_guests),
+            dietary_restrictions = COALESCE(EXCLUDED.dietary_restrictions, rsvp_guests.dietary_restrictions),
+            notes = COALESCE(EXCLUDED.notes, rsvp_guests.notes)
+        RETURNING (xmax = 0) AS inserted
+    )
+    SELECT
+        COUNT(*) FILTER (WHERE inserted) AS inserted,
+        COUNT(*) FILTER (WHERE NOT inserted) AS updated
+    FROM merged
+"""
+
+
+class ImportFormat(str, Enum):
+    """Supported guest list formats."""
+    CSV = "csv"
+    XLSX = "xlsx"
+
+
+class GuestImportError(ValueError):
+    """Raised when a guest list cannot be read at all."""
+
+
+@dataclass
+class ImportResult:
+    """Outcome of a guest list import."""
+    inserted: int = 0
+    updated: int = 0
+    rejected: int = 0
+    errors: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the result as a plain dictionary."""
+        return asdict(self)
+
+
+def normalize_phone_number(raw: Any, country_code: str = DEFAULT_COUNTRY_CODE) -> Optional[str]:
+    """
+    Normalize a phone number to the E.164 form stored in rsvp_guests.
+
+    Handles separators, 00 international prefixes, local numbers with a
+    trunk 0, and spreadsheet cells that lost their leading 0.
+
+    Args:
+        raw: Phone number as typed (string, int or float)
+        country_code: Country code for local numbers
+
+    Returns:
+        Normalized phone number (e.g. +972501234567) or None if invalid
+    """
+    if raw is None:
+        return None
+    if isinstance(raw, float) and raw.is_integer():
+        raw = int(raw)
+
+    value = str(raw).strip()
+    has_plus = value.startswith("+")
+    digits = re.sub(r"\D", "", value)
+    if not digits:
+        return None
+
+    if has_plus:
+        number = digits
+    elif digits.startswith("00"):
+        number = digits[2:]
+    elif digits.startswith(country_code) and len(digits) > 10:
+        number = digits
+    elif digits.startswith("0"):
+        number = country_code + digits[1:]
+    elif len(digits) == 9:
+        # Local number whose trunk 0 was dropped by a spreadsheet
+        number = country_code + digits
+    else:
+        number = digits
+
+    normalized = f"+{number}"
+    return normalized if PHONE_PATTERN.match(normalized) else None
+
+
+def _resolve_headers(headers: Iterable[Any]) -> Dict[int, str]:
+    """Map column positions to staging columns using HEADER_ALIASES."""
+    lookup = {
+        alias: column
+        for column, aliases in HEADER_ALIASES.items()
+        for alias in aliases
+    }
+    mapping = {}
+    for position, header in enumerate(headers):
+        column = lookup.get(str(header or "").strip().lower())
+        if column and column not in mapping.values():
+            mapping[position] = column
+    if "phone_number" not in mapping.values():
+        raise GuestImportError("Guest list must have a phone number column")
+    return mapping
+
+
+def read_csv_rows(stream: BinaryIO) -> Iterator[List[Any]]:
+    """
+    Yield raw rows (header first) from a UTF-8 CSV byte stream.
+
+    Raises:
+        GuestImportError: If the file is not UTF-8 or not valid CSV
+    """
+    text_stream = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    reader = csv.reader(text_stream)
+    try:
+        yield from reader
+    except UnicodeDecodeError:
+        raise GuestImportError(f"Guest list is not UTF-8 encoded (line {reader.line_num + 1})")
+    except csv.Error as e:
+        raise GuestImportError(f"Guest list is not valid CSV (line {reader.line_num}): {e}")
+    finally:
+        text_stream.detach()
+
+
+def read_xlsx_rows(stream: BinaryIO) -> Iterator[List[Any]]:
+    """
+    Yield raw rows (header first) from the first sheet of an XLSX workbook.
+
+    Raises:
+        GuestImportError: If openpyxl is missing or the file is not a readable workbook
+    """
+    try:
+        from openpyxl import load_workbook
+        from openpyxl.utils.exceptions import InvalidFileException
+    except ImportError:
+        raise GuestImportError("XLSX import requires openpyxl (pip install openpyxl)")
+
+    # Damaged or non-XLSX files surface as zip, XML (SyntaxError) and
+    # openpyxl errors, and as ValueError/KeyError from missing parts
+    unreadable = (zipfile.BadZipFile, InvalidFileException, SyntaxError, ValueError, KeyError, OSError)
+    try:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except unreadable as e:
+        raise GuestImportError(f"Guest list is not a valid XLSX workbook: {e}")
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield list(row)
+    except unreadable as e:
+        raise GuestImportError(f"Guest list is not a valid XLSX workbook: {e}")
+    finally:
+        workbook.close()
+
+
+def prepare_rows(raw_rows: Iterable[List[Any]], result: ImportResult) -> Iterator[Dict[str, Any]]:
+    """
+    Validate and normalize guest rows for staging.
+
+    The header is resolved eagerly so a malformed file fails before any
+    database work starts. Invalid rows are counted on result.rejected
+    and skipped. When a phone number appears on several lines the last
+    one is imported and the earlier ones are rejected as duplicates.
+
+    Args:
+        raw_rows: Rows from a reader, header row first
+        result: Import result to record rejections on
+
+    Returns:
+        Iterator of dictionaries keyed by STAGING_COLUMNS
+    """
+    raw_rows = iter(raw_rows)
+    header = next(raw_rows, None)
+    if header is None:
+        raise GuestImportError("Guest list is empty")
+    return _iter_prepared_rows(raw_rows, _resolve_headers(header), result)
+
+
+def _iter_prepared_rows(
+    raw_rows: Iterator[List[Any]],
+    mapping: Dict[int, str],
+    result: ImportResult
+) -> Iterator[Dict[str, Any]]:
+    """Yield normalized rows, rejecting the ones that fail validation."""
+    # Line of each phone's latest row so far
+    phone_lines: Dict[str, int] = {}
+    for line_no, raw in enumerate(raw_rows, start=2):
+        values = {
+            column: raw[position] if position < len(raw) else None
+            for position, column in mapping.items()
+        }
+        if all(value in (None, "") for value in values.values()):
+            continue
+
+        row = {
+            column: (str(values[column]).strip() or None) if values.get(column) is not None else None
+            for column in STAGING_COLUMNS[2:]
+        }
+        row["line_no"] = line_no
+        row["phone_number"] = normalize_phone_number(values.get("phone_number"))
+        if row["phone_number"] is None:
+            _reject(result, line_no, f"invalid phone number {values.get('phone_number')!r}")
+            continue
+
+        if row["num_guests"] is not None:
+            try:
+                row["num_guests"] = int(float(row["num_guests"]))
+            except ValueError:
+                _reject(result, line_no, f"invalid guest count {row['num_guests']!r}")
+                continue
+
+        earlier_line = phone_lines.get(row["phone_number"])
+        if earlier_line is not None:
+            _reject(result, earlier_line, f"duplicate phone number {row['phone_number']} (line {line_no} is imported)")
+        phone_lines[row["phone_number"]] = line_no
+        yield row
+
+
+def _reject(result: ImportResult, line_no: int, reason: str) -> None:
+    """Record a rejected row on the import result."""
+    result.rejected += 1
+    if len(result.errors) < MAX_REPORTED_ERRORS:
+        result.errors.append(f"line {line_no}: {reason}")
+
+
+class _CopyStream(io.TextIOBase):
+    """
+    Read-only file object that renders rows as COPY CSV on demand.
+
+    psycopg2's copy_expert pulls from read(), so rows are produced only
+    as fast as PostgreSQL consumes them.
+    """
+
+    def __init__(self, rows: Iterable[Dict[str, Any]]):
+        self._rows = iter(rows)
+        # Reader error raised inside copy_expert, which reports it as a COPY failure
+        self.error: Optional[GuestImportError] = None
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        self._pending = ""
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._pending) < size:
+            try:
+                row = next(self._rows, None)
+            except GuestImportError as e:
+                self.error = e
+                raise
+            if row is None:
+                break
+            self._buffer.seek(0)
+            self._buffer.truncate()
+            self._writer.writerow([row[column] for column in STAGING_COLUMNS])
+            self._pending += self._buffer.getvalue()
+
+        if size < 0:
+            chunk, self._pending = self._pending, ""
+        else:
+            chunk, self._pending = self._pending[:size], self._pending[size:]
+        return chunk
+
+
+class GuestImportService:
+    """
+    Service for bulk-importing guest lists.
+
+    Uses a raw DBAPI connection from the SQLAlchemy engine so the
+    whole import runs in one transaction with COPY.
+    """
+
+    def __init__(self, engine=None):
+        """
+        Initialize the import service.
+
+        Args:
+            engine: SQLAlchemy engine. If None, uses the application engine.
+        """
+        if engine is None:
+            from backend.db.session import engine
+        self.engine = engine
+
+    def import_file(self, stream: BinaryIO, import_format: ImportFormat) -> ImportResult:
+        """
+        Import a guest list file.
+
+        Args:
+            stream: Binary file object with the guest list
+            import_format: Format of the file
+
+        Returns:
+            Counts of inserted, updated and rejected rows
+        """
+        reader = read_xlsx_rows if import_format == ImportFormat.XLSX else read_csv_rows
+        return self.import_rows(reader(stream))
+
+    def import_rows(self, raw_rows: Iterable[List[Any]]) -> ImportResult:
+        """
+        Import raw guest rows (header first) in a single transaction.
+
+        Args:
+            raw_rows: Rows from a reader, header row first
+
+        Returns:
+            Counts of inserted, updated and rejected rows
+        """
+        result = ImportResult()
+        copy_stream = _CopyStream(prepare_rows(raw_rows, result))
+
+        conn = self.engine.raw_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(CREATE_STAGING_SQL)
+                cursor.copy_expert(COPY_STAGING_SQL, copy_stream)
+                cursor.execute(MERGE_STAGING_SQL)
+                inserted, updated = cursor.fetchone()
+                if inserted or updated:
+                    # The merge touches arbitrary guests; workers reload them wholesale
+                    notify_cache_changes(cursor, "rsvp_guests", [ALL_KEYS])
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            if copy_stream.error is not None and copy_stream.error is not e:
+                raise copy_stream.error from e
+            raise
+        finally:
+            conn.close()
+
+        result.inserted = inserted
+        result.updated = updated
+        logger.info(
+            "Guest import finished: %d inserted, %d updated, %d rejected",
+            result.inserted, result.updated, result.rejected
+        )
+        return result
@@ -0,0 +1,339 @@
+"""
+Guest search index module.
+
+Keeps an in-process trigram index over guest names and phone numbers so
+typeahead searches are answered without a database round trip.
+
+The index is built once at startup from rsvp_guests and then kept up to
+date by the write paths in crud and DataStorage. Until it is built (or if
+building failed) callers fall back to the database search.
+
+Each worker process holds its own copy; writes made by other workers (and
+by the response trigger) are applied from cache change notifications, see
+services/cache_notifications.py.
+"""
+import heapq
+import logging
+import re
+import threading
+import unicodedata
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+# Module-level logger with explicit name
+logger = logging.getLogger(__name__)
+
+# Minimum share of query trigrams a name must contain to match
+# (pg_trgm's default word_similarity_threshold is 0.6)
+SIMILARITY_THRESHOLD = 0.5
+
+# Fewer digits than this are not treated as a phone number search
+MIN_PHONE_SEARCH_DIGITS = 3
+
+# Hebrew niqqud and cantillation marks
+_NIQQUD_PATTERN = re.compile("[\u0591-\u05C7]")
+
+# Punctuation, symbols and emoji; everything but letters, digits and spaces
+_NON_WORD_PATTERN = re.compile(r"[^\w\s]|_")
+
+# Final letter forms, folded to their regular form
+_FINAL_LETTERS = str.maketrans("ךםןףץ", "כמנפצ")
+
+
+class IndexedGuest(NamedTuple):
+    """Guest fields served from the index (same shape as the listing rows)."""
+    id: Any
+    name: Optional[str]
+    attending: Optional[bool]
+    dietary_restrictions: Optional[str]
+    phone_number: Optional[str]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+
+def normalize_search_text(value: Optional[str]) -> str:
+    """
+    Normalize text for matching.
+
+    Removes niqqud, folds Hebrew final letters and case, and replaces
+    punctuation and emoji with spaces.
+
+    Args:
+        value: Text to normalize
+
+    Returns:
+        Normalized text with single spaces between words
+    """
+    if not value:
+        return ""
+    value = unicodedata.normalize("NFKC", value)
+    value = _NIQQUD_PATTERN.sub("", value).translate(_FINAL_LETTERS).casefold()
+    return " ".join(_NON_WORD_PATTERN.sub(" ", value).split())
+
+
+def phone_search_digits(value: Optional[str]) -> str:
+    """
+    Get the digits of a phone number, without the local trunk zero.
+
+    "050-1234567" and "+972501234567" share the digits "501234567".
+    """
+    return re.sub(r"\D", "", value or "").lstrip("0")
+
+
+def _word_trigrams(text: str) -> Set[str]:
+    """Trigrams of each word, padded like pg_trgm ("  w", " wo", "wor", ...)."""
+    trigrams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        trigrams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+
+def _digit_trigrams(digits: str) -> Set[str]:
+    """Unpadded trigrams of a digit string, for substring lookups."""
+    return {digits[i:i + 3] for i in range(len(digits) - 2)}
+
+
+class GuestSearchIndex:
+    """
+    In-memory trigram index over guest names and phone numbers.
+
+    Names are indexed per word: trigrams point to the distinct words that
+    contain them and words point to the guests whose name contains them.
+    Fuzzy matching therefore only scans the (small) vocabulary of words,
+    not every guest. Phones are indexed by trigrams of their digits.
+
+    All methods are thread safe. Writes that arrive while the index is
+    being built are replayed on top of the freshly loaded data, so they
+    are never lost to the snapshot.
+    """
+
+    def __init__(self):
+        """Initialize an empty index, not ready to serve searches."""
+        self._lock = threading.RLock()
+        self._pending: Optional[List[Tuple[str, Any]]] = None
+        self.ready = False
+        self._reset()
+
+    def _reset(self) -> None:
+        """Drop all indexed data (the caller holds the lock)."""
+        self._guests: Dict[Any, IndexedGuest] = {}
+        self._names: Dict[Any, str] = {}
+        self._phones: Dict[Any, str] = {}
+        self._word_guests: Dict[str, Set[Any]] = {}
+        self._word_trigrams: Dict[str, Set[str]] = {}
+        self._phone_trigrams: Dict[str, Set[Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._guests)
+
+    @property
+    def tracking(self) -> bool:
+        """Whether writes should be applied (the index is loaded or loading)."""
+        return self.ready or self._pending is not None
+
+    def load(self, rows: Iterable[Any]) -> None:
+        """
+        Replace the index contents with the given guest rows.
+
+        Args:
+            rows: Rows with the IndexedGuest attributes (e.g. listing query rows)
+        """
+        with self._lock:
+            self._pending = []
+
+        # Build a fresh index without holding the lock, then swap it in
+        fresh = GuestSearchIndex()
+        try:
+            for row in rows:
+                fresh._add(IndexedGuest(*(getattr(row, field) for field in IndexedGuest._fields)))
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            self.__dict__.update({
+                key: value for key, value in fresh.__dict__.items()
+                if key not in ("_lock", "_pending", "ready")
+            })
+            pending, self._pending = self._pending, None
+            for operation, value in pending:
+                if operation == "upsert":
+                    self._remove(value.id)
+                    self._add(value)
+                else:
+                    self._remove(value)
+            self.ready = True
+        logger.info(f"Guest search index loaded with {len(self._guests)} guests")
+
+    def upsert(self, row: Any) -> None:
+        """
+        Add or replace a guest.
+
+        Args:
+            row: Row or mapping with the IndexedGuest fields
+        """
+        if isinstance(row, dict):
+            guest = IndexedGuest(*(row.get(field) for field in IndexedGuest._fields))
+        else:
+            guest = IndexedGuest(*(getattr(row, field) for field in IndexedGuest._fields))
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(("upsert", guest))
+            self._remove(guest.id)
+            self._add(guest)
+
+    def remove(self, guest_id: Any) -> None:
+        """
+        Remove a guest, if present.
+
+        Args:
+            guest_id: ID of the guest to remove
+        """
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(("remove", guest_id))
+            self._remove(guest_id)
+
+    def clear(self) -> None:
+        """Empty the index and mark it as not ready."""
+        with self._lock:
+            self._reset()
+            self.ready = False
+
+    def search(self, query: str, limit: int) -> List[IndexedGuest]:
+        """
+        Find guests by fuzzy name or partial phone number, best match first.
+
+        Scoring mirrors the database search: a phone digit match scores 1.0,
+        a name containing the query 0.9, otherwise the average over the
+        query's words of the share of their trigrams found in the best
+        matching word of the name (at least SIMILARITY_THRESHOLD).
+
+        Args:
+            query: Search term (name, or any part of a phone number)
+            limit: Maximum number of results
+
+        Returns:
+            Matching guests
+        """
+        term = normalize_search_text(query)
+        digits = phone_search_digits(query)
+        if len(digits) < MIN_PHONE_SEARCH_DIGITS:
+            digits = ""
+        if not term:
+            return []
+
+        query_words = term.split()
+        scores: Dict[Any, float] = {}
+        with self._lock:
+            for query_word in query_words:
+                # Best similarity of this query word per guest
+                best: Dict[Any, float] = {}
+                for word, similarity in self._similar_words(query_word).items():
+                    for guest_id in self._word_guests[word]:
+                        if similarity > best.get(guest_id, 0.0):
+                            best[guest_id] = similarity
+                for guest_id, similarity in best.items():
+                    scores[guest_id] = scores.get(guest_id, 0.0) + similarity / len(query_words)
+
+            scores = {
+                guest_id: 0.9 if term in self._names[guest_id] else score
+                for guest_id, score in scores.items()
+                if score >= SIMILARITY_THRESHOLD or term in self._names[guest_id]
+            }
+
+            if digits:
+                postings = sorted(
+                    (self._phone_trigrams.get(trigram, set()) for trigram in _digit_trigrams(digits)),
+                    key=len
+                )
+                candidates = set.intersection(*postings) if postings else set()
+                for guest_id in candidates:
+                    if digits in self._phones[guest_id]:
+                        scores[guest_id] = 1.0
+
+            ranked = heapq.nsmallest(
+                limit, scores, key=lambda guest_id: (-scores[guest_id], self._names[guest_id])
+            )
+            return [self._guests[guest_id] for guest_id in ranked]
+
+    def _similar_words(self, query_word: str) -> Dict[str, float]:
+        """Indexed words sharing at least SIMILARITY_THRESHOLD of the query word's trigrams."""
+        trigrams = _word_trigrams(query_word)
+        hits = Counter()
+        for trigram in trigrams:
+            hits.update(self._word_trigrams.get(trigram, ()))
+        return {
+            word: count / len(trigrams)
+            for word, count in hits.items()
+            if count / len(trigrams) >= SIMILARITY_THRESHOLD
+        }
+
+    def _add(self, guest: IndexedGuest) -> None:
+        """Index a guest (the caller holds the lock)."""
+        name = normalize_search_text(guest.name)
+        phone = phone_search_digits(guest.phone_number)
+        self._guests[guest.id] = guest
+        self._names[guest.id] = name
+        self._phones[guest.id] = phone
+        for word in set(name.split()):
+            if word not in self._word_guests:
+                self._word_guests[word] = set()
+                for trigram in _word_trigrams(word):
+                    self._word_trigrams.setdefault(trigram, set()).add(word)
+            self._word_guests[word].add(guest.id)
+        for trigram in _digit_trigrams(phone):
+            self._phone_trigrams.setdefault(trigram, set()).add(guest.id)
+
+    def _remove(self, guest_id: Any) -> None:
+        """Unindex a guest (the caller holds the lock)."""
+        if self._guests.pop(guest_id, None) is None:
+            return
+        name = self._names.pop(guest_id)
+        phone = self._phones.pop(guest_id)
+        for word in set(name.split()):
+            guests = self._word_guests[word]
+            guests.discard(guest_id)
+            if not guests:
+                # Last guest with this word, drop it from the vocabulary
+                del self._word_guests[word]
+                _discard_posting(self._word_trigrams, _word_trigrams(word), word)
+        _discard_posting(self._phone_trigrams, _digit_trigrams(phone), guest_id)
+
+
+def _discard_posting(postings: Dict[str, Set[Any]], trigrams: Iterable[str], value: Any) -> None:
+    """Remove value from the postings of each trigram, dropping empty ones."""
+    for trigram in trigrams:
+        values = postings.get(trigram)
+        if values is not None:
+            values.discard(value)
+            if not values:
+                del postings[trigram]
+
+
+# Process-wide index shared by the API and the write paths
+guest_search_index = GuestSearchIndex()
+
+
+def build_guest_search_index(index: GuestSearchIndex = guest_search_index) -> None:
+    """
+    Load the index from rsvp_guests.
+
+    Errors are logged and leave the index not ready, so searches keep
+    falling back to the database.
+    """
+    from backend.db import crud
+    from backend.db.session import get_db_session
+
+    try:
+        with get_db_session() as db:
+            result = db.execute(
+                crud.rsvp_guest_index_query(db.get_bind().dialect.name),
+                execution_options={"stream_results": True, "yield_per": 2000}
+            )
+            index.load(result)
+    except Exception as e:
+        logger.error(f"Failed to build guest search index: {str(e)}")
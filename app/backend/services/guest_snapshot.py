@@ -0,0 +1,399 @@
+"""
+Guest snapshot module.
+
+A compact, memory-mapped snapshot of the guest directory (phone number to
+RSVP status, number of guests and name) plus the serialized /rsvp/stats
+response, shared by all workers on a host.
+
+One process, the refresher, writes the snapshot to a temporary file and
+swaps it in with os.replace(), so readers never see a partial file. Every
+worker maps the current file read-only: lookups binary-search the mapped
+records in place (only the matched name is decoded) and the statistics are
+read once per file, so workers share one copy in the page cache instead of
+each building their own. A reader notices a new file by its inode and
+remaps it; mappings of replaced files stay valid until dropped. Readers
+pass a maximum age, so a snapshot the refresher stopped rewriting is not
+served for long.
+
+The refresher holds an flock on "<path>.lock". The other workers retry it
+every few seconds, so when the refresher exits (or is recycled) another
+worker takes over.
+
+File layout (little-endian):
+
+    header   magic, guest count, stats length, names length, generated_at
+    records  one RECORD per guest, sorted by phone number
+    stats    serialized statistics (JSON, see stats_cache.serialize_stats)
+    names    UTF-8 guest names, referenced by offset and length
+"""
+import fcntl
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from backend.services.stats_cache import CachedStats, serialize_stats, stats_etag
+
+# Module-level logger with explicit name
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"RSVPSNP1"
+
+# magic, guest count, stats length, names length, generated_at (epoch seconds)
+HEADER = struct.Struct("<8sIIId")
+
+# phone (ASCII, NUL padded), status code, reserved, num_guests, name offset, name length
+RECORD = struct.Struct("<16sBBHII")
+
+# Longest phone number a record holds (E.164 is at most 16 characters with the +)
+MAX_PHONE_LENGTH = 16
+
+# rsvp_status values by their code in the snapshot; 0 is "no status"
+STATUSES = (None, "confirmed", "declined", "pending")
+_STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+# Seconds between checks of the snapshot file for a newer version
+SNAPSHOT_CHECK_INTERVAL = 0.5
+
+# Seconds between attempts of a standby worker to become the refresher
+SNAPSHOT_LOCK_RETRY_SECONDS = 5.0
+
+# Guest directory read by the refresher (PostgreSQL schema)
+GUEST_DIRECTORY_SQL = "SELECT phone_number, rsvp_status, num_guests, name FROM rsvp_guests"
+
+
+class SnapshotGuest(NamedTuple):
+    """Guest directory entry."""
+    phone_number: str
+    rsvp_status: Optional[str]
+    num_guests: int
+    name: Optional[str]
+
+
+def write_guest_snapshot(
+    path: str,
+    guests: Iterable[Tuple[str, Optional[str], Optional[int], Optional[str]]],
+    stats: Dict[str, Any]
+) -> int:
+    """
+    Write a snapshot and atomically replace the file at path.
+
+    Args:
+        path: Snapshot file path
+        guests: (phone_number, rsvp_status, num_guests, name) rows
+        stats: /rsvp/stats response body
+
+    Returns:
+        Number of guests written
+    """
+    directory: Dict[bytes, Tuple[int, int, bytes]] = {}
+    for phone_number, rsvp_status, num_guests, name in guests:
+        phone = (phone_number or "").encode("ascii", "ignore")
+        if not phone or len(phone) > MAX_PHONE_LENGTH:
+            logger.warning(f"Skipping guest with unusable phone number in snapshot: {phone_number!r}")
+            continue
+        directory[phone] = (
+            _STATUS_CODES.get(rsvp_status, 0),
+            max(0, min(int(num_guests or 0), 0xFFFF)),
+            (name or "").encode("utf-8"),
+        )
+
+    records = bytearray()
+    names = bytearray()
+    for phone in sorted(directory):
+        status_code, num_guests, name = directory[phone]
+        records += RECORD.pack(phone, status_code, 0, num_guests, len(names), len(name))
+        names += name
+    stats_body = serialize_stats(stats)
+
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=".snapshot-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(SNAPSHOT_MAGIC, len(directory), len(stats_body), len(names), time.time()))
+            f.write(records)
+            f.write(stats_body)
+            f.write(names)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return len(directory)
+
+
+class _MappedSnapshot:
+    """One mapped snapshot file."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.identity = (stat.st_dev, stat.st_ino, stat.st_mtime_ns)
+        magic, self.count, stats_len, names_len, self.generated_at = HEADER.unpack_from(self.mm, 0)
+        self.stats_start = HEADER.size + self.count * RECORD.size
+        self.names_start = self.stats_start + stats_len
+        if magic != SNAPSHOT_MAGIC or self.names_start + names_len != len(self.mm):
+            raise ValueError(f"Not a valid guest snapshot: {path}")
+        body = self.mm[self.stats_start:self.names_start]
+        self.stats = CachedStats(body, stats_etag(body))
+
+    def lookup(self, phone_number: str) -> Optional[SnapshotGuest]:
+        """Binary search the records for a phone number."""
+        key = phone_number.encode("ascii", "ignore").ljust(MAX_PHONE_LENGTH, b"\0")
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = HEADER.size + mid * RECORD.size
+            probe = self.mm[offset:offset + MAX_PHONE_LENGTH]
+            if probe < key:
+                lo = mid + 1
+            elif probe > key:
+                hi = mid
+            else:
+                _, status_code, _, num_guests, name_offset, name_len = RECORD.unpack_from(self.mm, offset)
+                start = self.names_start + name_offset
+                name = self.mm[start:start + name_len].decode("utf-8") or None
+                return SnapshotGuest(phone_number, STATUSES[status_code], num_guests, name)
+        return None
+
+
+class GuestSnapshot:
+    """
+    Read-only view of the current snapshot file.
+
+    Until a path is attached, or while the file is missing or invalid,
+    available is False and callers use the database instead.
+    """
+
+    def __init__(self, check_interval: float = SNAPSHOT_CHECK_INTERVAL):
+        """
+        Initialize the reader.
+
+        Args:
+            check_interval: Seconds between checks of the file for a newer version
+        """
+        self.check_interval = check_interval
+        self.path: Optional[str] = None
+        self._mapped: Optional[_MappedSnapshot] = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def attach(self, path: Optional[str]) -> None:
+        """Read snapshots from path (None detaches)."""
+        with self._lock:
+            self.path = path
+            self._mapped = None
+            self._checked_at = float("-inf")
+
+    def _current(self) -> Optional[_MappedSnapshot]:
+        """The mapped snapshot, remapped if the file was replaced."""
+        if self.path is None or time.monotonic() - self._checked_at < self.check_interval:
+            return self._mapped
+        with self._lock:
+            if time.monotonic() - self._checked_at < self.check_interval:
+                return self._mapped
+            self._checked_at = time.monotonic()
+            try:
+                stat = os.stat(self.path)
+                identity = (stat.st_dev, stat.st_ino, stat.st_mtime_ns)
+                if self._mapped is None or self._mapped.identity != identity:
+                    self._mapped = _MappedSnapshot(self.path)
+            except FileNotFoundError:
+                self._mapped = None
+            except (OSError, ValueError, struct.error) as e:
+                logger.warning(f"Failed to map guest snapshot: {str(e)}")
+                self._mapped = None
+            return self._mapped
+
+    def _fresh(self, max_age: Optional[float]) -> Optional[_MappedSnapshot]:
+        """The mapped snapshot if it was written at most max_age seconds ago."""
+        mapped = self._current()
+        if mapped is None or (max_age is not None and time.time() - mapped.generated_at > max_age):
+            return None
+        return mapped
+
+    @property
+    def available(self) -> bool:
+        """Whether a snapshot is mapped."""
+        return self._current() is not None
+
+    def fresh(self, max_age: Optional[float] = None) -> bool:
+        """Whether a snapshot written at most max_age seconds ago is mapped."""
+        return self._fresh(max_age) is not None
+
+    def lookup(self, phone_number: str, max_age: Optional[float] = None) -> Optional[SnapshotGuest]:
+        """
+        Look up a guest by phone number.
+
+        Args:
+            phone_number: Phone number
+            max_age: Ignore a snapshot written more than this many seconds ago
+
+        Returns:
+            The directory entry, or None if not found or no (fresh enough)
+            snapshot is mapped
+        """
+        mapped = self._fresh(max_age)
+        return mapped.lookup(phone_number) if mapped is not None else None
+
+    def stats(self, max_age: Optional[float] = None) -> Optional[CachedStats]:
+        """
+        Get the serialized statistics and their ETag.
+
+        Args:
+            max_age: Ignore a snapshot written more than this many seconds ago
+
+        Returns:
+            The statistics, or None if no (fresh enough) snapshot is mapped
+        """
+        mapped = self._fresh(max_age)
+        return mapped.stats if mapped is not None else None
+
+    def status(self) -> Dict[str, Any]:
+        """Path, size and age of the mapped snapshot."""
+        mapped = self._current()
+        return {
+            "path": self.path,
+            "available": mapped is not None,
+            "guests": mapped.count if mapped else 0,
+            "age_seconds": round(time.time() - mapped.generated_at, 3) if mapped else None,
+        }
+
+
+def read_snapshot_source() -> Tuple[List[Any], Dict[str, Any]]:
+    """Read the guest directory and statistics from the database."""
+    from sqlalchemy import text
+
+    from backend.db import crud
+    from backend.db.session import get_db_session
+
+    with get_db_session() as db:
+        guests = db.execute(text(GUEST_DIRECTORY_SQL)).all()
+        stats = crud.rsvp_stats_summary(crud.get_rsvp_statistics(db))
+    return guests, stats
+
+
+class GuestSnapshotRefresher:
+    """
+    Rewrite the snapshot periodically and soon after changes.
+
+    At most one refresher per snapshot path runs on a host: start() takes
+    an exclusive lock on "<path>.lock" and returns False if another
+    process holds it. The process then stands by, retrying the lock every
+    lock_retry_interval seconds, and takes over once the refresher exits.
+    request_refresh() (called for cache change notifications) wakes the
+    refresher early; requests arriving while it writes are folded into the
+    next write.
+    """
+
+    def __init__(
+        self,
+        source: Callable[[], Tuple[Iterable[Any], Dict[str, Any]]] = read_snapshot_source,
+        lock_retry_interval: float = SNAPSHOT_LOCK_RETRY_SECONDS
+    ):
+        """
+        Initialize the refresher.
+
+        Args:
+            source: Returns the guest rows and statistics to write
+            lock_retry_interval: Seconds between attempts to take over from another process
+        """
+        self.source = source
+        self.lock_retry_interval = lock_retry_interval
+        self.path: Optional[str] = None
+        self.interval = 0.0
+        self.refreshes = 0
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._lock_file = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether this process is the refresher."""
+        return self._lock_file is not None and self._thread is not None and self._thread.is_alive()
+
+    def start(self, path: str, interval: float) -> bool:
+        """
+        Become the refresher for path, or stand by if another process already is.
+
+        Args:
+            path: Snapshot file path
+            interval: Seconds between refreshes without changes
+
+        Returns:
+            True if this process now refreshes the snapshot
+        """
+        if self._thread is not None:
+            # Already refreshing or standing by; a standby tries the lock now
+            if self._lock_file is None and self._try_lock():
+                self._wakeup.set()
+            return self.running
+        self.path, self.interval = path, interval
+        self._stopped.clear()
+        acquired = self._try_lock()
+        if acquired:
+            self._wakeup.set()
+        self._thread = threading.Thread(target=self._run, name="guest-snapshot-refresher", daemon=True)
+        self._thread.start()
+        return acquired
+
+    def stop(self) -> None:
+        """Stop refreshing and release the lock."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def request_refresh(self) -> None:
+        """Ask for a refresh soon (no-op unless this process is the refresher)."""
+        if self._lock_file is not None:
+            self._wakeup.set()
+
+    def refresh(self) -> int:
+        """Write a new snapshot now; returns the number of guests written."""
+        guests, stats = self.source()
+        count = write_guest_snapshot(self.path, guests, stats)
+        self.refreshes += 1
+        return count
+
+    def _try_lock(self) -> bool:
+        """Take the refresher lock if no other process holds it."""
+        lock_file = open(f"{self.path}.lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def _run(self) -> None:
+        """Refresh loop; stands by until the lock is taken, then refreshes right away."""
+        while not self._stopped.is_set():
+            if self._lock_file is None:
+                if self._stopped.wait(self.lock_retry_interval) or not self._try_lock():
+                    continue
+                logger.info(f"Took over refreshing guest snapshot {self.path}")
+            else:
+                self._wakeup.wait(self.interval)
+                self._wakeup.clear()
+                if self._stopped.is_set():
+                    break
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Failed to refresh guest snapshot: {str(e)}")
+
+
+# Process-wide reader and refresher, set up at application startup
+guest_snapshot = GuestSnapshot()
+snapshot_refresher = GuestSnapshotRefresher()
@@ -0,0 +1,148 @@
+"""
+Latest response cache module.
+
+Keeps the latest user response per phone number in a bounded LRU, so the
+conversation flow can look up where a guest left off without a database
+round trip on every message.
+
+The cache is write-through: DataStorage puts each response it saves that
+became the guest's latest, so a guest's own follow-up message always sees
+the row it just wrote, and an older response never replaces a newer one. Each
+worker process holds its own copy; responses saved by other workers evict
+the entry through cache change notifications (services/cache_notifications.py),
+and ttl_seconds bounds staleness if a notification is missed.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Phones kept in the cache; the least recently used entry is dropped first
+LATEST_RESPONSE_CACHE_SIZE = 10000
+
+# Seconds an entry is trusted before it is read from the database again
+LATEST_RESPONSE_CACHE_TTL = 30.0
+
+
+class PhoneLRUCache:
+    """
+    Thread-safe LRU cache keyed by phone number with a per-entry TTL.
+
+    Negative lookups are not cached: a phone without responses is asked
+    again on the next lookup.
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of phones kept
+            ttl_seconds: Seconds an entry stays valid after it was stored
+        """
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any], Optional[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, phone_number: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the cached value for a phone, None on a miss or expired entry.
+        """
+        with self._lock:
+            entry = self._entries.get(phone_number)
+            if entry is None or time.monotonic() - entry[0] >= self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[phone_number]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(phone_number)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, phone_number: str, value: Dict[str, Any], version: Optional[str] = None) -> None:
+        """
+        Store the value for a phone, evicting the least recently used entry if full.
+
+        Args:
+            phone_number: Phone number
+            value: Value to cache
+            version: Version of the write that produced the value, if known
+        """
+        with self._lock:
+            self._entries[phone_number] = (time.monotonic(), value, version)
+            self._entries.move_to_end(phone_number)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def put_newer(
+        self,
+        phone_number: str,
+        value: Dict[str, Any],
+        order_key: str,
+        version: Optional[str] = None
+    ) -> bool:
+        """
+        Store the value unless the cached one is newer by value[order_key].
+
+        Writers that commit in one order may put in another; this keeps an
+        older value from replacing a newer one.
+
+        Args:
+            phone_number: Phone number
+            value: Value to cache
+            order_key: Key of the values that orders them (e.g. created_at)
+            version: Version of the write that produced the value, if known
+
+        Returns:
+            Whether the value was stored
+        """
+        with self._lock:
+            entry = self._entries.get(phone_number)
+            if entry is not None and entry[1].get(order_key) is not None and value.get(order_key) is not None \
+                    and entry[1][order_key] > value[order_key]:
+                return False
+            self._entries[phone_number] = (time.monotonic(), value, version)
+            self._entries.move_to_end(phone_number)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            return True
+
+    def invalidate(self, phone_number: str, version: Optional[str] = None) -> None:
+        """
+        Drop the entry for a phone, if any.
+
+        Args:
+            phone_number: Phone number
+            version: Version of the write being reported; an entry stored by
+                that same write is already current and is kept
+        """
+        with self._lock:
+            entry = self._entries.get(phone_number)
+            if entry is not None and (version is None or entry[2] != version):
+                del self._entries[phone_number]
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and hit/miss counters."""
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# Process-wide cache used by DataStorage
+latest_response_cache = PhoneLRUCache(LATEST_RESPONSE_CACHE_SIZE, LATEST_RESPONSE_CACHE_TTL)
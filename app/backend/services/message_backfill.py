@@ -0,0 +1,509 @@
+"""
+Message type backfill module.
+
+Re-classifies the text messages stored in user_responses
+(response_type message_<type>) with the current message rules, so rows
+saved under older rules get the labels new messages would get
+(PostgreSQL, migration 015).
+
+The job walks user_responses in primary-key (uuid) order, a chunk at a
+time. Rows saved after the job passed their place in that order were
+classified with the current rules when they arrived, so they need no
+backfill.
+Each chunk is classified on a process pool while the previous chunk is
+written, and the changed rows are updated in small batches. Each batch is
+one short transaction that:
+
+    updates the rows still carrying the label they were read with
+    moves their counts between types in response_rollups_hourly, for rows
+    the rollups have already counted
+    notifies the workers' caches of the changed phones
+    saves the checkpoint (the last id done)
+
+so an interrupted run resumes where it stopped. A checkpoint belongs to a
+rules version (a hash of the rules file); a run with other rules starts
+over from the first row.
+
+To keep the webhook path fast, the job sleeps between chunks and batches
+so it works at most DUTY_CYCLE of the time, and it waits at most
+LOCK_TIMEOUT_MS for a lock before backing off and retrying the batch.
+
+Only text rules are re-applied. Media messages (message_media, or
+message_MessageType.MEDIA as older webhooks stored them) are left as
+they are, since the number of attachments is not stored, and a message
+is never moved to a button or numeric answer, which are stored as their
+own typed rows.
+"""
+import hashlib
+import logging
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from backend.services.cache_notifications import NOTIFY_CHANGES_STATEMENT
+from backend.services.message_classifier import DEFAULT_RULES_PATH, MEDIA, MessageClassifier
+
+# Module-level logger with explicit name
+logger = logging.getLogger(__name__)
+
+# Checkpoint name of the message type backfill
+BACKFILL_NAME = "message_types"
+
+# Rows read and classified at a time
+BACKFILL_CHUNK_SIZE = 5000
+
+# Rows updated per transaction
+BACKFILL_BATCH_SIZE = 500
+
+# Share of the time the job works; it sleeps the rest
+DUTY_CYCLE = 0.25
+
+# Longest wait for a row or the rollup lock before the batch is retried
+LOCK_TIMEOUT_MS = 1000
+
+# Retries of a batch that timed out waiting for a lock, with doubling delays
+LOCK_RETRIES = 5
+LOCK_RETRY_DELAY = 0.5
+
+# Changed rows kept as examples for the dry-run report
+DIFF_SAMPLES = 20
+
+MESSAGE_TYPE_PREFIX = "message_"
+
+# Labels of media messages, current and as stored by older webhooks
+MEDIA_TYPES = (f"{MESSAGE_TYPE_PREFIX}{MEDIA}", "message_MessageType.MEDIA")
+
+# Checkpoint before the first row; every uuid sorts after it
+FIRST_ID = "00000000-0000-0000-0000-000000000000"
+
+# PostgreSQL error code of lock_timeout
+LOCK_NOT_AVAILABLE = "55P03"
+
+READ_CHUNK_SQL = r"""
+SELECT id, response_type, response_data->>'body' AS body
+FROM user_responses
+WHERE id > CAST(:after AS uuid)
+  AND response_type LIKE 'message\_%'
+  AND response_type <> ALL(CAST(:media_types AS text[]))
+ORDER BY id
+LIMIT :limit
+"""
+
+MAX_ID_SQL = "SELECT CAST(id AS text) FROM user_responses ORDER BY id DESC LIMIT 1"
+
+CHECKPOINT_SQL = """
+SELECT CAST(last_id AS text) AS last_id, rules_version, rows_scanned, rows_changed
+FROM backfill_checkpoints
+WHERE name = :name
+"""
+
+SAVE_CHECKPOINT_SQL = """
+INSERT INTO backfill_checkpoints (name, last_id, rules_version, rows_scanned, rows_changed)
+VALUES (:name, CAST(:last_id AS uuid), :rules_version, :rows_scanned, :rows_changed)
+ON CONFLICT (name) DO UPDATE SET
+    last_id = EXCLUDED.last_id,
+    rules_version = EXCLUDED.rules_version,
+    rows_scanned = EXCLUDED.rows_scanned,
+    rows_changed = EXCLUDED.rows_changed,
+    updated_at = NOW()
+"""
+
+LOCK_TIMEOUT_SQL = "SELECT set_config('lock_timeout', :timeout, true)"
+
+# The rollup refresh takes the same lock, so its watermark cannot move
+# while a batch decides which rows the rollups have counted
+ROLLUP_LOCK_SQL = "SELECT pg_advisory_xact_lock(hashtext('response_rollups'))"
+
+# Relabels the rows and moves the counts of the rows the rollups have
+# already counted (created at or before the watermark); newer rows are
+# counted with their new type by the next refresh
+UPDATE_BATCH_SQL = """
+WITH changed AS (
+    UPDATE user_responses ur
+    SET response_type = v.new_type
+    FROM unnest(CAST(:ids AS uuid[]), CAST(:old_types AS text[]), CAST(:new_types AS text[]))
+        AS v(id, old_type, new_type)
+    WHERE ur.id = v.id AND ur.response_type = v.old_type
+    RETURNING ur.id, ur.phone_number, ur.created_at, ur.button_payload,
+              ur.response_data->>'replied_to_sid' AS replied_to_sid, v.old_type, v.new_type
+),
+counted AS (
+    SELECT date_trunc('hour', c.created_at) AS bucket_start, c.old_type, c.new_type,
+           COALESCE(c.button_payload, '') AS button_payload,
+           COALESCE(st.template_sid, '') AS template_sid,
+           -- Only the first reply to a send answers it, as in the rollup refresh
+           CASE WHEN NOT EXISTS (
+               SELECT 1
+               FROM user_responses earlier
+               WHERE earlier.response_data->>'replied_to_sid' = st.message_sid
+                 AND (earlier.created_at, earlier.id) < (c.created_at, c.id)
+           ) THEN EXTRACT(EPOCH FROM c.created_at - st.sent_at) END AS answer_seconds
+    FROM changed c
+    LEFT JOIN sent_templates st ON st.message_sid = c.replied_to_sid
+    WHERE c.created_at <= (SELECT processed_up_to FROM rollup_watermarks WHERE name = 'responses')
+),
+deltas AS (
+    SELECT bucket_start, old_type AS response_type, button_payload, template_sid, -1 AS sign, answer_seconds
+    FROM counted
+    UNION ALL
+    SELECT bucket_start, new_type, button_payload, template_sid, 1, answer_seconds
+    FROM counted
+),
+moved AS (
+    INSERT INTO response_rollups_hourly AS r (
+        bucket_start, response_type, button_payload, template_sid,
+        responses, answered_sends, answer_seconds_sum
+    )
+    SELECT
+        bucket_start, response_type, button_payload, template_sid,
+        sum(sign),
+        COALESCE(sum(sign) FILTER (WHERE answer_seconds IS NOT NULL), 0),
+        COALESCE(sum(sign * answer_seconds), 0)
+    FROM deltas
+    GROUP BY 1, 2, 3, 4
+    ON CONFLICT (bucket_start, response_type, button_payload, template_sid) DO UPDATE SET
+        responses = r.responses + EXCLUDED.responses,
+        answered_sends = r.answered_sends + EXCLUDED.answered_sends,
+        answer_seconds_sum = r.answer_seconds_sum + EXCLUDED.answer_seconds_sum
+)
+SELECT id, phone_number FROM changed
+"""
+
+# A stored row: (id, response_type, body); ids are uuid strings, which
+# sort as PostgreSQL sorts the uuids
+StoredMessage = Tuple[str, str, Optional[str]]
+
+# A label change: (id, old type, new type)
+TypeChange = Tuple[str, str, str]
+
+
+def rules_version(path: str) -> str:
+    """Hash identifying the contents of a rules file."""
+    with open(path, "rb") as rules_file:
+        return hashlib.sha256(rules_file.read()).hexdigest()[:16]
+
+
+def reclassify(classifier: MessageClassifier, rows: Iterable[StoredMessage]) -> List[TypeChange]:
+    """
+    Classify stored messages and return the ones whose type changes.
+
+    Args:
+        classifier: Classifier with the current rules
+        rows: Stored (id, response_type, body) rows
+
+    Returns:
+        (id, old type, new type) of the rows to relabel; media rows are never relabelled
+    """
+    changes = []
+    for row_id, old_type, body in rows:
+        if old_type in MEDIA_TYPES:
+            continue
+        new_type = f"{MESSAGE_TYPE_PREFIX}{classifier.classify_text(body)}"
+        if new_type != old_type:
+            changes.append((row_id, old_type, new_type))
+    return changes
+
+
+def throttle_delay(elapsed: float, duty_cycle: float) -> float:
+    """Seconds to sleep after working for elapsed seconds to stay at duty_cycle."""
+    return elapsed * (1.0 - duty_cycle) / duty_cycle
+
+
+# Classifier of a pool worker process, compiled once by _init_worker
+_worker_classifier: Optional[MessageClassifier] = None
+
+
+def _init_worker(rules_path: str) -> None:
+    """Compile the rules in a pool worker."""
+    global _worker_classifier
+    _worker_classifier = MessageClassifier.from_file(rules_path)
+
+
+def _reclassify_in_worker(rows: List[StoredMessage]) -> List[TypeChange]:
+    """Pool task: reclassify part of a chunk."""
+    return reclassify(_worker_classifier, rows)
+
+
+@dataclass
+class BackfillProgress:
+    """Counters of a backfill run."""
+
+    last_id: str = FIRST_ID
+    max_id: str = FIRST_ID
+    scanned: int = 0
+    changed: int = 0
+    retries: int = 0
+    transitions: Counter = field(default_factory=Counter)
+    samples: List[Dict[str, Any]] = field(default_factory=list)
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def rate(self) -> float:
+        """Rows scanned per second so far."""
+        elapsed = time.monotonic() - self.started
+        return self.scanned / elapsed if elapsed > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Progress as a JSON-friendly dictionary."""
+        return {
+            "last_id": self.last_id,
+            "max_id": self.max_id,
+            "scanned": self.scanned,
+            "changed": self.changed,
+            "retries": self.retries,
+            "rows_per_second": round(self.rate, 1),
+            "transitions": {f"{old} -> {new}": count for (old, new), count in self.transitions.most_common()},
+            "samples": self.samples,
+        }
+
+
+class MessageTypeBackfill:
+    """Resumable re-classification of stored message types."""
+
+    def __init__(
+        self,
+        engine: Engine,
+        rules_path: Optional[str] = None,
+        workers: int = 0,
+        chunk_size: int = BACKFILL_CHUNK_SIZE,
+        batch_size: int = BACKFILL_BATCH_SIZE,
+        duty_cycle: float = DUTY_CYCLE,
+        lock_timeout_ms: int = LOCK_TIMEOUT_MS,
+        dry_run: bool = False,
+        name: str = BACKFILL_NAME,
+        on_progress: Optional[Callable[[BackfillProgress], None]] = None
+    ):
+        """
+        Configure a backfill.
+
+        Args:
+            engine: Engine of the (PostgreSQL) database to backfill
+            rules_path: Rules file (defaults to MESSAGE_RULES_PATH or the bundled rules)
+            workers: Classifier processes; 0 classifies in this process
+            chunk_size: Rows read and classified at a time
+            batch_size: Rows updated per transaction
+            duty_cycle: Share of the time spent working, in (0, 1]
+            lock_timeout_ms: Longest wait for a lock before a batch is retried
+            dry_run: Report the changes without writing them or the checkpoint
+            name: Checkpoint name
+            on_progress: Called after each chunk
+
+        Raises:
+            ValueError: If a size or the duty cycle is out of range
+        """
+        if chunk_size < 1 or batch_size < 1:
+            raise ValueError("chunk_size and batch_size must be positive")
+        if not 0 < duty_cycle <= 1:
+            raise ValueError("duty_cycle must be in (0, 1]")
+        if rules_path is None:
+            from backend.core.config import settings
+
+            rules_path = settings.MESSAGE_RULES_PATH or DEFAULT_RULES_PATH
+        self.engine = engine
+        self.rules_path = rules_path
+        self.rules_version = rules_version(rules_path)
+        self.classifier = MessageClassifier.from_file(rules_path)
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.duty_cycle = duty_cycle
+        self.lock_timeout_ms = lock_timeout_ms
+        self.dry_run = dry_run
+        self.name = name
+        self.on_progress = on_progress
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def run(self, start_id: Optional[str] = None, restart: bool = False) -> BackfillProgress:
+        """
+        Backfill from the checkpoint (or start_id) to the last row.
+
+        Args:
+            start_id: Start after this id instead of at the checkpoint
+            restart: Ignore the checkpoint and start from the first row
+
+        Returns:
+            Progress of this run
+        """
+        progress = BackfillProgress()
+        with Session(self.engine) as db:
+            progress.max_id = db.execute(text(MAX_ID_SQL)).scalar() or FIRST_ID
+            if start_id is not None:
+                progress.last_id = str(start_id)
+            elif not restart and not self.dry_run:
+                self._resume(db, progress)
+            db.rollback()
+
+            if self.workers > 0:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, initializer=_init_worker, initargs=(self.rules_path,)
+                )
+            try:
+                self._run(db, progress)
+            finally:
+                if self._pool is not None:
+                    self._pool.shutdown()
+                    self._pool = None
+        logger.info(
+            f"Message type backfill {'dry run ' if self.dry_run else ''}finished at id {progress.last_id}: "
+            f"{progress.scanned} scanned, {progress.changed} changed"
+        )
+        return progress
+
+    def _resume(self, db: Session, progress: BackfillProgress) -> None:
+        """Continue from the checkpoint if it was made with the same rules."""
+        checkpoint = db.execute(text(CHECKPOINT_SQL), {"name": self.name}).first()
+        if checkpoint is None:
+            return
+        if checkpoint.rules_version != self.rules_version:
+            logger.info("Message rules changed since the last backfill; starting over")
+            return
+        progress.last_id = checkpoint.last_id
+        progress.scanned = checkpoint.rows_scanned
+        progress.changed = checkpoint.rows_changed
+        logger.info(f"Resuming message type backfill after id {progress.last_id}")
+
+    def _run(self, db: Session, progress: BackfillProgress) -> None:
+        """Read, classify and write chunk by chunk, classifying one chunk ahead."""
+        rows = self._read_chunk(db, progress.last_id)
+        pending = self._classify(rows)
+        while rows:
+            # Classify the next chunk while this one is written
+            next_rows = self._read_chunk(db, rows[-1][0])
+            next_pending = self._classify(next_rows)
+
+            changes = sorted(change for part in pending for change in part)
+            self._apply(db, rows, changes, progress)
+            if self.on_progress is not None:
+                self.on_progress(progress)
+            else:
+                logger.info(
+                    f"Message type backfill at id {progress.last_id}/{progress.max_id}: "
+                    f"{progress.scanned} scanned, {progress.changed} changed, {progress.rate:.0f} rows/s"
+                )
+            rows, pending = next_rows, next_pending
+
+    def _read_chunk(self, db: Session, after: str) -> List[StoredMessage]:
+        """Read the next chunk of text messages, then pause for the duty cycle."""
+        started = time.monotonic()
+        rows = [
+            (str(row.id), row.response_type, row.body) for row in db.execute(
+                text(READ_CHUNK_SQL),
+                {"after": after, "limit": self.chunk_size, "media_types": list(MEDIA_TYPES)}
+            )
+        ]
+        db.rollback()
+        self._throttle(started)
+        return rows
+
+    def _classify(self, rows: List[StoredMessage]) -> Iterable[List[TypeChange]]:
+        """Start classifying a chunk; the result is iterated for its parts."""
+        if not rows:
+            return []
+        if self._pool is None:
+            return [reclassify(self.classifier, rows)]
+        part_size = -(-len(rows) // self.workers)
+        return self._pool.map(_reclassify_in_worker, [rows[i:i + part_size] for i in range(0, len(rows), part_size)])
+
+    def _apply(
+        self,
+        db: Session,
+        rows: Sequence[StoredMessage],
+        changes: List[TypeChange],
+        progress: BackfillProgress
+    ) -> None:
+        """Write a classified chunk in batches, each with its checkpoint."""
+        chunk_last_id = rows[-1][0]
+        if self.dry_run:
+            self._record_diff(rows, changes, progress)
+            progress.scanned += len(rows)
+            progress.last_id = chunk_last_id
+            return
+
+        scanned_before = progress.scanned
+        batches = [changes[i:i + self.batch_size] for i in range(0, len(changes), self.batch_size)] or [[]]
+        for number, batch in enumerate(batches, start=1):
+            last_id = chunk_last_id if number == len(batches) else batch[-1][0]
+            scanned = scanned_before + sum(1 for row in rows if row[0] <= last_id)
+            changed = self._write_batch(db, batch, last_id, scanned, progress)
+            progress.changed += changed
+            progress.scanned = scanned
+            progress.last_id = last_id
+            progress.transitions.update((old, new) for _, old, new in batch)
+
+    def _record_diff(self, rows: Sequence[StoredMessage], changes: List[TypeChange], progress: BackfillProgress) -> None:
+        """Count a dry-run chunk's changes and keep the first ones as samples."""
+        progress.changed += len(changes)
+        progress.transitions.update((old, new) for _, old, new in changes)
+        if len(progress.samples) < DIFF_SAMPLES and changes:
+            bodies = {row_id: body for row_id, _, body in rows}
+            for row_id, old_type, new_type in changes[:DIFF_SAMPLES - len(progress.samples)]:
+                progress.samples.append({"id": row_id, "from": old_type, "to": new_type, "body": bodies[row_id]})
+
+    def _write_batch(
+        self,
+        db: Session,
+        batch: List[TypeChange],
+        last_id: str,
+        scanned: int,
+        progress: BackfillProgress
+    ) -> int:
+        """
+        Relabel a batch, move its rollup counts, notify caches and save the checkpoint.
+
+        A batch that times out waiting for a lock is rolled back and retried
+        after a pause, so the job gives way to the webhook path.
+
+        Returns:
+            Rows relabelled (rows relabelled by someone else meanwhile are skipped)
+        """
+        delay = LOCK_RETRY_DELAY
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            try:
+                db.execute(text(LOCK_TIMEOUT_SQL), {"timeout": f"{self.lock_timeout_ms}ms"})
+                changed = []
+                if batch:
+                    db.execute(text(ROLLUP_LOCK_SQL))
+                    changed = db.execute(text(UPDATE_BATCH_SQL), {
+                        "ids": [row_id for row_id, _, _ in batch],
+                        "old_types": [old for _, old, _ in batch],
+                        "new_types": [new for _, _, new in batch],
+                    }).all()
+                if changed:
+                    db.execute(text(NOTIFY_CHANGES_STATEMENT), {
+                        "table": "user_responses",
+                        "keys": sorted({row.phone_number for row in changed}),
+                    })
+                db.execute(text(SAVE_CHECKPOINT_SQL), {
+                    "name": self.name,
+                    "last_id": last_id,
+                    "rules_version": self.rules_version,
+                    "rows_scanned": scanned,
+                    "rows_changed": progress.changed + len(changed),
+                })
+                db.commit()
+            except OperationalError as e:
+                db.rollback()
+                if getattr(e.orig, "pgcode", None) != LOCK_NOT_AVAILABLE or attempt == LOCK_RETRIES:
+                    raise
+                attempt += 1
+                progress.retries += 1
+                logger.warning(f"Backfill batch ending at id {last_id} timed out on a lock; retrying in {delay}s")
+                time.sleep(delay)
+                delay *= 2
+                continue
+            self._throttle(started)
+            return len(changed)
+
+    def _throttle(self, started: float) -> None:
+        """Sleep so the work since started stays within the duty cycle."""
+        if self.duty_cycle < 1:
+            time.sleep(throttle_delay(time.monotonic() - started, self.duty_cycle))
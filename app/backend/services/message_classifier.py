@@ -0,0 +1,232 @@
+"""
+Message classifier module.
+
+Classifies incoming WhatsApp message text (greeting, question, numeric
+answer, ...) for both the webhook pipeline (MessageCategorizer) and the
+conversation service.
+
+The rules are data (services/data/message_rules.json, or the file named by
+MESSAGE_RULES_PATH) and are compiled into one regular expression over the
+normalized text: niqqud removed, case folded, Hebrew final letters matched
+as their regular form, and punctuation and emoji (other than "?") acting as
+word separators. A message is classified in a single scan of that text.
+
+Rule match kinds:
+
+    exact     the whole message is the phrase ("hi", "שלום")
+    word      the phrase is a word of the message, optionally after up to
+              max_word_prefixes Hebrew prefix letters ("ומתי", "למה")
+    contains  the phrase appears anywhere ("?")
+
+When several rules match, the first one in the file wins.
+"""
+import json
+import logging
+import os
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+
+# Module-level logger with explicit name
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "message_rules.json")
+
+# Hebrew niqqud and cantillation marks, and the Arabic question mark (NFKC
+# already folds the full-width one to "?")
+_NIQQUD_PATTERN = re.compile("[\u0591-\u05C7]")
+_ARABIC_QUESTION_MARK = "\u061F"
+
+# Regular and final forms of Hebrew letters. Phrases match either form, which
+# is cheaper than folding every message (str.translate is slow on Hebrew).
+_FINAL_LETTERS = dict(zip("כמנפצ", "ךםןףץ"))
+_FOLD_FINAL_LETTERS = str.maketrans("ךםןףץ", "כמנפצ")
+
+# Punctuation, symbols, emoji and whitespace separate words; "?" is kept
+# apart so a lone greeting with a question mark is not a greeting
+_SEPARATOR = r"[^\w?]"
+_WORD_START = r"(?<!\w)"
+_WORD_END = r"(?!\w)"
+
+# Message types that do not depend on the text
+BUTTON = "button"
+NUMERIC = "numeric"
+MEDIA = "media"
+GENERAL = "general"
+
+# Message types a text rule may assign; each must be a webhook_service.MessageType
+GREETING = "greeting"
+QUESTION = "question"
+RULE_TYPES = frozenset({GREETING, QUESTION, GENERAL})
+
+
+def normalize_message_text(value: Optional[str]) -> str:
+    """
+    Normalize message text for classification.
+
+    Removes niqqud and folds compatibility forms and case. Punctuation and
+    emoji are left in place and final letters are not folded: the compiled
+    rules treat punctuation and emoji (except "?") as word separators and
+    match both letter forms, which saves passes over the text.
+
+    Args:
+        value: Message text
+
+    Returns:
+        Normalized text
+    """
+    if not value:
+        return ""
+    if not value.isascii():
+        value = unicodedata.normalize("NFKC", value).replace(_ARABIC_QUESTION_MARK, "?")
+        value = _NIQQUD_PATTERN.sub("", value)
+    return value.casefold()
+
+
+def _phrase_pattern(words: Tuple[str, ...]) -> str:
+    """Regular expression of a phrase's words, matching either form of Hebrew letters."""
+    return f"{_SEPARATOR}+".join(
+        "".join(
+            f"[{letter}{_FINAL_LETTERS[letter]}]" if letter in _FINAL_LETTERS else re.escape(letter)
+            for letter in word
+        )
+        for word in words
+    )
+
+
+class MessageClassifier:
+    """
+    Classifier compiled from a rules document.
+
+    Each rule becomes a named group of one alternation; scanning the
+    normalized text once yields every rule that matches, and the first
+    rule in the document wins.
+    """
+
+    def __init__(self, rules: Dict[str, Any]):
+        """
+        Compile a rules document.
+
+        Args:
+            rules: Parsed rules (see services/data/message_rules.json)
+
+        Raises:
+            ValueError: If a rule has an unknown type or match kind, or no phrases
+        """
+        self._numeric = re.compile(rules.get("numeric", r"^[1-9]$"))
+        prefixes = re.escape(rules.get("word_prefixes", ""))
+        max_prefixes = int(rules.get("max_word_prefixes", 0))
+        prefix = f"[{prefixes}]{{0,{max_prefixes}}}" if prefixes and max_prefixes else ""
+
+        self._types: Dict[str, str] = {}
+        self._priorities: Dict[str, int] = {}
+        alternatives: List[str] = []
+        for priority, rule in enumerate(rules.get("rules", [])):
+            if rule.get("type") not in RULE_TYPES:
+                raise ValueError(
+                    f"Unknown message type {rule.get('type')!r} in message rule {priority} "
+                    f"(expected one of {', '.join(sorted(RULE_TYPES))})"
+                )
+            phrases = sorted(
+                {
+                    tuple(re.findall(r"[\w?]+", normalize_message_text(phrase).translate(_FOLD_FINAL_LETTERS)))
+                    for phrase in rule.get("phrases", [])
+                } - {()},
+                key=len, reverse=True
+            )
+            if not phrases:
+                raise ValueError(f"Message rule {priority} ({rule.get('type')}) has no phrases")
+            choice = "|".join(_phrase_pattern(words) for words in phrases)
+            match = rule.get("match", "word")
+            if match == "exact":
+                pattern = f"^{_SEPARATOR}*(?:{choice}){_SEPARATOR}*$"
+            elif match == "word":
+                pattern = f"{_WORD_START}{prefix}(?:{choice}){_WORD_END}"
+            elif match == "contains":
+                pattern = f"(?:{choice})"
+            else:
+                raise ValueError(f"Unknown match kind {match!r} in message rule {priority}")
+            group = f"r{priority}"
+            self._types[group] = rule["type"]
+            self._priorities[group] = priority
+            alternatives.append(f"(?P<{group}>{pattern})")
+        self._pattern = re.compile("|".join(alternatives)) if alternatives else None
+
+    @classmethod
+    def from_file(cls, path: str) -> "MessageClassifier":
+        """
+        Load and compile a rules file.
+
+        Args:
+            path: JSON rules file
+
+        Returns:
+            The compiled classifier
+        """
+        with open(path, encoding="utf-8") as rules_file:
+            return cls(json.load(rules_file))
+
+    def classify_text(self, body: Optional[str]) -> str:
+        """
+        Classify message text by the rules.
+
+        Args:
+            body: Message text
+
+        Returns:
+            The type of the highest priority matching rule, or general
+        """
+        if self._pattern is None:
+            return GENERAL
+        best: Optional[str] = None
+        for match in self._pattern.finditer(normalize_message_text(body)):
+            group = match.lastgroup
+            if best is None or self._priorities[group] < self._priorities[best]:
+                best = group
+                if self._priorities[group] == 0:
+                    break
+        return self._types[best] if best is not None else GENERAL
+
+    def classify(
+        self,
+        body: Optional[str],
+        num_media: Any = 0,
+        button_text: str = "",
+        button_payload: str = ""
+    ) -> str:
+        """
+        Classify an incoming message.
+
+        Button replies come first, then single digit answers, then media,
+        then the text rules.
+
+        Args:
+            body: Message text
+            num_media: Number of attached media items (as sent by Twilio)
+            button_text: Text of the quick reply button pressed, if any
+            button_payload: Payload of that button, if any
+
+        Returns:
+            Message type
+        """
+        if button_text or button_payload:
+            logger.info("Button interaction detected: %s (payload: %s)", button_text, button_payload)
+            return BUTTON
+        body = body or ""
+        if self._numeric.match(body.strip()):
+            logger.info("Numeric response detected: %s", body)
+            return NUMERIC
+        if int(num_media or 0) > 0:
+            return MEDIA
+        return self.classify_text(body)
+
+
+def _load_default_classifier() -> MessageClassifier:
+    """Compile MESSAGE_RULES_PATH, or the bundled rules."""
+    from backend.core.config import settings
+
+    return MessageClassifier.from_file(settings.MESSAGE_RULES_PATH or DEFAULT_RULES_PATH)
+
+
+# Process-wide classifier shared by both message pipelines
+message_classifier = _load_default_classifier()
@@ -0,0 +1,368 @@
+"""
+Reply routes module.
+
+Decides which template answers an incoming message, for both the webhook
+pipeline (ResponseHandler) and the conversation service.
+
+The routing table is data: services/data/reply_routes.json (or the file
+named by REPLY_ROUTES_PATH), overridden and extended by the rows of the
+reply_routes table (PostgreSQL, migration 016). A route maps a message
+category (button, numeric, greeting, ...) and, for buttons, the pressed
+button's payload and text to:
+
+    template_sid  the Twilio template to send
+    response      fields added to the handler's result
+    variables     template content variables (optional; the sender's
+                  default name/date/link variables otherwise)
+
+Values of response and variables may use {body} (stripped),
+{profile_name}, {from_number}, {phone_suffix}, {button_text} and
+{button_payload}. They are compiled when the table is loaded, and a route
+is found with one dictionary lookup.
+
+The table is reloaded when the file changes (checked every
+REPLY_ROUTES_WATCH_SECONDS) and when the reply_routes table changes
+(its trigger notifies every worker through the cache change listener).
+A reload builds a new table and swaps it in, so a request already holding
+the old table finishes with it; a table that fails to load is logged and
+the current one kept.
+"""
+import json
+import logging
+import os
+import string
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Module-level logger with explicit name
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROUTES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "reply_routes.json")
+
+# Seconds between checks of the routing file
+REPLY_ROUTES_WATCH_SECONDS = 2.0
+
+# Placeholders available to response and variable values
+MESSAGE_FIELDS = frozenset({"body", "profile_name", "from_number", "phone_suffix", "button_text", "button_payload"})
+
+# (category, button payload, button text); None matches any
+RouteKey = Tuple[str, Optional[str], Optional[str]]
+
+ValuesBuilder = Callable[[Dict[str, str]], Dict[str, Any]]
+
+_FORMATTER = string.Formatter()
+
+
+def message_fields(message) -> Dict[str, str]:
+    """Placeholder values of a WhatsApp message."""
+    phone = message.from_number or ""
+    return {
+        "body": (message.body or "").strip(),
+        "profile_name": message.profile_name or "",
+        "from_number": phone,
+        "phone_suffix": phone[-4:],
+        "button_text": message.button_text or "",
+        "button_payload": message.button_payload or "",
+    }
+
+
+def _compile_values(values: Dict[str, Any], route: str) -> ValuesBuilder:
+    """
+    Compile a mapping whose string values may hold message placeholders.
+
+    Raises:
+        ValueError: If a value uses an unknown placeholder
+    """
+    static: Dict[str, Any] = {}
+    templated: Dict[str, str] = {}
+    for key, value in values.items():
+        fields = {field for _, field, _, _ in _FORMATTER.parse(value) if field is not None} \
+            if isinstance(value, str) else set()
+        unknown = fields - MESSAGE_FIELDS
+        if unknown:
+            raise ValueError(f"Reply route {route!r} uses unknown placeholders {sorted(unknown)} in {key!r}")
+        if fields:
+            templated[key] = value
+        else:
+            static[key] = value
+
+    def build(fields: Dict[str, str]) -> Dict[str, Any]:
+        result = dict(static)
+        for key, value in templated.items():
+            result[key] = value.format_map(fields)
+        return result
+
+    return build
+
+
+@dataclass(frozen=True)
+class CompiledRoute:
+    """A route with its response and variable builders."""
+
+    name: str
+    key: RouteKey
+    template_sid: str
+    build_response: ValuesBuilder
+    build_variables: Optional[ValuesBuilder] = None
+
+    @classmethod
+    def compile(cls, route: Dict[str, Any]) -> "CompiledRoute":
+        """
+        Compile a route document.
+
+        Args:
+            route: Route (see services/data/reply_routes.json)
+
+        Raises:
+            ValueError: If the route has no category or template, or an unknown placeholder
+        """
+        name = route.get("name") or route.get("template_sid") or "?"
+        if not route.get("category") or not route.get("template_sid"):
+            raise ValueError(f"Reply route {name!r} needs a category and a template_sid")
+        variables = route.get("variables")
+        return cls(
+            name=name,
+            key=(route["category"], route.get("payload") or None, route.get("text") or None),
+            template_sid=route["template_sid"],
+            build_response=_compile_values(route.get("response") or {}, name),
+            build_variables=_compile_values(variables, name) if variables is not None else None,
+        )
+
+    def send(self, sender, message) -> Dict[str, Any]:
+        """
+        Send the route's template in reply to a message.
+
+        Args:
+            sender: TwilioMessageSender
+            message: The WhatsApp message answered
+
+        Returns:
+            The sender's result, with the route's response fields
+        """
+        fields = message_fields(message)
+        logger.info(f"Replying to {message.profile_name} with route {self.name} ({self.template_sid})")
+        return sender.send_template(
+            message,
+            self.template_sid,
+            self.build_response(fields),
+            content_variables=self.build_variables(fields) if self.build_variables is not None else None
+        )
+
+
+class ReplyRouteTable:
+    """
+    Immutable routing table.
+
+    Within a category every route keys on the same fields (for example
+    payload and text for buttons, nothing for numeric answers), so a
+    message is routed with a single lookup of its category's key.
+    """
+
+    def __init__(self, routes: Iterable[Dict[str, Any]]):
+        """
+        Compile route documents.
+
+        Args:
+            routes: Route documents
+
+        Raises:
+            ValueError: If a route is invalid, two routes share a key, or a
+                category mixes routes keyed on different fields
+        """
+        self._routes: Dict[RouteKey, CompiledRoute] = {}
+        self._key_fields: Dict[str, Tuple[bool, bool]] = {}
+        for document in routes:
+            route = CompiledRoute.compile(document)
+            category, payload, text = route.key
+            fields = (payload is not None, text is not None)
+            if self._key_fields.setdefault(category, fields) != fields:
+                raise ValueError(f"Reply routes of category {category!r} must all match on the same fields")
+            if route.key in self._routes:
+                raise ValueError(f"Reply routes {self._routes[route.key].name!r} and {route.name!r} share a key")
+            self._routes[route.key] = route
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    def lookup(self, category: str, payload: str = "", text: str = "") -> Optional[CompiledRoute]:
+        """
+        Find the route of a message.
+
+        Args:
+            category: Message type (button, numeric, greeting, ...)
+            payload: Pressed button's payload
+            text: Pressed button's text
+
+        Returns:
+            The route, or None if the category has no route for the message
+        """
+        fields = self._key_fields.get(category)
+        if fields is None:
+            return None
+        return self._routes.get((category, payload if fields[0] else None, text if fields[1] else None))
+
+    def names(self) -> List[str]:
+        """Route names in load order."""
+        return [route.name for route in self._routes.values()]
+
+
+def _route_document(row) -> Dict[str, Any]:
+    """Route document of a reply_routes row."""
+    return {
+        "name": row.name,
+        "category": row.category,
+        "payload": row.button_payload,
+        "text": row.button_text,
+        "template_sid": row.template_sid,
+        "response": row.response,
+        "variables": row.variables,
+    }
+
+
+def merge_routes(base: Iterable[Dict[str, Any]], overrides: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Route documents of base with those of overrides replacing routes of the same key."""
+    merged: Dict[RouteKey, Dict[str, Any]] = {}
+    for route in list(base) + list(overrides):
+        merged[(route.get("category"), route.get("payload") or None, route.get("text") or None)] = route
+    return list(merged.values())
+
+
+class ReplyRouter:
+    """Process-wide routing table with hot reload."""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Load the routing file.
+
+        Args:
+            path: Routing file (defaults to REPLY_ROUTES_PATH or the bundled routes)
+        """
+        if path is None:
+            from backend.core.config import settings
+
+            path = settings.REPLY_ROUTES_PATH or DEFAULT_ROUTES_PATH
+        self.path = path
+        self.use_database = False
+        self.reloads = 0
+        self.failures = 0
+        self.interval = REPLY_ROUTES_WATCH_SECONDS
+        self._file_state = self._stat()
+        self._table = ReplyRouteTable(self._read_file())
+        self._reload_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def table(self) -> ReplyRouteTable:
+        """The current table (hold on to it for the rest of a request)."""
+        return self._table
+
+    def dispatch(self, category: str, message) -> Optional[CompiledRoute]:
+        """
+        Route a message.
+
+        Args:
+            category: Message type
+            message: The WhatsApp message
+
+        Returns:
+            The route, or None if there is none for the message
+        """
+        return self._table.lookup(category, message.button_payload or "", message.button_text or "")
+
+    def reload(self) -> bool:
+        """
+        Rebuild the table from the file (and the reply_routes table, once
+        started with the database) and swap it in.
+
+        Returns:
+            Whether the new table is in use; on failure the current one is kept
+        """
+        with self._reload_lock:
+            # A broken file is reported once, not on every check
+            self._file_state = self._stat()
+            try:
+                routes = self._read_file()
+                if self.use_database:
+                    routes = merge_routes(routes, self._read_database())
+                table = ReplyRouteTable(routes)
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Failed to reload reply routes, keeping the current table: {str(e)}")
+                return False
+            self._table = table
+            self.reloads += 1
+        logger.info(f"Loaded {len(table)} reply routes")
+        return True
+
+    @property
+    def running(self) -> bool:
+        """Whether the file watcher is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: float = REPLY_ROUTES_WATCH_SECONDS, use_database: bool = False) -> None:
+        """
+        Reload now and watch the routing file.
+
+        Args:
+            interval: Seconds between file checks (0 only reloads)
+            use_database: Merge in the reply_routes table
+        """
+        self.use_database = use_database
+        self.reload()
+        if interval <= 0 or self.running:
+            return
+        self.interval = interval
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="reply-route-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop watching the routing file."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def status(self) -> Dict[str, Any]:
+        """Source, routes and counters."""
+        return {
+            "path": self.path,
+            "database": self.use_database,
+            "watching": self.running,
+            "routes": self._table.names(),
+            "reloads": self.reloads,
+            "failures": self.failures,
+        }
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        """Modification time and size of the routing file, None if it is missing."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read_file(self) -> List[Dict[str, Any]]:
+        """Route documents of the routing file."""
+        with open(self.path, encoding="utf-8") as routes_file:
+            return json.load(routes_file).get("routes", [])
+
+    def _read_database(self) -> List[Dict[str, Any]]:
+        """Route documents of the reply_routes table."""
+        from backend.db.session import get_db_session
+        from app.backend.db.models import ReplyRoute
+
+        with get_db_session() as db:
+            return [_route_document(row) for row in db.query(ReplyRoute).order_by(ReplyRoute.id)]
+
+    def _run(self) -> None:
+        """Reload whenever the routing file changes."""
+        while not self._stopped.wait(self.interval):
+            if self._stat() != self._file_state:
+                self.reload()
+
+
+# Process-wide router shared by both message pipelines
+reply_router = ReplyRouter()
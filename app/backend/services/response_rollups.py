@@ -0,0 +1,184 @@
+"""
+Response rollups module.
+
+Maintains the hourly rollups behind the funnel and time-series analytics
+(/analytics), so charts read a few hundred rollup rows instead of
+scanning user_responses (PostgreSQL, migration 014):
+
+    response_rollups_hourly        responses per hour, response type, button
+                                   payload and template, with the total time
+                                   from the template being sent to the answer
+    template_send_rollups_hourly   template sends per hour
+
+A response is attributed to the template it answers: button replies store
+the SID of the message they reply to (replied_to_sid), which is joined to
+the sent_templates log. Only the first reply to a send counts as answering
+it, so answered_sends never exceeds the sends.
+
+Each refresh recounts the hourly rows from ROLLUP_RECOUNT_SECONDS before
+the previous refresh onwards, replacing them, and moves the watermark to
+the refresh time, in one transaction. A row whose transaction commits
+after a refresh has started is missed by that refresh only; the next one
+recounts its hour, as long as it commits within ROLLUP_RECOUNT_SECONDS.
+Recounting is idempotent, so rows are never counted twice. Updates and
+deletes are reflected only while their rows are inside that window.
+"""
+import logging
+import threading
+from typing import Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Module-level logger with explicit name
+logger = logging.getLogger(__name__)
+
+# Seconds between refreshes
+ROLLUP_REFRESH_SECONDS = 60.0
+
+# Hours starting up to this long before the previous refresh are recounted
+ROLLUP_RECOUNT_SECONDS = 3600.0
+
+# One refresh at a time across all workers; the others skip
+ROLLUP_LOCK_SQL = "SELECT pg_try_advisory_xact_lock(hashtext('response_rollups'))"
+
+# First hour to recount; every hour when the rollup has never been refreshed
+RECOUNT_FROM_SQL = """
+SELECT date_trunc('hour', COALESCE(
+    (SELECT processed_up_to FROM rollup_watermarks WHERE name = :name) - make_interval(secs => :recount_seconds),
+    '-infinity'
+))
+"""
+
+UPDATE_WATERMARK_SQL = """
+INSERT INTO rollup_watermarks (name, processed_up_to) VALUES (:name, NOW())
+ON CONFLICT (name) DO UPDATE SET processed_up_to = EXCLUDED.processed_up_to, updated_at = NOW()
+"""
+
+CLEAR_RESPONSE_ROLLUP_SQL = "DELETE FROM response_rollups_hourly WHERE bucket_start >= :recount_from"
+
+RESPONSE_ROLLUP_SQL = """
+INSERT INTO response_rollups_hourly (
+    bucket_start, response_type, button_payload, template_sid,
+    responses, answered_sends, answer_seconds_sum
+)
+SELECT
+    date_trunc('hour', ur.created_at),
+    ur.response_type,
+    COALESCE(ur.button_payload, ''),
+    COALESCE(st.template_sid, ''),
+    count(*),
+    count(*) FILTER (WHERE first_reply.answers_send),
+    COALESCE(sum(EXTRACT(EPOCH FROM ur.created_at - st.sent_at)) FILTER (WHERE first_reply.answers_send), 0)
+FROM user_responses ur
+LEFT JOIN sent_templates st ON st.message_sid = ur.response_data->>'replied_to_sid'
+CROSS JOIN LATERAL (
+    SELECT st.sent_at IS NOT NULL AND NOT EXISTS (
+        SELECT 1
+        FROM user_responses earlier
+        WHERE earlier.response_data->>'replied_to_sid' = st.message_sid
+          AND (earlier.created_at, earlier.id) < (ur.created_at, ur.id)
+    ) AS answers_send
+) first_reply
+WHERE ur.created_at >= :recount_from
+GROUP BY 1, 2, 3, 4
+"""
+
+CLEAR_TEMPLATE_SEND_ROLLUP_SQL = "DELETE FROM template_send_rollups_hourly WHERE bucket_start >= :recount_from"
+
+TEMPLATE_SEND_ROLLUP_SQL = """
+INSERT INTO template_send_rollups_hourly (bucket_start, template_sid, sent)
+SELECT date_trunc('hour', sent_at), template_sid, count(*)
+FROM sent_templates
+WHERE sent_at >= :recount_from
+GROUP BY 1, 2
+"""
+
+# Rollup (clear, count) statements by watermark name
+ROLLUPS = {
+    "responses": (CLEAR_RESPONSE_ROLLUP_SQL, RESPONSE_ROLLUP_SQL),
+    "template_sends": (CLEAR_TEMPLATE_SEND_ROLLUP_SQL, TEMPLATE_SEND_ROLLUP_SQL),
+}
+
+
+def refresh_rollups(db: Session, recount_seconds: float = ROLLUP_RECOUNT_SECONDS) -> Optional[Dict[str, int]]:
+    """
+    Recount each rollup's hours since its previous refresh (less recount_seconds) and commit.
+
+    Args:
+        db: Database session (PostgreSQL)
+        recount_seconds: Also recount the hours this long before the previous refresh
+
+    Returns:
+        Hourly rows written per rollup, or None if another worker is refreshing
+    """
+    if not db.execute(text(ROLLUP_LOCK_SQL)).scalar():
+        db.rollback()
+        return None
+    written = {}
+    for name, (clear_sql, count_sql) in ROLLUPS.items():
+        params = {
+            "recount_from": db.execute(
+                text(RECOUNT_FROM_SQL), {"name": name, "recount_seconds": recount_seconds}
+            ).scalar_one()
+        }
+        db.execute(text(clear_sql), params)
+        written[name] = db.execute(text(count_sql), params).rowcount
+        db.execute(text(UPDATE_WATERMARK_SQL), {"name": name})
+    db.commit()
+    return written
+
+
+class ResponseRollupRefresher:
+    """Refresh the rollups periodically in a background thread."""
+
+    def __init__(self):
+        self.interval = ROLLUP_REFRESH_SECONDS
+        self.refreshes = 0
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the refresh thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: float = ROLLUP_REFRESH_SECONDS) -> None:
+        """Start refreshing every interval seconds (the first refresh runs right away)."""
+        if self.running:
+            return
+        self.interval = interval
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="response-rollup-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop refreshing."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def refresh(self) -> Optional[Dict[str, int]]:
+        """Refresh now (see refresh_rollups)."""
+        from backend.db.session import get_db_session
+
+        with get_db_session() as db:
+            written = refresh_rollups(db)
+        if written is not None:
+            self.refreshes += 1
+            logger.debug(f"Refreshed response rollups: {written}")
+        return written
+
+    def _run(self) -> None:
+        """Refresh loop."""
+        while not self._stopped.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Failed to refresh response rollups: {str(e)}")
+            self._stopped.wait(self.interval)
+
+
+# Process-wide refresher, started at application startup (PostgreSQL only)
+rollup_refresher = ResponseRollupRefresher()
@@ -0,0 +1,278 @@
+"""
+RSVP live events module.
+
+Pushes RSVP changes to dashboards over server-sent events instead of
+having every open tab poll /rsvp/stats and /rsvp/guests.
+
+Each worker has one RsvpEventBroadcaster. Changes reach it from the write
+path: cache change notifications (every worker, any writer, including
+the response trigger) or, when no listener is connected, this worker's
+own crud commits. For each batch of changes the broadcaster reads the
+statistics and the changed guests once, then fans the same encoded
+events out to every subscriber:
+
+    event: stats   changed statistics fields (the first event is all of them)
+    event: guest   a changed guest row, as returned by /rsvp/guests
+    event: delete  a guest that no longer exists: {"id": ...}
+    event: reset   too much changed (or history needed to resume is gone);
+                   reload the guest list, then apply events
+
+Idle subscribers cost a queue and a parked task; nothing is read while
+nobody is subscribed. Event ids are "<worker>-<sequence>", and a recent
+window of events is kept so a client reconnecting with Last-Event-ID to
+the same worker gets what it missed. Any other Last-Event-ID gets reset.
+"""
+import asyncio
+import json
+import logging
+import threading
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+# Module-level logger with explicit name
+logger = logging.getLogger(__name__)
+
+# Events kept for resuming
+EVENT_HISTORY_SIZE = 1000
+
+# Events queued per subscriber before it is considered stalled and dropped
+SUBSCRIBER_QUEUE_SIZE = 256
+
+# Seconds between keep-alive comments on an idle stream
+KEEPALIVE_SECONDS = 15.0
+
+# Reconnect delay suggested to clients, in milliseconds
+RETRY_MILLISECONDS = 3000
+
+
+def encode_event(event_id: Optional[str], event: str, data: Any) -> bytes:
+    """Encode one server-sent event."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str))
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+def _read_changes(guest_ids: List[Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Read the current statistics and the changed guests."""
+    from backend.db import crud
+    from backend.db.session import get_db_session
+    from app.backend.db.models import RsvpGuest
+
+    with get_db_session() as db:
+        stats = crud.rsvp_stats_summary(crud.get_rsvp_statistics(db))
+        guests = []
+        if guest_ids:
+            rows = db.execute(crud.rsvp_guest_listing_query().where(RsvpGuest.id.in_(guest_ids))).all()
+            guests = [crud.serialize_guest_row(row) for row in rows]
+    return stats, guests
+
+
+class RsvpEventBroadcaster:
+    """
+    Fan RSVP change events out to server-sent event subscribers.
+
+    publish() may be called from any thread; events are produced on the
+    event loop the broadcaster is bound to (the first one to subscribe).
+    """
+
+    def __init__(
+        self,
+        read_changes: Callable[[List[Any]], Tuple[Dict[str, Any], List[Dict[str, Any]]]] = _read_changes,
+        history_size: int = EVENT_HISTORY_SIZE,
+        queue_size: int = SUBSCRIBER_QUEUE_SIZE
+    ):
+        """
+        Initialize the broadcaster.
+
+        Args:
+            read_changes: Returns (statistics, guest rows) for changed guest ids
+                (run in a thread)
+            history_size: Events kept for resuming
+            queue_size: Pending events per subscriber before it is dropped
+        """
+        self.read_changes = read_changes
+        self.queue_size = queue_size
+        self.worker_id = uuid.uuid4().hex[:8]
+        # Set while cache change notifications feed this worker, so local
+        # commits (also notified) are not published twice
+        self.remote_feed = False
+        self._history: Deque[Tuple[int, bytes]] = deque(maxlen=history_size)
+        self._sequence = 0
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._dropped: Set[asyncio.Queue] = set()
+        self._stats: Optional[Dict[str, Any]] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending_guests: Set[Any] = set()
+        self._pending = False
+        self._pending_reset = False
+        self._producing: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+
+    @property
+    def subscribers(self) -> int:
+        """Number of connected subscribers."""
+        return len(self._subscribers)
+
+    def publish(self, guest_ids: Iterable[Any] = (), reset: bool = False) -> None:
+        """
+        Report changed guests (or just changed statistics, without ids).
+
+        Does nothing while nobody is subscribed; the next subscriber
+        starts from the current statistics anyway.
+
+        Args:
+            guest_ids: Ids of changed guests
+            reset: Everything may have changed (bulk import, missed notifications)
+        """
+        loop = self._loop
+        if loop is None or not self._subscribers:
+            # The change is not recorded: skip a sequence number so earlier
+            # event ids can no longer be resumed from
+            with self._lock:
+                self._history.clear()
+                self._sequence += 1
+            return
+        with self._lock:
+            self._pending_guests.update(guest_ids)
+            self._pending = True
+            self._pending_reset = self._pending_reset or reset
+        try:
+            loop.call_soon_threadsafe(self._schedule)
+        except RuntimeError:
+            # Loop closed (shutdown)
+            pass
+
+    def set_remote_feed(self, connected: bool) -> None:
+        """Switch between cache change notifications and local commits as the source."""
+        self.remote_feed = connected
+
+    def publish_local(self, guest_ids: Iterable[Any] = (), reset: bool = False) -> None:
+        """Report a change committed by this worker, unless notifications already cover it."""
+        if not self.remote_feed:
+            self.publish(guest_ids, reset=reset)
+
+    def _schedule(self) -> None:
+        """Start producing events unless already running."""
+        if self._producing is None or self._producing.done():
+            self._producing = asyncio.get_running_loop().create_task(self._produce())
+
+    async def _produce(self) -> None:
+        """Turn pending changes into events until none are left."""
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return
+                reset = self._pending_reset
+                guest_ids = [] if reset else sorted(self._pending_guests, key=str)
+                self._pending_guests.clear()
+                self._pending = self._pending_reset = False
+            if not self._subscribers:
+                continue
+            try:
+                stats, guests = await asyncio.to_thread(self.read_changes, guest_ids)
+            except Exception as e:
+                logger.error(f"Failed to read RSVP changes for live events: {str(e)}")
+                continue
+            if reset:
+                # Clients reload; the statistics that follow are complete
+                self._broadcast("reset", {})
+                self._stats = None
+            previous = self._stats or {}
+            delta = {key: value for key, value in stats.items() if previous.get(key) != value}
+            self._stats = stats
+            if delta:
+                self._broadcast("stats", delta)
+            for guest in guests:
+                self._broadcast("guest", guest)
+            found = {str(guest["id"]) for guest in guests}
+            for guest_id in guest_ids:
+                if str(guest_id) not in found:
+                    self._broadcast("delete", {"id": guest_id})
+
+    def _broadcast(self, event: str, data: Any) -> None:
+        """Record an event and queue it for every subscriber."""
+        with self._lock:
+            self._sequence += 1
+            payload = encode_event(f"{self.worker_id}-{self._sequence}", event, data)
+            self._history.append((self._sequence, payload))
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                # Stalled client: drop it; its stream ends once it drains
+                # the queue and it resumes with Last-Event-ID
+                self._subscribers.discard(queue)
+                self._dropped.add(queue)
+
+    def _missed_events(self, last_event_id: Optional[str]) -> Optional[List[bytes]]:
+        """Events after last_event_id, or None if they cannot be replayed."""
+        if not last_event_id:
+            return None
+        worker_id, _, sequence = last_event_id.rpartition("-")
+        if worker_id != self.worker_id or not sequence.isdigit():
+            return None
+        sequence = int(sequence)
+        with self._lock:
+            if sequence > self._sequence:
+                return None
+            if sequence < self._sequence and (not self._history or sequence < self._history[0][0] - 1):
+                return None
+            return [payload for seq, payload in self._history if seq > sequence]
+
+    async def subscribe(self, last_event_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """
+        Stream encoded events for one client.
+
+        Args:
+            last_event_id: Last-Event-ID sent by a reconnecting client
+
+        Yields:
+            Encoded events and keep-alive comments
+        """
+        self._loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        missed = self._missed_events(last_event_id)
+        self._subscribers.add(queue)
+        try:
+            yield f"retry: {RETRY_MILLISECONDS}\n\n".encode("utf-8")
+            if missed is not None:
+                for payload in missed:
+                    yield payload
+            else:
+                if last_event_id:
+                    yield encode_event(None, "reset", {})
+                if self._stats is None:
+                    self._stats, _ = await asyncio.to_thread(self.read_changes, [])
+                yield encode_event(f"{self.worker_id}-{self._sequence}", "stats", self._stats)
+            while True:
+                if queue in self._dropped and queue.empty():
+                    return
+                try:
+                    payload = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                yield payload
+        finally:
+            self._subscribers.discard(queue)
+            self._dropped.discard(queue)
+            if not self._subscribers:
+                # Nobody is watching; don't trust the last statistics later
+                self._stats = None
+
+    def status(self) -> Dict[str, Any]:
+        """Subscriber and event counters."""
+        return {
+            "worker_id": self.worker_id,
+            "subscribers": len(self._subscribers),
+            "last_event": self._sequence,
+            "remote_feed": self.remote_feed,
+        }
+
+
+# Process-wide broadcaster
+rsvp_event_broadcaster = RsvpEventBroadcaster()
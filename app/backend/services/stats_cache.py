@@ -0,0 +1,99 @@
+"""
+RSVP statistics cache module.
+
+Keeps the serialized /rsvp/stats response with its ETag for a short time,
+so dashboard loads don't re-run the statistics aggregate on every request.
+
+Every write path that can change the statistics calls invalidate(): the
+crud session hooks, DataStorage (whose inserts drive the guest trigger)
+and the guest import. Writes made by other workers arrive as cache change
+notifications (services/cache_notifications.py); the TTL bounds staleness
+if one is missed.
+"""
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Dict, NamedTuple, Optional
+
+# Seconds a computed response is served before the statistics are recomputed
+RSVP_STATS_CACHE_TTL = 10.0
+
+
+class CachedStats(NamedTuple):
+    """Serialized statistics response."""
+    body: bytes
+    etag: str
+
+
+def stats_etag(body: bytes) -> str:
+    """Strong ETag for a serialized response body."""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def serialize_stats(stats: Dict[str, Any]) -> bytes:
+    """Serialize a statistics response (compact, keys sorted, so equal stats give equal bytes)."""
+    return json.dumps(stats, separators=(",", ":"), sort_keys=True).encode("utf-8")
+
+
+class StatsCache:
+    """
+    Single-entry TTL cache with a version counter.
+
+    A value computed while an invalidation happened is not stored: put()
+    takes the version read before computing and is ignored if it changed.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl_seconds: Seconds a stored response stays valid
+        """
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entry: Optional[CachedStats] = None
+        self._stored_at = 0.0
+        self._version = 0
+
+    @property
+    def version(self) -> int:
+        """Invalidation counter; read it before computing a value to put."""
+        return self._version
+
+    def get(self) -> Optional[CachedStats]:
+        """Get the cached response, None if missing or expired."""
+        with self._lock:
+            if self._entry is None or time.monotonic() - self._stored_at >= self.ttl_seconds:
+                return None
+            return self._entry
+
+    def put(self, stats: Dict[str, Any], version: int) -> CachedStats:
+        """
+        Serialize statistics and store them unless invalidated meanwhile.
+
+        Args:
+            stats: Statistics response
+            version: Value of self.version read before computing stats
+
+        Returns:
+            The serialized response (also when it was not stored)
+        """
+        body = serialize_stats(stats)
+        entry = CachedStats(body, stats_etag(body))
+        with self._lock:
+            if version == self._version:
+                self._entry = entry
+                self._stored_at = time.monotonic()
+        return entry
+
+    def invalidate(self) -> None:
+        """Drop the cached response; the next request recomputes it."""
+        with self._lock:
+            self._entry = None
+            self._version += 1
+
+
+# Process-wide cache used by the stats endpoint
+rsvp_stats_cache = StatsCache(RSVP_STATS_CACHE_TTL)
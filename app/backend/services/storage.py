@@ -6,14 +6,119 @@ Handles persistence of data to PostgreSQL database.
 import json
 import logging
 import os
-from datetime import datetime
-from typing import Dict, Any, Optional, List, Union
+from functools import lru_cache
+from typing import Dict, Any, Optional, List, Union, Iterable, Tuple
 import psycopg2
-from psycopg2.extras import RealDictCursor, Json
+from psycopg2.extras import RealDictCursor, Json, execute_values
+
+from backend.services.cache_notifications import notify_cache_changes
+from backend.services.guest_facets import guest_facet_index
+from backend.services.guest_search_index import IndexedGuest, guest_search_index
+from backend.services.latest_response_cache import latest_response_cache
+from backend.services.rsvp_events import rsvp_event_broadcaster
+from backend.services.stats_cache import rsvp_stats_cache
 
 # Module-level logger with explicit name
 logger = logging.getLogger(__name__)
 
+# Columns of rsvp_guests that may be updated, with their SQL types.
+# Anything else is rejected, so column names never come from user input.
+RSVP_UPDATABLE_COLUMNS: Dict[str, str] = {
+    "name": "varchar",
+    "email": "varchar",
+    "rsvp_status": "varchar",
+    "num_guests": "integer",
+    "attending": "boolean",
+    "dietary_restrictions": "text",
+    "notes": "text",
+    "last_interaction_at": "timestamptz",
+}
+
+# Rows per VALUES list when running a bulk update
+BULK_UPDATE_PAGE_SIZE = 500
+
+# rsvp_guests columns returned by writes to keep the guest search index current
+GUEST_INDEX_COLUMNS = ", ".join(IndexedGuest._fields)
+
+
+def _validate_rsvp_columns(columns: Iterable[str]) -> Tuple[str, ...]:
+    """
+    Check columns against the whitelist and return them in canonical order.
+    
+    Raises:
+        ValueError: If any column is not updatable
+    """
+    columns = tuple(sorted(columns))
+    invalid = [column for column in columns if column not in RSVP_UPDATABLE_COLUMNS]
+    if invalid:
+        raise ValueError(f"Columns not updatable: {', '.join(invalid)}")
+    return columns
+
+
+@lru_cache(maxsize=64)
+def _rsvp_update_sql(columns: Tuple[str, ...]) -> str:
+    """Build (and cache) the single-guest UPDATE statement for a column set."""
+    set_clause = ", ".join(f"{column} = %s" for column in columns)
+    return (
+        f"UPDATE rsvp_guests SET {set_clause} WHERE phone_number = %s "
+        f"RETURNING {GUEST_INDEX_COLUMNS}"
+    )
+
+
+@lru_cache(maxsize=64)
+def _rsvp_bulk_update_sql(columns: Tuple[str, ...]) -> str:
+    """Build (and cache) the UPDATE ... FROM (VALUES ...) statement for a column set."""
+    set_clause = ", ".join(
+        f"{column} = v.{column}::{RSVP_UPDATABLE_COLUMNS[column]}" for column in columns
+    )
+    return (
+        f"UPDATE rsvp_guests AS g SET {set_clause} "
+        f"FROM (VALUES %s) AS v (phone_number, {', '.join(columns)}) "
+        f"WHERE g.phone_number = v.phone_number "
+        f"RETURNING {', '.join('g.' + field for field in IndexedGuest._fields)}"
+    )
+
+
+def group_rsvp_updates(
+    updates: Iterable[Tuple[str, Dict[str, Any]]]
+) -> Dict[Tuple[str, ...], List[Tuple[Any, ...]]]:
+    """
+    Group (phone_number, updates) pairs by the set of columns they change.
+    
+    Updates for the same phone are merged first (later values win), so each
+    phone appears in exactly one group.
+    
+    Args:
+        updates: Pairs of phone number and fields to update
+        
+    Returns:
+        Mapping of column tuple to rows of (phone_number, *values)
+        
+    Raises:
+        ValueError: If any column is not updatable
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    for phone_number, fields in updates:
+        if fields:
+            merged.setdefault(phone_number, {}).update(fields)
+    
+    groups: Dict[Tuple[str, ...], List[Tuple[Any, ...]]] = {}
+    for phone_number in sorted(merged):
+        fields = merged[phone_number]
+        columns = _validate_rsvp_columns(fields)
+        groups.setdefault(columns, []).append(
+            (phone_number, *(fields[column] for column in columns))
+        )
+    return groups
+
+
+def _index_guest_rows(rows: Iterable[Tuple[Any, ...]]) -> None:
+    """Apply committed guest rows (in IndexedGuest column order) to the search and facet indexes."""
+    for index in (guest_search_index, guest_facet_index):
+        if index.tracking:
+            for row in rows:
+                index.upsert(IndexedGuest(*row))
+
 
 class DataStorage:
     """
@@ -55,6 +160,9 @@ class DataStorage:
         """
         Save any type of user response with phone_number as unique identifier.
         
+        created_at and the generated columns (button_payload, button_text,
+        numeric_value, message_body) are filled in by the database.
+        
         Args:
             message: The WhatsApp message
             response_type: Type of response (e.g., 'button', 'numeric', 'general')
@@ -63,16 +171,24 @@ class DataStorage:
         Returns:
             True if successful, False otherwise
         """
+        # Replies to a template are attributed to it by the analytics rollups
+        replied_to_sid = getattr(message, "original_replied_message_sid", "")
+        if replied_to_sid:
+            response_data = {**response_data, "replied_to_sid": replied_to_sid}
+        
         try:
             with self._get_connection() as conn:
-                with conn.cursor() as cursor:
-                    # Insert into user_responses table
+                with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                    # Insert into user_responses table; the row is returned for
+                    # the latest response cache, tagged with the transaction id
+                    # that the trigger's cache change notification carries
                     cursor.execute(
                         """
                         INSERT INTO user_responses 
                         (phone_number, profile_name, response_type, response_data, 
-                        message_sid, wa_id, created_at)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s)
+                        message_sid, wa_id)
+                        VALUES (%s, %s, %s, %s, %s, %s)
+                        RETURNING *, pg_current_xact_id()::text AS cache_version
                         """,
                         (
                             message.from_number,
@@ -80,11 +196,34 @@ class DataStorage:
                             response_type,
                             Json(response_data),
                             message.message_sid,
-                            message.wa_id,
-                            datetime.now()
+                            message.wa_id
                         )
                     )
-                    
+                    saved = dict(cursor.fetchone())
+                    cache_version = saved.pop("cache_version")
+                    # The insert trigger upserted the guest; read it back for the
+                    # latest response pointer, the search and facet indexes and
+                    # live events. The guest row stays locked until commit, so
+                    # the pointer read here is the one committed.
+                    cursor.execute(
+                        f"SELECT latest_response_id, {GUEST_INDEX_COLUMNS} FROM rsvp_guests WHERE phone_number = %s",
+                        (message.from_number,)
+                    )
+                    guests = cursor.fetchall()
+                    is_latest = any(str(guest["latest_response_id"]) == str(saved["id"]) for guest in guests)
+                    guest_rows = []
+                    if (guest_search_index.tracking or guest_facet_index.tracking
+                            or rsvp_event_broadcaster.subscribers):
+                        guest_rows = [tuple(guest[field] for field in IndexedGuest._fields) for guest in guests]
+            
+            # Committed; the trigger may have changed the guest's RSVP status. The
+            # pointer only moves forward, so a replayed or out-of-order older
+            # response is saved but not cached as the latest one
+            if is_latest:
+                latest_response_cache.put_newer(message.from_number, saved, "created_at", version=cache_version)
+            rsvp_stats_cache.invalidate()
+            _index_guest_rows(guest_rows)
+            rsvp_event_broadcaster.publish_local(row[0] for row in guest_rows)
             logger.info(f"Saved {response_type} response from {message.from_number} to database")
             return True
             
@@ -125,22 +264,57 @@ class DataStorage:
             logger.error(f"Failed to retrieve user responses: {str(e)}")
             return []
     
+    def record_sent_template(self, message_sid: str, phone_number: str, template_sid: str) -> bool:
+        """
+        Log a sent template message, so responses replying to it are
+        attributed to the template (see services/response_rollups.py).
+        
+        Args:
+            message_sid: Twilio SID of the sent message
+            phone_number: Recipient phone number
+            template_sid: Twilio content template SID
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            with self._get_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(
+                        """
+                        INSERT INTO sent_templates (message_sid, phone_number, template_sid)
+                        VALUES (%s, %s, %s)
+                        ON CONFLICT (message_sid) DO NOTHING
+                        """,
+                        (message_sid, phone_number, template_sid)
+                    )
+            return True
+        except Exception as e:
+            logger.error(f"Failed to record sent template: {str(e)}")
+            return False
+    
     def save_numeric_response(self, message, response_value: str) -> None:
         """
         Save numeric response to database.
         
+        The message body is stored on the same row, so no separate
+        chat-history row is needed.
+        
         Args:
             message: The WhatsApp message
             response_value: The numeric response value
         """
         # Use the general save_response method with specific response type
-        response_data = {'value': response_value}
+        response_data = {'value': response_value, 'body': message.body}
         self.save_response(message, 'numeric', response_data)
             
     def save_button_response(self, message, button_text: str, button_payload: str) -> bool:
         """
         Save button response to database.
         
+        The message body is stored on the same row, so no separate
+        chat-history row is needed.
+        
         Args:
             message: The WhatsApp message
             button_text: Text displayed on the button
@@ -151,7 +325,8 @@ class DataStorage:
         """
         response_data = {
             'button_text': button_text,
-            'button_payload': button_payload
+            'button_payload': button_payload,
+            'body': message.body
         }
         return self.save_response(message, 'button', response_data)
         
@@ -159,27 +334,37 @@ class DataStorage:
         """
         Get the latest response from a user.
         
+        Served from the latest response cache when possible. Otherwise the
+        guest's latest_response_id pointer (kept by the insert trigger) is
+        followed: one unique-key lookup on rsvp_guests joined to
+        user_responses by primary key, without sorting the user's history.
+        
         Args:
             phone_number: The user's phone number
             
         Returns:
             The latest response or None if no responses exist
         """
+        cached = latest_response_cache.get(phone_number)
+        if cached is not None:
+            return dict(cached)
+        
         try:
             with self._get_connection() as conn:
                 with conn.cursor(cursor_factory=RealDictCursor) as cursor:
                     cursor.execute(
                         """
-                        SELECT * FROM user_responses
-                        WHERE phone_number = %s
-                        ORDER BY created_at DESC
-                        LIMIT 1
+                        SELECT ur.* FROM rsvp_guests g
+                        JOIN user_responses ur ON ur.id = g.latest_response_id
+                        WHERE g.phone_number = %s
                         """,
                         (phone_number,)
                     )
                     response = cursor.fetchone()
                     
             if response:
+                response = dict(response)
+                latest_response_cache.put(phone_number, response)
                 return dict(response)
             return None
             
@@ -255,7 +440,7 @@ class DataStorage:
         
         Args:
             phone_number: Phone number as unique identifier
-            updates: Dictionary of fields to update
+            updates: Dictionary of fields to update (see RSVP_UPDATABLE_COLUMNS)
             
         Returns:
             True if successful, False otherwise
@@ -264,30 +449,19 @@ class DataStorage:
             return True
             
         try:
-            # Build the SET clause dynamically
-            set_clause_parts = []
-            params = []
-            
-            for field, value in updates.items():
-                set_clause_parts.append(f"{field} = %s")
-                params.append(value)
-            
-            # Add the phone_number to the parameters
-            params.append(phone_number)
-            
-            set_clause = ", ".join(set_clause_parts)
+            columns = _validate_rsvp_columns(updates)
+            params = [updates[column] for column in columns] + [phone_number]
             
             with self._get_connection() as conn:
                 with conn.cursor() as cursor:
-                    cursor.execute(
-                        f"""
-                        UPDATE rsvp_guests
-                        SET {set_clause}
-                        WHERE phone_number = %s
-                        """,
-                        params
-                    )
-                    
+                    cursor.execute(_rsvp_update_sql(columns), params)
+                    guest_rows = cursor.fetchall()
+                    notify_cache_changes(cursor, "rsvp_guests", (row[0] for row in guest_rows))
+            
+            if guest_rows:
+                rsvp_stats_cache.invalidate()
+                rsvp_event_broadcaster.publish_local(row[0] for row in guest_rows)
+            _index_guest_rows(guest_rows)
             logger.info(f"Updated RSVP details for {phone_number}")
             return True
             
@@ -295,6 +469,52 @@ class DataStorage:
             logger.error(f"Failed to update RSVP details: {str(e)}")
             return False
     
+    def bulk_update_rsvp_details(
+        self,
+        updates: Iterable[Tuple[str, Dict[str, Any]]]
+    ) -> Optional[int]:
+        """
+        Update RSVP details for many guests in a single transaction.
+        
+        Pairs are grouped by the columns they change and each group runs as
+        one UPDATE ... FROM (VALUES ...) statement.
+        
+        Args:
+            updates: Pairs of phone number and fields to update
+            
+        Returns:
+            Number of guest rows updated, or None if the update failed
+            (in which case nothing is written)
+        """
+        try:
+            groups = group_rsvp_updates(updates)
+            if not groups:
+                return 0
+            
+            guest_rows = []
+            with self._get_connection() as conn:
+                with conn.cursor() as cursor:
+                    for columns, rows in groups.items():
+                        sql = _rsvp_bulk_update_sql(columns)
+                        for start in range(0, len(rows), BULK_UPDATE_PAGE_SIZE):
+                            guest_rows.extend(execute_values(
+                                cursor, sql, rows[start:start + BULK_UPDATE_PAGE_SIZE],
+                                page_size=BULK_UPDATE_PAGE_SIZE, fetch=True
+                            ))
+                    notify_cache_changes(cursor, "rsvp_guests", (row[0] for row in guest_rows))
+            
+            updated = len(guest_rows)
+            if updated:
+                rsvp_stats_cache.invalidate()
+                rsvp_event_broadcaster.publish_local(row[0] for row in guest_rows)
+            _index_guest_rows(guest_rows)
+            logger.info(f"Bulk updated RSVP details for {updated} guests ({len(groups)} column sets)")
+            return updated
+            
+        except Exception as e:
+            logger.error(f"Failed to bulk update RSVP details: {str(e)}")
+            return None
+    
     def get_rsvp_statistics(self) -> Dict[str, int]:
         """
         Get overall RSVP statistics.
@@ -7,7 +7,7 @@ import json
 import logging
 import os
 import re
-from typing import Dict, Any
+from typing import Callable, Dict, Any, Optional
 
 # Module-level logger with explicit name
 logger = logging.getLogger(__name__)
@@ -20,7 +20,23 @@ class TwilioMessageSender:
     Handles all Twilio API interactions.
     """
     
-    def send_template(self, message, template_sid: str, additional_data: Dict = None) -> Dict[str, Any]:
+    def __init__(self, sent_template_log: Optional[Callable[[str, str, str], Any]] = None):
+        """
+        Initialize the sender.
+        
+        Args:
+            sent_template_log: Called with (message_sid, phone_number, template_sid)
+                for every template sent, e.g. DataStorage.record_sent_template
+        """
+        self.sent_template_log = sent_template_log
+    
+    def send_template(
+        self,
+        message,
+        template_sid: str,
+        additional_data: Dict = None,
+        content_variables: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """
         Send a message using Twilio template.
         
@@ -28,6 +44,7 @@ class TwilioMessageSender:
             message: The WhatsApp message to respond to
             template_sid: The Twilio template SID to use
             additional_data: Any additional data to include in the response
+            content_variables: Template variables (default: guest name, date and RSVP link)
             
         Returns:
             Response data with Twilio status
@@ -95,7 +112,7 @@ class TwilioMessageSender:
                 return response
             
             # Send message
-            vars = build_template_vars(guest_name, phone_number)
+            vars = content_variables if content_variables is not None else build_template_vars(guest_name, phone_number)
             twilio_message = client.messages.create(
                 from_=from_number,
                 to=f"whatsapp:{phone_number}",
@@ -103,6 +120,8 @@ class TwilioMessageSender:
                 content_variables=json.dumps(vars)
             )
             logger.info(f"Sent to {phone_number} | SID: {twilio_message.sid}")
+            if self.sent_template_log is not None:
+                self.sent_template_log(twilio_message.sid, phone_number, template_sid)
             
             # Check delivery status
             message_status = client.messages(twilio_message.sid).fetch().status
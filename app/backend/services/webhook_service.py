@@ -13,6 +13,8 @@ from enum import Enum
 from dataclasses import dataclass
 
 # Import from separated service modules
+from backend.services.message_classifier import message_classifier
+from backend.services.reply_routes import reply_router
 from backend.services.storage import DataStorage
 from backend.services.twilio_service import TwilioMessageSender
 
@@ -63,7 +65,8 @@ class MessageCategorizer:
     """
     Service for categorizing messages.
     
-    Classifies messages into appropriate message types.
+    Classifies messages into appropriate message types with the shared
+    rule-based classifier (services/message_classifier.py).
     """
     
     def categorize(self, message: WhatsAppMessage) -> str:
@@ -76,103 +79,38 @@ class MessageCategorizer:
         Returns:
             Message type
         """
-        # Check for button interactions first
-        if message.button_text or message.button_payload:
-            logger.info(f"Button interaction detected: {message.button_text} (payload: {message.button_payload})")
-            return MessageType.BUTTON
-        
-        # Use the message body for categorization
-        body = message.body.lower()
-        
-        # Check for numeric response (single digit 1-9)
-        if body.strip().isdigit() and len(body.strip()) == 1 and int(body.strip()) in range(1, 10):
-            logger.info(f"Numeric response detected: {body}")
-            return MessageType.NUMERIC
-        
-        # Clear, explicit checks for each message type
-        if int(message.num_media) > 0:
-            return MessageType.MEDIA
-            
-        if body in ['hi', 'hello', 'שלום', 'היי', 'hey']:
-            return MessageType.GREETING
-            
-        if '?' in body or any(word in body for word in ["שאלה", "מתי", "איפה", "כמה", "מה"]):
-            return MessageType.QUESTION
-            
-        # Default case
-        return MessageType.GENERAL
+        return MessageType(message_classifier.classify(
+            message.body, message.num_media, message.button_text, message.button_payload
+        ))
 
 
 class ResponseHandler:
     """
     Service for handling different types of responses.
     
-    Provides specialized handling for different message and response types.
+    Saves typed responses and answers them with the template of the reply
+    routing table (services/reply_routes.py).
     """
     
     def __init__(self):
-        self.twilio_sender = TwilioMessageSender()
         self.data_storage = DataStorage()
+        self.twilio_sender = TwilioMessageSender(sent_template_log=self.data_storage.record_sent_template)
     
-    def handle_decline_response(self, message: WhatsAppMessage) -> Dict[str, Any]:
-        """
-        Handle decline response (לצערי לא - Unfortunately not).
-        
-        Args:
-            message: The WhatsApp message with decline button interaction
-            
-        Returns:
-            Response data for decline interaction
-        """
-        logger.info(f"Handling decline response from {message.profile_name}")
-        
-        # Use the shared template sending method with decline-specific template
-        template_sid = "HX4b154aac4a81de7cebb4cb42fbd837a9"
-        return self.twilio_sender.send_template(
-            message, 
-            template_sid,
-            {"response_type": "decline"}
-        )
-    
-    def handle_approve_response(self, message: WhatsAppMessage) -> Dict[str, Any]:
+    def send_reply(self, message: WhatsAppMessage, message_type: MessageType) -> Optional[Dict[str, Any]]:
         """
-        Handle approve response (כן, אגיע! - Yes, I'll come!).
+        Send the template the reply routing table gives for a message.
         
         Args:
-            message: The WhatsApp message with approve button interaction
+            message: The WhatsApp message to answer
+            message_type: Its message type
             
         Returns:
-            Response data for approve interaction
+            Response data of the sent template, or None if no route matches
         """
-        logger.info(f"Handling approve response from {message.profile_name}")
-        
-        # Use the shared template sending method with approve-specific template
-        template_sid = "HXd10781b44eab25e5088956bfa0cfc541"
-        return self.twilio_sender.send_template(
-            message, 
-            template_sid,
-            {"response_type": "approve"}
-        )
-    
-    def handle_not_know_yet_response(self, message: WhatsAppMessage) -> Dict[str, Any]:
-        """
-        Handle "don't know yet" response (עוד לא יודע/ת - Don't know yet).
-        
-        Args:
-            message: The WhatsApp message with "don't know yet" button interaction
-            
-        Returns:
-            Response data for "don't know yet" interaction
-        """
-        logger.info(f"Handling 'don't know yet' response from {message.profile_name}")
-        
-        # Use the shared template sending method with "don't know yet"-specific template
-        template_sid = "HX9eddabf5aea2ec56279755bde2160640"
-        return self.twilio_sender.send_template(
-            message, 
-            template_sid,
-            {"response_type": "not_know_yet"}
-        )
+        route = reply_router.dispatch(message_type.value, message)
+        if route is None:
+            return None
+        return route.send(self.twilio_sender, message)
     
     def handle_numeric_response(self, message: WhatsAppMessage) -> Dict[str, Any]:
         """
@@ -191,16 +129,15 @@ class ResponseHandler:
         # Save to CSV
         self.data_storage.save_numeric_response(message, numeric_value)
         
-        # Use the shared template sending method with numeric-specific template
-        template_sid = "HXf67e92a3d1ed68775b925abc2dd1d325"
-        return self.twilio_sender.send_template(
-            message, 
-            template_sid,
-            {
-                "response_type": "numeric", 
-                "numeric_value": numeric_value
-            }
-        )
+        reply = self.send_reply(message, MessageType.NUMERIC)
+        if reply is not None:
+            return reply
+        return {
+            "status": "numeric_response_processed",
+            "message_type": MessageType.NUMERIC,
+            "numeric_value": numeric_value,
+            "from": message.from_number
+        }
     
     def handle_button_response(self, message: WhatsAppMessage) -> Dict[str, Any]:
         """
@@ -217,16 +154,10 @@ class ResponseHandler:
         # Save the button response to storage
         self.data_storage.save_button_response(message, message.button_text, message.button_payload)
         
-        # Handle specific button responses
-        if message.button_text == "לצערי לא" and message.button_payload == "2":
-            # Custom response for "Unfortunately not" button with payload 2
-            return self.handle_decline_response(message)
-        elif message.button_text == "כן, אגיע!" and message.button_payload == "1":
-            # Custom response for approval button
-            return self.handle_approve_response(message)
-        elif message.button_text == "עוד לא יודע/ת" and message.button_payload == "3":
-            # Custom response for "Don't know yet" button 
-            return self.handle_not_know_yet_response(message)
+        # Reply to known buttons (approve, decline, not sure yet)
+        reply = self.send_reply(message, MessageType.BUTTON)
+        if reply is not None:
+            return reply
             
         # Default button response
         return {
@@ -293,15 +224,16 @@ class WebhookService:
         message_type = self.message_categorizer.categorize(message)
         
         # Log the categorization
-        logger.info(
-            f"Message from {message.from_number} categorized as {message_type}"
-        )
+        logger.info("Message from %s categorized as %s", message.from_number, message_type.value)
         
-        # Save all non-empty messages for general chat history
-        if message.body.strip() and hasattr(self.response_handler, 'data_storage'):
+        # Save all non-empty messages for general chat history.
+        # Button and numeric responses store the body on their own typed row,
+        # so saving them here would insert (and run the guest trigger) twice.
+        is_typed_response = message_type in (MessageType.BUTTON, MessageType.NUMERIC)
+        if message.body.strip() and not is_typed_response and hasattr(self.response_handler, 'data_storage'):
             self.response_handler.data_storage.save_response(
                 message, 
-                f'message_{message_type}', 
+                f'message_{message_type.value}', 
                 {'body': message.body}
             )
         
@@ -0,0 +1,168 @@
+"""
+Tests for cross-worker cache change notifications.
+
+The PostgreSQL test needs a database given as TEST_PRIMARY_URI.
+"""
+import asyncio
+import os
+from collections import namedtuple
+
+import pytest
+
+from backend.services.cache_notifications import (
+    CacheChange, CacheChangeListener, RESYNC, apply_cache_changes, listener_dsn,
+    notify_cache_changes, parse_cache_change
+)
+from backend.services.guest_search_index import guest_search_index
+from backend.services.latest_response_cache import latest_response_cache
+from backend.services.stats_cache import rsvp_stats_cache
+
+GuestRow = namedtuple(
+    "GuestRow", "id name attending dietary_restrictions phone_number created_at updated_at"
+)
+
+
+@pytest.fixture(autouse=True)
+def clean_caches():
+    """Start and end each test with empty process-wide caches."""
+    latest_response_cache.clear()
+    guest_search_index.clear()
+    yield
+    latest_response_cache.clear()
+    guest_search_index.clear()
+
+
+def test_parse_cache_change():
+    """Payloads are [table, key, version] arrays; anything else is ignored."""
+    assert parse_cache_change('["rsvp_guests", "7", "1234"]') == CacheChange("rsvp_guests", "7", "1234")
+    assert parse_cache_change('["user_responses", "+972501111111", null]').version is None
+    assert parse_cache_change("not json") is None
+    assert parse_cache_change('["too", "short"]') is None
+
+
+def test_apply_evicts_latest_responses_from_other_writers():
+    """A response written elsewhere evicts the entry; this worker's own write keeps it."""
+    latest_response_cache.put("+972501111111", {"id": "a"}, version="100")
+    latest_response_cache.put("+972502222222", {"id": "b"}, version="100")
+    stats_version = rsvp_stats_cache.version
+
+    asyncio.run(apply_cache_changes([
+        CacheChange("user_responses", "+972501111111", "100"),
+        CacheChange("user_responses", "+972502222222", "101"),
+    ]))
+
+    assert latest_response_cache.get("+972501111111") == {"id": "a"}
+    assert latest_response_cache.get("+972502222222") is None
+    assert rsvp_stats_cache.version > stats_version
+
+
+def test_apply_patches_guest_search_index():
+    """Changed guests are re-read in one batch; guests no longer found are removed."""
+    guest_search_index.load([
+        GuestRow(1, "Dana Levi", True, None, "+972501111111", None, None),
+        GuestRow(2, "Noa Cohen", True, None, "+972502222222", None, None),
+    ])
+    fetched = []
+
+    def fetch_guest_rows(guest_ids):
+        fetched.append(guest_ids)
+        return [GuestRow(1, "Dana Mizrahi", True, None, "+972501111111", None, None)]
+
+    asyncio.run(apply_cache_changes(
+        [CacheChange("rsvp_guests", "1", "5"), CacheChange("rsvp_guests", "2", "5")],
+        fetch_guest_rows=fetch_guest_rows
+    ))
+
+    assert fetched == [["1", "2"]]
+    assert [row.name for row in guest_search_index.search("Mizrahi", 5)] == ["Dana Mizrahi"]
+    assert guest_search_index.search("Noa", 5) == []
+
+
+def test_resync_drops_everything():
+    """After a reconnect every cached response is dropped."""
+    latest_response_cache.put("+972501111111", {"id": "a"}, version="100")
+    asyncio.run(apply_cache_changes([RESYNC]))
+    assert len(latest_response_cache) == 0
+
+
+def test_listener_batches_notifications():
+    """Notifications arriving together reach the handler as one batch."""
+    batches = []
+
+    async def handler(changes):
+        batches.append(changes)
+
+    async def receive():
+        listener = CacheChangeListener("postgresql://unused", handler=handler)
+        for key in ("1", "2", "3"):
+            listener._on_notification(None, 0, listener.channel, f'["rsvp_guests", "{key}", "9"]')
+        listener._on_notification(None, 0, listener.channel, "garbage")
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        return listener
+
+    listener = asyncio.run(receive())
+    assert [[change.key for change in batch] for batch in batches] == [["1", "2", "3"]]
+    assert listener.received == 3
+
+
+def test_listener_retries_with_backoff():
+    """An unreachable database is retried with growing delays instead of failing."""
+    async def run_briefly():
+        listener = CacheChangeListener(
+            "postgresql://nobody@127.0.0.1:1/none", min_backoff=0.01, max_backoff=0.02
+        )
+        listener.start()
+        await asyncio.sleep(0.3)
+        await listener.stop()
+        return listener
+
+    listener = asyncio.run(run_briefly())
+    assert listener.failures >= 2
+    assert not listener.connected
+
+
+def test_listener_dsn_drops_driver():
+    """asyncpg gets a plain postgresql:// DSN."""
+    assert listener_dsn("postgresql+psycopg2://u:p@db:5432/rsvp") == "postgresql://u:p@db:5432/rsvp"
+
+
+@pytest.mark.skipif(
+    not os.environ.get("TEST_PRIMARY_URI"),
+    reason="needs TEST_PRIMARY_URI (a PostgreSQL database)"
+)
+def test_postgres_notifications_reach_listener():
+    """A committed write is delivered to the listener; a rolled back one is not."""
+    import psycopg2
+
+    uri = os.environ["TEST_PRIMARY_URI"]
+
+    async def roundtrip():
+        batches = []
+
+        async def handler(changes):
+            batches.append(changes)
+
+        listener = CacheChangeListener(listener_dsn(uri), handler=handler)
+        listener.start()
+        while not listener.connected:
+            await asyncio.sleep(0.01)
+
+        conn = psycopg2.connect(listener_dsn(uri))
+        with conn.cursor() as cursor:
+            notify_cache_changes(cursor, "rsvp_guests", ["rolled-back"])
+        conn.rollback()
+        with conn.cursor() as cursor:
+            notify_cache_changes(cursor, "rsvp_guests", ["42"])
+        conn.commit()
+        conn.close()
+
+        for _ in range(100):
+            if batches:
+                break
+            await asyncio.sleep(0.01)
+        await listener.stop()
+        return batches
+
+    batches = asyncio.run(roundtrip())
+    assert [change.key for batch in batches for change in batch] == ["42"]
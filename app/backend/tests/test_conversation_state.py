@@ -0,0 +1,154 @@
+"""
+Tests for the per-phone conversation state machine and its write-through cache.
+"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.backend.db.models import Base, ConversationState, SentTemplate, UserResponse
+from backend.services.conversation_state import (
+    ConversationSnapshot,
+    ConversationStateMachine,
+    ConversationStateStore,
+    conversation_event,
+    conversation_state_cache,
+    conversation_states,
+)
+from backend.services.latest_response_cache import PhoneLRUCache
+from backend.services.webhook_service import WhatsAppMessage
+
+PHONE = "+972501111111"
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """SQLite database with the conversation_states table."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'conversations.db'}", poolclass=NullPool)
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
+
+
+def _message(body="", button_text="", button_payload=""):
+    return WhatsAppMessage(
+        message_sid="SM1", from_number=PHONE, to_number="+972509999999",
+        profile_name="Noa", body=body, num_media="0", status="received", wa_id="972501111111",
+        button_text=button_text, button_payload=button_payload
+    )
+
+
+def test_state_machine_transitions():
+    """Buttons move the conversation from any step; a headcount only confirms after a yes."""
+    machine = ConversationStateMachine()
+    state = ConversationSnapshot(PHONE)
+
+    state = machine.apply(state, conversation_event("numeric"))
+    assert state.step == "new"
+    state = machine.apply(state, conversation_event("question"))
+    state = machine.apply(state, conversation_event("button", "1"), template_sid="HXapprove")
+    assert state.step == "awaiting_headcount"
+    state = machine.apply(state, conversation_event("numeric"))
+    assert state == ConversationSnapshot(PHONE, "confirmed", "HXapprove", message_count=4, question_count=1, version=4)
+    assert machine.apply(state, conversation_event("button", "2")).step == "declined"
+
+
+def test_transition_is_cached_only_when_committed(session_factory):
+    """The state is written with the response row and cached on commit, not on rollback."""
+    store = ConversationStateStore(PhoneLRUCache(100, 60))
+    with session_factory() as db:
+        db.add(UserResponse(phone_number=PHONE, question_key="button_response"))
+        store.advance(db, PHONE, "button:2")
+        db.rollback()
+        assert store.cache.get(PHONE) is None
+        assert db.get(ConversationState, PHONE) is None
+
+        db.add(UserResponse(phone_number=PHONE, question_key="button_response"))
+        state = store.advance(db, PHONE, "button:1", template_sid="HXapprove")
+        assert store.cache.get(PHONE) is None
+        db.commit()
+        assert store.cache.get(PHONE) == state
+        assert db.get(ConversationState, PHONE).step == "awaiting_headcount"
+        assert db.query(UserResponse).count() == 1
+
+        # Served from the cache without a query
+        assert store.get(db, PHONE).version == 1
+
+
+def test_stale_cached_state_is_retried_from_the_database(session_factory):
+    """A worker whose cached state is stale applies its transition to the stored one."""
+    worker_a = ConversationStateStore(PhoneLRUCache(100, 60))
+    worker_b = ConversationStateStore(PhoneLRUCache(100, 60))
+    with session_factory() as db:
+        worker_a.advance(db, PHONE, "greeting")
+        db.commit()
+        worker_b.advance(db, PHONE, "button:1")
+        db.commit()
+
+        # Worker A still caches version 1
+        assert worker_a.cache.get(PHONE).version == 1
+        state = worker_a.advance(db, PHONE, "numeric")
+        db.commit()
+    assert state.step == "confirmed"
+    assert state.version == 3
+    assert state.message_count == 3
+
+
+def test_conversation_service_records_steps(session_factory, monkeypatch):
+    """Replies carry the conversation step, which follows the guest's answers."""
+    from backend.services.conversation_service import ConversationService
+
+    monkeypatch.delenv("TWILIO_ACCOUNT_SID", raising=False)
+    conversation_state_cache.clear()
+    try:
+        with session_factory() as db:
+            service = ConversationService(db)
+            result = service.process_message(_message(button_text="כן, אגיע!", button_payload="1"))
+            assert result["response_type"] == "approve"
+            assert result["conversation_step"] == "awaiting_headcount"
+
+            result = service.process_message(_message(body="3"))
+            assert result["numeric_value"] == "3"
+            assert result["conversation_step"] == "confirmed"
+
+            # Without Twilio credentials no reply is sent, so no template is recorded
+            state = db.get(ConversationState, PHONE)
+            assert (state.message_count, state.last_template_sid) == (2, None)
+            assert db.query(UserResponse).count() == 2
+    finally:
+        conversation_state_cache.clear()
+
+
+def test_conversation_service_records_sent_reply_template(session_factory, monkeypatch):
+    """The reply template is recorded in the state once it has been sent."""
+    from backend.services.conversation_service import ConversationService
+
+    conversation_state_cache.clear()
+    try:
+        with session_factory() as db:
+            service = ConversationService(db)
+            monkeypatch.setattr(
+                service.twilio_sender, "send_template",
+                lambda *args, **kwargs: {"twilio_status": "queued", "twilio_message_sid": "SM-reply"}
+            )
+            result = service.process_message(_message(button_text="כן, אגיע!", button_payload="1"))
+            assert result["conversation_step"] == "awaiting_headcount"
+
+            state = db.get(ConversationState, PHONE)
+            assert state.last_template_sid == "HXd10781b44eab25e5088956bfa0cfc541"
+            assert conversation_states.get(db, PHONE).last_template_sid == state.last_template_sid
+    finally:
+        conversation_state_cache.clear()
+
+
+def test_conversation_service_logs_sent_templates(session_factory):
+    """Templates sent by the conversation pipeline are logged for reply attribution."""
+    from backend.services.conversation_service import ConversationService
+
+    with session_factory() as db:
+        service = ConversationService(db)
+        assert service.twilio_sender.sent_template_log is not None
+        service.twilio_sender.sent_template_log("SM-sent", PHONE, "HX1")
+        service.twilio_sender.sent_template_log("SM-sent", PHONE, "HX1")
+
+        sent = db.query(SentTemplate).all()
+        assert [(row.message_sid, row.phone_number, row.template_sid) for row in sent] == [("SM-sent", PHONE, "HX1")]
@@ -0,0 +1,110 @@
+"""
+Tests for the batch CRUD operations and caller-controlled transactions.
+"""
+import pytest
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.backend.db.models import Base, UserResponse, RsvpGuest
+from backend.db import crud
+from backend.services.guest_search_index import guest_search_index
+
+
+@pytest.fixture
+def engine():
+    """In-memory SQLite engine with the ORM schema."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture
+def db(engine):
+    """Session that keeps objects loaded after commit, like unit_of_work."""
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def statements(engine):
+    """Collect SQL statements executed on the engine."""
+    executed = []
+    event.listen(engine, "before_cursor_execute", lambda *args: executed.append(args[2]))
+    return executed
+
+
+def _responses(count):
+    return [
+        {"phone_number": f"+97250000000{i}", "question_key": "button_response", "response_text": str(i)}
+        for i in range(count)
+    ]
+
+
+def test_bulk_create_user_responses_returns_rows_in_input_order(db, statements):
+    """Responses are inserted with INSERT ... RETURNING and nothing is re-read."""
+    rows = crud.bulk_create_user_responses(db, _responses(5))
+    db.commit()
+
+    assert [row.phone_number for row in rows] == [f"+97250000000{i}" for i in range(5)]
+    texts = dict(db.execute(select(UserResponse.id, UserResponse.response_text)).all())
+    assert [texts[row.id] for row in rows] == ["0", "1", "2", "3", "4"]
+    assert all(row.created_at is not None for row in rows)
+    # SQLite needs one statement per row to keep RETURNING in order; PostgreSQL batches them
+    assert all("RETURNING" in sql for sql in statements if sql.startswith("INSERT"))
+    assert crud.bulk_create_user_responses(db, []) == []
+
+
+def test_bulk_upsert_guests(db):
+    """Guests with an id are updated and the others inserted, ids in input order."""
+    response_id = crud.bulk_create_user_responses(db, _responses(1))[0].id
+    existing = crud.bulk_create_rsvp_guests(db, [
+        {"user_response_id": response_id, "name": "Old", "attending": False}
+    ])[0]
+
+    guest_ids = crud.bulk_upsert_guests(db, [
+        {"user_response_id": response_id, "name": "New", "attending": True},
+        {"id": existing, "name": "Renamed", "attending": True, "not_a_column": 1},
+    ])
+    db.commit()
+
+    assert guest_ids[1] == existing
+    names = dict(db.execute(select(RsvpGuest.id, RsvpGuest.name)).all())
+    assert names == {existing: "Renamed", guest_ids[0]: "New"}
+
+
+def test_caller_controls_the_transaction(db, statements):
+    """commit=False writes only flush, so the caller can roll everything back."""
+    response = crud.create_user_response(db, _responses(1)[0], commit=False)
+    crud.create_rsvp_guest(
+        db, {"user_response_id": response.id, "name": "Guest", "attending": True}, commit=False
+    )
+    assert not any(sql == "COMMIT" for sql in statements)
+    db.rollback()
+
+    assert db.execute(select(func.count()).select_from(UserResponse)).scalar_one() == 0
+
+
+def test_commit_does_not_refresh(db, statements):
+    """A committed create issues no SELECT to reload the object."""
+    response = crud.create_user_response(db, _responses(1)[0])
+    assert response.id is not None
+    assert not any(sql.startswith("SELECT") for sql in statements)
+
+
+def test_search_index_updated_only_on_commit(db):
+    """Guest writes reach the search index when the transaction commits."""
+    guest_search_index.load([])
+    try:
+        response_id = crud.bulk_create_user_responses(db, _responses(1))[0].id
+        crud.bulk_create_rsvp_guests(db, [{"user_response_id": response_id, "name": "Rolled Back", "attending": True}])
+        db.rollback()
+        assert len(guest_search_index) == 0
+
+        response_id = crud.bulk_create_user_responses(db, _responses(1))[0].id
+        crud.bulk_create_rsvp_guests(db, [{"user_response_id": response_id, "name": "Committed", "attending": True}])
+        assert len(guest_search_index) == 0
+        db.commit()
+        assert [guest.name for guest in guest_search_index.search("committed", 10)] == ["Committed"]
+    finally:
+        guest_search_index.clear()
@@ -0,0 +1,119 @@
+"""
+Tests for read replica routing.
+
+The PostgreSQL test needs a primary and a streaming replica, e.g. two
+local instances, given as TEST_PRIMARY_URI and TEST_REPLICA_URI.
+"""
+import asyncio
+import os
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool, QueuePool
+
+from backend.db.routing import ReplicaRouter, pool_status
+from backend.db.session import async_database_uri
+
+
+def _router(lag_sql, max_lag=5.0, check_interval=0.0):
+    # NullPool closes aiosqlite connections (and their threads) right after the check
+    engine = create_engine("sqlite://")
+    async_engine = create_async_engine("sqlite+aiosqlite://", poolclass=NullPool)
+    return ReplicaRouter(engine, async_engine, max_lag, check_interval, lag_query=text(lag_sql))
+
+
+def test_without_replica_reads_use_primary():
+    """Without a replica every read goes to the primary."""
+    router = ReplicaRouter(None, None, 5.0, 0.0)
+    assert not router.enabled
+    assert not router.use_replica()
+
+
+def test_routes_by_replica_lag():
+    """Reads use the replica within the lag limit and the primary beyond it."""
+    assert _router("SELECT 1.5").use_replica()
+    assert not _router("SELECT 10").use_replica()
+
+    router = _router("SELECT 1.5")
+    assert asyncio.run(router.use_replica_async())
+    assert router.status()["lag_seconds"] == 1.5
+    assert router.status()["routed"] == {"replica": 1, "primary": 0}
+
+
+def test_unreachable_replica_falls_back_to_primary():
+    """A failing lag check routes reads to the primary."""
+    router = _router("SELECT no_such_column")
+    assert not router.use_replica()
+    assert router.lag_seconds is None
+    assert router.status()["routed"] == {"replica": 0, "primary": 1}
+
+
+def test_replica_not_streaming_falls_back_to_primary():
+    """A standby that reports no lag because it lost its upstream is not used."""
+    router = _router("SELECT NULL")
+    assert not router.use_replica()
+    assert router.lag_seconds is None
+
+
+def test_routing_counters_are_consistent_across_threads():
+    """Concurrent reads are all counted."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    router = _router("SELECT 1.5", check_interval=60)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: router.use_replica(), range(800)))
+    assert router.status()["routed"] == {"replica": 800, "primary": 0}
+
+
+def test_lag_is_cached_between_checks():
+    """Lag is measured at most once per check interval."""
+    router = _router("SELECT 1.5", check_interval=60)
+    assert router.use_replica()
+    router.lag_query = text("SELECT 10")
+    assert router.use_replica()
+
+
+def test_settings_reject_unsupported_database_backends(monkeypatch):
+    """An unsupported database URI fails settings validation, naming the setting."""
+    from pydantic import ValidationError
+
+    from backend.core.config import Settings
+
+    monkeypatch.setenv("DATABASE_REPLICA_URI", "mysql://localhost/wedding_rsvp")
+    with pytest.raises(ValidationError, match="DATABASE_REPLICA_URI uses unsupported database backend 'mysql'"):
+        Settings()
+    monkeypatch.setenv("DATABASE_REPLICA_URI", "sqlite:///replica.db")
+    assert Settings().DATABASE_REPLICA_URI == "sqlite:///replica.db"
+
+
+def test_pool_status_reports_queue_pool_counters():
+    """Queue pools report size and checked out connections."""
+    engine = create_engine("sqlite:///:memory:", poolclass=QueuePool)
+    with engine.connect():
+        status = pool_status(engine)
+    assert status["pool"] == "QueuePool"
+    assert status["checkedout"] == 1
+
+
+@pytest.mark.skipif(
+    not (os.environ.get("TEST_PRIMARY_URI") and os.environ.get("TEST_REPLICA_URI")),
+    reason="needs TEST_PRIMARY_URI and TEST_REPLICA_URI (a PostgreSQL primary and replica)"
+)
+def test_postgres_replica_routing():
+    """Against a real replica, lag is measured and reads go to the standby."""
+    replica_uri = os.environ["TEST_REPLICA_URI"]
+    router = ReplicaRouter(
+        create_engine(replica_uri),
+        create_async_engine(async_database_uri(replica_uri)),
+        max_lag_seconds=5.0,
+        check_interval=0.0
+    )
+    assert router.use_replica()
+    assert asyncio.run(router.use_replica_async())
+    assert router.lag_seconds is not None and router.lag_seconds <= 5.0
+
+    with router.replica_engine.connect() as conn:
+        assert conn.execute(text("SELECT pg_is_in_recovery()")).scalar()
+    with create_engine(os.environ["TEST_PRIMARY_URI"]).connect() as conn:
+        assert not conn.execute(text("SELECT pg_is_in_recovery()")).scalar()
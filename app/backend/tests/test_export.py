@@ -0,0 +1,46 @@
+"""
+Tests for the streaming export helpers.
+"""
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+
+from backend.services.export_service import serialize_rows, gzip_stream, ExportFormat
+
+COLUMNS = ["id", "name", "created_at"]
+BATCHES = [
+    [(1, "נועה", datetime(2025, 4, 1, 12, 0))],
+    [(2, "Eyal, Jr.", None), (3, None, datetime(2025, 4, 2, 9, 30))],
+]
+
+
+def _decompress(chunks):
+    return gzip.decompress(b"".join(chunks)).decode("utf-8")
+
+
+def test_csv_export_round_trip():
+    """CSV export has a header and survives gzip round trip."""
+    output = _decompress(gzip_stream(serialize_rows(BATCHES, COLUMNS, ExportFormat.CSV)))
+    rows = list(csv.reader(io.StringIO(output)))
+    assert rows[0] == COLUMNS
+    assert rows[1] == ["1", "נועה", "2025-04-01T12:00:00"]
+    assert rows[2] == ["2", "Eyal, Jr.", ""]
+    assert len(rows) == 4
+
+
+def test_ndjson_export_round_trip():
+    """NDJSON export produces one JSON object per row."""
+    output = _decompress(gzip_stream(serialize_rows(BATCHES, COLUMNS, ExportFormat.NDJSON)))
+    records = [json.loads(line) for line in output.splitlines()]
+    assert len(records) == 3
+    assert records[0] == {"id": 1, "name": "נועה", "created_at": "2025-04-01T12:00:00"}
+    assert records[2]["name"] is None
+
+
+def test_export_is_streamed_per_batch():
+    """Each batch is serialized lazily as its own chunk."""
+    chunks = serialize_rows(iter(BATCHES), COLUMNS, ExportFormat.NDJSON)
+    assert next(chunks).count("\n") == 1
+    assert next(chunks).count("\n") == 2
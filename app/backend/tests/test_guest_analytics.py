@@ -0,0 +1,119 @@
+"""
+Tests for the columnar guest analytics engine and its admin endpoints.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+pytest.importorskip("numpy")
+
+from app.backend.db.models import Base, RsvpGuest, SentTemplate, UserResponse
+from backend.services.guest_analytics import GuestAnalytics, normalize_dietary
+
+SENT_AT = datetime(2025, 5, 1, 10)
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """SQLite database with two invited families and a walk-in who was never sent a template."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'analytics.db'}", poolclass=NullPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        cohen = UserResponse(phone_number="+972501111111", question_key="button_response",
+                             created_at=SENT_AT + timedelta(minutes=5))
+        levi = UserResponse(phone_number="+972502222222", question_key="button_response",
+                            created_at=SENT_AT + timedelta(hours=2))
+        walk_in = UserResponse(phone_number="+972503333333", question_key="button_response")
+        db.add_all([cohen, levi, walk_in])
+        db.flush()
+        db.add_all([
+            SentTemplate(message_sid="SM1", phone_number=cohen.phone_number, template_sid="HXinvite", sent_at=SENT_AT),
+            SentTemplate(message_sid="SM2", phone_number=levi.phone_number, template_sid="HXinvite", sent_at=SENT_AT),
+            SentTemplate(message_sid="SM3", phone_number=levi.phone_number, template_sid="HXreminder",
+                         sent_at=SENT_AT + timedelta(hours=1)),
+            RsvpGuest(user_response_id=cohen.id, name="Dana", attending=True, dietary_restrictions="Vegan"),
+            RsvpGuest(user_response_id=cohen.id, name="Yossi", attending=True,
+                      dietary_restrictions="vegan; gluten free"),
+            RsvpGuest(user_response_id=levi.id, name="Noa", attending=False, dietary_restrictions=""),
+            RsvpGuest(user_response_id=walk_in.id, name="Walk-in", attending=True),
+        ])
+        db.commit()
+    return factory
+
+
+def test_normalize_dietary():
+    """Entries are split, trimmed, case-folded and deduplicated."""
+    assert normalize_dietary(" Gluten  Free, vegan;VEGAN ") == ("gluten free", "vegan")
+    assert normalize_dietary(None) == ()
+
+
+def test_summary(session_factory):
+    """Attendance, parties by phone, dietary facets and latency from the first send."""
+    analytics = GuestAnalytics(initial_capacity=2)
+    with session_factory() as db:
+        analytics.refresh(db, settle_seconds=0)
+    summary = analytics.summary()
+
+    assert summary["attendance"] == {
+        "guests": 4, "attending": 3, "not_attending": 1, "attendance_rate": 75.0,
+    }
+    assert summary["headcount"] == {
+        "parties": 3, "attending_parties": 2, "mean_party_size": 1.33, "party_sizes": {"1": 2, "2": 1},
+    }
+    assert summary["dietary"] == {
+        "vegan": {"guests": 2, "attending": 2},
+        "gluten free": {"guests": 1, "attending": 1},
+    }
+    latency = summary["response_latency"]
+    assert latency["count"] == 2
+    assert latency["p50_seconds"] == (300 + 7200) / 2
+    assert [bucket["count"] for bucket in latency["histogram"]] == [0, 1, 0, 1, 0, 0, 0]
+
+
+def test_refresh_is_incremental(session_factory):
+    """Only changed and deleted guests are read again."""
+    analytics = GuestAnalytics()
+    with session_factory() as db:
+        assert analytics.refresh(db, settle_seconds=0)["upserted"] == 4
+        assert analytics.refresh(db, settle_seconds=0)["upserted"] == 0
+
+        noa = db.query(RsvpGuest).filter_by(name="Noa").one()
+        noa.attending = True
+        noa.updated_at = datetime.utcnow()
+        db.delete(db.query(RsvpGuest).filter_by(name="Walk-in").one())
+        db.commit()
+
+        assert analytics.refresh(db, settle_seconds=0) == {"upserted": 1, "removed": 1, "timings": 0}
+    summary = analytics.summary()
+    assert summary["attendance"]["guests"] == 3
+    assert summary["attendance"]["attending"] == 3
+    assert summary["headcount"]["party_sizes"] == {"1": 1, "2": 1}
+
+
+def test_admin_endpoints(session_factory):
+    """The admin endpoints refresh and rebuild the process-wide engine."""
+    from backend.api.endpoints.admin import router as admin_router
+    from backend.db.session import get_read_db
+    from backend.services.guest_analytics import reset_guest_analytics
+
+    def override_get_read_db():
+        with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(admin_router, prefix="/admin")
+    app.dependency_overrides[get_read_db] = override_get_read_db
+    client = TestClient(app)
+    reset_guest_analytics()
+    try:
+        assert client.get("/admin/analytics/guests").json()["attendance"]["guests"] == 4
+        status = client.post("/admin/analytics/guests/rebuild").json()
+        assert status["guests"] == 4 and status["refreshes"] == 1
+    finally:
+        reset_guest_analytics()
@@ -0,0 +1,120 @@
+"""
+Tests for the bitmap guest facet index.
+"""
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.services.guest_facets import GuestFacetIndex, guest_facet_index
+from backend.services.guest_search_index import IndexedGuest
+
+NOW = datetime.utcnow()
+
+
+def _guest(guest_id, attending, dietary, phone, days_ago=0):
+    updated_at = NOW - timedelta(days=days_ago)
+    return IndexedGuest(guest_id, f"Guest {guest_id}", attending, dietary, phone, updated_at, updated_at)
+
+
+def _index():
+    index = GuestFacetIndex()
+    index.load([
+        _guest(1, True, "Vegan", "+972501111111"),
+        _guest(2, True, "vegan, gluten free", "+972501111111", days_ago=3),
+        _guest(3, False, None, "+972502222222", days_ago=10),
+        _guest(4, None, "Kosher", "+972503333333", days_ago=90),
+    ])
+    return index
+
+
+def test_counts_without_filters():
+    """Every facet value is counted over all guests."""
+    result = _index().query({}, limit=10)
+
+    assert result["total"] == 4
+    assert result["ids"] == [1, 2, 3, 4]
+    assert result["counts"] == {
+        "status": {"attending": 2, "not_attending": 1, "unknown": 1},
+        "headcount": {"2": 2, "1": 2},
+        "dietary": {"vegan": 2, "gluten free": 1, "none": 1, "kosher": 1},
+        "last_interaction": {"today": 1, "7d": 1, "30d": 1, "older": 1},
+    }
+
+
+def test_filters_intersect_facets_and_union_values():
+    """Values of a facet are alternatives; facets narrow each other."""
+    index = _index()
+    result = index.query({"status": ["attending"], "dietary": ["vegan", "kosher"]}, limit=10)
+    assert result["ids"] == [1, 2]
+    # Status counts ignore the status filter, dietary counts the dietary one
+    assert result["counts"]["status"] == {"attending": 2, "unknown": 1}
+    assert result["counts"]["dietary"] == {"vegan": 2, "gluten free": 1}
+
+    result = index.query({"last_interaction": ["7d", "30d"]}, limit=1, offset=1)
+    assert result["total"] == 2
+    assert result["ids"] == [3]
+
+
+def test_incremental_updates_move_party_members():
+    """Upserts and removals update every bitmap, including the party's headcount."""
+    index = _index()
+    index.upsert(_guest(5, True, "", "+972502222222"))
+    assert index.query({"headcount": ["2"]}, limit=10)["ids"] == [1, 2, 3, 5]
+
+    index.upsert(_guest(3, True, "vegetarian", "+972502222222", days_ago=10))
+    result = index.query({"status": ["not_attending"]}, limit=10)
+    assert result["total"] == 0
+    assert index.query({"dietary": ["vegetarian"]}, limit=10)["ids"] == [3]
+
+    index.remove(1)
+    index.remove(3)
+    result = index.query({}, limit=10)
+    assert result["ids"] == [2, 4, 5]
+    assert result["counts"]["headcount"] == {"1": 3}
+    assert result["counts"]["dietary"] == {"vegan": 1, "gluten free": 1, "none": 1, "kosher": 1}
+
+    # Freed ordinals are reused
+    index.upsert(_guest(6, False, None, None))
+    assert index.query({"status": ["not_attending"]}, limit=10)["ids"] == [6]
+    assert len(index) == 4
+
+
+def test_writes_during_load_are_replayed():
+    """A write made while the snapshot is loading wins over the snapshot."""
+    index = GuestFacetIndex()
+
+    def rows():
+        yield _guest(1, True, None, "+972501111111")
+        yield _guest(2, True, None, "+972502222222")
+        index.upsert(_guest(1, False, None, "+972501111111"))
+        index.remove(2)
+
+    index.load(rows())
+    assert index.query({}, limit=10)["counts"]["status"] == {"not_attending": 1}
+
+
+def test_facets_endpoint():
+    """The endpoint passes repeated parameters as alternatives and 503s until loaded."""
+    from backend.api.endpoints.rsvp import router as rsvp_router
+    from backend.core.exception_handlers import register_exception_handlers
+
+    app = FastAPI()
+    register_exception_handlers(app)
+    app.include_router(rsvp_router, prefix="/rsvp")
+    client = TestClient(app)
+
+    guest_facet_index.clear()
+    try:
+        assert client.get("/rsvp/guests/facets").status_code == 503
+        guest_facet_index.load([
+            _guest(1, True, "Vegan", "+972501111111"),
+            _guest(2, False, "Kosher", "+972502222222"),
+        ])
+        response = client.get("/rsvp/guests/facets", params=[("dietary", "VEGAN"), ("dietary", "kosher")])
+        assert response.status_code == 200
+        assert response.json()["ids"] == [1, 2]
+        response = client.get("/rsvp/guests/facets", params={"status": "attending"})
+        assert response.json()["total"] == 1
+    finally:
+        guest_facet_index.clear()
@@ -0,0 +1,110 @@
+"""
+Tests for guest list import parsing and normalization.
+"""
+import csv
+import io
+
+import pytest
+
+from backend.services.guest_import_service import (
+    normalize_phone_number,
+    prepare_rows,
+    read_csv_rows,
+    read_xlsx_rows,
+    ImportResult,
+    GuestImportError,
+    STAGING_COLUMNS,
+    _CopyStream,
+)
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("+972506228892", "+972506228892"),
+    ("050-622-8892", "+972506228892"),
+    ("972 50 622 8892", "+972506228892"),
+    ("00972506228892", "+972506228892"),
+    (506228892, "+972506228892"),
+    (972506228892.0, "+972506228892"),
+    ("+1 (415) 555-1234", "+14155551234"),
+    ("12345", None),
+    ("", None),
+    (None, None),
+])
+def test_normalize_phone_number(raw, expected):
+    """Phone numbers are normalized to E.164."""
+    assert normalize_phone_number(raw) == expected
+
+
+def test_prepare_rows_rejects_invalid_rows():
+    """Rows with bad phones or counts are rejected and reported."""
+    data = "שם,טלפון,מספר אורחים\nנועה,050-1234567,2\nבלי טלפון,,1\nדניאל,0527654321,many\n,,\n"
+    result = ImportResult()
+    rows = list(prepare_rows(read_csv_rows(io.BytesIO(data.encode("utf-8"))), result))
+
+    assert [row["phone_number"] for row in rows] == ["+972501234567"]
+    assert rows[0]["name"] == "נועה"
+    assert rows[0]["num_guests"] == 2
+    assert result.rejected == 2
+    assert result.errors[0].startswith("line 3")
+
+
+def test_prepare_rows_reports_duplicate_phones():
+    """The last line of a phone is imported; earlier lines are rejected as duplicates."""
+    data = "name,phone\nNoa,050-1234567\nDani,0527654321\nNoa Cohen,+972501234567\n"
+    result = ImportResult()
+    rows = list(prepare_rows(read_csv_rows(io.BytesIO(data.encode("utf-8"))), result))
+
+    assert [row["line_no"] for row in rows] == [2, 3, 4]
+    assert result.rejected == 1
+    assert result.errors == ["line 2: duplicate phone number +972501234567 (line 4 is imported)"]
+
+
+def test_prepare_rows_requires_phone_column():
+    """A guest list without a phone column fails before any row is read."""
+    with pytest.raises(GuestImportError):
+        prepare_rows([["name", "email"], ["Eyal", "e@example.com"]], ImportResult())
+
+
+def test_unreadable_files_are_import_errors():
+    """Files that cannot be decoded are reported as import errors, not server errors."""
+    latin1 = "name,phone\nNoé,0501234567\n".encode("latin-1")
+    with pytest.raises(GuestImportError, match="UTF-8"):
+        list(read_csv_rows(io.BytesIO(latin1)))
+
+    # A bad line past the first decoded block fails while COPY pulls rows
+    data = b"name,phone\n" + b"Noa,0501234567\n" * 1000 + b"\xe9,1\n"
+    rows = prepare_rows(read_csv_rows(io.BytesIO(data)), ImportResult())
+    stream = _CopyStream(rows)
+    with pytest.raises(GuestImportError):
+        stream.read()
+    assert isinstance(stream.error, GuestImportError)
+
+
+def test_corrupt_xlsx_is_an_import_error():
+    """A file that is not a workbook is an import error."""
+    pytest.importorskip("openpyxl")
+    with pytest.raises(GuestImportError, match="XLSX"):
+        list(read_xlsx_rows(io.BytesIO(b"not a workbook")))
+
+
+def test_copy_stream_renders_csv_in_small_reads():
+    """The COPY stream yields valid CSV regardless of read size."""
+    rows = [
+        {"line_no": 2, "phone_number": "+972501234567", "name": 'Cohen, "Dani"', "email": None,
+         "num_guests": 3, "dietary_restrictions": None, "notes": "line\nbreak"},
+        {"line_no": 3, "phone_number": "+972527654321", "name": "Noa", "email": None,
+         "num_guests": None, "dietary_restrictions": "vegan", "notes": None},
+    ]
+    stream = _CopyStream(rows)
+    chunks = []
+    while True:
+        chunk = stream.read(7)
+        if not chunk:
+            break
+        chunks.append(chunk)
+
+    parsed = list(csv.reader(io.StringIO("".join(chunks))))
+    assert len(parsed) == 2
+    assert parsed[0][STAGING_COLUMNS.index("name")] == 'Cohen, "Dani"'
+    assert parsed[0][STAGING_COLUMNS.index("notes")] == "line\nbreak"
+    assert parsed[1][STAGING_COLUMNS.index("dietary_restrictions")] == "vegan"
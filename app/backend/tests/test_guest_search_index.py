@@ -0,0 +1,82 @@
+"""
+Tests for the in-memory guest search index.
+"""
+from backend.services.guest_search_index import (
+    GuestSearchIndex,
+    IndexedGuest,
+    normalize_search_text,
+)
+
+
+def _guest(guest_id, name, phone):
+    return IndexedGuest(guest_id, name, True, None, phone, None, None)
+
+
+def _names(results):
+    return [guest.name for guest in results]
+
+
+def _index():
+    index = GuestSearchIndex()
+    index.load([
+        _guest(1, "נועה כהן", "+972501111111"),
+        _guest(2, "Daniel Friedman", "+972522222222"),
+        _guest(3, "Maya Levi", "+972533333333"),
+    ])
+    return index
+
+
+def test_normalize_search_text():
+    """Niqqud, final letters, case and punctuation are folded away."""
+    assert normalize_search_text("נוֹעָה כֹּהֵן!") == "נועה כהנ"
+    assert normalize_search_text("  Daniel-FRIEDMAN 🎉 ") == "daniel friedman"
+    assert normalize_search_text(None) == ""
+
+
+def test_search_by_name_prefix_typo_and_niqqud():
+    """Names match by prefix, with typos, and regardless of niqqud or final letters."""
+    index = _index()
+    assert index.ready
+    assert _names(index.search("dan", 10)) == ["Daniel Friedman"]
+    assert _names(index.search("Fridman", 10)) == ["Daniel Friedman"]
+    assert _names(index.search("כֹּהֵן", 10)) == ["נועה כהן"]
+    assert _names(index.search("כהנ", 10)) == ["נועה כהן"]
+    assert index.search("zzz", 10) == []
+
+
+def test_search_by_partial_phone():
+    """Phones match by any run of digits, in local or international form."""
+    index = _index()
+    assert _names(index.search("052-222", 10)) == ["Daniel Friedman"]
+    assert _names(index.search("+97253333", 10)) == ["Maya Levi"]
+
+
+def test_incremental_updates():
+    """Upserts replace the indexed name and removals drop the guest."""
+    index = _index()
+    index.upsert(_guest(3, "Maya Cohen", "+972533333333"))
+    assert index.search("levi", 10) == []
+    assert _names(index.search("cohen", 10)) == ["Maya Cohen"]
+
+    index.upsert({"id": 4, "name": "Ariel Cohen", "phone_number": "+972544444444"})
+    assert _names(index.search("cohen", 1)) == ["Ariel Cohen"]
+
+    index.remove(3)
+    assert _names(index.search("cohen", 10)) == ["Ariel Cohen"]
+    assert len(index) == 3
+
+
+def test_writes_during_load_are_replayed():
+    """A write made while the snapshot is loading wins over the snapshot."""
+    index = GuestSearchIndex()
+
+    def rows():
+        yield _guest(1, "Old Name", "+972501111111")
+        yield _guest(2, "Removed", "+972522222222")
+        index.upsert(_guest(1, "New Name", "+972501111111"))
+        index.remove(2)
+
+    assert not index.tracking
+    index.load(rows())
+    assert _names(index.search("name", 10)) == ["New Name"]
+    assert index.search("removed", 10) == []
@@ -0,0 +1,123 @@
+"""
+Tests for the memory-mapped guest snapshot.
+"""
+import json
+import os
+import time
+
+import pytest
+
+from backend.services.guest_snapshot import (
+    GuestSnapshot, GuestSnapshotRefresher, SnapshotGuest, write_guest_snapshot
+)
+
+GUESTS = [
+    ("+972502222222", "declined", 0, "Noa Cohen"),
+    ("+972501111111", "confirmed", 3, "דנה לוי"),
+    ("+972503333333", None, None, None),
+]
+STATS = {"total_guests": 3, "attending_guests": 1}
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "guests.snapshot")
+
+
+def test_lookup_by_phone(path):
+    """Guests are found by phone number with their status, count and name."""
+    assert write_guest_snapshot(path, GUESTS, STATS) == 3
+    snapshot = GuestSnapshot(check_interval=0)
+    snapshot.attach(path)
+
+    assert snapshot.lookup("+972501111111") == SnapshotGuest("+972501111111", "confirmed", 3, "דנה לוי")
+    assert snapshot.lookup("+972502222222").rsvp_status == "declined"
+    assert snapshot.lookup("+972503333333") == SnapshotGuest("+972503333333", None, 0, None)
+    assert snapshot.lookup("+972509999999") is None
+    assert snapshot.status()["guests"] == 3
+
+
+def test_stats_with_etag(path):
+    """Statistics come back serialized, with an ETag, and can be aged out."""
+    write_guest_snapshot(path, GUESTS, STATS)
+    snapshot = GuestSnapshot(check_interval=0)
+    snapshot.attach(path)
+
+    stats = snapshot.stats()
+    assert json.loads(stats.body) == STATS
+    assert stats.etag.startswith('"')
+    assert snapshot.stats(max_age=-1) is None
+
+
+def test_stale_snapshot_is_not_served(path):
+    """Lookups, like statistics, ignore a snapshot older than max_age."""
+    write_guest_snapshot(path, GUESTS, STATS)
+    snapshot = GuestSnapshot(check_interval=0)
+    snapshot.attach(path)
+
+    assert snapshot.fresh(max_age=60)
+    assert snapshot.lookup("+972501111111", max_age=60) is not None
+    assert not snapshot.fresh(max_age=-1)
+    assert snapshot.lookup("+972501111111", max_age=-1) is None
+
+
+def test_swapped_file_is_remapped(path):
+    """A new snapshot replaces the file atomically and readers pick it up."""
+    write_guest_snapshot(path, GUESTS, STATS)
+    snapshot = GuestSnapshot(check_interval=0)
+    snapshot.attach(path)
+    old_etag = snapshot.stats().etag
+
+    write_guest_snapshot(path, [("+972501111111", "declined", 0, "דנה לוי")], {"total_guests": 1})
+
+    assert snapshot.lookup("+972501111111").rsvp_status == "declined"
+    assert snapshot.lookup("+972502222222") is None
+    assert snapshot.stats().etag != old_etag
+    assert [name for name in os.listdir(os.path.dirname(path)) if name.startswith(".snapshot-")] == []
+
+
+def test_missing_or_invalid_file_is_unavailable(path):
+    """Without a valid file the reader reports unavailable."""
+    snapshot = GuestSnapshot(check_interval=0)
+    assert not snapshot.available
+    snapshot.attach(path)
+    assert not snapshot.available
+
+    with open(path, "wb") as f:
+        f.write(b"not a snapshot")
+    assert not snapshot.available
+    assert snapshot.lookup("+972501111111") is None
+
+
+def test_only_one_refresher_per_path(path):
+    """The first refresher takes the lock; others only read."""
+    first = GuestSnapshotRefresher(source=lambda: (GUESTS, STATS))
+    second = GuestSnapshotRefresher(source=lambda: (GUESTS, STATS))
+    try:
+        assert first.start(path, interval=60)
+        assert not second.start(path, interval=60)
+        assert first.running and not second.running
+        first.refresh()
+        assert os.path.exists(path)
+    finally:
+        first.stop()
+    assert second.start(path, interval=60)
+    second.stop()
+
+
+def test_standby_takes_over_when_refresher_stops(path):
+    """A standby process retries the lock and refreshes once the refresher is gone."""
+    first = GuestSnapshotRefresher(source=lambda: (GUESTS, STATS))
+    second = GuestSnapshotRefresher(source=lambda: (GUESTS, STATS), lock_retry_interval=0.01)
+    try:
+        assert first.start(path, interval=60)
+        assert not second.start(path, interval=60)
+        first.stop()
+        deadline = time.monotonic() + 5
+        while second.refreshes == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert second.running
+        assert second.refreshes == 1
+    finally:
+        first.stop()
+        second.stop()
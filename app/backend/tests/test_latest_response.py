@@ -0,0 +1,104 @@
+"""
+Tests for latest-response lookups and the per-phone LRU cache.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.backend.db.models import Base, UserResponse, RsvpGuest, get_guest_by_phone
+from backend.services.latest_response_cache import PhoneLRUCache
+
+
+@pytest.fixture
+def db():
+    """In-memory SQLite session with the ORM schema."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def test_get_guest_by_phone_is_one_statement(db):
+    """The guest of the latest response is fetched with a single query."""
+    now = datetime(2024, 5, 1)
+    older = UserResponse(phone_number="+972501111111", question_key="button_response", created_at=now)
+    newer = UserResponse(
+        phone_number="+972501111111", question_key="numeric_response", created_at=now + timedelta(minutes=1)
+    )
+    db.add_all([older, newer])
+    db.flush()
+    db.add_all([
+        RsvpGuest(user_response_id=older.id, name="Old", attending=False),
+        RsvpGuest(user_response_id=newer.id, name="New", attending=True),
+    ])
+    db.commit()
+
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    assert get_guest_by_phone(db, "+972501111111").name == "New"
+    assert len(statements) == 1
+    assert get_guest_by_phone(db, "+972509999999") is None
+
+
+def test_get_guest_by_phone_without_guest_on_latest_response(db):
+    """A latest response without a guest does not fall back to an older one."""
+    now = datetime(2024, 5, 1)
+    older = UserResponse(phone_number="+972501111111", question_key="button_response", created_at=now)
+    db.add(older)
+    db.flush()
+    db.add(RsvpGuest(user_response_id=older.id, name="Old", attending=False))
+    db.add(UserResponse(
+        phone_number="+972501111111", question_key="greeting", created_at=now + timedelta(minutes=1)
+    ))
+    db.commit()
+
+    assert get_guest_by_phone(db, "+972501111111") is None
+
+
+def test_cache_evicts_least_recently_used():
+    """The least recently used phone is dropped when the cache is full."""
+    cache = PhoneLRUCache(maxsize=2, ttl_seconds=60)
+    cache.put("a", {"id": 1})
+    cache.put("b", {"id": 2})
+    assert cache.get("a") == {"id": 1}
+    cache.put("c", {"id": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"id": 1}
+    assert cache.get("c") == {"id": 3}
+    assert cache.stats()["hits"] == 3
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_write_through_replaces_entry():
+    """Putting a newer response replaces the cached one."""
+    cache = PhoneLRUCache(maxsize=10, ttl_seconds=60)
+    cache.put("a", {"id": 1})
+    cache.put("a", {"id": 2})
+    assert cache.get("a") == {"id": 2}
+    assert len(cache) == 1
+
+    cache.invalidate("a")
+    assert cache.get("a") is None
+
+
+def test_cache_keeps_newer_response():
+    """An older response put after a newer one does not replace it."""
+    cache = PhoneLRUCache(maxsize=10, ttl_seconds=60)
+    newer = {"id": 2, "created_at": datetime(2025, 4, 2)}
+    assert cache.put_newer("a", newer, "created_at")
+    assert not cache.put_newer("a", {"id": 1, "created_at": datetime(2025, 4, 1)}, "created_at")
+    assert cache.get("a") == newer
+    assert cache.put_newer("a", {"id": 3, "created_at": datetime(2025, 4, 3)}, "created_at")
+    assert cache.get("a")["id"] == 3
+
+
+def test_cache_entries_expire():
+    """Entries older than the TTL are misses."""
+    cache = PhoneLRUCache(maxsize=10, ttl_seconds=0)
+    cache.put("a", {"id": 1})
+    assert cache.get("a") is None
+    assert len(cache) == 0
@@ -0,0 +1,123 @@
+"""
+Tests for the message type backfill.
+
+The backfill test needs a migrated PostgreSQL database given as TEST_PRIMARY_URI.
+"""
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from backend.services.message_backfill import (
+    MessageTypeBackfill,
+    _init_worker,
+    _reclassify_in_worker,
+    reclassify,
+    throttle_delay,
+)
+from backend.services.message_classifier import DEFAULT_RULES_PATH, message_classifier
+
+ROWS = [
+    ("1", "message_general", "מתי מתחילה החופה"),
+    ("2", "message_greeting", "שלום"),
+    ("3", "message_question", "תודה רבה"),
+    ("4", "message_MessageType.GENERAL", "hello"),
+    ("5", "message_general", None),
+    ("6", "message_MessageType.MEDIA", "שאלה"),
+    ("7", "message_media", None),
+]
+
+
+def test_reclassify_returns_changed_rows():
+    """Only text rows whose label differs from the current rules are returned; media rows are kept."""
+    assert reclassify(message_classifier, ROWS) == [
+        ("1", "message_general", "message_question"),
+        ("3", "message_question", "message_general"),
+        ("4", "message_MessageType.GENERAL", "message_greeting"),
+    ]
+
+
+def test_pool_workers_classify_like_this_process():
+    """Workers compile the same rules file and return the same changes."""
+    with ProcessPoolExecutor(max_workers=2, initializer=_init_worker, initargs=(DEFAULT_RULES_PATH,)) as pool:
+        parts = list(pool.map(_reclassify_in_worker, [ROWS[:2], ROWS[2:]]))
+    assert [change for part in parts for change in part] == reclassify(message_classifier, ROWS)
+
+
+def test_throttle_and_settings():
+    """The job sleeps three times its work at a 25% duty cycle and rejects bad settings."""
+    assert throttle_delay(0.2, 0.25) == pytest.approx(0.6)
+    assert throttle_delay(0.2, 1.0) == 0
+    engine = create_engine("sqlite://")
+    with pytest.raises(ValueError):
+        MessageTypeBackfill(engine, duty_cycle=0)
+    with pytest.raises(ValueError):
+        MessageTypeBackfill(engine, batch_size=0)
+
+
+@pytest.mark.skipif(
+    not os.environ.get("TEST_PRIMARY_URI"),
+    reason="needs TEST_PRIMARY_URI (a migrated PostgreSQL database)"
+)
+def test_postgres_backfill_dry_run_and_resume():
+    """A dry run writes nothing; a run relabels in batches and resumes from its checkpoint."""
+    from sqlalchemy import text
+
+    engine = create_engine(os.environ["TEST_PRIMARY_URI"], poolclass=NullPool)
+    name = f"test-{uuid.uuid4()}"
+    # Consecutive uuids at the top of the key space, so the run starting
+    # just before them sees only these rows
+    prefix = f"ffffffff-ffff-ffff-ffff-{uuid.uuid4().hex[:6]}"
+    start_id = f"{prefix}000000"
+    rows = [
+        ("message_general", "איפה האולם"),
+        ("message_question", "מזל טוב"),
+        ("message_general", "תודה"),
+        ("message_media", "שאלה"),
+        ("message_MessageType.MEDIA", "שאלה"),
+    ]
+    ids = [f"{prefix}{number:06x}" for number in range(1, len(rows) + 1)]
+    with engine.begin() as connection:
+        for row_id, (response_type, body) in zip(ids, rows):
+            connection.execute(text(
+                "INSERT INTO user_responses (id, phone_number, response_type, response_data) "
+                "VALUES (CAST(:id AS uuid), '+972500000001', :response_type, CAST(:data AS jsonb))"
+            ), {"id": row_id, "response_type": response_type, "data": f'{{"body": "{body}"}}'})
+
+    def stored_types():
+        with engine.connect() as connection:
+            return connection.execute(text(
+                "SELECT response_type FROM user_responses WHERE id = ANY(CAST(:ids AS uuid[])) ORDER BY id"
+            ), {"ids": ids}).scalars().all()
+
+    try:
+        def backfill(**kwargs):
+            return MessageTypeBackfill(engine, chunk_size=2, batch_size=1, duty_cycle=1.0, name=name, **kwargs)
+
+        dry_run = backfill(dry_run=True).run(start_id=start_id)
+        assert dry_run.to_dict()["transitions"] == {
+            "message_general -> message_question": 1, "message_question -> message_general": 1,
+        }
+        assert stored_types() == [
+            "message_general", "message_question", "message_general", "message_media", "message_MessageType.MEDIA",
+        ]
+
+        progress = backfill(workers=2).run(start_id=start_id)
+        assert progress.changed == 2
+        assert progress.last_id == ids[2]
+        assert stored_types() == [
+            "message_question", "message_general", "message_general", "message_media", "message_MessageType.MEDIA",
+        ]
+
+        resumed = backfill().run()
+        assert resumed.last_id >= progress.last_id
+        assert resumed.changed == 2
+    finally:
+        with engine.begin() as connection:
+            connection.execute(
+                text("DELETE FROM user_responses WHERE id = ANY(CAST(:ids AS uuid[]))"), {"ids": ids}
+            )
+            connection.execute(text("DELETE FROM backfill_checkpoints WHERE name = :name"), {"name": name})
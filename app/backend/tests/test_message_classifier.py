@@ -0,0 +1,72 @@
+"""
+Tests for the shared rule-based message classifier.
+"""
+import pytest
+
+from backend.services.message_classifier import (
+    RULE_TYPES, MessageClassifier, message_classifier, normalize_message_text
+)
+from backend.services.webhook_service import MessageCategorizer, MessageType, WhatsAppMessage
+
+
+def _message(body, num_media="0", button_text="", button_payload=""):
+    return WhatsAppMessage(
+        message_sid="SM1", from_number="+972501111111", to_number="+972509999999",
+        profile_name="Noa", body=body, num_media=num_media, status="received", wa_id="972501111111",
+        button_text=button_text, button_payload=button_payload
+    )
+
+
+def test_normalize_message_text():
+    """Niqqud and case are folded; compatibility forms are unified."""
+    assert normalize_message_text("שָׁלוֹם") == "שלום"
+    assert normalize_message_text("ＨＥＬＬＯ؟") == "hello?"
+    assert normalize_message_text(None) == ""
+
+
+@pytest.mark.parametrize("body, expected", [
+    ("שלום", "greeting"),
+    ("שָׁלוֹם 👋", "greeting"),
+    ("Hi!", "greeting"),
+    ("hi?", "question"),
+    ("hello there", "general"),
+    ("האם יש חניה באולם?", "question"),
+    ("ומתי צריך להגיע", "question"),
+    ("כמה אנשים אפשר להביא", "question"),
+    ("תודה רבה מהמשפחה", "general"),
+    ("3", "numeric"),
+    (" 2 ", "numeric"),
+    ("0", "general"),
+    ("²", "general"),
+    ("", "general"),
+])
+def test_classify_text(body, expected):
+    """Greetings, questions and numeric answers in Hebrew and English."""
+    assert message_classifier.classify(body) == expected
+
+
+def test_buttons_and_media_come_before_the_text():
+    """Button replies win over everything, media over the text rules."""
+    categorizer = MessageCategorizer()
+    assert categorizer.categorize(_message("שלום", button_text="כן, אגיע!", button_payload="1")) == MessageType.BUTTON
+    assert categorizer.categorize(_message("שלום", num_media="1")) == MessageType.MEDIA
+    assert categorizer.categorize(_message("7", num_media="1")) == MessageType.NUMERIC
+
+
+def test_rules_are_data():
+    """The first matching rule wins; bad rules are rejected."""
+    classifier = MessageClassifier({"rules": [
+        {"type": "greeting", "match": "word", "phrases": ["תודה", "thanks"]},
+        {"type": "question", "match": "contains", "phrases": ["?"]},
+    ]})
+    assert classifier.classify("תודה, מתי?") == "greeting"
+    assert classifier.classify("מתי?") == "question"
+    with pytest.raises(ValueError):
+        MessageClassifier({"rules": [{"type": "question", "match": "fuzzy", "phrases": ["a"]}]})
+
+
+def test_rule_types_are_message_types():
+    """A rule type the webhook cannot represent fails when the rules are compiled."""
+    assert RULE_TYPES <= {message_type.value for message_type in MessageType}
+    with pytest.raises(ValueError, match="thanks"):
+        MessageClassifier({"rules": [{"type": "thanks", "match": "word", "phrases": ["תודה"]}]})
@@ -0,0 +1,120 @@
+"""
+Tests for the reply routing table and its hot reload.
+"""
+import json
+import time
+
+import pytest
+
+from backend.services.reply_routes import ReplyRouter, ReplyRouteTable, merge_routes, reply_router
+from backend.services.webhook_service import WhatsAppMessage
+
+APPROVE = {"name": "approve", "category": "button", "payload": "1", "text": "כן, אגיע!",
+           "template_sid": "HXapprove", "response": {"response_type": "approve"}}
+NUMERIC = {"name": "numeric", "category": "numeric", "template_sid": "HXnumeric",
+           "response": {"response_type": "numeric", "numeric_value": "{body}"},
+           "variables": {"1": "{profile_name}", "2": "https://rsvp.link/{phone_suffix}"}}
+
+
+def _message(body="", button_text="", button_payload=""):
+    return WhatsAppMessage(
+        message_sid="SM1", from_number="+972501111111", to_number="+972509999999",
+        profile_name="Noa", body=body, num_media="0", status="received", wa_id="972501111111",
+        button_text=button_text, button_payload=button_payload
+    )
+
+
+class RecordingSender:
+    """Records send_template calls instead of calling Twilio."""
+
+    def __init__(self):
+        self.sent = []
+
+    def send_template(self, message, template_sid, additional_data=None, content_variables=None):
+        self.sent.append((template_sid, additional_data, content_variables))
+        return {"status": "response_processed", **additional_data}
+
+
+def test_bundled_routes_cover_both_pipelines():
+    """The bundled file routes the three buttons, numeric answers, greetings and questions."""
+    table = reply_router.table
+    assert table.lookup("button", "2", "לצערי לא").template_sid == "HX4b154aac4a81de7cebb4cb42fbd837a9"
+    assert table.lookup("numeric", "", "").template_sid == "HXf67e92a3d1ed68775b925abc2dd1d325"
+    assert table.lookup("greeting").name == "greeting"
+    assert table.lookup("button", "2", "כן, אגיע!") is None
+    assert table.lookup("general") is None
+
+
+def test_lookup_ignores_fields_a_category_does_not_key_on():
+    """Numeric routes match any payload and text; button routes need both."""
+    table = ReplyRouteTable([APPROVE, NUMERIC])
+    assert table.lookup("numeric", "7", "anything").name == "numeric"
+    assert table.lookup("button", "1", "כן, אגיע!").name == "approve"
+    assert table.lookup("button", "1", "") is None
+
+
+def test_route_builds_response_and_variables():
+    """Placeholders are filled from the message; the body is stripped."""
+    sender = RecordingSender()
+    route = ReplyRouteTable([NUMERIC]).lookup("numeric")
+    result = route.send(sender, _message(body=" 3 "))
+    assert result["numeric_value"] == "3"
+    assert sender.sent == [("HXnumeric", {"response_type": "numeric", "numeric_value": "3"},
+                            {"1": "Noa", "2": "https://rsvp.link/1111"})]
+
+
+@pytest.mark.parametrize("routes", [
+    [APPROVE, APPROVE],
+    [APPROVE, {**APPROVE, "text": ""}],
+    [{**NUMERIC, "response": {"value": "{message}"}}],
+    [{"name": "no-template", "category": "greeting"}],
+])
+def test_invalid_tables_are_rejected(routes):
+    """Duplicate keys, mixed key fields, unknown placeholders and missing templates fail to load."""
+    with pytest.raises(ValueError):
+        ReplyRouteTable(routes)
+
+
+def test_database_rows_override_file_routes():
+    """A row with a file route's key replaces it; other rows are added."""
+    merged = merge_routes([APPROVE, NUMERIC], [
+        {**APPROVE, "template_sid": "HXapprove2"},
+        {"name": "decline", "category": "button", "payload": "2", "text": "לצערי לא", "template_sid": "HXdecline"},
+    ])
+    table = ReplyRouteTable(merged)
+    assert len(table) == 3
+    assert table.lookup("button", "1", "כן, אגיע!").template_sid == "HXapprove2"
+
+
+def test_reload_swaps_tables_and_keeps_the_old_one_on_errors(tmp_path):
+    """A request holding the old table keeps it; a broken file is not swapped in."""
+    path = tmp_path / "routes.json"
+    path.write_text(json.dumps({"routes": [APPROVE]}), encoding="utf-8")
+    router = ReplyRouter(str(path))
+    in_flight = router.table
+
+    path.write_text(json.dumps({"routes": [{**APPROVE, "template_sid": "HXnew"}]}), encoding="utf-8")
+    assert router.reload()
+    assert router.dispatch("button", _message(button_text="כן, אגיע!", button_payload="1")).template_sid == "HXnew"
+    assert in_flight.lookup("button", "1", "כן, אגיע!").template_sid == "HXapprove"
+
+    path.write_text("{not json", encoding="utf-8")
+    assert not router.reload()
+    assert router.table.lookup("button", "1", "כן, אגיע!").template_sid == "HXnew"
+    assert router.status()["failures"] == 1
+
+
+def test_watcher_reloads_on_file_change(tmp_path):
+    """The watcher thread picks up a rewritten file."""
+    path = tmp_path / "routes.json"
+    path.write_text(json.dumps({"routes": [NUMERIC]}), encoding="utf-8")
+    router = ReplyRouter(str(path))
+    router.start(interval=0.01)
+    try:
+        path.write_text(json.dumps({"routes": [{**NUMERIC, "template_sid": "HXnumeric-v2"}]}), encoding="utf-8")
+        deadline = time.monotonic() + 5
+        while router.table.lookup("numeric").template_sid != "HXnumeric-v2" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert router.table.lookup("numeric").template_sid == "HXnumeric-v2"
+    finally:
+        router.stop()
@@ -0,0 +1,162 @@
+"""
+Tests for the analytics endpoints served from the hourly rollups.
+
+The refresh test needs a migrated PostgreSQL database given as TEST_PRIMARY_URI.
+"""
+import os
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.backend.db.models import Base, ResponseRollupHourly, TemplateSendRollupHourly
+from backend.api.endpoints.analytics import router as analytics_router
+from backend.core.exception_handlers import register_exception_handlers
+from backend.db.session import get_async_read_db
+
+INVITE = "HXinvite"
+REMINDER = "HXreminder"
+
+
+@pytest.fixture
+def client(tmp_path):
+    """Analytics router on a SQLite database with a day of rollups."""
+    database_path = tmp_path / "rollups.db"
+    engine = create_engine(f"sqlite:///{database_path}", poolclass=NullPool)
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        db.add_all([
+            TemplateSendRollupHourly(bucket_start=datetime(2025, 4, 1, 9), template_sid=INVITE, sent=100),
+            TemplateSendRollupHourly(bucket_start=datetime(2025, 4, 1, 12), template_sid=REMINDER, sent=20),
+            ResponseRollupHourly(
+                bucket_start=datetime(2025, 4, 1, 9), response_type="button", button_payload="1",
+                template_sid=INVITE, responses=30, answered_sends=30, answer_seconds_sum=30 * 600.0
+            ),
+            ResponseRollupHourly(
+                bucket_start=datetime(2025, 4, 1, 11), response_type="button", button_payload="2",
+                template_sid=INVITE, responses=10, answered_sends=10, answer_seconds_sum=10 * 7200.0
+            ),
+            ResponseRollupHourly(
+                bucket_start=datetime(2025, 4, 1, 11), response_type="button", button_payload="1",
+                template_sid=INVITE, responses=5, answered_sends=5, answer_seconds_sum=5 * 7200.0
+            ),
+            ResponseRollupHourly(
+                bucket_start=datetime(2025, 4, 1, 13), response_type="button", button_payload="3",
+                template_sid=REMINDER, responses=4, answered_sends=4, answer_seconds_sum=4 * 60.0
+            ),
+            ResponseRollupHourly(
+                bucket_start=datetime(2025, 4, 1, 13), response_type="message_question",
+                responses=7
+            ),
+        ])
+        db.commit()
+
+    session_factory = async_sessionmaker(
+        create_async_engine(f"sqlite+aiosqlite:///{database_path}", poolclass=NullPool)
+    )
+
+    async def override_get_async_db():
+        async with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    register_exception_handlers(app)
+    app.include_router(analytics_router, prefix="/analytics")
+    app.dependency_overrides[get_async_read_db] = override_get_async_db
+    return TestClient(app)
+
+
+def test_time_series_has_a_point_per_hour(client):
+    """Confirmations per hour since the blast, with empty hours filled in."""
+    points = client.get("/analytics/responses/timeseries", params={
+        "start": "2025-04-01T09:00:00", "end": "2025-04-01T13:00:00",
+        "response_type": "button", "button_payload": "1",
+    }).json()
+
+    assert [point["responses"] for point in points] == [30, 0, 5, 0]
+    assert points[0]["bucket_start"] == "2025-04-01T09:00:00"
+    assert points[0]["avg_answer_seconds"] == 600.0
+    assert points[1]["avg_answer_seconds"] is None
+
+
+def test_time_series_rejects_bad_ranges(client):
+    """Empty, inverted or overly long ranges are rejected."""
+    response = client.get("/analytics/responses/timeseries", params={
+        "start": "2025-04-02T00:00:00", "end": "2025-04-01T00:00:00",
+    })
+    assert response.status_code == 400
+    response = client.get("/analytics/responses/timeseries", params={
+        "start": "2020-01-01T00:00:00", "end": "2025-01-01T00:00:00",
+    })
+    assert response.status_code == 400
+
+
+def test_funnel_from_rollups(client):
+    """Sends, answers and RSVP statuses, overall and per template."""
+    funnel = client.get("/analytics/funnel").json()
+
+    assert funnel["sent"] == 120
+    assert funnel["answered"] == 49
+    assert funnel["rsvp"] == {"confirmed": 35, "declined": 10, "pending": 4}
+    assert funnel["by_response_type"] == {"button": 49, "message_question": 7}
+    assert funnel["responses"] == 56
+    invite, reminder = funnel["templates"]
+    assert invite == {
+        "template_sid": INVITE, "sent": 100, "answered": 45,
+        "avg_answer_seconds": round((30 * 600 + 15 * 7200) / 45, 1),
+    }
+    assert reminder["template_sid"] == REMINDER and reminder["answered"] == 4
+
+
+def test_funnel_for_one_template_and_range(client):
+    """Filters narrow the funnel to a template and a time range."""
+    funnel = client.get("/analytics/funnel", params={
+        "template_sid": INVITE, "start": "2025-04-01T10:00:00",
+    }).json()
+
+    assert funnel["sent"] == 0
+    assert funnel["answered"] == 15
+    assert funnel["answer_rate"] is None
+    assert funnel["rsvp"] == {"confirmed": 5, "declined": 10, "pending": 0}
+
+
+@pytest.mark.skipif(
+    not os.environ.get("TEST_PRIMARY_URI"),
+    reason="needs TEST_PRIMARY_URI (a migrated PostgreSQL database)"
+)
+def test_postgres_refresh_recounts_recent_hours():
+    """A refresh counts new rows once, however often the recent hours are recounted."""
+    from sqlalchemy import text
+
+    from backend.services.response_rollups import refresh_rollups
+
+    engine = create_engine(os.environ["TEST_PRIMARY_URI"], poolclass=NullPool)
+    with sessionmaker(bind=engine)() as db:
+        refresh_rollups(db)
+        before = db.execute(text("SELECT COALESCE(sum(sent), 0) FROM template_send_rollups_hourly")).scalar()
+        message_sid = db.execute(text(
+            "INSERT INTO sent_templates (message_sid, phone_number, template_sid) "
+            "VALUES ('SMrolluptest' || gen_random_uuid(), '+972500000000', 'HXrolluptest') "
+            "RETURNING message_sid"
+        )).scalar_one()
+        for _ in range(2):
+            db.execute(text(
+                "INSERT INTO user_responses (phone_number, response_type, response_data) "
+                "VALUES ('+972500000000', 'button', "
+                "jsonb_build_object('button_payload', '1', 'replied_to_sid', CAST(:sid AS text)))"
+            ), {"sid": message_sid})
+        db.commit()
+        refresh_rollups(db)
+        refresh_rollups(db)
+        after = db.execute(text("SELECT COALESCE(sum(sent), 0) FROM template_send_rollups_hourly")).scalar()
+        assert after == before + 1
+        answered = db.execute(text(
+            "SELECT sum(responses), sum(answered_sends) FROM response_rollups_hourly "
+            "WHERE template_sid = 'HXrolluptest'"
+        )).one()
+        assert tuple(answered) == (2, 1)
@@ -0,0 +1,170 @@
+"""
+Tests for the RSVP server-sent events broadcaster.
+"""
+import asyncio
+import json
+
+from backend.services.rsvp_events import RsvpEventBroadcaster
+
+
+class FakeDatabase:
+    """Statistics and guest rows served to the broadcaster."""
+
+    def __init__(self):
+        self.stats = {"total_guests": 2, "attending_guests": 1}
+        self.guests = {1: {"id": 1, "name": "Dana Levi"}, 2: {"id": 2, "name": "Noa Cohen"}}
+        self.reads = []
+
+    def read_changes(self, guest_ids):
+        self.reads.append(list(guest_ids))
+        return dict(self.stats), [self.guests[guest_id] for guest_id in guest_ids if guest_id in self.guests]
+
+
+def parse(chunk):
+    """Decode one encoded event into (id, event, data)."""
+    fields = dict(line.split(": ", 1) for line in chunk.decode("utf-8").strip().split("\n"))
+    return fields.get("id"), fields.get("event"), json.loads(fields["data"]) if "data" in fields else None
+
+
+async def next_event(stream):
+    """The next event of a stream, skipping the retry field and keep-alives."""
+    while True:
+        chunk = await asyncio.wait_for(stream.__anext__(), 1)
+        if not chunk.startswith((b"retry:", b":")):
+            return parse(chunk)
+
+
+def test_stream_starts_with_full_statistics():
+    """A new subscriber gets every statistics field first."""
+    async def scenario():
+        broadcaster = RsvpEventBroadcaster(read_changes=FakeDatabase().read_changes)
+        stream = broadcaster.subscribe()
+        first = await next_event(stream)
+        await stream.aclose()
+        return broadcaster, first
+
+    broadcaster, (event_id, event, data) = asyncio.run(scenario())
+    assert event == "stats"
+    assert data == {"total_guests": 2, "attending_guests": 1}
+    assert event_id.startswith(broadcaster.worker_id)
+    assert broadcaster.subscribers == 0
+
+
+def test_changes_fan_out_as_deltas():
+    """One read per batch; every subscriber gets the changed fields and rows."""
+    async def scenario():
+        database = FakeDatabase()
+        broadcaster = RsvpEventBroadcaster(read_changes=database.read_changes)
+        streams = [broadcaster.subscribe(), broadcaster.subscribe()]
+        for stream in streams:
+            await next_event(stream)
+
+        database.stats["attending_guests"] = 2
+        del database.guests[2]
+        broadcaster.publish([1, 2])
+        broadcaster.publish([1])
+        received = [[await next_event(stream) for _ in range(3)] for stream in streams]
+        for stream in streams:
+            await stream.aclose()
+        return database, received
+
+    database, received = asyncio.run(scenario())
+    assert received[0] == received[1]
+    assert [(event, data) for _, event, data in received[0]] == [
+        ("stats", {"attending_guests": 2}),
+        ("guest", {"id": 1, "name": "Dana Levi"}),
+        ("delete", {"id": 2}),
+    ]
+    assert database.reads == [[], [1, 2]]
+
+
+def test_resume_replays_missed_events():
+    """Last-Event-ID from this worker replays; an unknown one gets a reset."""
+    async def scenario():
+        database = FakeDatabase()
+        broadcaster = RsvpEventBroadcaster(read_changes=database.read_changes)
+        watcher = broadcaster.subscribe()
+        last_id, _, _ = await next_event(watcher)
+
+        broadcaster.publish([2])
+        missed = await next_event(watcher)
+        resumed = broadcaster.subscribe(last_id)
+        replayed = await next_event(resumed)
+
+        foreign = broadcaster.subscribe("another-worker-12")
+        reset = [await next_event(foreign) for _ in range(2)]
+        for stream in (watcher, resumed, foreign):
+            await stream.aclose()
+        return missed, replayed, reset
+
+    missed, replayed, reset = asyncio.run(scenario())
+    assert replayed == missed
+    assert [event for _, event, _ in reset] == ["reset", "stats"]
+
+
+def test_changes_without_subscribers_prevent_resume():
+    """Changes nobody saw are not in the history, so old ids get a reset."""
+    async def scenario():
+        broadcaster = RsvpEventBroadcaster(read_changes=FakeDatabase().read_changes)
+        stream = broadcaster.subscribe()
+        last_id, _, _ = await next_event(stream)
+        await stream.aclose()
+
+        broadcaster.publish([1])
+        resumed = broadcaster.subscribe(last_id)
+        event = await next_event(resumed)
+        await resumed.aclose()
+        return event
+
+    _, event, _ = asyncio.run(scenario())
+    assert event == "reset"
+
+
+def test_reset_is_broadcast_with_full_statistics():
+    """A change to everything tells clients to reload."""
+    async def scenario():
+        broadcaster = RsvpEventBroadcaster(read_changes=FakeDatabase().read_changes)
+        stream = broadcaster.subscribe()
+        await next_event(stream)
+        broadcaster.publish([1], reset=True)
+        events = [await next_event(stream) for _ in range(2)]
+        await stream.aclose()
+        return events
+
+    events = asyncio.run(scenario())
+    assert [(event, data) for _, event, data in events] == [
+        ("reset", {}),
+        ("stats", {"total_guests": 2, "attending_guests": 1}),
+    ]
+
+
+def test_stalled_subscriber_is_dropped():
+    """A client that stops reading is cut off instead of buffering forever."""
+    async def scenario():
+        database = FakeDatabase()
+        broadcaster = RsvpEventBroadcaster(read_changes=database.read_changes, queue_size=2)
+        stalled = broadcaster.subscribe()
+        await next_event(stalled)
+        for count in range(3, 7):
+            database.stats["total_guests"] = count
+            broadcaster.publish()
+            await asyncio.sleep(0.05)
+        drained = [chunk async for chunk in stalled]
+        return broadcaster, drained
+
+    broadcaster, drained = asyncio.run(scenario())
+    assert len(drained) == 2
+    assert broadcaster.subscribers == 0
+
+
+def test_local_commits_are_skipped_while_notifications_feed_the_worker():
+    """With the listener connected, local commits arrive as notifications instead."""
+    database = FakeDatabase()
+    broadcaster = RsvpEventBroadcaster(read_changes=database.read_changes)
+    broadcaster.set_remote_feed(True)
+    sequence = broadcaster.status()["last_event"]
+    broadcaster.publish_local([1])
+    assert broadcaster.status()["last_event"] == sequence
+    broadcaster.set_remote_feed(False)
+    broadcaster.publish_local([1])
+    assert broadcaster.status()["last_event"] == sequence + 1
@@ -0,0 +1,294 @@
+"""
+Tests for the RSVP guest listing and search endpoints.
+"""
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.backend.db.models import Base, UserResponse, RsvpGuest
+from backend.api.endpoints.rsvp import encode_sync_token, router as rsvp_router
+from backend.core.exception_handlers import register_exception_handlers
+from backend.db import crud
+from backend.db.crud import rsvp_guest_listing_query
+from backend.db.session import get_async_read_db
+from backend.services.guest_search_index import guest_search_index
+from backend.services.guest_snapshot import guest_snapshot, write_guest_snapshot
+from backend.services.stats_cache import rsvp_stats_cache
+
+
+@pytest.fixture
+def database_path(tmp_path):
+    """SQLite database file shared by the sync and async engines."""
+    return tmp_path / "rsvp.db"
+
+
+@pytest.fixture
+def engine(database_path):
+    """SQLite engine seeded with guests from several phones."""
+    engine = create_engine(f"sqlite:///{database_path}", poolclass=NullPool)
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        for i in range(1, 6):
+            db.add(UserResponse(id=i, phone_number=f"+97250000000{i}", question_key="button_response"))
+            db.add(RsvpGuest(
+                user_response_id=i, name=f"Guest_{i}", attending=i % 2 == 0,
+                created_at=datetime(2025, 4, i)
+            ))
+        db.add(RsvpGuest(user_response_id=1, name="נועה 100%", attending=True, created_at=datetime(2025, 4, 10)))
+        db.commit()
+    return engine
+
+
+@pytest.fixture
+def async_engine(engine, database_path):
+    """aiosqlite engine on the seeded database, as used by the API."""
+    return create_async_engine(f"sqlite+aiosqlite:///{database_path}", poolclass=NullPool)
+
+
+@pytest.fixture
+def statements(async_engine):
+    """Collect SQL statements executed by the API."""
+    executed = []
+    event.listen(async_engine.sync_engine, "before_cursor_execute", lambda *args: executed.append(args[2]))
+    return executed
+
+
+@pytest.fixture
+def client(async_engine):
+    """Test client for the RSVP router backed by the async SQLite engine."""
+    session_factory = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    register_exception_handlers(app)
+    app.include_router(rsvp_router, prefix="/rsvp")
+    app.dependency_overrides[get_async_read_db] = override_get_async_db
+    # Statistics cached by a previous test belong to another database
+    rsvp_stats_cache.invalidate()
+    return TestClient(app)
+
+
+def test_list_guests_has_no_per_guest_queries(client, statements):
+    """A page of guests is served by one projected query, with phone numbers joined in."""
+    response = client.get("/rsvp/guests", params={"limit": 3})
+
+    assert response.status_code == 200
+    guests = response.json()
+    assert [guest["name"] for guest in guests] == ["נועה 100%", "Guest_5", "Guest_4"]
+    assert guests[0]["phone_number"] == "+972500000001"
+    # One query for the page, one for the total estimate
+    assert len(statements) == 2
+
+
+def test_cursor_pagination_walks_all_guests(client):
+    """Following X-Next-Cursor visits every guest exactly once, in order."""
+    seen = []
+    response = client.get("/rsvp/guests", params={"limit": 4})
+    assert response.headers["X-Total-Count"] == "6"
+    while True:
+        seen.extend(guest["name"] for guest in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        response = client.get("/rsvp/guests", params={"limit": 4, "cursor": cursor})
+
+    assert seen == ["נועה 100%", "Guest_5", "Guest_4", "Guest_3", "Guest_2", "Guest_1"]
+
+
+def test_skip_limit_pagination_still_supported(client):
+    """The legacy skip/limit parameters keep working."""
+    guests = client.get("/rsvp/guests", params={"skip": 4, "limit": 4}).json()
+    assert [guest["name"] for guest in guests] == ["Guest_2", "Guest_1"]
+
+
+def test_invalid_cursor_is_rejected(client):
+    """A malformed cursor yields a 400 error."""
+    response = client.get("/rsvp/guests", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+    assert response.json()["error"] == "INVALID_CURSOR"
+
+
+def test_search_guests_by_name_and_phone(client, statements):
+    """Search matches partial names (wildcards escaped) and exact phones."""
+    assert [g["name"] for g in client.get("/rsvp/guests/search", params={"query": "100%"}).json()] == ["נועה 100%"]
+    assert client.get("/rsvp/guests/search", params={"query": "Guest%"}).json() == []
+    assert {g["name"] for g in client.get("/rsvp/guests/search", params={"query": "+972500000001"}).json()} == {
+        "Guest_1", "נועה 100%"
+    }
+    assert len(statements) == 3
+
+
+def test_lazy_loading_user_response_raises(engine):
+    """Accidental lazy loads of RsvpGuest.user_response raise."""
+    with sessionmaker(bind=engine)() as db:
+        guest = db.query(RsvpGuest).first()
+        with pytest.raises(InvalidRequestError):
+            guest.user_response
+
+
+def test_search_guests_partial_phone_niqqud_and_limit(client):
+    """Search matches partial phones, ignores niqqud and caps the results."""
+    by_phone = client.get("/rsvp/guests/search", params={"query": "050-0000003"}).json()
+    assert [g["name"] for g in by_phone] == ["Guest_3"]
+
+    with_niqqud = client.get("/rsvp/guests/search", params={"query": "נוֹעָה"}).json()
+    assert [g["name"] for g in with_niqqud] == ["נועה 100%"]
+
+    capped = client.get("/rsvp/guests/search", params={"query": "guest", "limit": 2}).json()
+    assert [g["name"] for g in capped] == ["Guest_1", "Guest_2"]
+
+    assert client.get("/rsvp/guests/search", params={"query": "x", "limit": 1000}).status_code == 422
+
+
+def test_search_served_from_index_when_loaded(engine, client, statements):
+    """Once the in-memory index is loaded, search makes no database queries."""
+    with sessionmaker(bind=engine)() as db:
+        guest_search_index.load(db.execute(rsvp_guest_listing_query()).all())
+    try:
+        statements.clear()
+        results = client.get("/rsvp/guests/search", params={"query": "נוֹעה"}).json()
+        assert [g["name"] for g in results] == ["נועה 100%"]
+        assert results[0]["phone_number"] == "+972500000001"
+        assert statements == []
+    finally:
+        guest_search_index.clear()
+
+
+def test_index_query_reads_guest_phone_on_postgresql():
+    """On PostgreSQL the indexes load the phone the write paths return, rsvp_guests.phone_number."""
+    from sqlalchemy.dialects import postgresql
+
+    sql = str(crud.rsvp_guest_index_query("postgresql").compile(dialect=postgresql.dialect()))
+    assert "rsvp_guests.phone_number" in sql
+    assert "user_responses" not in sql
+    assert crud.rsvp_guest_index_query("sqlite").compare(rsvp_guest_listing_query())
+
+
+def test_stats_endpoint_single_query(client, statements):
+    """Statistics are served by one aggregate query on the async session."""
+    response = client.get("/rsvp/stats")
+
+    assert response.status_code == 200
+    assert response.json()["total_guests"] == 6
+    assert response.json()["total_responses"] == 5
+    assert len(statements) == 1
+
+
+def test_stats_are_cached_with_etag(client, statements):
+    """Repeat requests are served from the cache and revalidated with If-None-Match."""
+    first = client.get("/rsvp/stats")
+    etag = first.headers["ETag"]
+    assert etag.startswith('"') and first.headers["Cache-Control"] == "no-cache"
+
+    statements.clear()
+    second = client.get("/rsvp/stats")
+    assert second.content == first.content
+    assert second.headers["ETag"] == etag
+
+    not_modified = client.get("/rsvp/stats", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["ETag"] == etag
+    assert statements == []
+
+    assert client.get("/rsvp/stats", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_stats_cache_invalidated_by_committed_writes(client, engine, statements):
+    """A committed crud write drops the cached statistics; a rolled back one does not."""
+    etag = client.get("/rsvp/stats").headers["ETag"]
+
+    with sessionmaker(bind=engine)() as db:
+        crud.create_rsvp_guest(db, {"user_response_id": 2, "name": "Late", "attending": True}, commit=False)
+        db.rollback()
+    statements.clear()
+    assert client.get("/rsvp/stats", headers={"If-None-Match": etag}).status_code == 304
+    assert statements == []
+
+    with sessionmaker(bind=engine)() as db:
+        crud.bulk_create_rsvp_guests(db, [{"user_response_id": 2, "name": "Late", "attending": True}])
+        db.commit()
+    response = client.get("/rsvp/stats", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["total_guests"] == 7
+    assert response.headers["ETag"] != etag
+    assert len(statements) == 1
+
+
+def test_stats_served_from_guest_snapshot(client, statements, tmp_path):
+    """With a shared snapshot mapped, statistics are read from it without a query."""
+    path = str(tmp_path / "guests.snapshot")
+    write_guest_snapshot(path, [], {"total_guests": 42})
+    guest_snapshot.attach(path)
+    try:
+        response = client.get("/rsvp/stats")
+        assert response.json() == {"total_guests": 42}
+        assert response.headers["ETag"] == guest_snapshot.stats().etag
+        assert statements == []
+    finally:
+        guest_snapshot.attach(None)
+
+
+def test_guest_summary_served_from_guest_snapshot(client, statements, tmp_path):
+    """A fresh snapshot answers guest lookups, including misses, without a query."""
+    path = str(tmp_path / "guests.snapshot")
+    write_guest_snapshot(path, [("+972500000001", "confirmed", 2, "Guest_1")], {})
+    guest_snapshot.attach(path)
+    try:
+        response = client.get("/rsvp/guests/+972500000001")
+        assert response.json() == {
+            "phone_number": "+972500000001", "rsvp_status": "confirmed", "num_guests": 2, "name": "Guest_1",
+        }
+        assert client.get("/rsvp/guests/+972509999999").status_code == 404
+        assert statements == []
+    finally:
+        guest_snapshot.attach(None)
+
+
+def test_guest_changes_sync(client, engine, monkeypatch):
+    """A full sync, then only updated and deleted guests after the token."""
+    monkeypatch.setattr(crud, "GUEST_SYNC_SETTLE_SECONDS", 0)
+    first = client.get("/rsvp/guests/changes", params={"limit": 4}).json()
+    assert len(first["changed"]) == 4 and first["has_more"]
+    second = client.get("/rsvp/guests/changes", params={"limit": 4, "since": first["next"]}).json()
+    assert len(second["changed"]) == 2 and not second["has_more"]
+    assert {guest["id"] for guest in first["changed"] + second["changed"]} == set(range(1, 7))
+
+    with sessionmaker(bind=engine)() as db:
+        crud.update_rsvp_guest(db, 2, {"name": "Renamed"})
+        crud.delete_rsvp_guest(db, 3)
+    changes = client.get("/rsvp/guests/changes", params={"since": second["next"]}).json()
+    assert [guest["name"] for guest in changes["changed"]] == ["Renamed"]
+    assert changes["deleted"] == [3]
+
+    unchanged = client.get("/rsvp/guests/changes", params={"since": changes["next"]}).json()
+    assert unchanged["changed"] == [] and unchanged["deleted"] == []
+
+
+def test_guest_changes_resend_recent_rows(client):
+    """Rows younger than the settle window are sent again until they settle."""
+    first = client.get("/rsvp/guests/changes").json()
+    again = client.get("/rsvp/guests/changes", params={"since": first["next"]}).json()
+    assert len(first["changed"]) == 6
+    assert again["changed"] == first["changed"]
+
+
+def test_guest_changes_rejects_bad_or_expired_tokens(client):
+    """Malformed tokens are a 400; tokens older than the tombstone log a 410."""
+    assert client.get("/rsvp/guests/changes", params={"since": "garbage"}).status_code == 400
+
+    old = (datetime(2020, 1, 1), None)
+    token = encode_sync_token(old, old)
+    response = client.get("/rsvp/guests/changes", params={"since": token})
+    assert response.status_code == 410
+    assert response.json()["error"] == "SYNC_TOKEN_EXPIRED"
@@ -0,0 +1,63 @@
+"""
+Tests for the single-query RSVP statistics.
+"""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.db.models import Base, UserResponse, RsvpGuest, get_rsvp_statistics
+
+
+@pytest.fixture
+def db():
+    """In-memory SQLite session with the ORM schema."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def _response(db, response_id, phone, day):
+    timestamp = datetime(2025, 4, day)
+    db.add(UserResponse(
+        id=response_id, phone_number=phone, question_key="button_response",
+        created_at=timestamp, updated_at=timestamp
+    ))
+
+
+def _guest(db, response_id, attending):
+    db.add(RsvpGuest(user_response_id=response_id, name="Guest", attending=attending))
+
+
+def test_empty_database(db):
+    """No responses yields all-zero statistics."""
+    stats = get_rsvp_statistics(db)
+    assert stats.total_responses == 0
+    assert stats.total_guests == 0
+    assert stats.attendance_rate == 0.0
+
+
+def test_only_latest_response_per_phone_counts(db):
+    """Guests of superseded responses are ignored."""
+    _response(db, 1, "+972501111111", 1)
+    _response(db, 2, "+972501111111", 2)
+    _response(db, 3, "+972502222222", 1)
+    _response(db, 4, "+972503333333", 1)
+    _guest(db, 1, True)
+    _guest(db, 1, True)
+    _guest(db, 2, False)
+    _guest(db, 3, True)
+    _guest(db, 3, False)
+    db.commit()
+
+    stats = get_rsvp_statistics(db)
+
+    assert stats.total_responses == 3
+    assert stats.attending_count == 1
+    assert stats.not_attending_count == 2
+    assert stats.total_guests == 3
+    assert stats.attending_guests == 1
+    assert stats.not_attending_guests == 2
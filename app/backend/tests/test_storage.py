@@ -0,0 +1,48 @@
+"""
+Tests for DataStorage SQL building helpers.
+"""
+import pytest
+
+from backend.services.storage import (
+    group_rsvp_updates,
+    _rsvp_update_sql,
+    _rsvp_bulk_update_sql,
+)
+
+
+def test_group_rsvp_updates_by_column_set():
+    """Updates are merged per phone and grouped by the columns they change."""
+    groups = group_rsvp_updates([
+        ("+972501111111", {"rsvp_status": "confirmed"}),
+        ("+972502222222", {"rsvp_status": "declined"}),
+        ("+972503333333", {"num_guests": 2, "rsvp_status": "confirmed"}),
+        ("+972502222222", {"rsvp_status": "confirmed"}),
+        ("+972504444444", {}),
+    ])
+
+    assert groups == {
+        ("rsvp_status",): [
+            ("+972501111111", "confirmed"),
+            ("+972502222222", "confirmed"),
+        ],
+        ("num_guests", "rsvp_status"): [
+            ("+972503333333", 2, "confirmed"),
+        ],
+    }
+
+
+def test_group_rsvp_updates_rejects_unknown_columns():
+    """Column names outside the whitelist are rejected."""
+    with pytest.raises(ValueError):
+        group_rsvp_updates([("+972501111111", {"phone_number = NULL; --": "x"})])
+
+
+def test_update_statements_are_cached_per_column_set():
+    """Statement text is built once per column set."""
+    columns = ("dietary_restrictions", "num_guests")
+    assert _rsvp_update_sql(columns) is _rsvp_update_sql(columns)
+    assert _rsvp_bulk_update_sql(columns) is _rsvp_bulk_update_sql(columns)
+
+    bulk_sql = _rsvp_bulk_update_sql(columns)
+    assert "num_guests = v.num_guests::integer" in bulk_sql
+    assert "FROM (VALUES %s) AS v (phone_number, dietary_restrictions, num_guests)" in bulk_sql
@@ -17,6 +17,9 @@ const RsvpStatusPage = () => {
   const [error, setError] = useState(null);
   const [currentPage, setCurrentPage] = useState(1);
   const [searchMode, setSearchMode] = useState(false);
+  // pageCursors[n] is the cursor that loads page n + 1 (page 1 needs none)
+  const [pageCursors, setPageCursors] = useState([null]);
+  const [totalGuests, setTotalGuests] = useState(null);
   
   const guestsPerPage = 10;
   
@@ -35,9 +38,21 @@ const RsvpStatusPage = () => {
   const fetchGuests = async (page = 1) => {
     setLoading(true);
     try {
-      const skip = (page - 1) * guestsPerPage;
-      const response = await axios.get(`/api/v1/rsvp/guests?skip=${skip}&limit=${guestsPerPage}`);
+      const cursors = page === 1 ? [null] : pageCursors;
+      const cursor = cursors[page - 1];
+      const params = { limit: guestsPerPage };
+      if (cursor) {
+        params.cursor = cursor;
+      }
+      const response = await axios.get('/api/v1/rsvp/guests', { params });
       setGuests(response.data);
+      
+      // Remember the cursor for the next page and the estimated total
+      const nextCursors = cursors.slice(0, page);
+      nextCursors[page] = response.headers['x-next-cursor'] || null;
+      setPageCursors(nextCursors);
+      const total = response.headers['x-total-count'];
+      setTotalGuests(total !== undefined ? Number(total) : null);
       setSearchMode(false);
       setError(null);
     } catch (err) {
@@ -71,10 +86,36 @@ const RsvpStatusPage = () => {
   
   // Load initial data
   useEffect(() => {
-    fetchStats();
     fetchGuests();
   }, []);
   
+  // Live updates: statistics and changed guests are pushed by the server
+  useEffect(() => {
+    if (typeof EventSource === 'undefined') {
+      fetchStats();
+      return undefined;
+    }
+    // Reconnects (with Last-Event-ID) are handled by the browser
+    const events = new EventSource('/api/v1/rsvp/events');
+    events.addEventListener('stats', (e) => {
+      const changed = JSON.parse(e.data);
+      setStats((prev) => ({ ...prev, ...changed }));
+    });
+    events.addEventListener('guest', (e) => {
+      const guest = JSON.parse(e.data);
+      setGuests((prev) => prev.map((g) => (g.id === guest.id ? guest : g)));
+    });
+    events.addEventListener('delete', (e) => {
+      const { id } = JSON.parse(e.data);
+      setGuests((prev) => prev.filter((g) => g.id !== id));
+    });
+    events.addEventListener('reset', () => {
+      setCurrentPage(1);
+      fetchGuests(1);
+    });
+    return () => events.close();
+  }, []);
+  
   // Handle pagination
   const handlePageChange = (newPage) => {
     setCurrentPage(newPage);
@@ -90,6 +131,7 @@ const RsvpStatusPage = () => {
   // Reset search
   const handleReset = () => {
     setSearchQuery('');
+    setCurrentPage(1);
     fetchGuests(1);
   };
   
@@ -200,10 +242,13 @@ const RsvpStatusPage = () => {
               >
                 הקודם
               </button>
-              <span className="page-indicator">עמוד {currentPage}</span>
+              <span className="page-indicator">
+                עמוד {currentPage}
+                {totalGuests !== null && ` מתוך ${Math.max(1, Math.ceil(totalGuests / guestsPerPage))}`}
+              </span>
               <button
                 onClick={() => handlePageChange(currentPage + 1)}
-                disabled={guests.length < guestsPerPage}
+                disabled={!pageCursors[currentPage]}
                 className="page-button"
               >
                 הבא